@@ -81,6 +81,19 @@ DM_FULL_MODEL = "gpt-4.1-2025-04-14"                   # Used for complex action
 # --- Model Routing Settings ---
 ENABLE_INTELLIGENT_ROUTING = True                        # Enable/disable action-based model routing
 MAX_VALIDATION_RETRIES = 1                              # Retry with full model after this many validation failures
+SKIP_LOW_RISK_VALIDATION = True                         # Accept low-risk DM responses on local checks (core/validation/validation_policy.py)
+ENABLE_STREAMING_NARRATION = True                       # Show DM narration while the response is generated (core/ai/narration_stream.py)
+COMBAT_LOCAL_RESOLUTION = True                          # Resolve combat dice, damage and saves locally; the model declares and narrates (core/managers/combat_round_engine.py)
+
+# --- Token Budgets (see utils/usage_ledger.py) ---
+# Tokens per game session, keyed by "session" or a subsystem name (dm, actions,
+# predictor, validation, character_updates, plot_updates, combat, summaries, ...).
+# A soft limit logs a warning; at a hard limit further calls raise BudgetExceededError.
+# Report usage with: python -m utils.usage_ledger
+TOKEN_BUDGETS = {
+    # "session": {"soft": 2000000},
+    # "summaries": {"soft": 200000, "hard": 400000},
+}
 
 # --- Web Interface Configuration ---
 WEB_PORT = 8357                                         # Port for the web interface (changed from 5000 for security)
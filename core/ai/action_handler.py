@@ -62,6 +62,7 @@ from utils.module_path_manager import ModulePathManager
 from updates.plot_update import update_plot
 from utils.encoding_utils import sanitize_text, safe_json_dump, safe_json_load
 from utils.file_operations import safe_read_json
+from utils.prompt_encoding import encode_section
 from core.managers.status_manager import (
     status_transitioning_location, status_updating_character, status_updating_party,
     status_updating_plot, status_advancing_time, status_processing_levelup
@@ -359,7 +360,7 @@ Use the EXACT locationId and areaId from the provided data. Do not create new ID
         user_prompt = f"""Analyze this 5th edition adventure module to determine the starting location:
 
 MODULE DATA:
-{json.dumps(module_data, indent=2)}
+{encode_section('module_start', module_data)}
 
 Determine the most logical starting location based on adventure flow, area types, NPCs, and narrative logic."""
 
@@ -1508,12 +1509,11 @@ def move_background_npc(npc_name, context, current_location_hint=None, party_tra
     """
     import json
     import copy
-    import shutil
-    import os
     import time
     import threading
     from datetime import datetime
     from utils.file_operations import safe_write_json, safe_read_json
+    from utils.version_store import version_store
     
     debug(f"STATE_CHANGE: moveBackgroundNPC called for {npc_name}", category="npc_management")
     debug(f"AI_CALL: Context: {context}", category="npc_management")
@@ -1552,10 +1552,9 @@ def move_background_npc(npc_name, context, current_location_hint=None, party_tra
                 print(f"ERROR: Could not load area data from {area_file}")
                 return False
                 
-            # Create backup
-            backup_path = create_area_backup(area_file)
-            if not backup_path:
-                print("WARNING: Could not create backup, proceeding anyway")
+            # Keep the unmodified area in memory; the saved change is recorded
+            # as a patch in the area's version history instead of a file copy
+            original_area_data = copy.deepcopy(area_data)
             
             # Get party NPCs for validation
             party_npcs = party_tracker_data.get("partyNPCs", [])
@@ -1605,18 +1604,15 @@ def move_background_npc(npc_name, context, current_location_hint=None, party_tra
                 # Save updated area data
                 if safe_write_json(area_file, area_data):
                     info(f"SUCCESS: Updated area file {area_file}", category="file_operations")
-                    # Clean up old backups
-                    cleanup_old_area_backups(area_file)
+                    version_store.record(area_file, original_area_data, area_data, reason=f"npc_move {npc_name}")
                     return True
                 else:
                     print(f"ERROR: Failed to save updated area data")
-                    # Restore from backup if save failed
-                    if backup_path and os.path.exists(backup_path):
-                        try:
-                            shutil.copy2(backup_path, area_file)
-                            warning("FILE_OP: Restored area file from backup due to save failure", category="file_operations")
-                        except Exception as e:
-                            print(f"ERROR: Could not restore from backup: {e}")
+                    # Put the unmodified area back if the save failed
+                    if safe_write_json(area_file, original_area_data):
+                        warning("FILE_OP: Restored area file after save failure", category="file_operations")
+                    else:
+                        print(f"ERROR: Could not restore area file {area_file}")
                     return False
             else:
                 print("ERROR: Failed to execute NPC movement decision")
@@ -1969,48 +1965,4 @@ def execute_npc_movement_decision(decision, area_data, location_id, npc_name, pa
         
     except Exception as e:
         error(f"FAILURE: Failed to execute decision: {str(e)}", category="npc_management")
-        return False
-
-def create_area_backup(area_file):
-    """Create timestamped backup of area file"""
-    import shutil
-    import os
-    from datetime import datetime
-    
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{area_file}.backup_npc_move_{timestamp}"
-        shutil.copy2(area_file, backup_name)
-        debug(f"FILE_OP: Created area backup: {os.path.basename(backup_name)}", category="file_operations")
-        return backup_name
-    except Exception as e:
-        error(f"FILE_OP: Could not create area backup: {e}", category="file_operations")
-        return None
-
-def cleanup_old_area_backups(area_file, max_backups=5):
-    """Clean up old area backup files"""
-    import os
-    
-    try:
-        directory = os.path.dirname(area_file)
-        base_name = os.path.basename(area_file)
-        
-        backup_files = []
-        for file in os.listdir(directory):
-            if file.startswith(f"{base_name}.backup_npc_move_") and file.endswith(".json"):
-                backup_path = os.path.join(directory, file)
-                mtime = os.path.getmtime(backup_path)
-                backup_files.append((mtime, backup_path))
-        
-        # Sort by modification time (newest first) and remove old ones
-        backup_files.sort(reverse=True)
-        if len(backup_files) > max_backups:
-            for _, old_backup in backup_files[max_backups:]:
-                try:
-                    os.remove(old_backup)
-                    debug(f"FILE_OP: Removed old backup: {os.path.basename(old_backup)}", category="file_operations")
-                except Exception as e:
-                    warning(f"FILE_OP: Could not remove old backup: {e}", category="file_operations")
-                    
-    except Exception as e:
-        warning(f"FILE_OP: Backup cleanup failed: {e}", category="file_operations")
\ No newline at end of file
+        return False
\ No newline at end of file
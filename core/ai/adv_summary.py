@@ -23,10 +23,11 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from openai import OpenAI
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from config import OPENAI_API_KEY, ADVENTURE_SUMMARY_MODEL
 from utils.module_path_manager import ModulePathManager
 from utils.encoding_utils import sanitize_text, safe_json_load, safe_json_dump
+from utils.schema_registry import schema_registry
 from core.managers.status_manager import status_generating_summary
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
@@ -91,7 +92,7 @@ def get_game_time():
 
 def validate_location_json(location_data, schema):
     try:
-        validate(instance=location_data, schema=schema)
+        schema_registry.validate(location_data, schema)
     except ValidationError as e:
         debug_print(f"Error: Invalid location data structure. {e}")
         sys.exit(1) # Or raise the error to be caught by the caller
@@ -132,7 +133,7 @@ def update_location_json(adventure_summary, location_info, current_area_id_from_
     except Exception as e:
         debug_print(f"Error getting last encounter ID: {str(e)}")
 
-    loca_schema_full = load_json_file("schemas/loca_schema.json") # Load the full schema
+    loca_schema_full = schema_registry.get_schema("loca_schema") # Shared cached schema
     game_time = get_game_time()
 
     # --- DETAILED SCHEMA ACCESS DEBUGGING ---
@@ -454,7 +455,7 @@ Your writing should feel immersive, literary, and grounded—like a historical e
         return None
 
 def update_journal(adventure_summary, party_tracker_data, location_name):
-    journal_schema = load_json_file("schemas/journal_schema.json")
+    journal_schema = schema_registry.get_schema("journal_schema")
     journal_data = {"entries": []} # Default to empty journal
 
     try:
@@ -477,7 +478,7 @@ def update_journal(adventure_summary, party_tracker_data, location_name):
 
     try:
         if journal_schema: # Only validate if schema was loaded
-            validate(instance=journal_data, schema=journal_schema)
+            schema_registry.validate(journal_data, journal_schema)
     except ValidationError as e:
         debug_print(f"Error: Invalid journal entry structure. {e}")
         return # Or handle error, e.g., don't save if invalid
@@ -0,0 +1,334 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Campaign Memory
+
+A small BM25 index over what the campaign remembers: module chronicles in
+modules/campaign_summaries and the location entries of journal.json. Instead
+of pasting every chronicle into the prompt, the context builder asks for the
+passages most relevant to the current location, the NPCs around the party and
+the player's last input, within a fixed token budget. The prompt stays the
+same size whether the campaign has two chronicles or two hundred.
+
+Sources are split into passages of roughly PASSAGE_WORDS words. Term counts
+of each passage are kept in modules/campaign_summaries/campaign_memory_index.json
+together with the mtime and size of the file they came from, so refresh()
+only re-reads chronicles that changed and journal entries that are new.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from utils.encoding_utils import safe_json_load
+from utils.token_estimator import TokenEstimator
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("campaign_memory")
+
+SUMMARIES_DIR = "modules/campaign_summaries"
+JOURNAL_FILE = "journal.json"
+MEMORY_INDEX_FILE = os.path.join(SUMMARIES_DIR, "campaign_memory_index.json")
+INDEX_FORMAT_VERSION = 1
+
+PASSAGE_WORDS = 150
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_TOP_K = 8
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset("""
+    a about after again all also an and any are as at be been before being but by can could did do does
+    for from had has have he her here him his how i if in into is it its just me more most my no not now
+    of on once only or other our out over own same she should so some such than that the their them then
+    there these they this those through to too under until up very was we were what when where which
+    while who whom why will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case terms of a text without stopwords, possessives or one-letter words"""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        word = word.strip("'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        if len(word) > 1 and word not in _STOPWORDS:
+            terms.append(word)
+    return terms
+
+def split_passages(text: str, max_words: int = PASSAGE_WORDS) -> List[str]:
+    """Split text into passages of about max_words words, on paragraph and sentence boundaries"""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph.split()) <= max_words:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(s for s in _SENTENCE_END.split(paragraph) if s)
+
+    passages, current, words = [], [], 0
+    for piece in pieces:
+        piece_words = len(piece.split())
+        if current and words + piece_words > max_words:
+            passages.append(" ".join(current))
+            current, words = [], 0
+        current.append(piece)
+        words += piece_words
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+class CampaignMemory:
+    """Incrementally maintained BM25 index over chronicles and journal entries"""
+
+    def __init__(self, summaries_dir: str = SUMMARIES_DIR, journal_file: str = JOURNAL_FILE,
+                 index_path: Optional[str] = MEMORY_INDEX_FILE):
+        self.summaries_dir = summaries_dir
+        self.journal_file = journal_file
+        self.index_path = index_path
+        self._sources = {}   # source key -> {"stamp": ..., "passages": [passage dicts]}
+        self._loaded = False
+        self._stats = None   # (document frequencies, passage count, average length), built on demand
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> "CampaignMemory":
+        """Bring the index up to date with the files on disk, re-reading only what changed"""
+        if not self._loaded:
+            self._load()
+        changed = False
+        seen = set()
+
+        if os.path.isdir(self.summaries_dir):
+            for entry in os.scandir(self.summaries_dir):
+                if "_summary_" not in entry.name or not entry.name.endswith(".json"):
+                    continue
+                seen.add(entry.name)
+                stamp = _stamp(entry.path)
+                source = self._sources.get(entry.name)
+                if source is not None and source["stamp"] == stamp:
+                    continue
+                self._sources[entry.name] = {"stamp": stamp, "passages": self._chronicle_passages(entry.path)}
+                changed = True
+
+        journal_stamp = _stamp(self.journal_file)
+        journal = self._sources.get(self.journal_file)
+        if journal is not None and journal["stamp"] == journal_stamp:
+            seen.add(self.journal_file)
+        elif journal_stamp is not None:
+            seen.add(self.journal_file)
+            self._sources[self.journal_file] = {
+                "stamp": journal_stamp,
+                "passages": self._journal_passages(journal["passages"] if journal else [])
+            }
+            changed = True
+
+        for key in [k for k in self._sources if k not in seen]:
+            del self._sources[key]
+            changed = True
+
+        if changed:
+            self._stats = None
+            self._save()
+        return self
+
+    def _chronicle_passages(self, path: str) -> List[Dict[str, Any]]:
+        data = safe_json_load(path)
+        if not isinstance(data, dict) or not isinstance(data.get("summary"), str):
+            return []
+        sequence = data.get("sequenceNumber", 1)
+        title = f"{data.get('moduleName', 'Unknown Module')} (Chronicle {sequence:03d})"
+        order = str(data.get("completionDate", ""))
+        debug(f"CAMPAIGN_MEMORY: Indexing chronicle {os.path.basename(path)}", category="campaign_context")
+        return [self._passage("chronicle", title, order, i, text)
+                for i, text in enumerate(split_passages(data["summary"]))]
+
+    def _journal_passages(self, previous: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Passages of journal.json, reusing those of entries that did not change"""
+        data = safe_json_load(self.journal_file)
+        entries = data.get("entries", []) if isinstance(data, dict) else []
+        reusable = {}
+        for passage in previous:
+            reusable.setdefault(passage["entry"], []).append(passage)
+
+        passages, added = [], 0
+        for number, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not isinstance(entry.get("summary"), str):
+                continue
+            digest = hashlib.sha1(entry["summary"].encode("utf-8")).hexdigest()
+            key = f"{number}:{digest}"
+            if key in reusable:
+                passages.extend(reusable[key])
+                continue
+            title = f"Journal: {entry.get('location', 'Unknown')} ({entry.get('date', 'N/A')})"
+            for i, text in enumerate(split_passages(entry["summary"])):
+                passage = self._passage("journal", title, f"journal:{number:06d}", i, text)
+                passage["entry"] = key
+                passages.append(passage)
+            added += 1
+        if added:
+            debug(f"CAMPAIGN_MEMORY: Indexed {added} journal entries", category="campaign_context")
+        return passages
+
+    @staticmethod
+    def _passage(kind: str, title: str, order: str, part: int, text: str) -> Dict[str, Any]:
+        terms = tokenize(f"{title} {text}")
+        return {
+            "kind": kind,
+            "title": title,
+            "order": order,
+            "part": part,
+            "text": text,
+            "length": len(terms),
+            "terms": dict(Counter(terms)),
+            "tokens": TokenEstimator.estimate_tokens_from_text(text)
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        self._loaded = True
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get("version") == INDEX_FORMAT_VERSION and isinstance(payload.get("sources"), dict):
+            self._sources = payload["sources"]
+
+    def _save(self):
+        if not self.index_path:
+            return
+        payload = {"version": INDEX_FORMAT_VERSION, "sources": self._sources}
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            warning(f"FILE_OP: Could not save campaign memory index: {e}", category="campaign_context")
+
+    # ------------------------------------------------------------------
+    # Retrieval
+    # ------------------------------------------------------------------
+
+    def passages(self, kinds: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """All indexed passages, optionally of some kinds only, in campaign order"""
+        result = [p for source in self._sources.values() for p in source["passages"]
+                  if kinds is None or p["kind"] in kinds]
+        return sorted(result, key=lambda p: (p["order"], p["title"], p["part"]))
+
+    def _statistics(self):
+        if self._stats is None:
+            document_frequency = Counter()
+            total_length = count = 0
+            for source in self._sources.values():
+                for passage in source["passages"]:
+                    document_frequency.update(passage["terms"].keys())
+                    total_length += passage["length"]
+                    count += 1
+            self._stats = (document_frequency, count, (total_length / count) if count else 0.0)
+        return self._stats
+
+    def score(self, passage: Dict[str, Any], query_terms: List[str]) -> float:
+        """BM25 score of one passage for a query"""
+        document_frequency, count, average_length = self._statistics()
+        if not count:
+            return 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * passage["length"] / (average_length or 1))
+        total = 0.0
+        for term in set(query_terms):
+            tf = passage["terms"].get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            total += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return total
+
+    def retrieve(self, query: str, token_budget: int = DEFAULT_TOKEN_BUDGET, top_k: int = DEFAULT_TOP_K,
+                 kinds: Optional[tuple] = None, exclude_text: str = "") -> List[Dict[str, Any]]:
+        """
+        Most relevant passages for a query that fit within a token budget
+
+        The opening of the most recent chronicle is always considered first,
+        so the model knows where the previous adventure left off even when the
+        query matches nothing.
+
+        Args:
+            query: Free text: location, NPC names, player input
+            token_budget: Estimated tokens the passages may use in total
+            top_k: Maximum number of passages
+            kinds: Restrict to "chronicle" and/or "journal" passages
+            exclude_text: Text already in the prompt; passages contained in it are skipped
+
+        Returns:
+            Selected passages in campaign order
+        """
+        candidates = [p for p in self.passages(kinds) if not (exclude_text and p["text"][:200] in exclude_text)]
+        if not candidates:
+            return []
+
+        query_terms = tokenize(query or "")
+        ranked = sorted(((self.score(p, query_terms), i) for i, p in enumerate(candidates)), reverse=True)
+        order = [i for score, i in ranked if score > 0]
+        chronicles = [i for i, p in enumerate(candidates) if p["kind"] == "chronicle"]
+        if chronicles:
+            latest = candidates[chronicles[-1]]
+            opening = next(i for i in chronicles if candidates[i]["title"] == latest["title"])
+            order = [opening] + [i for i in order if i != opening]
+
+        selected, used = [], 0
+        for i in order:
+            passage = candidates[i]
+            if used + passage["tokens"] > token_budget:
+                continue
+            selected.append(i)
+            used += passage["tokens"]
+            if len(selected) >= top_k:
+                break
+
+        debug(f"CAMPAIGN_MEMORY: Selected {len(selected)} of {len(candidates)} passages ({used} tokens)",
+              category="campaign_context")
+        return [candidates[i] for i in sorted(selected)]
+
+def format_passages(passages: List[Dict[str, Any]]) -> str:
+    """Group passages under their chronicle or journal heading"""
+    parts, title = [], None
+    for passage in passages:
+        if passage["title"] != title:
+            title = passage["title"]
+            parts.append(f"--- {title} ---")
+        parts.append(passage["text"])
+    return "\n".join(parts)
+
+# Global instance for the campaign in modules/
+campaign_memory = CampaignMemory()
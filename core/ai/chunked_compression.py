@@ -20,57 +20,54 @@ import shutil
 from ..generators.location_summarizer import LocationSummarizer
 from datetime import datetime
 from .chunked_compression_config import COMPRESSION_TRIGGER, CHUNK_SIZE
+from .conversation_index import conversation_index
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
 set_script_name("chunked_compression")
 
+def _chronicle_entry(conversation_data, i):
+    content = conversation_data[i].get('content', '')
+    return {
+        'index': i,
+        'type': 'chronicle',
+        'preview': content[:100] + "..." if len(content) > 100 else content
+    }
+
+def _location_summary_entry(conversation_data, i):
+    content = conversation_data[i].get('content', '')
+    lines = content.split('\n')
+    location_name = "Unknown"
+    for line in lines:
+        if line.strip() and not line.startswith('===') and ':' in line:
+            location_name = line.split(':')[0].strip()
+            break
+    
+    return {
+        'index': i,
+        'location': location_name,
+        'type': 'location',
+        'preview': content[:100] + "..." if len(content) > 100 else content
+    }
+
 def find_all_summaries(conversation_data):
     """Find all location summaries and AI chronicles separately"""
-    location_summaries = []
-    ai_chronicles = []
-    
-    for i, message in enumerate(conversation_data):
-        content = message.get('content', '')
-        if '=== LOCATION SUMMARY ===' in content:
-            # Check if it's an AI chronicle
-            if '[AI-Generated Chronicle Summary]' in content:
-                ai_chronicles.append({
-                    'index': i,
-                    'type': 'chronicle',
-                    'preview': content[:100] + "..." if len(content) > 100 else content
-                })
-            else:
-                # Regular location summary
-                lines = content.split('\n')
-                location_name = "Unknown"
-                for line in lines:
-                    if line.strip() and not line.startswith('===') and ':' in line:
-                        location_name = line.split(':')[0].strip()
-                        break
-                
-                location_summaries.append({
-                    'index': i,
-                    'location': location_name,
-                    'type': 'location',
-                    'preview': content[:100] + "..." if len(content) > 100 else content
-                })
-    
+    index = conversation_index.update(conversation_data)
+    location_summaries = [_location_summary_entry(conversation_data, i) for i in index.positions('location_summary')]
+    ai_chronicles = [_chronicle_entry(conversation_data, i) for i in index.positions('chronicle')]
     return location_summaries, ai_chronicles
 
 def count_summaries_after_last_chronicle(conversation_data):
     """Count location summaries that appear after the last AI chronicle"""
-    location_summaries, ai_chronicles = find_all_summaries(conversation_data)
+    index = conversation_index.update(conversation_data)
     
-    if not ai_chronicles:
-        # No chronicles yet, count all location summaries
-        return len(location_summaries), location_summaries, None
+    # Find the last chronicle; with none yet, all location summaries count
+    last_chronicle_idx = index.last('chronicle')
+    start = 0 if last_chronicle_idx is None else last_chronicle_idx + 1
     
-    # Find the last chronicle
-    last_chronicle_idx = ai_chronicles[-1]['index']
-    
-    # Count location summaries after last chronicle
-    summaries_after_chronicle = [s for s in location_summaries if s['index'] > last_chronicle_idx]
+    # Only the summaries after the last chronicle are parsed
+    summaries_after_chronicle = [_location_summary_entry(conversation_data, i)
+                                 for i in index.between('location_summary', start)]
     
     return len(summaries_after_chronicle), summaries_after_chronicle, last_chronicle_idx
 
@@ -90,15 +87,44 @@ def find_compression_range(conversation_data, summaries_after_chronicle, last_ch
     # If there's a previous chronicle, we need to preserve the location transition after it
     if last_chronicle_idx is not None:
         # Find the location transition message after the last chronicle
-        for i in range(last_chronicle_idx + 1, first_summary_idx):
-            msg = conversation_data[i]
-            if msg.get('role') == 'user' and 'Location transition:' in msg.get('content', ''):
-                # Start compression after this transition
-                first_summary_idx = i + 1
-                break
+        transition_idx = conversation_index.update(conversation_data).first_after('location_transition', last_chronicle_idx)
+        if transition_idx is not None and transition_idx < first_summary_idx:
+            # Start compression after this transition
+            first_summary_idx = transition_idx + 1
     
     return first_summary_idx, last_summary_idx, summaries_to_compress
 
+def find_chronicle_insert_position(conversation_data, first_msg_idx):
+    """Where a chronicle replacing messages from first_msg_idx starts: after a location transition just before the range"""
+    for i in range(first_msg_idx - 1, max(0, first_msg_idx - 5), -1):
+        if conversation_data[i].get('role') == 'user' and 'Location transition:' in conversation_data[i].get('content', ''):
+            return i + 1
+    return first_msg_idx
+
+def summarize_chunk(messages_to_compress, summaries_to_compress):
+    """Generate the AI chronicle for one chunk of location summaries"""
+    summarizer = LocationSummarizer()
+    result = summarizer.summarize_transition_group(
+        start_location=summaries_to_compress[0]['location'],
+        end_location=summaries_to_compress[-1]['location'],
+        messages=messages_to_compress,
+        intermediate_locations=[s['location'] for s in summaries_to_compress[1:-1]]
+    )
+    
+    info("SUCCESS: AI Chronicle Generated!", category="compression")
+    debug(f"COMPRESSION_STATS: Original tokens: {result['original_tokens']:,}", category="compression")
+    debug(f"COMPRESSION_STATS: Summary tokens: {result['summary_tokens']:,}", category="compression")
+    debug(f"COMPRESSION_STATS: Compression ratio: {result['compression_ratio']:.1%}", category="compression")
+    debug(f"COMPRESSION_STATS: Events preserved: {result['events_preserved']}", category="compression")
+    return result
+
+def chronicle_message(result):
+    """Conversation message holding a generated chronicle"""
+    return {
+        "role": "assistant",
+        "content": f"=== LOCATION SUMMARY ===\n\n{result['summary']}"
+    }
+
 def chunked_compression(conversation_file="modules/conversation_history/conversation_history.json"):
     """Perform chunked compression - 8 transitions at a time
     
@@ -119,7 +145,7 @@ def chunked_compression(conversation_file="modules/conversation_history/conversa
     count, summaries_after_chronicle, last_chronicle_idx = count_summaries_after_last_chronicle(conversation_data)
     
     info("COMPRESSION_STATUS: Current state:", category="compression")
-    debug(f"  AI Chronicles found: {len([m for m in conversation_data if '[AI-Generated Chronicle Summary]' in m.get('content', '')])}", category="compression")
+    debug(f"  AI Chronicles found: {conversation_index.update(conversation_data).count('chronicle')}", category="compression")
     debug(f"  Location summaries after last chronicle: {count}", category="compression")
     debug(f"  Compression trigger: {COMPRESSION_TRIGGER} summaries", category="compression")
     debug(f"  Compression size: {CHUNK_SIZE} transitions per chunk", category="compression")
@@ -149,59 +175,15 @@ def chunked_compression(conversation_file="modules/conversation_history/conversa
     messages_to_compress = conversation_data[first_msg_idx:last_msg_idx + 1]
     debug(f"  Total messages in range: {len(messages_to_compress)}", category="compression")
     
-    # Initialize AI summarizer
-    summarizer = LocationSummarizer()
-    
     try:
         # Generate AI chronicle for the 8 transitions
-        result = summarizer.summarize_transition_group(
-            start_location=summaries_to_compress[0]['location'],
-            end_location=summaries_to_compress[-1]['location'],
-            messages=messages_to_compress,
-            intermediate_locations=[s['location'] for s in summaries_to_compress[1:-1]]
-        )
-        
-        info("SUCCESS: AI Chronicle Generated!", category="compression")
-        debug(f"COMPRESSION_STATS: Original tokens: {result['original_tokens']:,}", category="compression")
-        debug(f"COMPRESSION_STATS: Summary tokens: {result['summary_tokens']:,}", category="compression")
-        debug(f"COMPRESSION_STATS: Compression ratio: {result['compression_ratio']:.1%}", category="compression")
-        debug(f"COMPRESSION_STATS: Events preserved: {result['events_preserved']}", category="compression")
+        result = summarize_chunk(messages_to_compress, summaries_to_compress)
         
-        # Create the compressed conversation
+        # Create the compressed conversation, preserving the location
+        # transition before our compression range
         compressed_conversation = conversation_data.copy()
-        
-        # Create AI chronicle message
-        ai_chronicle_message = {
-            "role": "assistant",
-            "content": f"=== LOCATION SUMMARY ===\n\n{result['summary']}"
-        }
-        
-        # Find where to insert the chronicle
-        # We want to preserve the location transition before our compression range
-        insert_position = first_msg_idx
-        
-        # Look backwards for a location transition message
-        for i in range(first_msg_idx - 1, max(0, first_msg_idx - 5), -1):
-            if compressed_conversation[i].get('role') == 'user' and 'Location transition:' in compressed_conversation[i].get('content', ''):
-                # Insert after this transition
-                insert_position = i + 1
-                break
-        
-        # Replace the range with the chronicle
-        # But preserve any location transition at the end
-        end_transition_idx = None
-        for i in range(last_msg_idx + 1, min(len(compressed_conversation), last_msg_idx + 3)):
-            if compressed_conversation[i].get('role') == 'user' and 'Location transition:' in compressed_conversation[i].get('content', ''):
-                end_transition_idx = i
-                break
-        
-        # Perform the replacement
-        if end_transition_idx:
-            # Keep the transition after our range
-            compressed_conversation[insert_position:last_msg_idx + 1] = [ai_chronicle_message]
-        else:
-            # No transition to preserve
-            compressed_conversation[insert_position:last_msg_idx + 1] = [ai_chronicle_message]
+        insert_position = find_chronicle_insert_position(compressed_conversation, first_msg_idx)
+        compressed_conversation[insert_position:last_msg_idx + 1] = [chronicle_message(result)]
         
         # Save files
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
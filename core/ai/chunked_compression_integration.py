@@ -12,6 +12,7 @@ This module adds chunked compression checks after location transitions.
 import json
 import os
 from .chunked_compression import chunked_compression
+from .conversation_index import conversation_index
 from utils.encoding_utils import safe_json_load, safe_json_dump
 from .chunked_compression_config import (
     COMPRESSION_TRIGGER, 
@@ -48,19 +49,10 @@ def check_and_perform_chunked_compression(conversation_file="modules/conversatio
             debug("FILE_CHECK: No conversation history found", category="compression")
             return False
         
-        # Count location summaries
-        location_summary_count = 0
-        last_chronicle_idx = -1
-        
-        for i, msg in enumerate(conversation_history):
-            content = msg.get('content', '')
-            if '=== LOCATION SUMMARY ===' in content:
-                if '[AI-Generated Chronicle Summary]' in content:
-                    last_chronicle_idx = i
-                else:
-                    # Only count summaries after the last chronicle
-                    if i > last_chronicle_idx:
-                        location_summary_count += 1
+        # Count location summaries after the last chronicle
+        index = conversation_index.update(conversation_history)
+        last_chronicle_idx = index.last('chronicle')
+        location_summary_count = index.count('location_summary', 0 if last_chronicle_idx is None else last_chronicle_idx + 1)
         
         debug(f"SUMMARY_COUNT: Found {location_summary_count} location summaries after last chronicle", category="compression")
         
@@ -112,7 +104,7 @@ def check_and_perform_chunked_compression(conversation_file="modules/conversatio
 
 def integrate_with_cumulative_summary():
     """
-    This function should be called at the end of compress_conversation_history_on_transition
-    in cumulative_summary.py to check if chunked compression is needed.
+    Check if chunked compression is needed after a location summary has been
+    added to the conversation history.
     """
     return check_and_perform_chunked_compression()
\ No newline at end of file
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Context Fragment Cache
+
+update_conversation_history rebuilds the system context every turn: the
+system prompt, world state, plot, map, current location and party tracker
+sections. Most of them depend on files that rarely change. Each section is
+cached here under a key describing its inputs (file mtimes and sizes, or a
+hash of in-memory data) and rebuilt only when that key changes.
+
+An unchanged section returns the very same message dict as last time, so
+identity-based indexes over the history (conversation_index) keep their
+prefix across rebuilds.
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Hashable
+
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("context_fragments")
+
+def content_key(data: Any) -> str:
+    """Hash of JSON-serializable data"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class ContextFragmentCache:
+    """Named fragments, each rebuilt only when its input key changes"""
+
+    def __init__(self):
+        self._fragments = {}  # name -> (key, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, key: Callable[[], Hashable], build: Callable[[], Any]) -> Any:
+        """
+        Cached fragment, rebuilt if its inputs changed
+
+        Args:
+            name: Fragment name
+            key: Returns the current input key. It is called again after a
+                rebuild, so a build that writes its own inputs (e.g. campaign
+                data saved while scanning for modules) does not miss next time.
+            build: Builds the fragment
+        """
+        cached = self._fragments.get(name)
+        if cached is not None and cached[0] == key():
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        value = build()
+        self._fragments[name] = (key(), value)
+        debug(f"CONTEXT_CACHE: Rebuilt {name} fragment", category="conversation_management")
+        return value
+
+# Global instance used by update_conversation_history
+context_fragments = ContextFragmentCache()
@@ -0,0 +1,211 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Conversation Message Index
+
+Classifies each message of the main conversation history once and keeps a
+sorted list of positions per tag, so questions like "where is the last
+location transition" or "how many location summaries follow the last
+chronicle" are a bisect instead of a scan with substring tests.
+
+Tags (a message can have several):
+- system, module_context (system message carrying "Current module:")
+- user, assistant, conversation (user or assistant, but not a DM note)
+- dm_note, location_transition, module_transition, module_summary
+- location_summary, chronicle
+
+update() reads only messages it has not seen before. Messages are matched by
+identity, so appends and truncations of the same list are cheap. A history
+freshly loaded from disk is matched against the index saved next to it
+(conversation_history.index.json) by a hash of every message's role and
+content, and is only reclassified if the two differ.
+"""
+
+import hashlib
+import json
+import os
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("conversation_index")
+
+CONVERSATION_INDEX_FILE = "modules/conversation_history/conversation_history.index.json"
+INDEX_FORMAT_VERSION = 2
+
+LOCATION_SUMMARY_MARKER = "=== LOCATION SUMMARY ==="
+CHRONICLE_MARKER = "[AI-Generated Chronicle Summary]"
+
+def classify_message(message: Dict[str, Any]) -> List[str]:
+    """Tags of one message"""
+    role = message.get("role")
+    content = message.get("content", "")
+    if not isinstance(content, str):
+        content = ""
+    tags = []
+
+    if role == "system":
+        tags.append("system")
+        if "Current module:" in content:
+            tags.append("module_context")
+    elif role in ("user", "assistant"):
+        tags.append(role)
+        if role == "user" and "Dungeon Master Note:" in content:
+            tags.append("dm_note")
+        else:
+            tags.append("conversation")
+        if role == "user":
+            if "Location transition:" in content:
+                tags.append("location_transition")
+            if content.startswith("Module transition:"):
+                tags.append("module_transition")
+            if content.startswith("Module summary:"):
+                tags.append("module_summary")
+
+    if LOCATION_SUMMARY_MARKER in content:
+        tags.append("chronicle" if CHRONICLE_MARKER in content else "location_summary")
+    return tags
+
+def history_signature(conversation_history: List[Dict[str, Any]]) -> str:
+    """Hash of the role and content of every message of a history"""
+    digest = hashlib.sha256()
+    for message in conversation_history:
+        digest.update(json.dumps([message.get("role"), message.get("content")], ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class ConversationIndex:
+    """Sorted positional indexes over a conversation history"""
+
+    def __init__(self, index_path: Optional[str] = CONVERSATION_INDEX_FILE):
+        self.index_path = index_path
+        self._messages = []  # messages read so far, in history order
+        self._tags = []      # tags of each message
+        self._positions = {}  # tag -> sorted positions
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def update(self, conversation_history: List[Dict[str, Any]]) -> "ConversationIndex":
+        """Catch up with the history, classifying only messages not seen before"""
+        common = min(len(conversation_history), len(self._messages))
+        while common and conversation_history[common - 1] is not self._messages[common - 1]:
+            common -= 1
+        if common < len(self._messages):
+            self._truncate(common)
+        if common == 0 and conversation_history and self._adopt_saved(conversation_history):
+            return self
+        for message in conversation_history[common:]:
+            self._append(message, classify_message(message))
+        return self
+
+    def _truncate(self, length: int):
+        for tags in self._tags[length:]:
+            for tag in tags:
+                positions = self._positions[tag]
+                positions.pop()
+                if not positions:
+                    del self._positions[tag]
+        del self._messages[length:]
+        del self._tags[length:]
+
+    def _append(self, message: Dict[str, Any], tags: List[str]):
+        position = len(self._messages)
+        for tag in tags:
+            self._positions.setdefault(tag, []).append(position)
+        self._messages.append(message)
+        self._tags.append(tags)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, conversation_history: List[Dict[str, Any]]):
+        """Write the index next to the history it describes"""
+        if not self.index_path:
+            return
+        self.update(conversation_history)
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "count": len(self._messages),
+            "signature": history_signature(conversation_history),
+            "tags": [",".join(tags) for tags in self._tags]
+        }
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            warning(f"FILE_OP: Could not save conversation index: {e}", category="conversation_management")
+
+    def _adopt_saved(self, conversation_history: List[Dict[str, Any]]) -> bool:
+        """Take tags from the saved index if it describes exactly this history"""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (payload.get("version") != INDEX_FORMAT_VERSION
+                or payload.get("count") != len(conversation_history)
+                or payload.get("signature") != history_signature(conversation_history)):
+            return False
+        for message, tags in zip(conversation_history, payload.get("tags", [])):
+            self._append(message, tags.split(",") if tags else [])
+        debug(f"CONVERSATION_INDEX: Loaded saved index for {len(conversation_history)} messages",
+              category="conversation_management")
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def positions(self, tag: str) -> List[int]:
+        """All positions with a tag, in order"""
+        return list(self._positions.get(tag, []))
+
+    def has(self, tag: str) -> bool:
+        return tag in self._positions
+
+    def has_tag(self, position: int, tag: str) -> bool:
+        return 0 <= position < len(self._tags) and tag in self._tags[position]
+
+    def last(self, tag: str, before: Optional[int] = None) -> Optional[int]:
+        """Last position with a tag, optionally strictly before a position"""
+        positions = self._positions.get(tag)
+        if not positions:
+            return None
+        if before is None:
+            return positions[-1]
+        i = bisect_left(positions, before)
+        return positions[i - 1] if i else None
+
+    def first_after(self, tag: str, after: int) -> Optional[int]:
+        """First position with a tag strictly after a position"""
+        positions = self._positions.get(tag, [])
+        i = bisect_right(positions, after)
+        return positions[i] if i < len(positions) else None
+
+    def count(self, tag: str, start: int = 0, end: Optional[int] = None) -> int:
+        """Number of positions with a tag in [start, end)"""
+        positions = self._positions.get(tag, [])
+        hi = len(positions) if end is None else bisect_left(positions, end)
+        return max(0, hi - bisect_left(positions, start))
+
+    def between(self, tag: str, start: int = 0, end: Optional[int] = None) -> List[int]:
+        """Positions with a tag in [start, end)"""
+        positions = self._positions.get(tag, [])
+        hi = len(positions) if end is None else bisect_left(positions, end)
+        return positions[bisect_left(positions, start):hi]
+
+# Global instance for the main conversation history
+conversation_index = ConversationIndex()
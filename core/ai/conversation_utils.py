@@ -81,58 +81,72 @@ import os
 from utils.module_path_manager import ModulePathManager
 from utils.encoding_utils import safe_json_load
 from utils.plot_formatting import format_plot_for_ai
-from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.prompt_encoding import encode_section
+from utils.debug_exports import debug_exporter, ChatHistoryExport
+from utils.file_operations import file_stamp
+from core.ai.conversation_index import conversation_index
+from core.ai.campaign_memory import campaign_memory, format_passages
+from core.ai.context_fragments import context_fragments, content_key
+from utils.enhanced_logger import debug, set_script_name
 
 # Set script name for logging
 set_script_name("conversation_utils")
 
+# Characters of the player's last input used to query campaign memory
+MEMORY_QUERY_INPUT_CHARS = 1000
+
 # ============================================================================
 # CAMPAIGN SUMMARY INJECTION
 # ============================================================================
 
-def inject_campaign_summaries(new_history):
-    """Inject campaign summaries as system messages into conversation history"""
+def build_campaign_memory_query(conversation_history, party_tracker_data, current_location=None):
+    """Text describing the current scene, used to pick relevant campaign memories"""
+    parts = []
+    if party_tracker_data:
+        world_conditions = party_tracker_data.get("worldConditions", {})
+        parts.append(str(world_conditions.get("currentLocation", "")))
+        parts.append(str(world_conditions.get("currentArea", "")))
+        parts.extend(str(npc.get("name", "")) for npc in party_tracker_data.get("partyNPCs", []) if isinstance(npc, dict))
+    if current_location:
+        parts.extend(str(npc.get("name", "")) for npc in current_location.get("npcs", []) if isinstance(npc, dict))
+    for msg in reversed(conversation_history or []):
+        if msg.get("role") == "user" and isinstance(msg.get("content"), str):
+            parts.append(msg["content"][-MEMORY_QUERY_INPUT_CHARS:])
+            break
+    return " ".join(p for p in parts if p)
+
+def inject_campaign_summaries(new_history, conversation_history=None, party_tracker_data=None,
+                              current_location=None, insert_at=None):
+    """
+    Inject relevant campaign memories as one system message
+
+    Chronicles of earlier modules and journal entries are retrieved from the
+    campaign memory index by relevance to the current location, nearby NPCs
+    and the player's last input, within a fixed token budget, so the message
+    does not grow with the length of the campaign.
+    """
     try:
-        summaries_dir = "modules/campaign_summaries"
-        if os.path.exists(summaries_dir):
-            summary_files = [f for f in os.listdir(summaries_dir) if '_summary_' in f and f.endswith('.json')]
-            
-            # Load all summaries with their completion dates for proper chronological sorting
-            summaries_with_dates = []
-            for summary_file in summary_files:
-                try:
-                    summary_path = os.path.join(summaries_dir, summary_file)
-                    summary_data = safe_json_load(summary_path)
-                    if summary_data and "completionDate" in summary_data:
-                        summaries_with_dates.append((summary_data["completionDate"], summary_file, summary_data))
-                except Exception as e:
-                    debug(f"WARNING: Could not load completion date from {summary_file}", exception=e, category="campaign_context")
-            
-            # Sort by completion date (chronological order)
-            summaries_with_dates.sort(key=lambda x: x[0])
-            
-            if summaries_with_dates:
-                for completion_date, summary_file, summary_data in summaries_with_dates:
-                    try:
-                        if summary_data and "summary" in summary_data:
-                            module_name = summary_data.get("moduleName", "Unknown Module")
-                            sequence = summary_data.get("sequenceNumber", 1)
-                            
-                            # Create the full content for this single chronicle
-                            chronicle_content = (
-                                f"=== CAMPAIGN CONTEXT ===\n\n"
-                                f"--- {module_name} (Chronicle {sequence:03d}) ---\n"
-                                f"{summary_data['summary']}"
-                            )
-                            
-                            # Append it as a new, separate system message
-                            new_history.append({"role": "system", "content": chronicle_content})
-                            
-                            debug(f"SUCCESS: Injected chronicle for {module_name} (completed {completion_date}) as a separate system message", category="campaign_context")
-                    except Exception as e:
-                        debug(f"FAILURE: Could not inject summary {summary_file}", exception=e, category="campaign_context")
-            else:
-                debug(f"INFO: No campaign summary files found in {summaries_dir}", category="campaign_context")
+        exclude_text = ""
+        if conversation_history:
+            index = conversation_index.update(conversation_history)
+            exclude_text = "\n".join(
+                conversation_history[i].get("content", "")
+                for i in sorted(index.positions("location_summary") + index.positions("chronicle"))
+            )
+
+        query = build_campaign_memory_query(conversation_history, party_tracker_data, current_location)
+        passages = campaign_memory.refresh().retrieve(query, exclude_text=exclude_text)
+        if not passages:
+            debug("INFO: No campaign memories to inject", category="campaign_context")
+            return
+
+        chronicle_content = f"=== CAMPAIGN CONTEXT ===\n\n{format_passages(passages)}"
+        message = {"role": "system", "content": chronicle_content}
+        if insert_at is None:
+            new_history.append(message)
+        else:
+            new_history.insert(insert_at, message)
+        debug(f"SUCCESS: Injected {len(passages)} campaign memory passages", category="campaign_context")
     except Exception as e:
         debug(f"FAILURE: Error injecting campaign summaries", exception=e, category="campaign_context")
 
@@ -142,12 +156,8 @@ def inject_campaign_summaries(new_history):
 
 def find_last_module_transition_index(conversation_history):
     """Find the index of the last module transition marker"""
-    for i in range(len(conversation_history) - 1, -1, -1):
-        message = conversation_history[i]
-        if (message.get("role") == "user" and 
-            message.get("content", "").startswith("Module transition:")):
-            return i
-    return -1  # No previous module transition found
+    last_index = conversation_index.update(conversation_history).last("module_transition")
+    return -1 if last_index is None else last_index  # -1: no previous module transition found
 
 def find_last_system_message_index(conversation_history):
     """Find the index of the last system message to use as boundary marker"""
@@ -241,38 +251,120 @@ def get_previous_module_from_history(conversation_history):
             return parts[1].strip()
     
     # If no transition found, look for module info in system messages
-    for msg in reversed(conversation_history):
-        if msg.get("role") == "system":
-            content = msg.get("content", "")
-            if "Current module:" in content:
-                # Extract module name from world state context
-                import re
-                match = re.search(r"Current module: ([^\n(]+)", content)
-                if match:
-                    return match.group(1).strip()
+    for i in reversed(conversation_index.update(conversation_history).positions("module_context")):
+        content = conversation_history[i].get("content", "")
+        # Extract module name from world state context
+        import re
+        match = re.search(r"Current module: ([^\n(]+)", content)
+        if match:
+            return match.group(1).strip()
     
     return None
 
-def compress_json_data(data):
-    """Compress JSON data by removing unnecessary whitespace."""
-    return json.dumps(data, separators=(',', ':'))
+# ============================================================================
+# CONTEXT FRAGMENTS
+# ============================================================================
+# Each system section below is cached in context_fragments and rebuilt only
+# when the files or data it is built from change.
+
+SYSTEM_PROMPT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "prompts", "mythic_system_prompt.txt")
+CALENDAR_PROMPT_FILE = "prompts/calendar.txt"
+CAMPAIGN_FILE = "modules/campaign.json"
+PARTY_TRACKER_FILE = "party_tracker.json"
 
-def load_json_data(file_path):
+def _read_system_prompt():
+    with open(SYSTEM_PROMPT_FILE, "r", encoding="utf-8") as file:
+        return file.read().strip()
+
+def _read_calendar_prompt():
+    try:
+        with open(CALENDAR_PROMPT_FILE, "r", encoding="utf-8") as f:
+            return f.read()
+    except:
+        debug("WARNING: Could not load calendar.txt prompt", category="conversation_management")
+        return ""
+
+def _build_world_state_message(party_tracker_data):
+    """World state system message, or None"""
     try:
-        data = safe_json_load(file_path)
-        if data is not None:
-            return compress_json_data(data)
+        from core.managers.campaign_manager import CampaignManager
+        campaign_manager = CampaignManager()
+        available_modules = campaign_manager.campaign_data.get('availableModules', [])
+        
+        # Get current module from actual party_tracker.json file
+        current_module = 'Unknown'
+        try:
+            if os.path.exists(PARTY_TRACKER_FILE):
+                party_data = safe_json_load(PARTY_TRACKER_FILE)
+                if party_data:
+                    current_module = party_data.get('module', 'Unknown')
+        except:
+            # Fallback to parameter if file reading fails
+            current_module = party_tracker_data.get('module', 'Unknown') if party_tracker_data else 'Unknown'
+        
+        world_state_parts = []
+        if available_modules:
+            other_modules = [m for m in available_modules if m != current_module]
+            if other_modules:
+                world_state_parts.append(f"Available modules for travel: {', '.join(other_modules)}")
+                world_state_parts.append(f"To travel to another module, use: 'I travel to [module name]' or similar explicit phrasing")
+            world_state_parts.append(f"Current module: {current_module}")
         else:
-            print(f"{file_path} not found. Returning None.")
-            return None
+            world_state_parts.append(f"Current module: {current_module} (no other modules detected)")
+            
+        # Add hub information if available
+        hubs = campaign_manager.campaign_data.get('hubs', {})
+        if hubs:
+            hub_names = list(hubs.keys())
+            world_state_parts.append(f"Established hubs: {', '.join(hub_names)}")
+            
+        if world_state_parts:
+            world_state_message = "WORLD STATE CONTEXT:\n" + "\n".join(world_state_parts)
+            return {"role": "system", "content": world_state_message}
+            
+    except Exception as e:
+        # Don't let world state errors break the conversation system
+        pass
+    return None
+
+def _build_map_message(map_file):
+    try:
+        map_data = safe_json_load(map_file)
     except json.JSONDecodeError:
-        print(f"{file_path} has an invalid JSON format. Returning None.")
+        print(f"{map_file} has an invalid JSON format. Skipping map data.")
         return None
+    if not map_data:
+        print(f"{map_file} not found. Skipping map data.")
+        return None
+    map_message = "Here's the current map data:\n"
+    map_message += f"{encode_section('map', map_data)}\n"
+    return {"role": "system", "content": map_message}
+
+def _build_location_fragment(area_file, current_location_id):
+    """(current location data, location system message), either may be None"""
+    try:
+        location_data = safe_json_load(area_file)
+        if location_data is None:
+            print(f"{area_file} not found. Skipping location data.")
+    except json.JSONDecodeError:
+        print(f"{area_file} has an invalid JSON format. Skipping location data.")
+        location_data = None
+
+    # Find the relevant location data based on the current location ID
+    if location_data and current_location_id:
+        for location in location_data["locations"]:
+            if location["locationId"] == current_location_id:
+                return location, {
+                    "role": "system",
+                    "content": f"Current Location:\n{encode_section('location', location)}\n"
+                }
+    return None, None
 
 def update_conversation_history(conversation_history, party_tracker_data, plot_data, module_data):
     # Read the actual system prompt to get the proper identifier
-    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "prompts", "mythic_system_prompt.txt"), "r", encoding="utf-8") as file:
-        main_system_prompt_text = file.read().strip()
+    main_system_prompt_text = context_fragments.get(
+        "system_prompt", lambda: file_stamp(SYSTEM_PROMPT_FILE), _read_system_prompt
+    )
     
     # Use the first part of the actual system prompt as identifier
     main_prompt_start = main_system_prompt_text[:50]  # First 50 characters as identifier
@@ -320,125 +412,89 @@ def update_conversation_history(conversation_history, party_tracker_data, plot_d
     # Module transition detection and marker insertion now happens in action_handler.py
     # This section is preserved for any future module transition logic
 
-    # Insert world state information
-    try:
-        from core.managers.campaign_manager import CampaignManager
-        campaign_manager = CampaignManager()
-        available_modules = campaign_manager.campaign_data.get('availableModules', [])
-        
-        # Get current module from actual party_tracker.json file
-        current_module = 'Unknown'
-        party_tracker_file = "party_tracker.json"
-        try:
-            if os.path.exists(party_tracker_file):
-                party_data = safe_json_load(party_tracker_file)
-                if party_data:
-                    current_module = party_data.get('module', 'Unknown')
-        except:
-            # Fallback to parameter if file reading fails
-            current_module = party_tracker_data.get('module', 'Unknown') if party_tracker_data else 'Unknown'
-        
-        world_state_parts = []
-        if available_modules:
-            other_modules = [m for m in available_modules if m != current_module]
-            if other_modules:
-                world_state_parts.append(f"Available modules for travel: {', '.join(other_modules)}")
-                world_state_parts.append(f"To travel to another module, use: 'I travel to [module name]' or similar explicit phrasing")
-            world_state_parts.append(f"Current module: {current_module}")
-        else:
-            world_state_parts.append(f"Current module: {current_module} (no other modules detected)")
-            
-        # Add hub information if available
-        hubs = campaign_manager.campaign_data.get('hubs', {})
-        if hubs:
-            hub_names = list(hubs.keys())
-            world_state_parts.append(f"Established hubs: {', '.join(hub_names)}")
-            
-        if world_state_parts:
-            world_state_message = "WORLD STATE CONTEXT:\n" + "\n".join(world_state_parts)
-            new_history.append({"role": "system", "content": world_state_message})
-            
-    except Exception as e:
-        # Don't let world state errors break the conversation system
-        pass
+    # Insert world state information. Campaign data is only reloaded (and new
+    # modules only scanned for) when campaign.json, the party tracker file or
+    # the modules directory change.
+    world_state_message = context_fragments.get(
+        "world_state",
+        lambda: (file_stamp(CAMPAIGN_FILE), file_stamp(PARTY_TRACKER_FILE), file_stamp("modules")),
+        lambda: _build_world_state_message(party_tracker_data)
+    )
+    if world_state_message:
+        new_history.append(world_state_message)
     
-    # CAMPAIGN SUMMARY INJECTION: Add previous adventure context
-    try:
-        inject_campaign_summaries(new_history)
-    except Exception as e:
-        debug(f"FAILURE: Error injecting campaign summaries", exception=e, category="campaign_context")
+    # CAMPAIGN SUMMARY INJECTION: Added here once the current location is known,
+    # since its NPCs are part of the memory query
+    campaign_context_position = len(new_history)
     
 # Module transition detection now happens before system message removal above
 
     # Insert plot data with new formatting
     if plot_data:
-        formatted_plot = format_plot_for_ai(plot_data)
-        new_history.append({"role": "system", "content": formatted_plot})
+        new_history.append(context_fragments.get(
+            "plot",
+            lambda: content_key(plot_data),
+            lambda: {"role": "system", "content": format_plot_for_ai(plot_data)}
+        ))
 
     # Get the current area and location ID from the party tracker data
     current_area = party_tracker_data["worldConditions"]["currentArea"] if party_tracker_data else None
     current_area_id = party_tracker_data["worldConditions"]["currentAreaId"] if party_tracker_data else None
     current_location_id = party_tracker_data["worldConditions"]["currentLocationId"] if party_tracker_data else None
 
-    # Insert map data
+    current_location = None
+    location_message = None
     if current_area_id:
         # Use current module from party tracker for consistent path resolution
         current_module_name = party_tracker_data.get("module", "").replace(" ", "_") if party_tracker_data else None
         path_manager = ModulePathManager(current_module_name)
+
+        # Insert map data
         map_file = path_manager.get_map_path(current_area_id)
-        map_data = load_json_data(map_file)
-        if map_data:
-            map_message = "Here's the current map data:\n"
-            map_message += f"{map_data}\n"
-            new_history.append({"role": "system", "content": map_message})
+        map_message = context_fragments.get(
+            "map", lambda: (map_file, file_stamp(map_file)), lambda: _build_map_message(map_file)
+        )
+        if map_message:
+            new_history.append(map_message)
 
-    # Load the area-specific JSON file
-    if current_area_id:
-        # Use current module from party tracker for consistent path resolution
-        current_module_name = party_tracker_data.get("module", "").replace(" ", "_") if party_tracker_data else None
-        path_manager = ModulePathManager(current_module_name)
+        # Load the area-specific JSON file and find the current location in it
         area_file = path_manager.get_area_path(current_area_id)
-        try:
-            location_data = safe_json_load(area_file)
-            if location_data is None:
-                print(f"{area_file} not found. Skipping location data.")
-        except json.JSONDecodeError:
-            print(f"{area_file} has an invalid JSON format. Skipping location data.")
-            location_data = None
+        current_location, location_message = context_fragments.get(
+            "location",
+            lambda: (area_file, file_stamp(area_file), current_location_id),
+            lambda: _build_location_fragment(area_file, current_location_id)
+        )
 
-    # Find the relevant location data based on the current location ID
-    current_location = None
-    if location_data and current_location_id:
-        for location in location_data["locations"]:
-            if location["locationId"] == current_location_id:
-                current_location = location
-                break
+    inject_campaign_summaries(new_history, conversation_history, party_tracker_data,
+                              current_location, insert_at=campaign_context_position)
 
     # Insert the most recent location information
-    if current_location:
-        new_history.append({
-            "role": "system",
-            "content": f"Current Location:\n{compress_json_data(current_location)}\n"
-        })
+    if location_message:
+        new_history.append(location_message)
 
     # Add party tracker data with calendar system information
     if party_tracker_data:
         # Load calendar system prompt
-        calendar_info = ""
-        try:
-            with open("prompts/calendar.txt", "r", encoding="utf-8") as f:
-                calendar_info = f.read()
-        except:
-            debug("WARNING: Could not load calendar.txt prompt", category="conversation_management")
-        
-        party_tracker_message = "Here's the updated party tracker data:\n"
-        party_tracker_message += f"Party Tracker Data: {compress_json_data(party_tracker_data)}\n"
+        calendar_info = context_fragments.get(
+            "calendar", lambda: file_stamp(CALENDAR_PROMPT_FILE), _read_calendar_prompt
+        )
         
-        # Add calendar information if available
-        if calendar_info:
-            party_tracker_message += f"\n{calendar_info}\n"
+        def build_party_tracker_message():
+            party_tracker_message = "Here's the updated party tracker data:\n"
+            party_tracker_message += f"Party Tracker Data:\n{encode_section('party_tracker', party_tracker_data)}\n"
+            
+            # Add calendar information if available
+            if calendar_info:
+                party_tracker_message += f"\n{calendar_info}\n"
+            return {"role": "system", "content": party_tracker_message}
         
-        new_history.append({"role": "system", "content": party_tracker_message})
+        # The tracker changes most turns, so its section is keyed by its own data;
+        # reusing the message when nothing changed keeps the history prefix stable
+        new_history.append(context_fragments.get(
+            "party_tracker",
+            lambda: (content_key(party_tracker_data), calendar_info),
+            build_party_tracker_message
+        ))
 
     # Add the rest of the conversation history
     debug(f"STATE_CHANGE: update_conversation_history preserving {len(updated_history)} messages", category="conversation_management")
@@ -598,28 +654,25 @@ NOTES: {npc_data.get('notes', 'None')}
 
     return updated_history
 
+CHAT_HISTORY_FILE = "modules/conversation_history/chat_history.json"
+chat_history_export = ChatHistoryExport(CHAT_HISTORY_FILE)
+
 def generate_chat_history(conversation_history):
-    """Generate a lightweight chat history without system messages"""
-    output_file = "modules/conversation_history/chat_history.json"
+    """Schedule a background refresh of the lightweight chat history (no system messages)"""
+    snapshot = list(conversation_history)
+    debug_exporter.submit(CHAT_HISTORY_FILE, lambda: _write_chat_history(snapshot))
+
+def _write_chat_history(conversation_history):
+    # Filter out system messages and keep only user and assistant messages
+    chat_history = [msg for msg in conversation_history if msg["role"] != "system"]
+    result = chat_history_export.write(chat_history)
     
-    try:
-        # Filter out system messages and keep only user and assistant messages
-        chat_history = [msg for msg in conversation_history if msg["role"] != "system"]
-        
-        # Write the filtered chat history to the output file
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(chat_history, f, indent=2)
-        
-        # Print statistics
-        system_count = len(conversation_history) - len(chat_history)
-        total_count = len(conversation_history)
-        user_count = sum(1 for msg in chat_history if msg["role"] == "user")
-        assistant_count = sum(1 for msg in chat_history if msg["role"] == "assistant")
-        
-        info(f"SUCCESS: Lightweight chat history updated!", category="conversation_history")
-        debug(f"System messages removed: {system_count}", category="conversation_history")
-        debug(f"User messages: {user_count}", category="conversation_history")
-        debug(f"Assistant messages: {assistant_count}", category="conversation_history")
-        
-    except Exception as e:
-        error(f"FAILURE: Error generating chat history: {str(e)}", exception=e, category="conversation_history")
\ No newline at end of file
+    # Print statistics
+    system_count = len(conversation_history) - len(chat_history)
+    user_count = sum(1 for msg in chat_history if msg["role"] == "user")
+    assistant_count = sum(1 for msg in chat_history if msg["role"] == "assistant")
+    
+    debug(f"SUCCESS: Lightweight chat history {result}", category="conversation_history")
+    debug(f"System messages removed: {system_count}", category="conversation_history")
+    debug(f"User messages: {user_count}", category="conversation_history")
+    debug(f"Assistant messages: {assistant_count}", category="conversation_history")
\ No newline at end of file
@@ -57,7 +57,9 @@ from config import OPENAI_API_KEY, ADVENTURE_SUMMARY_MODEL
 from utils.module_path_manager import ModulePathManager
 from utils.file_operations import safe_write_json, safe_read_json
 from utils.encoding_utils import sanitize_text, safe_json_load, safe_json_dump
-from core.managers.status_manager import status_generating_summary, status_updating_journal, status_compressing_history
+from core.managers.status_manager import status_generating_summary, status_updating_journal
+from core.ai.conversation_index import conversation_index
+from core.ai.summary_cache import summary_cache, segment_key
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -220,11 +222,19 @@ def build_location_summaries_from_conversation(conversation_history):
                     "summary": summary
                 })
     
+    debug_print(f"Summary cache: {summary_cache.report()}")
     return summaries
 
-def generate_location_summary(location_name, messages):
-    """Generate a summary for what happened in a specific location"""
-    status_generating_summary()
+def generate_location_summary(location_name, messages, show_status=True):
+    """Generate a summary for what happened in a specific location, reusing the cached one if the segment is unchanged"""
+    cache_key = segment_key(location_name, messages, ADVENTURE_SUMMARY_MODEL)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary:
+        debug_print(f"Using cached summary for {location_name}")
+        return cached_summary
+    
+    if show_status:
+        status_generating_summary()
     debug_print(f"Generating summary for {location_name}")
     
     # Extract conversation content
@@ -279,6 +289,7 @@ Use past tense and third person. Be vivid, specific, and emotional where appropr
         # Sanitize AI response to prevent encoding issues
         summary = sanitize_text(summary)
         debug_print(f"Summary generated for {location_name}")
+        summary_cache.put(cache_key, summary)
         return summary
     except Exception as e:
         debug_print(f"ERROR: Failed to generate summary for {location_name}: {str(e)}")
@@ -344,111 +355,37 @@ def clean_old_summaries_from_conversation(conversation_history):
     
     return cleaned_history
 
-def compress_conversation_history_on_transition(conversation_history, leaving_location_name):
+def find_last_location_segment(conversation_history):
     """
-    Compress conversation history when transitioning out of a location.
-    Creates a summary of the location being left and removes those messages.
-    Uses location transition messages as markers.
-    Returns the compressed conversation history.
+    Find the messages spent at the location left by the most recent transition.
+
+    Returns:
+        (start_marker_index, transition_index): the location's messages lie
+        strictly between the two. start_marker_index is the previous
+        transition or location summary, else a system message, else -1.
+        None if there is no location transition.
     """
-    status_compressing_history()
-    debug_print(f"Compressing conversation history when leaving {leaving_location_name}")
-    debug_print(f"Total messages in history: {len(conversation_history)}")
-    
-    # First clean old summaries
-    conversation_history = clean_old_summaries_from_conversation(conversation_history)
-    
-    # Find the most recent location transition message
-    transition_index = None
-    for i in range(len(conversation_history) - 1, -1, -1):
-        msg = conversation_history[i]
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            transition_index = i
-            debug_print(f"Found transition at index {i}: {msg.get('content', '')}")
-            break
-    
+    index = conversation_index.update(conversation_history)
+    transition_index = index.last("location_transition")
     if transition_index is None:
-        debug_print("No location transition found in conversation history")
-        return conversation_history
-    
-    # Find the previous marker (transition, adventure history, or last system message)
-    previous_marker_index = None
-    
-    # Look backwards from the transition
-    for i in range(transition_index - 1, -1, -1):
-        msg = conversation_history[i]
-        
-        # Stop at previous transition
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            previous_marker_index = i
-            debug_print(f"Found previous transition at index {i}")
-            break
-            
-        # Stop at assistant summary (from previous compression)
-        if msg.get("role") == "assistant" and "=== LOCATION SUMMARY ===" in msg.get("content", ""):
-            previous_marker_index = i
-            debug_print(f"Found previous summary at index {i}")
-            break
-    
-    # If no previous marker found, find the last system message
-    if previous_marker_index is None:
-        for i in range(transition_index - 1, -1, -1):
-            if conversation_history[i].get("role") == "system":
-                previous_marker_index = i
-                debug_print(f"Using last system message at index {i} as start marker")
-    
-    # If still nothing, start from beginning
-    if previous_marker_index is None:
-        previous_marker_index = -1
-    
-    debug_print(f"Collecting messages from index {previous_marker_index + 1} to {transition_index - 1}")
-    
-    # Collect messages to summarize (between markers, excluding the markers themselves)
-    messages_to_summarize = []
-    for i in range(previous_marker_index + 1, transition_index):
-        msg = conversation_history[i]
-        # Include all messages except system messages and error notes
-        if msg.get("role") == "system":
-            continue
-        if msg.get("role") == "user" and msg.get("content", "").startswith("Error Note:"):
-            continue
-        messages_to_summarize.append(msg)
-    
-    debug_print(f"Found {len(messages_to_summarize)} messages to summarize")
-    
-    # Generate summary if we have messages to summarize
-    if len(messages_to_summarize) > 0:
-        summary = generate_location_summary(leaving_location_name, messages_to_summarize)
-        
-        if summary:
-            # Build the new conversation history
-            new_history = []
-            
-            # 1. Keep everything up to and including the previous marker
-            for i in range(0, previous_marker_index + 1):
-                new_history.append(conversation_history[i])
-            
-            # 2. Insert the summary as an assistant message
-            summary_message = {
-                "role": "assistant",
-                "content": f"=== LOCATION SUMMARY ===\n\n{leaving_location_name}:\n{'-' * len(leaving_location_name + ':')}\n{summary}"
-            }
-            new_history.append(summary_message)
-            
-            # 3. Add everything from the transition onwards (including the transition itself)
-            for i in range(transition_index, len(conversation_history)):
-                new_history.append(conversation_history[i])
-            
-            debug_print(f"Compressed history from {len(conversation_history)} to {len(new_history)} messages")
-            debug_print(f"Removed {len(messages_to_summarize)} messages from {leaving_location_name}")
-            
-            return new_history
-        else:
-            debug_print("Failed to generate summary")
-            return conversation_history
-    else:
-        debug_print(f"No messages to summarize for {leaving_location_name}")
-        return conversation_history
+        return None
+    debug_print(f"Found transition at index {transition_index}: {conversation_history[transition_index].get('content', '')}")
+    
+    # Stop at the previous transition or summary (from a previous compression)
+    markers = [index.last(tag, before=transition_index)
+               for tag in ("location_transition", "location_summary", "chronicle")]
+    markers = [i for i in markers if i is not None and conversation_history[i].get("role") in ("user", "assistant")]
+    if markers:
+        previous_marker_index = max(markers)
+        debug_print(f"Found previous marker at index {previous_marker_index}")
+        return previous_marker_index, transition_index
+    
+    # Otherwise start after the earliest system message, or from the beginning
+    first_system = index.first_after("system", -1)
+    if first_system is not None and first_system < transition_index:
+        debug_print(f"Using system message at index {first_system} as start marker")
+        return first_system, transition_index
+    return -1, transition_index
 
 def generate_enhanced_adventure_summary(conversation_history_data, party_tracker_data, leaving_location_name):
     """
@@ -457,49 +394,11 @@ def generate_enhanced_adventure_summary(conversation_history_data, party_tracker
     """
     debug_print(f"Generating enhanced adventure summary for {leaving_location_name}")
     
-    # Find the most recent location transition message
-    transition_index = None
-    for i in range(len(conversation_history_data) - 1, -1, -1):
-        msg = conversation_history_data[i]
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            transition_index = i
-            debug_print(f"Found most recent transition at index {i}: {msg.get('content', '')}")
-            break
-    
-    if transition_index is None:
+    segment = find_last_location_segment(conversation_history_data)
+    if segment is None:
         debug_print("No location transition found in conversation history")
         return None
-    
-    # Find the previous boundary (either another transition or the last system message)
-    previous_boundary_index = None
-    
-    # Look backwards from the current transition
-    for i in range(transition_index - 1, -1, -1):
-        msg = conversation_history_data[i]
-        
-        # Stop at previous transition
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            previous_boundary_index = i
-            debug_print(f"Found previous transition at index {i}")
-            break
-            
-        # Stop at location summary (from previous compression)
-        if msg.get("role") == "assistant" and "=== LOCATION SUMMARY ===" in msg.get("content", ""):
-            previous_boundary_index = i
-            debug_print(f"Found previous location summary at index {i}")
-            break
-    
-    # If no previous transition found, find the last system message
-    if previous_boundary_index is None:
-        for i in range(transition_index - 1, -1, -1):
-            if conversation_history_data[i].get("role") == "system":
-                previous_boundary_index = i
-                debug_print(f"Using last system message at index {i} as boundary")
-        
-        # If still nothing, start from beginning
-        if previous_boundary_index is None:
-            previous_boundary_index = -1
-            debug_print("Starting from beginning of conversation")
+    previous_boundary_index, transition_index = segment
     
     # Collect messages between boundaries (excluding the boundaries themselves)
     location_messages = []
@@ -519,6 +418,13 @@ def generate_enhanced_adventure_summary(conversation_history_data, party_tracker
     summary = generate_location_summary(leaving_location_name, location_messages)
     
     # For journal entries, we want a more detailed summary
+    if summary:
+        return expand_summary_for_journal(summary)
+    
+    return None
+
+def expand_summary_for_journal(summary):
+    """Expand a location summary into a detailed journal entry, or return it unchanged on failure"""
     if summary:
         # Enhance the summary with specific details
         messages = [
@@ -552,12 +458,13 @@ Keep the narrative engaging but factual."""},
     
     return None
 
-def update_journal_with_summary(adventure_summary, party_tracker_data, location_name):
+def update_journal_with_summary(adventure_summary, party_tracker_data, location_name, show_status=True):
     """
     Update the journal with the new adventure summary.
     This adds to the journal but doesn't affect conversation history.
     """
-    status_updating_journal()
+    if show_status:
+        status_updating_journal()
     debug_print(f"Updating journal with summary for {location_name}")
     
     journal_data = safe_read_json("journal.json")
@@ -593,10 +500,7 @@ def check_and_compact_missing_summaries(conversation_history, party_tracker_data
         return conversation_history
     
     # First, find all location transitions
-    transitions = []
-    for i, msg in enumerate(conversation_history):
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            transitions.append(i)
+    transitions = conversation_index.update(conversation_history).positions("location_transition")
     
     debug_print(f"Found {len(transitions)} total transitions")
     
@@ -671,15 +575,12 @@ def check_and_compact_missing_summaries(conversation_history, party_tracker_data
                 
                 
                 # Double-check: Make sure there's no summary between trans_idx and next_boundary
-                has_summary_between = False
-                for j in range(trans_idx + 1, next_boundary):
-                    check_msg = conversation_history[j]
-                    if check_msg.get("role") == "assistant" and "=== LOCATION SUMMARY ===" in check_msg.get("content", ""):
-                        debug_print(f"Found existing summary between boundaries at index {j}, skipping")
-                        has_summary_between = True
-                        break
-                
-                if has_summary_between:
+                index = conversation_index.update(conversation_history)
+                summaries_between = [j for tag in ("location_summary", "chronicle")
+                                     for j in index.between(tag, trans_idx + 1, next_boundary)
+                                     if index.has_tag(j, "assistant")]
+                if summaries_between:
+                    debug_print(f"Found existing summary between boundaries at index {min(summaries_between)}, skipping")
                     continue
                 
                 # Collect messages between boundaries
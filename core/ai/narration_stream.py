@@ -0,0 +1,237 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Narration Streaming
+
+The DM answers with a JSON object whose "narration" field is what the
+player reads. Waiting for the whole object before showing anything makes
+the player wait for the full completion on every turn. Here the response is
+read as it streams: NarrationExtractor pulls the narration out of the
+partial JSON, and NarrationStream shows it as a draft on the terminal and
+passes it to the web interface through a callback, as status_manager does
+for status messages.
+
+The draft is only a preview. Actions are still applied once the complete
+response has been parsed and validated. process_ai_response calls
+finalize() with the narration it would print: if that is what was already
+shown, it is not printed again. A draft whose response is rejected by
+validation, or replaced (transition narration), is discarded.
+
+Callback events: ("start", ""), ("delta", text), ("end", draft),
+("final", narration) and ("discard", "").
+"""
+
+import json
+import sys
+from typing import Callable, Optional
+
+from termcolor import colored
+
+from utils.encoding_utils import sanitize_text
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("narration_stream")
+
+NARRATION_KEY = "narration"
+
+def _is_high_surrogate(hex_digits: str) -> bool:
+    try:
+        return 0xD800 <= int(hex_digits, 16) <= 0xDBFF
+    except ValueError:
+        return False
+
+class NarrationExtractor:
+    """Incremental parser for the top-level "narration" string of a streamed JSON object"""
+
+    def __init__(self, key: str = NARRATION_KEY):
+        self.key = key
+        self.done = False        # the closing quote of the narration has been read
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._expect_value = False
+        self._reading_key = False
+        self._capturing = False
+        self._key_chars = []
+        self._last_key = None
+        self._pending = ""       # raw narration characters not decoded yet
+
+    def feed(self, text: str) -> str:
+        """Consume the next piece of the response; returns newly decoded narration text"""
+        raw = []
+        for ch in text:
+            if self.done:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._capturing:
+                        self._capturing = False
+                        self.done = True
+                    elif self._reading_key:
+                        self._reading_key = False
+                        self._last_key = "".join(self._key_chars)
+                    continue
+                if self._capturing:
+                    raw.append(ch)
+                elif self._reading_key:
+                    self._key_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._reading_key = True
+                    self._key_chars = []
+                    self._expect_key = False
+                elif self._depth == 1 and self._expect_value and self._last_key == self.key:
+                    self._capturing = True
+                self._expect_value = False
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and ch == "{"
+                self._expect_value = False
+            elif ch in "}]":
+                self._depth -= 1
+            elif self._depth == 1 and ch == ":":
+                self._expect_value = True
+            elif self._depth == 1 and ch == ",":
+                self._expect_key = True
+                self._last_key = None
+            elif not ch.isspace():
+                self._expect_value = False
+        self._pending += "".join(raw)
+        return self._decode(final=self.done)
+
+    def _decode(self, final: bool) -> str:
+        """Decode the pending characters up to the last complete escape sequence"""
+        pending = self._pending
+        cut = len(pending)
+        if not final:
+            i = 0
+            while i < len(pending):
+                if pending[i] != "\\":
+                    i += 1
+                    continue
+                if i + 1 >= len(pending):
+                    break
+                need = 6 if pending[i + 1] == "u" else 2
+                if need == 6 and i + 6 <= len(pending) and _is_high_surrogate(pending[i + 2:i + 6]):
+                    need = 12  # keep a surrogate pair together
+                if i + need > len(pending):
+                    break
+                i += need
+            cut = i
+        try:
+            text = json.loads(f'"{pending[:cut]}"')
+        except ValueError:
+            text = pending[:cut]
+        self._pending = pending[cut:]
+        return text
+
+def _normalized(text: str) -> str:
+    # Compare narration the way it reads on screen
+    return " ".join(sanitize_text(text).split())
+
+class NarrationStream:
+    """Shows the narration of a streamed DM response while it is generated"""
+
+    def __init__(self):
+        self._callback = None
+        self._extractor = None
+        self._draft = None  # narration shown so far, None when nothing is shown
+
+    def set_callback(self, callback: Optional[Callable[[str, str], None]]):
+        """Set a function called with (event, text) for each narration event"""
+        self._callback = callback
+
+    def _notify(self, event: str, text: str = ""):
+        if self._callback:
+            try:
+                self._callback(event, text)
+            except Exception as e:
+                debug(f"STREAM: Narration callback failed on {event}: {e}", category="narrative_generation")
+
+    @staticmethod
+    def _console(text: str):
+        # Straight to the terminal: the web interface captures sys.stdout and
+        # gets the draft through the callback instead
+        try:
+            sys.__stdout__.write(text)
+            sys.__stdout__.flush()
+        except (AttributeError, OSError, UnicodeEncodeError):
+            pass
+
+    def begin(self):
+        """Start reading a new response, discarding a draft that was never finalized"""
+        if self._draft is not None:
+            self.discard()
+        self._extractor = NarrationExtractor()
+
+    def feed(self, content: str):
+        """Feed the next piece of the response text"""
+        if self._extractor is None or self._extractor.done:
+            return
+        text = sanitize_text(self._extractor.feed(content))
+        if not text:
+            return
+        if self._draft is None:
+            self._draft = ""
+            self._console(colored("Dungeon Master: ", "blue"))
+            self._notify("start")
+        self._draft += text
+        self._console(colored(text, "blue"))
+        self._notify("delta", text)
+
+    def end(self):
+        """The response is complete"""
+        self._extractor = None
+        if self._draft is not None:
+            self._console("\n")
+            self._notify("end", self._draft)
+
+    def finalize(self, narration: str) -> bool:
+        """
+        Settle the draft against the narration about to be shown
+
+        Returns:
+            True if the draft already showed this narration and it need not be printed again
+        """
+        if self._draft is None:
+            return False
+        if _normalized(self._draft) != _normalized(narration or ""):
+            self.discard()
+            return False
+        self._draft = None
+        self._notify("final", narration)
+        return True
+
+    def keep(self):
+        """Settle the draft as shown, for responses added to history without process_ai_response"""
+        if self._draft is not None:
+            self.finalize(self._draft)
+
+    def discard(self):
+        """Withdraw the draft, e.g. after the response failed validation"""
+        self._extractor = None
+        if self._draft is None:
+            return
+        self._draft = None
+        self._console(colored("[Revising the response...]\n", "blue"))
+        self._notify("discard")
+
+# Global instance for DM responses
+narration_stream = NarrationStream()
+
+def set_narration_callback(callback: Optional[Callable[[str, str], None]]):
+    """Set the function that receives narration stream events (used by the web interface)"""
+    narration_stream.set_callback(callback)
@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Location Summary Cache
+
+Generated location summaries keyed by a hash of the segment they describe:
+the location name, the summary model and the role and content of every
+message. A segment that has not changed since it was last summarized is
+served from the cache instead of another model call, so rebuilding the
+session summary or the journal only pays for new or changed locations.
+
+Entries are kept in least-recently-used order and persisted to
+modules/conversation_history/location_summary_cache.json. Hits, misses and
+evictions are counted for report().
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("summary_cache")
+
+SUMMARY_CACHE_FILE = "modules/conversation_history/location_summary_cache.json"
+CACHE_FORMAT_VERSION = 1
+MAX_CACHED_SUMMARIES = 256
+
+def segment_key(location_name: str, messages: List[Dict[str, Any]], model: str = "") -> str:
+    """Hash of everything a location summary is generated from"""
+    digest = hashlib.sha256()
+    digest.update(f"{model}\x00{location_name}\x00".encode("utf-8"))
+    for message in messages:
+        digest.update(json.dumps([message.get("role"), message.get("content")], ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class SummaryCache:
+    """Persistent LRU cache of location summaries"""
+
+    def __init__(self, cache_path: Optional[str] = SUMMARY_CACHE_FILE, max_entries: int = MAX_CACHED_SUMMARIES):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> summary, least recently used first
+        self._loaded = False
+        self._lock = threading.Lock()  # summaries are also generated on the summary engine's worker
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._load()
+            summary = self._entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return summary
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._load()
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def report(self) -> str:
+        """One-line hit/miss summary for the logs"""
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return (f"{self.hits} hits, {self.misses} misses ({rate} hit rate), "
+                f"{len(self._entries)}/{self.max_entries} entries, {self.evictions} evictions")
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            warning(f"FILE_OP: Ignoring unreadable summary cache: {e}", category="cumulative_summary")
+            return
+        if payload.get("version") != CACHE_FORMAT_VERSION:
+            return
+        for key, summary in payload.get("entries", [])[-self.max_entries:]:
+            self._entries[key] = summary
+        debug(f"FILE_OP: Loaded {len(self._entries)} cached location summaries", category="cumulative_summary")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        payload = {"version": CACHE_FORMAT_VERSION, "entries": [[k, v] for k, v in self._entries.items()]}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            warning(f"FILE_OP: Could not save summary cache: {e}", category="cumulative_summary")
+
+# Global instance shared by every location summary call
+summary_cache = SummaryCache()
@@ -0,0 +1,230 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Background Summary Engine
+
+The conversation is summarized in levels, each with a fixed fan-in:
+- location: the messages spent at one location, one summary per transition
+- chapter: CHUNK_SIZE location summaries folded into one chronicle once
+  COMPRESSION_TRIGGER of them follow the last chronicle
+- module and campaign: module summaries written at module transitions, served
+  back through campaign_memory
+
+The location and chapter levels used to run inside the turn, so leaving a
+location cost the player several model calls before the prompt came back.
+Here they are scheduled instead: the work runs on a worker thread from a
+snapshot of the messages while the player types, and apply_ready() splices
+finished summaries into the history at the start of the next turn.
+
+A finished summary replaces exactly the run of messages it was built from.
+System messages are left out of the run: the context messages are rebuilt
+every turn, and they stay where they are. If the run is no longer in the
+history (the history was rebuilt, truncated or reloaded with different
+content), the result is dropped and the transition is picked up again by the
+normal checks. The journal entry is written only when the summary is applied,
+so a dropped result leaves no entry behind.
+"""
+
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.ai.cumulative_summary import (
+    find_last_location_segment,
+    generate_location_summary,
+    expand_summary_for_journal,
+    update_journal_with_summary
+)
+from core.ai.chunked_compression import (
+    count_summaries_after_last_chronicle,
+    find_compression_range,
+    find_chronicle_insert_position,
+    summarize_chunk,
+    chronicle_message
+)
+from core.ai.chunked_compression_config import (
+    COMPRESSION_TRIGGER,
+    ENABLE_AUTO_COMPRESSION,
+    CREATE_BACKUPS,
+    CONVERSATION_FILE
+)
+from utils.encoding_utils import safe_json_dump
+from utils.enhanced_logger import debug, info, warning, set_script_name
+
+# Set script name for logging
+set_script_name("summary_engine")
+
+LOCATION = "location"
+CHAPTER = "chapter"
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    # Identity covers in-place edits such as DM note truncation,
+    # equality covers a history reloaded from disk
+    return a is b or a == b
+
+def _find_run(conversation_history: List[Dict[str, Any]], run: List[Dict[str, Any]]) -> Optional[List[int]]:
+    """Positions of an unchanged run of non-system messages in the history, or None"""
+    positions = [i for i, msg in enumerate(conversation_history) if msg.get("role") != "system"]
+    for start in range(len(positions) - len(run), -1, -1):
+        if all(_same(conversation_history[positions[start + i]], message) for i, message in enumerate(run)):
+            return positions[start:start + len(run)]
+    return None
+
+def _without_system(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [msg for msg in messages if msg.get("role") != "system"]
+
+def location_summary_message(location_name: str, summary: str) -> Dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": f"=== LOCATION SUMMARY ===\n\n{location_name}:\n{'-' * len(location_name + ':')}\n{summary}"
+    }
+
+class SummaryEngine:
+    """Schedules location and chapter summaries and applies them at turn boundaries"""
+
+    def __init__(self):
+        self._executor = None
+        self._jobs = []  # scheduled jobs in order: level, title, replaced run, anchor, journal data, future
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            # One worker keeps summaries, and journal entries, in transition order
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary_engine")
+        return self._executor.submit(fn, *args)
+
+    def pending(self, level: Optional[str] = None) -> int:
+        """Number of scheduled jobs not yet applied"""
+        return sum(1 for job in self._jobs if level is None or job["level"] == level)
+
+    # ------------------------------------------------------------------
+    # Location level
+    # ------------------------------------------------------------------
+
+    def schedule_location(self, conversation_history: List[Dict[str, Any]],
+                          party_tracker_data: Dict[str, Any], leaving_location_name: str) -> bool:
+        """
+        Summarize the location left by the most recent transition in the background
+
+        Returns:
+            True if a job was scheduled, False if it is already pending or there is nothing to summarize
+        """
+        segment = find_last_location_segment(conversation_history)
+        if segment is None:
+            return False
+        start, transition_index = segment
+        transition_message = conversation_history[transition_index]
+        if any(job["level"] == LOCATION and _same(job["anchor"], transition_message) for job in self._jobs):
+            return False
+
+        replaced = _without_system(conversation_history[start + 1:transition_index])
+        messages = [dict(msg) for msg in replaced
+                    if not (msg.get("role") == "user" and msg.get("content", "").startswith("Error Note:"))]
+        if not messages:
+            debug(f"SUMMARY_ENGINE: No messages to summarize for {leaving_location_name}", category="location_transitions")
+            return False
+
+        # The journal entry is dated from the world state at the time of the transition
+        world_conditions = copy.deepcopy((party_tracker_data or {}).get("worldConditions", {}))
+        future = self._submit(self._summarize_location, leaving_location_name, messages)
+        self._jobs.append({"level": LOCATION, "title": leaving_location_name, "replaced": replaced,
+                           "anchor": transition_message, "journal": {"worldConditions": world_conditions},
+                           "future": future})
+        info(f"SUMMARY_ENGINE: Summarizing {leaving_location_name} in the background ({len(messages)} messages)",
+             category="location_transitions")
+        return True
+
+    @staticmethod
+    def _summarize_location(location_name: str, messages: List[Dict[str, Any]]) -> Optional[Tuple[Dict[str, Any], str]]:
+        summary = generate_location_summary(location_name, messages, show_status=False)
+        if not summary:
+            return None
+        # The journal gets the expanded entry; the history keeps the concise one
+        return location_summary_message(location_name, summary), expand_summary_for_journal(summary)
+
+    # ------------------------------------------------------------------
+    # Chapter level
+    # ------------------------------------------------------------------
+
+    def schedule_chapter(self, conversation_history: List[Dict[str, Any]]) -> bool:
+        """Fold the oldest CHUNK_SIZE location summaries into a chronicle in the background, if due"""
+        if not ENABLE_AUTO_COMPRESSION or self.pending(CHAPTER):
+            return False
+        count, summaries_after_chronicle, last_chronicle_idx = count_summaries_after_last_chronicle(conversation_history)
+        if count < COMPRESSION_TRIGGER:
+            return False
+        first_msg_idx, last_msg_idx, summaries_to_compress = find_compression_range(
+            conversation_history, summaries_after_chronicle, last_chronicle_idx
+        )
+        if first_msg_idx is None:
+            return False
+
+        insert_position = find_chronicle_insert_position(conversation_history, first_msg_idx)
+        replaced = _without_system(conversation_history[insert_position:last_msg_idx + 1])
+        messages = [dict(msg) for msg in conversation_history[first_msg_idx:last_msg_idx + 1]]
+        future = self._submit(self._summarize_chapter, messages, summaries_to_compress)
+        self._jobs.append({"level": CHAPTER, "title": summaries_to_compress[0]["location"], "replaced": replaced,
+                           "anchor": replaced[-1], "journal": None, "future": future})
+        info(f"SUMMARY_ENGINE: Compressing {len(summaries_to_compress)} location summaries into a chronicle "
+             f"in the background ({count} >= {COMPRESSION_TRIGGER})", category="compression")
+        return True
+
+    @staticmethod
+    def _summarize_chapter(messages: List[Dict[str, Any]],
+                           summaries_to_compress: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], None]:
+        return chronicle_message(summarize_chunk(messages, summaries_to_compress)), None
+
+    # ------------------------------------------------------------------
+    # Turn boundary
+    # ------------------------------------------------------------------
+
+    def apply_ready(self, conversation_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Splice finished summaries into the history
+
+        Returns:
+            A new history list if anything was applied, otherwise the one passed in
+        """
+        applied = False
+        for job in [job for job in self._jobs if job["future"].done()]:
+            self._jobs.remove(job)
+            try:
+                result = job["future"].result()
+            except Exception as e:
+                warning(f"SUMMARY_ENGINE: {job['level'].capitalize()} summary for {job['title']} failed: {e}",
+                        category="conversation_management")
+                continue
+            if result is None:
+                continue
+            message, journal_entry = result
+
+            positions = _find_run(conversation_history, job["replaced"])
+            if positions is None:
+                debug(f"SUMMARY_ENGINE: Dropped stale {job['level']} summary for {job['title']}",
+                      category="conversation_management")
+                continue
+
+            if job["level"] == CHAPTER and CREATE_BACKUPS and os.path.exists(CONVERSATION_FILE):
+                backup_file = f"conversation_history_backup_{os.path.getmtime(CONVERSATION_FILE)}.json"
+                safe_json_dump(conversation_history, backup_file)
+                info(f"BACKUP_CREATED: Created backup: {backup_file}", category="compression")
+
+            removed = set(positions)
+            conversation_history = (conversation_history[:positions[0]] + [message] +
+                                    [msg for i, msg in enumerate(conversation_history)
+                                     if i >= positions[0] and i not in removed])
+            applied = True
+            if journal_entry:
+                update_journal_with_summary(journal_entry, job["journal"], job["title"], show_status=False)
+            info(f"SUMMARY_ENGINE: Applied {job['level']} summary for {job['title']} "
+                 f"({len(job['replaced'])} messages -> 1)", category="conversation_management")
+
+        if applied:
+            self.schedule_chapter(conversation_history)
+        return conversation_history
+
+# Global instance for the main conversation history
+summary_engine = SummaryEngine()
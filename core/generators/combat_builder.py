@@ -4,7 +4,6 @@
 # This software is subject to the terms of the Fair Source License.
 
 import json
-import random
 import sys
 import os
 
@@ -16,6 +15,7 @@ from termcolor import colored
 import logging
 import shutil
 from utils.module_path_manager import ModulePathManager
+from utils.generator_context import GeneratorContext
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -268,8 +268,13 @@ def generate_encounter(encounter_data):
     encounter_number = get_next_encounter_number(location)
     encounter_id = f"{location}-E{encounter_number}"
     
+    # Seed the encounter so initiative and every round's prerolls can be reproduced
+    generator_context = GeneratorContext(encounter_data.get("seed"))
+    initiative_rng = generator_context.stream("initiative")
+
     encounter = {
         "encounterId": encounter_id,
+        "seed": generator_context.seed,
         "creatures": []
     }
 
@@ -308,7 +313,7 @@ def generate_encounter(encounter_data):
     player = {
         "name": player_data["name"],
         "type": "player",
-        "initiative": random.randint(1, 20),
+        "initiative": initiative_rng.randint(1, 20),
         "status": player_data.get("status", "alive"),
         "conditions": player_data.get("condition_affected", []),
         "actions": {"actionType": "", "target": ""},
@@ -337,7 +342,7 @@ def generate_encounter(encounter_data):
             "name": monster_name,
             "type": "enemy",
             "monsterType": formatted_monster_type,
-            "initiative": random.randint(1, 20),
+            "initiative": initiative_rng.randint(1, 20),
             "status": "alive",
             "conditions": [],
             "actions": {"actionType": "", "target": ""},
@@ -365,7 +370,7 @@ def generate_encounter(encounter_data):
             "name": npc_full_name,
             "type": "npc",
             "npcType": formatted_npc_type,
-            "initiative": random.randint(1, 20),
+            "initiative": initiative_rng.randint(1, 20),
             "status": npc_data.get("status", "alive"),
             "conditions": npc_data.get("condition_affected", []),
             "actions": {"actionType": "", "target": ""},
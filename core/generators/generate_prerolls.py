@@ -47,19 +47,21 @@
 # data presentation while maintaining game rule accuracy.
 # ============================================================================
 
-import random
 import json
 import os
 
-def generate_generic_dice_pool():
+from utils.generator_context import make_rng
+
+def generate_generic_dice_pool(rng=None):
     """Generate a pool of various dice types for flexible use"""
+    rng = make_rng(rng=rng)
     dice_pool = {
-        "d4": [random.randint(1, 4) for _ in range(8)],
-        "d6": [random.randint(1, 6) for _ in range(8)], 
-        "d8": [random.randint(1, 8) for _ in range(6)],
-        "d10": [random.randint(1, 10) for _ in range(6)],
-        "d12": [random.randint(1, 12) for _ in range(4)],
-        "d20": [random.randint(1, 20) for _ in range(10)]  # Extra d20s for various uses
+        "d4": [rng.randint(1, 4) for _ in range(8)],
+        "d6": [rng.randint(1, 6) for _ in range(8)], 
+        "d8": [rng.randint(1, 8) for _ in range(6)],
+        "d10": [rng.randint(1, 10) for _ in range(6)],
+        "d12": [rng.randint(1, 12) for _ in range(4)],
+        "d20": [rng.randint(1, 20) for _ in range(10)]  # Extra d20s for various uses
     }
     return dice_pool
 
@@ -157,45 +159,29 @@ def get_npc_attacks(npc_name):
         print(f"Error loading NPC {npc_name}: {e}")
         return [{"name": "weapon attack"}], 1
 
-def generate_prerolls(encounter_data, round_num=None):
-    """Generate organized dice rolls with generic pool and creature-specific attacks.
+def roll_prerolls(encounter_data, round_num=None, rng=None):
+    """Roll one round of dice: the generic pool and each creature's attacks and saving throws.
     
     Args:
         encounter_data: The encounter data dictionary
         round_num: The current combat round number (defaults to 1 if not specified)
+        rng: Optional seeded random.Random for reproducible dice (global random if None)
     
     Returns:
-        str: Formatted preroll text with round tracking
+        dict: {"round", "preroll_id", "player", "generic": {die: [rolls]},
+               "creatures": {name: {"type", "attacks": [rolls], "attack_names": [names], "saves": {ability: roll}}}}
     """
+    rng = make_rng(rng=rng)
+    
     # Determine round number
     if round_num is None:
         round_num = encounter_data.get('current_round', 1)
     
     # Generate preroll ID for tracking
-    preroll_id = f"{round_num}-{random.randint(1000,9999)}"
-    
-    preroll_lines = []
-    preroll_lines.append(f"DM Note: COMBAT ROUND {round_num} - DICE AVAILABLE:")
-    preroll_lines.append(f"Preroll Set ID: {preroll_id} (Generated at round start)")
-    preroll_lines.append("")
-    
-    # Add critical dice usage instructions
-    preroll_lines.append("CRITICAL DICE USAGE:")
-    preroll_lines.append("- For NPC/Monster ATTACKS, you MUST use a die from the \"CREATURE ATTACKS\" list for that specific creature.")
-    preroll_lines.append("- For NPC/Monster SAVING THROWS, you MUST use a die from the \"SAVING THROWS\" list.")
-    preroll_lines.append("- The \"GENERIC DICE\" pool is ONLY for damage rolls, spell effects, or other non-attack/non-save rolls.")
-    preroll_lines.append("- FAILURE TO USE THE CORRECT POOL IS A CRITICAL ERROR.")
-    preroll_lines.append("")
+    preroll_id = f"{round_num}-{rng.randint(1000,9999)}"
     
     # Generate generic dice pool
-    dice_pool = generate_generic_dice_pool()
-    preroll_lines.append("=== GENERIC DICE (use for spells, abilities, improvisation) ===")
-    dice_line_parts = []
-    for die_type, rolls in dice_pool.items():
-        rolls_str = ",".join(map(str, rolls))
-        dice_line_parts.append(f"{die_type}: [{rolls_str}]")
-    preroll_lines.append(" | ".join(dice_line_parts))
-    preroll_lines.append("")
+    dice_pool = generate_generic_dice_pool(rng)
     
     # Find player name for context
     player_name = "Unknown Player"
@@ -204,19 +190,12 @@ def generate_prerolls(encounter_data, round_num=None):
             player_name = creature.get("name", "Unknown Player")
             break
     
-    # Generate creature-specific attack rolls
-    preroll_lines.append("=== CREATURE ATTACKS (exact number per creature) ===")
-    preroll_lines.append(f"[PLAYER: {player_name}] Must make own rolls")
-    
-    attack_creatures = []
-    saving_throw_creatures = []
-    
+    creatures = {}
     for creature in encounter_data.get("creatures", []):
         if creature.get("type") == "player":
             continue
             
         creature_name = creature.get("name", "Unknown Creature")
-        creature_type = creature.get("type", "unknown").upper()
         
         # Get attack information from encounter data OR load from files
         num_attacks = creature.get("numAttacks")
@@ -250,35 +229,87 @@ def generate_prerolls(encounter_data, round_num=None):
             attacks_info = [{"name": f"{creature_type_name} attack"}]
         
         # Generate exact number of attack rolls needed
-        attack_rolls = [random.randint(1, 20) for _ in range(num_attacks)]
+        attack_rolls = [rng.randint(1, 20) for _ in range(num_attacks)]
+        
+        # Generate saving throws for this creature
+        save_rolls = {
+            "STR": rng.randint(1, 20),
+            "DEX": rng.randint(1, 20), 
+            "CON": rng.randint(1, 20),
+            "INT": rng.randint(1, 20),
+            "WIS": rng.randint(1, 20),
+            "CHA": rng.randint(1, 20)
+        }
+        
+        creatures[creature_name] = {
+            "type": creature.get("type", "unknown"),
+            "attacks": attack_rolls,
+            "attack_names": [attack.get("name", "attack") for attack in attacks_info[:num_attacks]],
+            "saves": save_rolls
+        }
+    
+    return {
+        "round": round_num,
+        "preroll_id": preroll_id,
+        "player": player_name,
+        "generic": dice_pool,
+        "creatures": creatures
+    }
+
+def format_prerolls(prerolls):
+    """Format rolled dice from roll_prerolls() as the DM note shown to the combat model"""
+    round_num = prerolls["round"]
+    player_name = prerolls["player"]
+    
+    preroll_lines = []
+    preroll_lines.append(f"DM Note: COMBAT ROUND {round_num} - DICE AVAILABLE:")
+    preroll_lines.append(f"Preroll Set ID: {prerolls['preroll_id']} (Generated at round start)")
+    preroll_lines.append("")
+    
+    # Add critical dice usage instructions
+    preroll_lines.append("CRITICAL DICE USAGE:")
+    preroll_lines.append("- For NPC/Monster ATTACKS, you MUST use a die from the \"CREATURE ATTACKS\" list for that specific creature.")
+    preroll_lines.append("- For NPC/Monster SAVING THROWS, you MUST use a die from the \"SAVING THROWS\" list.")
+    preroll_lines.append("- The \"GENERIC DICE\" pool is ONLY for damage rolls, spell effects, or other non-attack/non-save rolls.")
+    preroll_lines.append("- FAILURE TO USE THE CORRECT POOL IS A CRITICAL ERROR.")
+    preroll_lines.append("")
+    
+    preroll_lines.append("=== GENERIC DICE (use for spells, abilities, improvisation) ===")
+    dice_line_parts = []
+    for die_type, rolls in prerolls["generic"].items():
+        rolls_str = ",".join(map(str, rolls))
+        dice_line_parts.append(f"{die_type}: [{rolls_str}]")
+    preroll_lines.append(" | ".join(dice_line_parts))
+    preroll_lines.append("")
+    
+    # Generate creature-specific attack rolls
+    preroll_lines.append("=== CREATURE ATTACKS (exact number per creature) ===")
+    preroll_lines.append(f"[PLAYER: {player_name}] Must make own rolls")
+    
+    attack_creatures = []
+    saving_throw_creatures = []
+    
+    for creature_name, dice in prerolls["creatures"].items():
+        attack_rolls = dice["attacks"]
+        attack_names = dice["attack_names"]
+        num_attacks = len(attack_rolls)
         
         # Format attack information
         if num_attacks == 1:
             attack_desc = f"Attack[{attack_rolls[0]}] (1 attack available"
-            if attacks_info:
-                attack_name = attacks_info[0].get("name", "attack")
-                attack_desc += f": {attack_name}"
+            if attack_names:
+                attack_desc += f": {attack_names[0]}"
             attack_desc += ")"
         else:
             attack_rolls_str = "], Attack[".join(map(str, attack_rolls))
             attack_desc = f"Attack[{attack_rolls_str}] ({num_attacks} attacks available"
-            if attacks_info:
-                attack_names = [attack.get("name", "attack") for attack in attacks_info[:num_attacks]]
+            if attack_names:
                 attack_desc += f": {', '.join(attack_names)}"
             attack_desc += ")"
         
         attack_creatures.append(f"{creature_name}: {attack_desc}")
         
-        # Generate saving throws for this creature
-        save_rolls = {
-            "STR": random.randint(1, 20),
-            "DEX": random.randint(1, 20), 
-            "CON": random.randint(1, 20),
-            "INT": random.randint(1, 20),
-            "WIS": random.randint(1, 20),
-            "CHA": random.randint(1, 20)
-        }
-        save_rolls_str = ", ".join([f"{ability}:{roll}" for ability, roll in save_rolls.items()])
+        save_rolls_str = ", ".join([f"{ability}:{roll}" for ability, roll in dice["saves"].items()])
         saving_throw_creatures.append(f"{creature_name}: {save_rolls_str}")
     
     # Add attack information
@@ -302,6 +333,19 @@ def generate_prerolls(encounter_data, round_num=None):
     
     return "\n".join(preroll_lines)
 
+def generate_prerolls(encounter_data, round_num=None, rng=None):
+    """Generate organized dice rolls with generic pool and creature-specific attacks.
+    
+    Args:
+        encounter_data: The encounter data dictionary
+        round_num: The current combat round number (defaults to 1 if not specified)
+        rng: Optional seeded random.Random for reproducible dice (global random if None)
+    
+    Returns:
+        str: Formatted preroll text with round tracking
+    """
+    return format_prerolls(roll_prerolls(encounter_data, round_num=round_num, rng=rng))
+
 def test_generate_prerolls():
     """Test function for generate_prerolls"""
     # Create a sample encounter with the new structure
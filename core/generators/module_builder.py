@@ -58,6 +58,7 @@ class BuilderConfig:
     locations_per_area: int = 15
     output_directory: str = "./modules"
     verbose: bool = True
+    seed: Optional[int] = None  # Seed for procedural realm generation (random if None)
 
 class ModuleBuilder:
     """Orchestrates the complete module generation process"""
@@ -71,7 +72,7 @@ class ModuleBuilder:
         self.context = ModuleContext()
         
         # Initialize generators
-        self.module_gen = ModuleGenerator()
+        self.module_gen = ModuleGenerator(seed=config.seed)
         self.plot_gen = PlotGenerator()
         self.location_gen = LocationGenerator()
         self.area_gen = AreaGenerator()
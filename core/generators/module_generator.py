@@ -71,7 +71,6 @@ import json
 import os
 import re
 import glob
-import random
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -82,6 +81,10 @@ from utils.module_path_manager import ModulePathManager
 from utils.file_operations import safe_write_json as save_json_safely
 from utils.enhanced_logger import debug, info, warning, error
 from utils.sites_generator import SiteGenerator
+from utils.realm_generator import RealmGenerator
+from utils.generator_context import GeneratorContext
+from utils.warfare_system import WarfareManager, create_siege_scenario
+from utils.mythic_generators import mythic_generators
 
 # Initialize OpenAI client
 client = OpenAI(api_key=OPENAI_API_KEY)
@@ -455,9 +458,13 @@ def validate_module_structure(module_name):
     return issues
 
 class ModuleGenerator:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.prompt_guide = ModulePromptGuide()
         self.schema = self.load_schema()
+        # Seeded streams for the procedural realm pipeline (realm, sites,
+        # holdings/population, warfare); the seed is recorded in realm metadata
+        self.generator_context = GeneratorContext(seed)
+        self.rng = self.generator_context.stream("population")
     
     def load_schema(self) -> Dict[str, Any]:
         """Load the module schema for validation"""
@@ -688,7 +695,9 @@ If the field expects an object, return just the object.
         coastal_type = self._determine_coastal_type(module_data)
         
         info(f"Generating Realm: {realm_name} (coastal: {coastal_type})", category="module_generation")
+        realm_gen = RealmGenerator(rng=self.generator_context.stream("realm"))
         realm_data = realm_gen.generate_realm(realm_name, coastal_type)
+        realm_data["metadata"]["seed"] = self.generator_context.seed
         
         # Save the main realm data
         save_json_safely(realm_data, f"{module_dir}/realm_map.json")
@@ -727,7 +736,7 @@ If the field expects an object, return just the object.
                 complexity="moderate",
                 danger_level=danger_level,
                 recommended_level=recommended_level,
-                num_locations=random.randint(5, 7)  # Explicitly set to 5-7 locations
+                num_locations=self.generator_context.stream("areas").randint(5, 7)  # Explicitly set to 5-7 locations
             )
             
             # Generate area data
@@ -787,7 +796,8 @@ If the field expects an object, return just the object.
             "generated_sites": generated_sites,
             "holdings": generated_holdings,
             "warfare_scenarios": warfare_scenarios,
-            "generation_timestamp": datetime.now().isoformat()
+            "generation_timestamp": datetime.now().isoformat(),
+            "generator": self.generator_context.to_metadata()
         }
         
         save_json_safely(realm_summary, f"{module_dir}/realm_summary.json")
@@ -819,7 +829,8 @@ If the field expects an object, return just the object.
         info("Generating detailed Sites for significant realm locations", category="module_generation")
         
         generated_sites = []
-        site_gen = SiteGenerator()
+        site_rng = self.generator_context.stream("sites")
+        site_gen = SiteGenerator(site_rng)
         
         # Generate Sites for each Holding
         for holding in realm_data.get("holdings", []):
@@ -842,7 +853,7 @@ If the field expects an object, return just the object.
         
         # Generate Sites for some Myths (50% chance each)
         for myth_data in realm_data.get("myths", []):
-            if random.random() < 0.5:  # 50% chance
+            if site_rng.random() < 0.5:  # 50% chance
                 myth_name = myth_data['name']
                 site_name = f"Site of {myth_name}"
                 
@@ -906,11 +917,12 @@ If the field expects an object, return just the object.
         info("Generating Warfare scenarios for realm conflicts", category="module_generation")
         
         scenarios = []
+        warfare_rng = self.generator_context.stream("warfare")
         
         # Generate a siege scenario for the Seat of Power
         seat_of_power = next((h for h in realm_data.get("holdings", []) if h['type'] == 'seat_of_power'), None)
         if seat_of_power:
-            siege_scenario = create_siege_scenario("castle")
+            siege_scenario = create_siege_scenario("castle", rng=warfare_rng)
             siege_data = {
                 "name": f"Siege of {seat_of_power['type'].replace('_', ' ').title()}",
                 "type": "siege",
@@ -918,15 +930,15 @@ If the field expects an object, return just the object.
                 "description": f"A major siege targeting the realm's Seat of Power",
                 "warfare_data": siege_scenario.generate_battle_report(),
                 "trigger_conditions": ["Realm under serious threat", "Major antagonist revealed"],
-                "glory_reward": random.randint(3, 5)
+                "glory_reward": warfare_rng.randint(3, 5)
             }
             
             save_json_safely(siege_data, f"{module_dir}/warfare/siege_scenario.json")
             scenarios.append(siege_data)
         
         # Generate field battle scenarios
-        for i in range(random.randint(1, 3)):
-            battle_scenario = WarfareManager()
+        for i in range(warfare_rng.randint(1, 3)):
+            battle_scenario = WarfareManager(warfare_rng)
             # Add some opposing forces
             battle_scenario.add_warband("knights", "Defender Knights", "defender")
             battle_scenario.add_warband("mercenaries", "Attacking Force", "attacker")
@@ -937,7 +949,7 @@ If the field expects an object, return just the object.
                 "description": f"A field battle between opposing forces in the realm",
                 "warfare_data": battle_scenario.generate_battle_report(),
                 "trigger_conditions": ["Faction conflict escalates", "Territory dispute"],
-                "glory_reward": random.randint(1, 3)
+                "glory_reward": warfare_rng.randint(1, 3)
             }
             
             save_json_safely(battle_data, f"{module_dir}/warfare/battle_scenario_{i+1}.json")
@@ -1001,11 +1013,11 @@ If the field expects an object, return just the object.
     def _get_knights_per_holding(self, holding_type: str) -> int:
         """Get number of knights per holding type"""
         knight_counts = {
-            "seat_of_power": random.randint(5, 8),
-            "castle": random.randint(3, 5),
-            "fortress": random.randint(2, 4),
-            "tower": random.randint(1, 2),
-            "town": random.randint(1, 3)
+            "seat_of_power": self.rng.randint(5, 8),
+            "castle": self.rng.randint(3, 5),
+            "fortress": self.rng.randint(2, 4),
+            "tower": self.rng.randint(1, 2),
+            "town": self.rng.randint(1, 3)
         }
         return knight_counts.get(holding_type, 1)
     
@@ -1015,11 +1027,11 @@ If the field expects an object, return just the object.
         uncommon_goods = ["spices", "fine cloth", "worked metal", "preserved foods"]
         rare_goods = ["precious metals", "gemstones", "rare spices", "magical components"]
         
-        goods = random.sample(common_goods, random.randint(2, 3))
-        if random.random() < 0.7:
-            goods.extend(random.sample(uncommon_goods, random.randint(1, 2)))
-        if random.random() < 0.3:
-            goods.extend(random.sample(rare_goods, 1))
+        goods = self.rng.sample(common_goods, self.rng.randint(2, 3))
+        if self.rng.random() < 0.7:
+            goods.extend(self.rng.sample(uncommon_goods, self.rng.randint(1, 2)))
+        if self.rng.random() < 0.3:
+            goods.extend(self.rng.sample(rare_goods, 1))
         
         return goods
     
@@ -1032,26 +1044,26 @@ If the field expects an object, return just the object.
             "Bandit problems",
             "Neighboring realm tensions"
         ]
-        return random.sample(conflicts, random.randint(1, 3))
+        return self.rng.sample(conflicts, self.rng.randint(1, 3))
     
     def _generate_holding_defenses(self, holding_type: str) -> Dict:
         """Generate defensive capabilities for a holding"""
         if holding_type in ["castle", "fortress", "seat_of_power"]:
             return {
                 "walls": "Stone fortifications",
-                "garrison": f"{random.randint(20, 100)} professional soldiers",
+                "garrison": f"{self.rng.randint(20, 100)} professional soldiers",
                 "siege_equipment": "Basic defensive engines"
             }
         elif holding_type == "tower":
             return {
                 "walls": "Tower walls and palisade",
-                "garrison": f"{random.randint(10, 30)} guards",
+                "garrison": f"{self.rng.randint(10, 30)} guards",
                 "siege_equipment": "None"
             }
         else:
             return {
                 "walls": "Wooden palisade or none",
-                "garrison": f"{random.randint(5, 20)} militia",
+                "garrison": f"{self.rng.randint(5, 20)} militia",
                 "siege_equipment": "None"
             }
     
@@ -1061,7 +1073,7 @@ If the field expects an object, return just the object.
             # Use mythic_generators to get a random knight
             knight_types = list(mythic_generators.knights.keys())
             if knight_types:
-                knight_type = random.choice(knight_types)
+                knight_type = self.rng.choice(knight_types)
                 knight_data = mythic_generators.knights[knight_type].copy()
                 knight_data["generated_name"] = f"Sir/Dame {self._generate_knight_name()}"
                 return knight_data
@@ -1072,18 +1084,18 @@ If the field expects an object, return just the object.
         return {
             "generated_name": f"Sir/Dame {self._generate_knight_name()}",
             "type": "Generic Knight",
-            "vigour": random.randint(8, 15),
-            "clarity": random.randint(8, 15), 
-            "spirit": random.randint(8, 15),
-            "guard": random.randint(2, 5),
-            "glory": random.randint(0, 3)
+            "vigour": self.rng.randint(8, 15),
+            "clarity": self.rng.randint(8, 15), 
+            "spirit": self.rng.randint(8, 15),
+            "guard": self.rng.randint(2, 5),
+            "glory": self.rng.randint(0, 3)
         }
     
     def _generate_knight_name(self) -> str:
         """Generate a random knight name"""
         first_names = ["Aldric", "Brianna", "Cedric", "Diana", "Edmund", "Fiona", "Gareth", "Helena"]
         last_names = ["Ironhold", "Stormwind", "Goldleaf", "Shadowmere", "Brightblade", "Thornfield"]
-        return f"{random.choice(first_names)} {random.choice(last_names)}"
+        return f"{self.rng.choice(first_names)} {self.rng.choice(last_names)}"
     
     def _generate_mythic_creature(self, myth_name: str) -> Dict:
         """Generate a creature associated with a specific myth"""
@@ -1093,7 +1105,7 @@ If the field expects an object, return just the object.
             cast_members = myth_data.get("cast", [])
             if cast_members:
                 return {
-                    "name": random.choice(cast_members),
+                    "name": self.rng.choice(cast_members),
                     "type": "Mythic Entity",
                     "description": f"A being associated with the Myth of {myth_name}",
                     "threat_level": "Varies by omen progression"
@@ -1250,7 +1262,7 @@ If the field expects an object, return just the object.
                     "involvedLocations": [location["id"]],
                     "status": "not started",
                     "plotImpact": "Completing this quest provides Glory and advantages in the main plot.",
-                    "glory_reward": random.randint(1, 2)
+                    "glory_reward": self.generator_context.stream("plot").randint(1, 2)
                 }
                 plot_point["sideQuests"].append(side_quest)
                 side_quest_counter += 1
@@ -1389,8 +1401,8 @@ def main():
     errors = generator.validate_module(module)
     if errors:
         print("\nValidation errors:")
-        for error in errors:
-            print(f"  - {error}")
+        for problem in errors:
+            print(f"  - {problem}")
     else:
         print("\nValidation successful!")
         
@@ -75,6 +75,7 @@ from openai import OpenAI
 import config
 from utils.encoding_utils import safe_json_load, safe_json_dump
 from utils.module_path_manager import ModulePathManager
+from core.ai.campaign_memory import campaign_memory, format_passages
 from utils.enhanced_logger import debug, info, warning, error, game_event, set_script_name
 
 # Set script name for logging
@@ -853,23 +854,15 @@ Focus on story outcomes, character development, and decisions that will matter i
         context_parts.append(f"CAMPAIGN: {self.campaign_data['campaignName']}")
         context_parts.append(f"Current Module: {current_module}")
         
-        # Add all completed module summaries (multiple visits per module)
+        # Add the chronicle passages most relevant to the module being entered,
+        # within a fixed budget rather than every summary of every visit
         debug(f"STATE_CHANGE: Completed modules: {self.campaign_data.get('completedModules', [])}", category="summary_building")
         if self.campaign_data['completedModules']:
-            context_parts.append("\\nPREVIOUS ADVENTURES:")
-            for module in self.campaign_data['completedModules']:
-                debug(f"FILE_OP: Loading summaries for module: {module}", category="summary_building")
-                summaries = self._load_module_summaries(module)
-                debug(f"FILE_OP: Found {len(summaries)} summaries for {module}", category="summary_building")
-                if summaries:
-                    context_parts.append(f"\\n=== CHRONICLES OF {module.upper()} ===")
-                    for i, summary in enumerate(summaries):
-                        visit_num = i + 1
-                        seq_num = summary.get('sequenceNumber', visit_num)
-                        context_parts.append(f"\\n--- Visit {visit_num} (Chronicle {seq_num:03d}) ---")
-                        summary_text = summary.get('summary', 'No summary available')
-                        context_parts.append(summary_text)
-                        debug(f"FILE_OP: Added summary {seq_num} ({len(summary_text)} chars)", category="summary_building")
+            passages = campaign_memory.refresh().retrieve(current_module.replace("_", " "), kinds=("chronicle",))
+            debug(f"FILE_OP: Selected {len(passages)} chronicle passages", category="summary_building")
+            if passages:
+                context_parts.append("\\nPREVIOUS ADVENTURES:")
+                context_parts.append(format_passages(passages))
         
         # Add current world state
         if self.campaign_data.get('worldState'):
@@ -99,6 +99,7 @@ Combat Logging System:
 # ARCHITECTURAL INTEGRATION:
 # - Called by action_handler.py for combat-related actions
 # - Uses generate_prerolls.py for dice management
+# - Uses combat_round_engine.py to resolve dice, damage and saves locally
 # - Integrates with party_tracker.json for state persistence
 # - Implements our "Defense in Depth" validation strategy
 # 
@@ -115,12 +116,13 @@ import json
 import os
 import time
 import re
-import random
 import subprocess
+from contextlib import ExitStack
 from datetime import datetime
 from utils.xp import main as calculate_xp
 from openai import OpenAI
 # Import model configurations from config.py
+import config
 from config import (
     OPENAI_API_KEY,
     COMBAT_MAIN_MODEL,
@@ -133,11 +135,17 @@ from updates.update_character_info import update_character_info, normalize_chara
 import updates.update_encounter as update_encounter
 import updates.update_party_tracker as update_party_tracker
 # Import the preroll generator
-from core.generators.generate_prerolls import generate_prerolls
+from core.generators.generate_prerolls import roll_prerolls, format_prerolls
 # Import safe JSON functions
 from utils.encoding_utils import safe_json_load
 from utils.file_operations import safe_write_json
+from utils.debug_exports import debug_exporter
+from utils.prompt_encoding import encode_section
+from utils.generator_context import GeneratorContext
 import core.ai.cumulative_summary as cumulative_summary
+from core.managers.combat_transcript import CombatRoundIndex, SUMMARY_PREFIX
+from core.managers.encounter_session import EncounterSession
+from core.managers.combat_round_engine import RoundDice, apply_round_changes, resolve_round
 from utils.enhanced_logger import debug, info, warning, error, game_event, set_script_name
 
 # Set script name for logging
@@ -651,7 +659,7 @@ def validate_combat_response(response, encounter_data, user_input, conversation_
     # Add current validation data
     validation_conversation.extend([
         {"role": "system", "content": "=== CURRENT VALIDATION DATA ==="},
-        {"role": "system", "content": f"Encounter Data:\n{json.dumps(encounter_data, indent=2)}"},
+        {"role": "system", "content": f"Encounter Data:\n{encode_section('combat_encounter', encounter_data)}"},
         {"role": "user", "content": f"Player Input: {user_input}"},
         {"role": "assistant", "content": response}
     ])
@@ -681,7 +689,6 @@ def validate_combat_response(response, encounter_data, user_input, conversation_
                 # Log validation results with encounter context
                 # Create debug/combat directory if it doesn't exist
                 import os
-                from datetime import datetime
                 debug_combat_dir = os.path.join("debug", "combat")
                 os.makedirs(debug_combat_dir, exist_ok=True)
                 
@@ -807,6 +814,185 @@ def get_initiative_order(encounter_data):
     
     return " -> ".join(order_parts)
 
+def build_preroll_cache(encounter_data, round_num):
+    """Prerolls for a round, drawn from the encounter's seeded stream for that round"""
+    # Encounters built before they were seeded get a seed on their next round
+    seed = encounter_data.setdefault("seed", GeneratorContext().seed)
+    rng = GeneratorContext(seed).stream(f"prerolls:{round_num}")
+    dice = roll_prerolls(encounter_data, round_num=round_num, rng=rng)
+    return {
+        'round': round_num,
+        'rolls': format_prerolls(dice),
+        'dice': dice,
+        'preroll_id': f"{round_num}-{rng.randint(1000,9999)}"
+    }
+
+def build_intent_prompt(current_round, initiative_display, all_dynamic_state, dice, user_input_text):
+    """Per-turn prompt asking the combat model what happens this round, without any dice"""
+    attack_lines = []
+    for name in dice.prerolls.get("creatures", {}):
+        names = ", ".join(dice.attack_names(name)) or "attack"
+        attack_lines.append(f"{name}: {names} ({dice.attacks_left(name)} attacks left this round)")
+    attacks_available = "\n".join(attack_lines) or "None"
+
+    return f"""--- CURRENT COMBAT STATE ---
+Round: {current_round}
+{initiative_display}
+All Creatures State:
+{all_dynamic_state}
+
+--- NPC/MONSTER ATTACKS AVAILABLE ---
+{attacks_available}
+--- END OF STATE ---
+
+Player: {user_input_text}
+
+Now, declare what happens for the rest of the current round in initiative order, until it is my turn again or every creature has acted. Do not narrate yet and do not roll any dice or total any numbers: the game engine rolls the NPC and monster dice, checks hits and saves, and applies damage. You will narrate the results afterwards.
+
+Respond with valid JSON only:
+{{"combat_round": <round number>, "intents": [...], "actions": [...]}}
+
+Intent types, in the order they happen:
+- {{"type": "attack", "attacker": "<name>", "target": "<name>", "attack": "<attack name>"}}. For my attack add "roll": <my attack total>, "natural": <my d20> and "damage": <my damage total>, using only numbers I stated; leave them out if I did not give them.
+- {{"type": "save", "source": "<name>", "targets": ["<name>"], "ability": "STR|DEX|CON|INT|WIS|CHA", "dc": <DC>, "damage": "<dice such as 3d6>" or <number>, "damage_type": "<type>", "half_on_success": true|false, "condition": "<condition on a failed save>"}}. For my own save add "rolls": {{"<my name>": <my save total>}}.
+- {{"type": "damage", "target": "<name>", "amount": <number> or "dice": "<dice>", "damage_type": "<type>"}} for damage without an attack roll or save.
+- {{"type": "heal", "target": "<name>", "amount": <number> or "dice": "<dice>"}}
+- {{"type": "condition", "target": "<name>", "condition": "<condition>", "remove": true|false}}
+- {{"type": "status", "target": "<name>", "status": "fled|surrendered"}} for an enemy leaving the fight.
+
+"actions" holds every other action in the usual format, such as updateCharacterInfo for spent spell slots or ammunition, or exit when combat ends. Never use actions for hit points, damage, healing or conditions; the engine applies those. Set "combat_round" to {current_round + 1} only if every living creature has acted this round, otherwise {current_round}."""
+
+def write_round_to_characters(session, encounter_data, changes):
+    """Copy resolved hit points, status and conditions to the player and NPC character files"""
+    for creature in encounter_data.get("creatures", []):
+        changed = changes.get(creature.get("name"))
+        if not changed or creature.get("type") not in ("player", "npc"):
+            continue
+        if creature["type"] == "player":
+            character_data = session.player(creature["name"])
+            character_path = session.path_manager.get_character_path(creature["name"])
+        else:
+            character_data, matched_filename = session.npc(creature["name"])
+            character_path = session.path_manager.get_character_path(matched_filename) if matched_filename else None
+        if not character_data or not character_path:
+            error(f"FAILURE: No character file to record round results for {creature['name']}", category="character_updates")
+            continue
+
+        if "currentHitPoints" in changed:
+            character_data["hitPoints"] = changed["currentHitPoints"]
+        if "status" in changed:
+            character_data["status"] = changed["status"]
+        if "conditions" in changed:
+            character_data["condition_affected"] = changed["conditions"]
+            character_data["condition"] = changed["conditions"][0] if changed["conditions"] else "none"
+        if safe_write_json(character_path, character_data):
+            debug(f"STATE_CHANGE: Recorded round results for {creature['name']}: {changed}", category="character_updates")
+        else:
+            error(f"FAILURE: Failed to save round results for {creature['name']}", category="character_updates")
+
+def resolve_round_locally(conversation_history, encounter_data, session, monster_templates, dice):
+    """
+    Run a combat round through the local round engine
+
+    The combat model is asked twice: once for the round's intents (see
+    build_intent_prompt, which must be the last message in the history) and
+    once to narrate what the engine resolved. Attack rolls, damage, saves and
+    hit points never go through the model, so the response needs no
+    validation pass and no model calls to update the encounter or the
+    character files.
+
+    Returns:
+        The assistant message for the combat history, a JSON string with
+        narration, combat_round, actions and the resolved outcomes, or None
+        if the model's intents could not be read (the caller then lets the
+        model resolve the round itself)
+    """
+    messages = list(conversation_history)
+    temperature_used = get_combat_temperature(encounter_data, validation_attempt=0)
+    intents_response = None
+    for attempt in range(2):
+        try:
+            response = client.chat.completions.create(
+                model=COMBAT_MAIN_MODEL,
+                temperature=temperature_used,
+                messages=messages
+            )
+            content = response.choices[0].message.content.strip()
+        except Exception as e:
+            error(f"FAILURE: AI call for round intents failed (Attempt {attempt + 1}/2)", exception=e, category="combat_events")
+            continue
+        try:
+            parsed = parse_json_safely(content)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict) and isinstance(parsed.get("intents"), list):
+            intents_response = parsed
+            messages.append({"role": "assistant", "content": content})
+            break
+        messages.extend([
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": "Your previous response was not a valid JSON object with 'combat_round', 'intents' and 'actions' fields. Please provide a valid JSON response."}
+        ])
+    if intents_response is None:
+        warning("ROUND_ENGINE: Could not read the round's intents, letting the model resolve the round", category="combat_events")
+        return None
+
+    # Resolve against the latest combatant files
+    sheets = {}
+    for creature in encounter_data.get("creatures", []):
+        if creature.get("type") == "enemy":
+            sheets[creature["name"]] = monster_templates.get(creature.get("monsterType"))
+        elif creature.get("type") == "player":
+            sheets[creature["name"]] = session.player(creature["name"])
+        elif creature.get("type") == "npc":
+            sheets[creature["name"]] = session.npc(creature["name"])[0]
+
+    result = resolve_round(intents_response["intents"], encounter_data, sheets, dice)
+    apply_round_changes(encounter_data, result.changes)
+    # Saving also records which prerolled dice this round has used
+    if not safe_write_json(session.encounter_path, encounter_data):
+        error(f"FAILURE: Failed to save round results to {session.encounter_path}", category="file_operations")
+    write_round_to_characters(session, encounter_data, result.changes)
+    for outcome in result.outcomes:
+        info(f"ROUND_ENGINE: {outcome}", category="combat_events")
+    for reason in result.unresolved:
+        debug(f"ROUND_ENGINE: Not applied: {reason}", category="combat_events")
+
+    resolution_lines = "\n".join(f"- {outcome}" for outcome in result.outcomes) or "- Nothing needed a roll."
+    resolution_note = f"""DM Note: ROUND RESOLUTION (final and already applied to the game state)
+{resolution_lines}"""
+    if result.unresolved:
+        resolution_note += "\nNot applied:\n" + "\n".join(f"- {reason}" for reason in result.unresolved)
+    resolution_note += """
+
+Narrate these results vividly in initiative order, stopping at my turn or at the end of the round, and engage me creatively. Do not change any number or outcome. If something was not applied because I have not given a roll, ask me for it. Respond with valid JSON only: {"narration": "<narration>"}"""
+    messages.append({"role": "user", "content": resolution_note})
+
+    narration = None
+    try:
+        response = client.chat.completions.create(
+            model=COMBAT_MAIN_MODEL,
+            temperature=temperature_used,
+            messages=messages
+        )
+        parsed = parse_json_safely(response.choices[0].message.content.strip())
+        if isinstance(parsed, dict) and isinstance(parsed.get("narration"), str):
+            narration = parsed["narration"]
+    except Exception as e:
+        error("FAILURE: AI call for round narration failed", exception=e, category="combat_events")
+    if not narration:
+        narration = " ".join(result.outcomes) or "The combatants circle one another, looking for an opening."
+
+    # Hit points are settled; encounter updates from the model would apply them twice
+    actions = [action for action in intents_response.get("actions", [])
+               if isinstance(action, dict) and str(action.get("action", "")).lower() != "updateencounter"]
+    return json.dumps({
+        "narration": narration,
+        "combat_round": intents_response.get("combat_round", dice.prerolls.get("round")),
+        "actions": actions,
+        "resolution": result.outcomes
+    })
+
 def log_conversation_structure(conversation):
     """Log the structure of the conversation history for debugging"""
     debug("VALIDATION: Conversation Structure:", category="combat_validation")
@@ -961,12 +1147,16 @@ def update_json_schema(ai_response, player_info, encounter_data, party_tracker_d
 def generate_chat_history(conversation_history, encounter_id):
     """
     Generate a lightweight combat chat history without system messages
-    for a specific encounter ID
+    for a specific encounter ID. The log files are written by the debug
+    export worker, so the end of combat does not wait on them.
     """
     # Create a formatted timestamp
-    from datetime import datetime
     timestamp = datetime.now().strftime(HISTORY_TIMESTAMP_FORMAT)
+    snapshot = list(conversation_history)
+    debug_exporter.submit(f"combat_logs/{encounter_id}/{timestamp}",
+                          lambda: _write_combat_chat_history(snapshot, encounter_id, timestamp))
 
+def _write_combat_chat_history(conversation_history, encounter_id, timestamp):
     # Create directory for this encounter if it doesn't exist
     encounter_dir = f"combat_logs/{encounter_id}"
     os.makedirs(encounter_dir, exist_ok=True)
@@ -1029,25 +1219,33 @@ def generate_chat_history(conversation_history, encounter_id):
     except Exception as e:
         error(f"FAILURE: Error generating combat chat history", exception=e, category="combat_logs")
 
-def sync_active_encounter():
-    """Sync player and NPC data to the active encounter file if one exists"""
+def sync_active_encounter(session=None):
+    """
+    Sync player and NPC data to the active encounter file if one exists.
+
+    With an EncounterSession, files come from its cache and NPC names are
+    resolved once per combat instead of on every call.
+    """
     from utils.module_path_manager import ModulePathManager
     from utils.encoding_utils import safe_json_load
-    # Get current module from party tracker for consistent path resolution
-    try:
-        party_tracker = safe_json_load("party_tracker.json")
-        current_module = party_tracker.get("module", "").replace(" ", "_") if party_tracker else None
-        path_manager = ModulePathManager(current_module)
-    except:
-        path_manager = ModulePathManager()  # Fallback to reading from file
     
     # Check if there's an active combat encounter
     try:
-        party_tracker = safe_json_load("party_tracker.json")
+        party_tracker = session.party_tracker() if session else safe_json_load("party_tracker.json")
         if not party_tracker:
             error("FAILURE: Failed to load party_tracker.json", category="file_operations")
             return
         
+        # Get current module from party tracker for consistent path resolution
+        if session:
+            path_manager = session.path_manager
+        else:
+            try:
+                current_module = party_tracker.get("module", "").replace(" ", "_")
+                path_manager = ModulePathManager(current_module)
+            except:
+                path_manager = ModulePathManager()  # Fallback to reading from file
+        
         active_encounter_id = party_tracker.get("worldConditions", {}).get("activeCombatEncounter", "")
         if not active_encounter_id:
             # No active encounter, nothing to sync
@@ -1055,7 +1253,10 @@ def sync_active_encounter():
             
         # Load the encounter file
         encounter_file = f"modules/encounters/encounter_{active_encounter_id}.json"
-        encounter_data = safe_json_load(encounter_file)
+        if session and session.encounter_id == active_encounter_id:
+            encounter_data = session.encounter()
+        else:
+            encounter_data = safe_json_load(encounter_file)
         if not encounter_data:
             error(f"FAILURE: Failed to load encounter file: {encounter_file}", category="file_operations")
             return {}
@@ -1066,49 +1267,48 @@ def sync_active_encounter():
         # Update player and NPC data in the encounter
         for creature in encounter_data.get("creatures", []):
             if creature["type"] == "player":
-                player_file = path_manager.get_character_path(normalize_character_name(creature['name']))
                 try:
-                    player_data = safe_json_load(player_file)
+                    if session:
+                        player_data = session.player(creature['name'])
+                    else:
+                        player_data = safe_json_load(path_manager.get_character_path(normalize_character_name(creature['name'])))
+                    character_data = player_data
                     if not player_data:
-                        error(f"FAILURE: Failed to load player file: {player_file}", category="file_operations")
-                        # Update combat-relevant fields
-                        if creature.get("currentHitPoints") != player_data.get("hitPoints"):
-                            creature["currentHitPoints"] = player_data.get("hitPoints")
-                            changes_made = True
-                        if creature.get("maxHitPoints") != player_data.get("maxHitPoints"):
-                            creature["maxHitPoints"] = player_data.get("maxHitPoints")
-                            changes_made = True
-                        if creature.get("status") != player_data.get("status"):
-                            creature["status"] = player_data.get("status")
-                            changes_made = True
-                        if creature.get("conditions") != player_data.get("condition_affected"):
-                            creature["conditions"] = player_data.get("condition_affected", [])
-                            changes_made = True
+                        error(f"FAILURE: Failed to load player file for: {creature['name']}", category="file_operations")
                 except Exception as e:
+                    character_data = None
                     error(f"FAILURE: Failed to sync player data to encounter", exception=e, category="encounter_setup")
                     
             elif creature["type"] == "npc":
                 try:
                     # Use fuzzy matching for NPC loading
-                    npc_data, matched_filename = load_npc_with_fuzzy_match(creature['name'], path_manager)
+                    if session:
+                        npc_data, matched_filename = session.npc(creature['name'])
+                    else:
+                        npc_data, matched_filename = load_npc_with_fuzzy_match(creature['name'], path_manager)
+                    character_data = npc_data
                     if not npc_data:
                         error(f"FAILURE: Failed to load NPC file for: {creature['name']}", category="file_operations")
-                    else:
-                        # Update combat-relevant fields
-                        if creature.get("currentHitPoints") != npc_data.get("hitPoints"):
-                            creature["currentHitPoints"] = npc_data.get("hitPoints")
-                            changes_made = True
-                        if creature.get("maxHitPoints") != npc_data.get("maxHitPoints"):
-                            creature["maxHitPoints"] = npc_data.get("maxHitPoints")
-                            changes_made = True
-                        if creature.get("status") != npc_data.get("status"):
-                            creature["status"] = npc_data.get("status")
-                            changes_made = True
-                        if creature.get("conditions") != npc_data.get("condition_affected"):
-                            creature["conditions"] = npc_data.get("condition_affected", [])
-                            changes_made = True
                 except Exception as e:
+                    character_data = None
                     error(f"FAILURE: Failed to sync NPC data to encounter", exception=e, category="encounter_setup")
+            else:
+                continue
+            
+            if character_data:
+                # Update combat-relevant fields
+                if creature.get("currentHitPoints") != character_data.get("hitPoints"):
+                    creature["currentHitPoints"] = character_data.get("hitPoints")
+                    changes_made = True
+                if creature.get("maxHitPoints") != character_data.get("maxHitPoints"):
+                    creature["maxHitPoints"] = character_data.get("maxHitPoints")
+                    changes_made = True
+                if creature.get("status") != character_data.get("status"):
+                    creature["status"] = character_data.get("status")
+                    changes_made = True
+                if creature.get("conditions") != character_data.get("condition_affected"):
+                    creature["conditions"] = character_data.get("condition_affected", [])
+                    changes_made = True
         
         # Save the encounter file if changes were made
         if changes_made:
@@ -1170,135 +1370,76 @@ def filter_encounter_for_system_prompt(encounter_data):
     debug("STATE_CHANGE: Created minimal encounter data for system prompt", category="combat_events")
     return minimal_data
 
-def compress_old_combat_rounds(conversation_history, current_round, keep_recent_rounds=2):
+def compress_old_combat_rounds(conversation_history, current_round, keep_recent_rounds=2, round_index=None):
     """
     Compress old combat rounds in conversation history to reduce token usage.
     Keeps the last 'keep_recent_rounds' rounds uncompressed for context.
+
+    round_index is the combat's CombatRoundIndex. It only reads messages added
+    since the last call, and starts summarizing the rounds the next call will
+    compress in the background. Without one, the history is indexed from scratch.
     """
     try:
         # Debug logging
         debug(f"COMPRESSION: Called with current_round={current_round}, keep_recent_rounds={keep_recent_rounds}", category="combat_events")
         debug(f"COMPRESSION: Conversation history has {len(conversation_history)} messages", category="combat_events")
         
+        if round_index is None:
+            round_index = CombatRoundIndex(generate_combat_round_summary)
+        round_index.update(conversation_history)
+        
         # Don't compress if we're in early rounds
         if current_round <= keep_recent_rounds:
             debug(f"COMPRESSION: Skipping - too early (round {current_round} <= {keep_recent_rounds})", category="combat_events")
             return conversation_history
         
         # Check if compression is needed
-        rounds_to_compress = []
-        for round_num in range(1, current_round - keep_recent_rounds):
-            # Check if this round is already compressed
-            already_compressed = any(
-                msg.get('role') == 'assistant' and 
-                f"COMBAT ROUND {round_num} SUMMARY:" in msg.get('content', '')
-                for msg in conversation_history
-            )
-            if not already_compressed:
-                rounds_to_compress.append(round_num)
-            else:
-                debug(f"COMPRESSION: Round {round_num} already compressed", category="combat_events")
-        
+        rounds_to_compress = round_index.rounds_to_compress(current_round - keep_recent_rounds)
         if not rounds_to_compress:
             debug("COMPRESSION: No rounds need compression", category="combat_events")
+            round_index.prefetch(current_round + 1 - keep_recent_rounds)
             return conversation_history
         
         debug(f"COMPRESSION: Compressing rounds {rounds_to_compress}", category="combat_events")
         
-        # Find round boundaries
-        round_boundaries = {}
-        current_tracking_round = None
+        # Summaries not started earlier run concurrently
+        round_index.prefetch(current_round - keep_recent_rounds)
         
-        for i, msg in enumerate(conversation_history):
-            content = msg.get('content', '')
-            
-            # Check for combat round markers in DM notes
-            if msg.get('role') == 'user' and 'COMBAT ROUND' in content:
-                match = re.search(r'COMBAT ROUND (\d+)', content)
-                if match:
-                    round_num = int(match.group(1))
-                    if round_num in rounds_to_compress:
-                        current_tracking_round = round_num
-                        if round_num not in round_boundaries:
-                            round_boundaries[round_num] = []
-                        round_boundaries[round_num].append(i)
-            
-            # Check for combat_round field in AI responses
-            elif msg.get('role') == 'assistant' and '"combat_round"' in content:
-                try:
-                    # Extract JSON from content
-                    json_match = re.search(r'\{.*"combat_round"\s*:\s*(\d+).*\}', content, re.DOTALL)
-                    if json_match:
-                        round_num = int(json_match.group(1))
-                        if round_num in rounds_to_compress:
-                            current_tracking_round = round_num
-                            if round_num not in round_boundaries:
-                                round_boundaries[round_num] = []
-                            round_boundaries[round_num].append(i)
-                except:
-                    pass
-            
-            # Continue tracking messages for current round
-            elif current_tracking_round and current_tracking_round in round_boundaries:
-                round_boundaries[current_tracking_round].append(i)
-                
-                # Stop tracking when we hit the next round
-                next_round_match = re.search(r'COMBAT ROUND (\d+)', content)
-                if next_round_match and int(next_round_match.group(1)) != current_tracking_round:
-                    current_tracking_round = None
+        # Map the first message of each summarized round to its summary
+        summary_at = {}
+        dropped_indices = set()
+        for round_num in rounds_to_compress:
+            indices = round_index.round_positions(round_num)
+            summary = round_index.summary(round_num)
+            if summary:
+                summary_at[indices[0]] = (round_num, summary)
+                dropped_indices.update(indices)
+                info(f"COMPRESSION: Compressed round {round_num}", category="combat_events")
         
-        # Compress each round
-        new_conversation = []
-        processed_indices = set()
+        if not summary_at:
+            # Keep original if compression fails
+            return conversation_history
         
+        new_conversation = []
         for i, msg in enumerate(conversation_history):
-            if i in processed_indices:
-                continue
-            
-            # Check if this starts a round to compress
-            round_to_compress = None
-            for round_num, indices in round_boundaries.items():
-                if i == indices[0]:
-                    round_to_compress = round_num
-                    break
-            
-            if round_to_compress:
-                # Extract messages for this round
-                indices = round_boundaries[round_to_compress]
-                round_messages = []
-                for idx in indices:
-                    if idx < len(conversation_history):
-                        round_messages.append(conversation_history[idx])
-                
-                # Generate summary
-                summary = generate_combat_round_summary(round_to_compress, round_messages)
-                
-                if summary:
-                    # Add compressed round
-                    new_conversation.append({
-                        "role": "assistant",
-                        "content": f"COMBAT ROUND {round_to_compress} SUMMARY:\n{json.dumps(summary, indent=2)}"
-                    })
-                    
-                    # Add transition message
-                    if round_to_compress < current_round - keep_recent_rounds:
-                        new_conversation.append({
-                            "role": "user",
-                            "content": f"Round {round_to_compress} ends and Round {round_to_compress + 1} begins"
-                        })
-                    
-                    processed_indices.update(indices)
-                    info(f"COMPRESSION: Compressed round {round_to_compress}", category="combat_events")
-                else:
-                    # Keep original if compression fails
-                    for idx in indices:
-                        new_conversation.append(conversation_history[idx])
-                        processed_indices.add(idx)
-            else:
+            if i in summary_at:
+                round_num, summary = summary_at[i]
+                # Add compressed round
+                new_conversation.append({
+                    "role": "assistant",
+                    "content": f"{SUMMARY_PREFIX.format(round_num)}\n{json.dumps(summary, indent=2)}"
+                })
+                # Add transition message
+                new_conversation.append({
+                    "role": "user",
+                    "content": f"Round {round_num} ends and Round {round_num + 1} begins"
+                })
+            if i not in dropped_indices:
                 # Keep message as-is
                 new_conversation.append(msg)
-                processed_indices.add(i)
         
+        round_index.reset(new_conversation)
+        round_index.prefetch(current_round + 1 - keep_recent_rounds)
         return new_conversation
         
     except Exception as e:
@@ -1358,6 +1499,11 @@ Focus on mechanical accuracy for the actions. For narrative_highlights, extract
 
 def run_combat_simulation(encounter_id, party_tracker_data, location_info):
    """Main function to run the combat simulation"""
+   # The round index and encounter session are closed however the combat ends
+   with ExitStack() as resources:
+       return _run_combat_simulation(encounter_id, party_tracker_data, location_info, resources)
+
+def _run_combat_simulation(encounter_id, party_tracker_data, location_info, resources):
    print(f"\n[COMBAT_MANAGER] ========== COMBAT SIMULATION START ==========")
    print(f"[COMBAT_MANAGER] Encounter ID: {encounter_id}")
    print(f"[COMBAT_MANAGER] Location: {location_info.get('name', 'Unknown')}")
@@ -1389,6 +1535,9 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
        ]
        print("[COMBAT_MANAGER] Starting new combat session.")
    
+   # Round boundaries of the combat history, kept up to date for compression
+   round_index = resources.enter_context(CombatRoundIndex(generate_combat_round_summary))
+   
    # Initialize and reset secondary model histories
    second_model_history = []
    third_model_history = []
@@ -1480,19 +1629,22 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
    
    # Populate the system messages ONLY if it's a new combat session
    if not is_resuming:
-       conversation_history[2]["content"] = f"Player Character:\n{json.dumps(filter_dynamic_fields(player_info), indent=2)}"
-       conversation_history[3]["content"] = f"Monster Templates:\n{json.dumps({k: filter_dynamic_fields(v) for k, v in monster_templates.items()}, indent=2)}"
+       conversation_history[2]["content"] = f"Player Character:\n{encode_section('combat_player', filter_dynamic_fields(player_info))}"
+       conversation_history[3]["content"] = f"Monster Templates:\n{encode_section('combat_monsters', {k: filter_dynamic_fields(v) for k, v in monster_templates.items()})}"
        if not monster_templates and any(c["type"] == "enemy" for c in encounter_data["creatures"]):
            error("FAILURE: No monster templates were loaded!", category="file_operations")
            return None, None
        
-       conversation_history[4]["content"] = f"Location:\n{json.dumps(location_info, indent=2)}"
-       conversation_history.append({"role": "system", "content": f"NPC Templates:\n{json.dumps({k: filter_dynamic_fields(v) for k, v in npc_templates.items()}, indent=2)}"})
-       conversation_history.append({"role": "system", "content": f"Encounter Details:\n{json.dumps(filter_encounter_for_system_prompt(encounter_data), indent=2)}"})
+       conversation_history[4]["content"] = f"Location:\n{encode_section('combat_location', location_info)}"
+       conversation_history.append({"role": "system", "content": f"NPC Templates:\n{encode_section('combat_npcs', {k: filter_dynamic_fields(v) for k, v in npc_templates.items()})}"})
+       conversation_history.append({"role": "system", "content": f"Encounter Details:\n{encode_section('combat_encounter_details', filter_encounter_for_system_prompt(encounter_data))}"})
        
        log_conversation_structure(conversation_history)
        save_json_file(conversation_history_file, conversation_history)
    
+   # Combatant files are cached for the rest of the combat and re-read only after a write
+   session = resources.enter_context(EncounterSession(encounter_id, path_manager, load_npc_with_fuzzy_match))
+   
    # Prepare initial dynamic state info for all creatures
    dynamic_state_parts = []
    
@@ -1521,8 +1673,8 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
            
            # Get the actual max HP from the correct source
            if creature["type"] == "npc":
-               # For NPCs, look up their true max HP from their character file using fuzzy match
-               npc_data, matched_filename = load_npc_with_fuzzy_match(creature_name, path_manager)
+               # For NPCs, look up their true max HP from their character file
+               npc_data, matched_filename = session.npc(creature_name)
                if npc_data:
                    creature_max_hp = npc_data["maxHitPoints"]
                else:
@@ -1542,13 +1694,8 @@ def run_combat_simulation(encounter_id, party_tracker_data, location_info):
    # Initialize round tracking and generate prerolls
    # Use combat_round as primary, fall back to current_round
    round_num = encounter_data.get('combat_round', encounter_data.get('current_round', 1))
-   preroll_text = generate_prerolls(encounter_data, round_num=round_num)
-   
-   encounter_data['preroll_cache'] = {
-       'round': round_num,
-       'rolls': preroll_text,
-       'preroll_id': f"{round_num}-{random.randint(1000,9999)}"
-   }
+   encounter_data['preroll_cache'] = build_preroll_cache(encounter_data, round_num)
+   preroll_text = encounter_data['preroll_cache']['rolls']
    save_json_file(json_file_path, encounter_data)
    debug(f"STATE_CHANGE: Saved prerolls for round {round_num}", category="combat_events")
    
@@ -1689,7 +1836,7 @@ Player: {initial_prompt_text}"""
            status_manager.update_status("", is_processing=False)
        except Exception as e:
            debug(f"Could not clear status: {e}", category="status")
-       sync_active_encounter()
+       sync_active_encounter(session)
        
        # REFRESH CONVERSATION HISTORY WITH LATEST DATA
        debug("STATE_CHANGE: Refreshing conversation history with latest character data...", category="combat_events")
@@ -1700,24 +1847,24 @@ Player: {initial_prompt_text}"""
        player_file = path_manager.get_character_path(player_name)
        try:
            # Load fresh data for conversation history without overwriting player_info
-           fresh_player_data = safe_json_load(player_file)
+           fresh_player_data = session.player(player_info["name"])
            if not fresh_player_data:
                error(f"FAILURE: Failed to load player file: {player_file}", category="file_operations")
            else:
                # Update conversation history with fresh data (same pattern as NPCs)
-               conversation_history[2]["content"] = f"Player Character:\n{json.dumps(filter_dynamic_fields(fresh_player_data), indent=2)}"
+               conversation_history[2]["content"] = f"Player Character:\n{encode_section('combat_player', filter_dynamic_fields(fresh_player_data))}"
        except Exception as e:
            error(f"FAILURE: Failed to reload player file {player_file}", exception=e, category="file_operations")
        
        # Reload encounter data
        json_file_path = f"modules/encounters/encounter_{encounter_id}.json"
        try:
-           encounter_data = safe_json_load(json_file_path)
+           encounter_data = session.encounter()
            if encounter_data:
                # Find and update the encounter data in conversation history
                for i, msg in enumerate(conversation_history):
                    if msg["role"] == "system" and "Encounter Details:" in msg["content"]:
-                       conversation_history[i]["content"] = f"Encounter Details:\n{json.dumps(filter_encounter_for_system_prompt(encounter_data), indent=2)}"
+                       conversation_history[i]["content"] = f"Encounter Details:\n{encode_section('combat_encounter_details', filter_encounter_for_system_prompt(encounter_data))}"
                        break
        except Exception as e:
            error(f"FAILURE: Failed to reload encounter file {json_file_path}", exception=e, category="file_operations")
@@ -1725,8 +1872,8 @@ Player: {initial_prompt_text}"""
        # Reload NPC data
        for creature in encounter_data["creatures"]:
            if creature["type"] == "npc":
-               # Use fuzzy matching for NPC reloading
-               npc_data, matched_filename = load_npc_with_fuzzy_match(creature["name"], path_manager)
+               # NPC names were resolved once; unchanged files come from the cache
+               npc_data, matched_filename = session.npc(creature["name"])
                if npc_data and matched_filename:
                    # Update the NPC in the templates dictionary
                    npc_templates[matched_filename] = npc_data
@@ -1736,7 +1883,7 @@ Player: {initial_prompt_text}"""
        # Replace NPC templates in conversation history (with dynamic fields filtered)
        for i, msg in enumerate(conversation_history):
            if msg["role"] == "system" and "NPC Templates:" in msg["content"]:
-               conversation_history[i]["content"] = f"NPC Templates:\n{json.dumps({k: filter_dynamic_fields(v) for k, v in npc_templates.items()}, indent=2)}"
+               conversation_history[i]["content"] = f"NPC Templates:\n{encode_section('combat_npcs', {k: filter_dynamic_fields(v) for k, v in npc_templates.items()})}"
                break
        
        # Save updated conversation history
@@ -1804,8 +1951,8 @@ Player: {initial_prompt_text}"""
                # Get the actual max HP from the correct source
                npc_data = None
                if creature["type"] == "npc":
-                   # For NPCs, look up their true max HP from their character file using fuzzy match
-                   npc_data, matched_filename = load_npc_with_fuzzy_match(creature_name, path_manager)
+                   # For NPCs, look up their true max HP from their character file
+                   npc_data, matched_filename = session.npc(creature_name)
                    if npc_data:
                        creature_max_hp = npc_data["maxHitPoints"]
                    else:
@@ -1846,12 +1993,8 @@ Player: {initial_prompt_text}"""
        
        if current_round > cached_round:
            # Generate fresh prerolls for new round
-           preroll_text = generate_prerolls(encounter_data, round_num=current_round)
-           encounter_data['preroll_cache'] = {
-               'round': current_round,
-               'rolls': preroll_text,
-               'preroll_id': f"{current_round}-{random.randint(1000,9999)}"
-           }
+           encounter_data['preroll_cache'] = build_preroll_cache(encounter_data, current_round)
+           preroll_text = encounter_data['preroll_cache']['rolls']
            # Save the encounter data with preroll cache to disk
            save_json_file(json_file_path, encounter_data)
            debug(f"STATE_CHANGE: Generated new prerolls for round {current_round}", category="combat_events")
@@ -1863,12 +2006,8 @@ Player: {initial_prompt_text}"""
                debug(f"STATE_CHANGE: Reusing cached prerolls for round {current_round} (ID: {preroll_id})", category="combat_events")
            else:
                # Fallback if cache missing
-               preroll_text = generate_prerolls(encounter_data, round_num=current_round)
-               encounter_data['preroll_cache'] = {
-                   'round': current_round,
-                   'rolls': preroll_text,
-                   'preroll_id': f"{current_round}-{random.randint(1000,9999)}"
-               }
+               encounter_data['preroll_cache'] = build_preroll_cache(encounter_data, current_round)
+               preroll_text = encounter_data['preroll_cache']['rolls']
                # Save the encounter data with preroll cache to disk
                save_json_file(json_file_path, encounter_data)
                debug(f"STATE_CHANGE: Generated fallback prerolls for round {current_round}", category="combat_events")
@@ -1923,11 +2062,20 @@ Your response narratively MUST stop at one of two points:
 
 Do not narrate or process any actions from the next round in this response. The goal is to complete the current round of actions and then pause. If you do need to stop, please engage me creatively so I don't get bored."""
        
+       # With local resolution the model only declares the round; the engine rolls it
+       local_round = getattr(config, "COMBAT_LOCAL_RESOLUTION", True) and 'dice' in encounter_data.get('preroll_cache', {})
+       if local_round:
+           preroll_cache = encounter_data['preroll_cache']
+           round_dice = RoundDice(preroll_cache['dice'], preroll_cache.setdefault('used', {}))
+           round_prompt = build_intent_prompt(current_round, initiative_display, all_dynamic_state, round_dice, user_input_text)
+       else:
+           round_prompt = user_input_with_note
+       
        # Clean old DM notes before adding new user input
        conversation_history = clean_old_dm_notes(conversation_history)
        
        # Add user input to conversation history
-       conversation_history.append({"role": "user", "content": user_input_with_note})
+       conversation_history.append({"role": "user", "content": round_prompt})
        save_json_file(conversation_history_file, conversation_history)
        
        # Get AI response with validation and retries
@@ -1937,7 +2085,17 @@ Do not narrate or process any actions from the next round in this response. The
        validation_attempts = []  # Store all validation attempts for logging
        initial_conversation_length = len(conversation_history)  # Mark where validation started
        
-       for attempt in range(max_retries):
+       if local_round:
+           print("[COMBAT_MANAGER] Resolving round with the local round engine")
+           ai_response = resolve_round_locally(conversation_history, encounter_data, session, monster_templates, round_dice)
+           valid_response = ai_response is not None
+           if not valid_response:
+               # Fall back to the model resolving the round with the prerolled dice
+               conversation_history[-1] = {"role": "user", "content": user_input_with_note}
+               save_json_file(conversation_history_file, conversation_history)
+       
+       # The model resolves and validates the round only when the engine did not
+       for attempt in range(0 if valid_response else max_retries):
            try:
                print(f"[COMBAT_MANAGER] Making AI call for player action (attempt {attempt + 1}/{max_retries})")
                print(f"[COMBAT_MANAGER] Processing player input: {user_input_text[:50]}..." if len(user_input_text) > 50 else f"[COMBAT_MANAGER] Processing player input: {user_input_text}")
@@ -2097,7 +2255,6 @@ Do not narrate or process any actions from the next round in this response. The
            os.makedirs(debug_combat_dir, exist_ok=True)
            
            # Create timestamped filename
-           from datetime import datetime
            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # Remove last 3 digits of microseconds
            encounter_id = encounter_data.get("encounterId", "unknown").replace("/", "_")
            validation_count = len(validation_attempts)
@@ -2174,7 +2331,8 @@ Do not narrate or process any actions from the next round in this response. The
                        compressed_history = compress_old_combat_rounds(
                            conversation_history, 
                            new_round, 
-                           keep_recent_rounds=2
+                           keep_recent_rounds=2,
+                           round_index=round_index
                        )
                        
                        # Save compressed history
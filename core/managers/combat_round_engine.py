@@ -0,0 +1,465 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Combat Round Engine
+
+Resolves the mechanics of a combat round locally. The combat model declares
+what each creature does this round as structured intents ("Goblin 1 attacks
+Norn with its Scimitar", "the shaman's spell forces a DEX save"). This module
+settles them:
+
+- NPC and monster attack rolls and saving throws come from the round's
+  prerolls, damage dice from the generic pool, in order
+- Players roll their own dice; their intents carry the totals they stated
+- Hits are checked against armor class, saves against the DC, and damage
+  is adjusted for resistances, immunities and vulnerabilities
+- Hit points, status and conditions change on a working copy of the
+  encounter's creatures, which the caller writes back
+
+The model then only narrates the outcomes, so a round needs no arithmetic
+from the model and no validation pass to catch its mistakes.
+
+Prerolls are the dict from generate_prerolls.roll_prerolls(). Which dice a
+round has used is kept in a "used" dict next to them, so a round split over
+several player inputs never reuses an attack roll.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from utils.generator_context import make_rng
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("combat_round_engine")
+
+ABILITIES = {
+    "STR": "strength", "DEX": "dexterity", "CON": "constitution",
+    "INT": "intelligence", "WIS": "wisdom", "CHA": "charisma"
+}
+
+_DICE = re.compile(r"^\s*(\d*)\s*d\s*(\d+)\s*(?:([+-])\s*(\d+))?\s*$", re.IGNORECASE)
+# Monster saving throws are listed as "DEX +4" or "Dexterity +4"
+_SAVE_BONUS = re.compile(r"^\s*([A-Za-z]+)\s*([+-]\s*\d+)?\s*$")
+
+def parse_dice(expression: Any) -> Optional[tuple]:
+    """(count, sides, bonus) of a dice expression such as "2d6+3", or None"""
+    if not isinstance(expression, str):
+        return None
+    match = _DICE.match(expression)
+    if not match:
+        return None
+    count, sides, sign, bonus = match.groups()
+    bonus = int(bonus) if bonus else 0
+    return int(count or 1), int(sides), -bonus if sign == "-" else bonus
+
+def ability_key(ability: Any) -> Optional[str]:
+    """Three-letter key of an ability name ("dex", "Dexterity" -> "DEX")"""
+    if not isinstance(ability, str):
+        return None
+    ability = ability.strip().upper()[:3]
+    return ability if ability in ABILITIES else None
+
+class RoundDice:
+    """The round's prerolled dice, handed out in order"""
+
+    def __init__(self, prerolls: Dict[str, Any], used: Optional[Dict[str, Any]] = None, rng=None):
+        """
+        Args:
+            prerolls: Dice from roll_prerolls()
+            used: Dice already spent this round; updated in place
+            rng: Source for extra dice once a generic pool runs out
+        """
+        self.prerolls = prerolls
+        self.used = used if used is not None else {}
+        self.used.setdefault("attacks", {})
+        self.used.setdefault("generic", {})
+        self.rng = make_rng(rng=rng)
+
+    def _creature(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.prerolls.get("creatures", {}).get(name)
+
+    def attack_names(self, name: str) -> List[str]:
+        creature = self._creature(name)
+        return list(creature.get("attack_names", [])) if creature else []
+
+    def attacks_left(self, name: str) -> int:
+        creature = self._creature(name)
+        if not creature:
+            return 0
+        return max(0, len(creature.get("attacks", [])) - self.used["attacks"].get(name, 0))
+
+    def attack(self, name: str) -> Optional[int]:
+        """Next attack roll of a creature, or None if it has no attacks left"""
+        if not self.attacks_left(name):
+            return None
+        index = self.used["attacks"].get(name, 0)
+        self.used["attacks"][name] = index + 1
+        return self._creature(name)["attacks"][index]
+
+    def save(self, name: str, ability: str) -> Optional[int]:
+        """A creature's saving throw die for an ability; the same die all round"""
+        creature = self._creature(name)
+        return creature.get("saves", {}).get(ability) if creature else None
+
+    def roll(self, sides: int) -> int:
+        """Next die from the generic pool, or a fresh one once the pool is spent"""
+        die = f"d{sides}"
+        pool = self.prerolls.get("generic", {}).get(die, [])
+        index = self.used["generic"].get(die, 0)
+        if index < len(pool):
+            self.used["generic"][die] = index + 1
+            return pool[index]
+        return self.rng.randint(1, sides)
+
+    def roll_damage(self, expression: Any, critical: bool = False) -> Optional[int]:
+        """Total of a dice expression, with the dice doubled on a critical hit"""
+        if isinstance(expression, int) and not isinstance(expression, bool):
+            return max(0, expression)
+        dice = parse_dice(expression)
+        if dice is None:
+            return None
+        count, sides, bonus = dice
+        count *= 2 if critical else 1
+        return max(0, sum(self.roll(sides) for _ in range(count)) + bonus)
+
+class RoundResult:
+    """Outcome of a resolved round"""
+
+    def __init__(self):
+        self.outcomes = []    # one line per resolved intent, for the narrator and the log
+        self.unresolved = []  # intents that were not applied, with the reason
+        self.changes = {}     # creature name -> changed fields
+
+class _Unresolved(Exception):
+    """An intent that cannot be applied as stated"""
+
+class _Creature:
+    """Working copy of the fields of one creature a round may change"""
+
+    def __init__(self, creature: Dict[str, Any], sheet: Optional[Dict[str, Any]]):
+        self.name = creature["name"]
+        self.type = creature.get("type")
+        self.sheet = sheet or {}
+        self.original = creature
+        self.hit_points = creature.get("currentHitPoints")
+        self.max_hit_points = creature.get("maxHitPoints")
+        self.status = str(creature.get("status", "alive")).lower()
+        self.conditions = list(creature.get("conditions") or [])
+
+    @property
+    def armor_class(self) -> Optional[int]:
+        value = self.original.get("armorClass", self.sheet.get("armorClass"))
+        return value if isinstance(value, int) else None
+
+    def find_attack(self, name: Any) -> Optional[Dict[str, Any]]:
+        """A monster action or character attack by name; the first attack if name is empty"""
+        attacks = [a for a in (self.sheet.get("actions") or self.sheet.get("attacksAndSpellcasting") or [])
+                   if isinstance(a, dict) and a.get("damageDice")]
+        if not attacks:
+            return None
+        if not name:
+            return attacks[0]
+        wanted = str(name).lower()
+        for attack in attacks:
+            if str(attack.get("name", "")).lower() == wanted:
+                return attack
+        for attack in attacks:
+            attack_name = str(attack.get("name", "")).lower()
+            if attack_name and (attack_name in wanted or wanted in attack_name):
+                return attack
+        return None
+
+    def save_bonus(self, ability: str) -> int:
+        scores = self.sheet.get("abilities") or {}
+        score = scores.get(ABILITIES[ability])
+        bonus = (score - 10) // 2 if isinstance(score, int) else 0
+        for entry in self.sheet.get("savingThrows") or []:
+            match = _SAVE_BONUS.match(str(entry))
+            if not match or ability_key(match.group(1)) != ability:
+                continue
+            if match.group(2):
+                return int(match.group(2).replace(" ", ""))  # monster bonus as listed
+            return bonus + (self.sheet.get("proficiencyBonus") or 0)
+        return bonus
+
+    def adjust_damage(self, amount: int, damage_type: Any) -> int:
+        if not damage_type:
+            return amount
+        damage_type = str(damage_type).lower()
+
+        def listed(field):
+            return any(damage_type in str(entry).lower() for entry in self.sheet.get(field) or [])
+
+        if listed("damageImmunities"):
+            return 0
+        if listed("damageResistances"):
+            amount //= 2
+        if listed("damageVulnerabilities"):
+            amount *= 2
+        return amount
+
+    def take_damage(self, amount: int) -> str:
+        before = self.hit_points
+        self.hit_points = max(0, before - amount)
+        if self.hit_points == 0 and self.status == "alive":
+            if self.type == "enemy":
+                self.status = "dead"
+            else:
+                # Players and allies drop and make death saves; that stays with the narrator
+                self.status = "unconscious"
+                if "unconscious" not in self.conditions:
+                    self.conditions.append("unconscious")
+        return self.describe_hit_points(before)
+
+    def heal(self, amount: int) -> str:
+        before = self.hit_points
+        limit = self.max_hit_points if isinstance(self.max_hit_points, int) else before + amount
+        self.hit_points = min(limit, before + amount)
+        if self.hit_points > 0 and self.status == "unconscious":
+            self.status = "alive"
+            self.conditions = [c for c in self.conditions if c != "unconscious"]
+        return self.describe_hit_points(before)
+
+    def describe_hit_points(self, before: int) -> str:
+        text = f"{self.name} HP {before} -> {self.hit_points}"
+        if self.status != "alive":
+            text += f", {self.status}"
+        return text
+
+    def changes(self) -> Dict[str, Any]:
+        changed = {}
+        if self.hit_points != self.original.get("currentHitPoints"):
+            changed["currentHitPoints"] = self.hit_points
+        if self.status != str(self.original.get("status", "alive")).lower():
+            changed["status"] = self.status
+        if self.conditions != list(self.original.get("conditions") or []):
+            changed["conditions"] = self.conditions
+        return changed
+
+class _Round:
+    def __init__(self, encounter_data: Dict[str, Any], sheets: Dict[str, Any], dice: RoundDice):
+        self.dice = dice
+        self.result = RoundResult()
+        self.creatures = {}
+        for creature in encounter_data.get("creatures", []):
+            if isinstance(creature, dict) and creature.get("name"):
+                self.creatures[creature["name"].lower()] = _Creature(creature, sheets.get(creature["name"]))
+
+    def creature(self, name: Any) -> Optional[_Creature]:
+        if not isinstance(name, str):
+            return None
+        return self.creatures.get(re.sub(r"^the\s+", "", name.strip(), flags=re.IGNORECASE).lower())
+
+    def living(self, name: Any, role: str) -> _Creature:
+        creature = self.creature(name)
+        if creature is None:
+            raise _Unresolved(f"no creature named '{name}' ({role})")
+        if creature.status in ("dead", "defeated"):
+            raise _Unresolved(f"{creature.name} is {creature.status}")
+        if not isinstance(creature.hit_points, int):
+            raise _Unresolved(f"{creature.name} has no hit points on record")
+        return creature
+
+    # ------------------------------------------------------------------
+    # Intents
+    # ------------------------------------------------------------------
+
+    def attack(self, intent: Dict[str, Any]) -> str:
+        attacker = self.living(intent.get("attacker"), "attacker")
+        if attacker.status != "alive":
+            raise _Unresolved(f"{attacker.name} is {attacker.status} and cannot attack")
+        target = self.living(intent.get("target"), "target")
+        armor_class = target.armor_class
+        if armor_class is None:
+            raise _Unresolved(f"{target.name} has no armor class on record")
+
+        if attacker.type == "player":
+            # Players roll their own dice; use the totals they stated
+            total, damage = intent.get("roll"), intent.get("damage")
+            if not isinstance(total, int):
+                raise _Unresolved(f"{attacker.name} has not given an attack roll")
+            natural = intent.get("natural")
+            hit = natural == 20 or (natural != 1 and total >= armor_class)
+            attack_name = intent.get("attack") or "attack"
+            line = f"{attacker.name} attacks {target.name} with {attack_name}: {total} vs AC {armor_class}"
+            if not hit:
+                return f"{line}, miss"
+            if not isinstance(damage, int):
+                raise _Unresolved(f"{attacker.name} hit {target.name} but has not given a damage roll")
+            critical = natural == 20
+            damage_type = intent.get("damage_type")
+        else:
+            attack = attacker.find_attack(intent.get("attack"))
+            if attack is None:
+                if intent.get("attack"):
+                    raise _Unresolved(f"{attacker.name} has no attack named '{intent['attack']}'")
+                raise _Unresolved(f"{attacker.name} has no attacks on record")
+            roll = self.dice.attack(attacker.name)
+            if roll is None:
+                raise _Unresolved(f"{attacker.name} has no attacks left this round")
+            bonus = attack.get("attackBonus") or 0
+            total = roll + bonus
+            critical = roll == 20
+            hit = critical or (roll != 1 and total >= armor_class)
+            line = (f"{attacker.name} attacks {target.name} with {attack.get('name', 'attack')}: "
+                    f"{roll}{bonus:+d} = {total} vs AC {armor_class}")
+            if not hit:
+                return f"{line}, {'natural 1, ' if roll == 1 else ''}miss"
+            damage = self.dice.roll_damage(attack.get("damageDice"), critical=critical)
+            if damage is None:
+                raise _Unresolved(f"{attacker.name}'s {attack.get('name')} has no damage dice")
+            damage += attack.get("damageBonus") or 0
+            damage_type = attack.get("damageType")
+
+        damage = target.adjust_damage(max(0, damage), damage_type)
+        kind = f" {damage_type}" if damage_type else ""
+        return (f"{line}, {'critical hit' if critical else 'hit'} for {damage}{kind} damage "
+                f"({target.take_damage(damage)})")
+
+    def save(self, intent: Dict[str, Any]) -> str:
+        ability = ability_key(intent.get("ability"))
+        if ability is None:
+            raise _Unresolved(f"unknown saving throw ability '{intent.get('ability')}'")
+        source = self.creature(intent.get("source"))
+        dc = intent.get("dc")
+        if not isinstance(dc, int) and source is not None:
+            dc = (source.sheet.get("spellcasting") or {}).get("spellSaveDC")
+        if not isinstance(dc, int):
+            raise _Unresolved("the saving throw has no DC")
+        targets = intent.get("targets") or ([intent["target"]] if intent.get("target") else [])
+        if not targets:
+            raise _Unresolved("the saving throw has no targets")
+
+        # One damage roll for every creature in the effect
+        damage = None
+        if intent.get("damage") is not None:
+            damage = self.dice.roll_damage(intent.get("damage"))
+            if damage is None:
+                raise _Unresolved(f"cannot roll damage '{intent.get('damage')}'")
+        half = intent.get("half_on_success", True)
+        condition = intent.get("condition")
+        stated = intent.get("rolls") or {}
+
+        lines = []
+        for name in targets:
+            try:
+                target = self.living(name, "save target")
+                if target.type == "player":
+                    total = stated.get(target.name)
+                    if not isinstance(total, int):
+                        raise _Unresolved(f"{target.name} has not given a {ability} saving throw")
+                    line = f"{target.name} {ability} save {total} vs DC {dc}"
+                else:
+                    roll = self.dice.save(target.name, ability)
+                    if roll is None:
+                        raise _Unresolved(f"{target.name} has no {ability} saving throw die")
+                    total = roll + target.save_bonus(ability)
+                    line = f"{target.name} {ability} save {roll}{total - roll:+d} = {total} vs DC {dc}"
+            except _Unresolved as e:
+                self.result.unresolved.append(str(e))
+                continue
+            saved = total >= dc
+            line += ", success" if saved else ", failure"
+            if damage is not None:
+                taken = (damage // 2 if half else 0) if saved else damage
+                taken = target.adjust_damage(taken, intent.get("damage_type"))
+                kind = f" {intent['damage_type']}" if intent.get("damage_type") else ""
+                line += f", {taken}{kind} damage ({target.take_damage(taken)})"
+            if condition and not saved and condition not in target.conditions:
+                target.conditions.append(condition)
+                line += f", {condition}"
+            lines.append(line)
+        # Targets that could not save are already listed as unresolved
+        return "; ".join(lines)
+
+    def damage(self, intent: Dict[str, Any]) -> str:
+        target = self.living(intent.get("target"), "target")
+        amount = self.dice.roll_damage(intent.get("amount", intent.get("dice")))
+        if amount is None:
+            raise _Unresolved(f"no damage amount for {target.name}")
+        amount = target.adjust_damage(amount, intent.get("damage_type"))
+        kind = f" {intent['damage_type']}" if intent.get("damage_type") else ""
+        return f"{target.name} takes {amount}{kind} damage ({target.take_damage(amount)})"
+
+    def heal(self, intent: Dict[str, Any]) -> str:
+        target = self.living(intent.get("target"), "target")
+        amount = self.dice.roll_damage(intent.get("amount", intent.get("dice")))
+        if amount is None:
+            raise _Unresolved(f"no healing amount for {target.name}")
+        return f"{target.name} regains {amount} HP ({target.heal(amount)})"
+
+    def condition(self, intent: Dict[str, Any]) -> str:
+        target = self.living(intent.get("target"), "target")
+        condition = str(intent.get("condition") or "").strip().lower()
+        if not condition:
+            raise _Unresolved(f"no condition named for {target.name}")
+        if intent.get("remove"):
+            target.conditions = [c for c in target.conditions if c.lower() != condition]
+            return f"{target.name} is no longer {condition}"
+        if condition not in target.conditions:
+            target.conditions.append(condition)
+        return f"{target.name} is {condition}"
+
+    def status(self, intent: Dict[str, Any]) -> str:
+        target = self.living(intent.get("target"), "target")
+        if target.type != "enemy":
+            raise _Unresolved(f"{target.name} is not an enemy")
+        target.status = "defeated"
+        return f"{target.name} is defeated ({intent.get('status') or 'out of the fight'})"
+
+_HANDLERS = {
+    "attack": _Round.attack,
+    "save": _Round.save,
+    "damage": _Round.damage,
+    "heal": _Round.heal,
+    "condition": _Round.condition,
+    "status": _Round.status
+}
+
+def resolve_round(intents: List[Dict[str, Any]], encounter_data: Dict[str, Any],
+                  sheets: Dict[str, Any], dice: RoundDice) -> RoundResult:
+    """
+    Resolve a round's intents in order
+
+    Args:
+        intents: Intents declared by the combat model
+        encounter_data: Current encounter data (not modified)
+        sheets: Creature name -> monster template or character file
+        dice: The round's dice
+
+    Returns:
+        RoundResult with the outcome lines, unresolved intents and the
+        changes to apply with apply_round_changes()
+    """
+    round_state = _Round(encounter_data, sheets, dice)
+    result = round_state.result
+    for intent in intents or []:
+        if not isinstance(intent, dict):
+            continue
+        handler = _HANDLERS.get(str(intent.get("type", "")).lower())
+        if handler is None:
+            result.unresolved.append(f"unknown intent type '{intent.get('type')}'")
+            continue
+        try:
+            outcome = handler(round_state, intent)
+            if outcome:
+                result.outcomes.append(outcome)
+        except _Unresolved as e:
+            result.unresolved.append(str(e))
+    for creature in round_state.creatures.values():
+        changed = creature.changes()
+        if changed:
+            result.changes[creature.name] = changed
+    debug(f"ROUND_ENGINE: {len(result.outcomes)} outcomes, {len(result.unresolved)} unresolved, "
+          f"{len(result.changes)} creatures changed", category="combat_events")
+    return result
+
+def apply_round_changes(encounter_data: Dict[str, Any], changes: Dict[str, Dict[str, Any]]):
+    """Write resolved changes into the encounter's creatures"""
+    for creature in encounter_data.get("creatures", []):
+        if isinstance(creature, dict) and creature.get("name") in changes:
+            creature.update(changes[creature["name"]])
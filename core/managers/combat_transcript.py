@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Combat Round Index
+
+Tracks which combat round each message of the combat conversation belongs to,
+so compress_old_combat_rounds() no longer rescans and regex-searches the whole
+history every time a round advances.
+
+The index remembers the messages it has already read. update() re-reads only
+what changed since the last call: new messages at the end, or the tail after a
+truncation (the combat loop drops validation retries by slicing the history).
+Messages are compared by identity, so the history list may be reassigned
+freely as long as the message dicts are kept.
+
+A round is complete once a later round has started. Complete rounds can be
+summarized ahead of time in worker threads with prefetch(), so by the time a
+round falls out of the recent window its summary is usually ready.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("combat_transcript")
+
+SUMMARY_PREFIX = "COMBAT ROUND {} SUMMARY:"
+MAX_SUMMARY_WORKERS = 3
+
+_USER_ROUND_MARKER = re.compile(r"COMBAT ROUND (\d+)")
+_ASSISTANT_ROUND_FIELD = re.compile(r'"combat_round"\s*:\s*(\d+)')
+_SUMMARY_MARKER = re.compile(r"COMBAT ROUND (\d+) SUMMARY:")
+
+class CombatRoundIndex:
+    """Incremental map from combat conversation messages to rounds"""
+
+    def __init__(self, summarize: Callable[[int, List[Dict[str, Any]]], Optional[Dict[str, Any]]]):
+        self.summarize = summarize
+        self._messages = []     # messages read so far, in history order
+        self._rounds = []       # round of each message, or None
+        self._tracking = []     # round being tracked after each message
+        self._positions = {}    # round -> positions of its messages
+        self._compressed = {}   # round -> position of its summary message
+        self._pending = {}      # round -> (message ids, future)
+        self._executor = None
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def update(self, conversation_history: List[Dict[str, Any]]):
+        """Catch up with the history, reading only messages not seen before"""
+        common = min(len(conversation_history), len(self._messages))
+        while common and conversation_history[common - 1] is not self._messages[common - 1]:
+            common -= 1
+        if common < len(self._messages):
+            self._truncate(common)
+        for message in conversation_history[common:]:
+            self._append(message)
+
+    def reset(self, conversation_history: List[Dict[str, Any]]):
+        """Re-read a history that was rebuilt, e.g. after compression"""
+        self._truncate(0)
+        self.update(conversation_history)
+
+    def _truncate(self, length: int):
+        for round_num in self._rounds[length:]:
+            if round_num is not None:
+                positions = self._positions[round_num]
+                positions.pop()
+                if not positions:
+                    del self._positions[round_num]
+        del self._messages[length:]
+        del self._rounds[length:]
+        del self._tracking[length:]
+        self._compressed = {r: i for r, i in self._compressed.items() if i < length}
+
+    def _append(self, message: Dict[str, Any]):
+        position = len(self._messages)
+        tracking = self._tracking[-1] if self._tracking else None
+        role = message.get("role")
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = ""
+        round_num = None
+
+        if role == "user" and "COMBAT ROUND" in content:
+            match = _USER_ROUND_MARKER.search(content)
+            if match:
+                round_num = tracking = int(match.group(1))
+        elif role == "assistant" and content.startswith("COMBAT ROUND") and "SUMMARY:" in content:
+            match = _SUMMARY_MARKER.match(content)
+            if match:
+                self._compressed[int(match.group(1))] = position
+            tracking = None
+        elif role == "assistant" and '"combat_round"' in content:
+            match = _ASSISTANT_ROUND_FIELD.search(content)
+            if match:
+                round_num = tracking = int(match.group(1))
+        elif tracking is not None:
+            round_num = tracking
+
+        if round_num is not None:
+            self._positions.setdefault(round_num, []).append(position)
+        self._messages.append(message)
+        self._rounds.append(round_num)
+        self._tracking.append(tracking)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def is_compressed(self, round_num: int) -> bool:
+        return round_num in self._compressed
+
+    def latest_round(self) -> Optional[int]:
+        return max(self._positions, default=None)
+
+    def round_positions(self, round_num: int) -> List[int]:
+        """Positions of a round's messages in the indexed history"""
+        return list(self._positions.get(round_num, []))
+
+    def round_messages(self, round_num: int) -> List[Dict[str, Any]]:
+        return [self._messages[i] for i in self.round_positions(round_num)]
+
+    def rounds_to_compress(self, below_round: int) -> List[int]:
+        """Uncompressed rounds before below_round that have messages"""
+        return sorted(r for r in self._positions if r < below_round and r not in self._compressed)
+
+    # ------------------------------------------------------------------
+    # Summaries
+    # ------------------------------------------------------------------
+
+    def prefetch(self, below_round: int):
+        """Start summarizing complete rounds before below_round in the background"""
+        latest = self.latest_round()
+        if latest is None:
+            return
+        for round_num in self.rounds_to_compress(min(below_round, latest)):
+            messages = self.round_messages(round_num)
+            message_ids = tuple(id(m) for m in messages)
+            pending = self._pending.get(round_num)
+            if pending and pending[0] == message_ids:
+                continue
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MAX_SUMMARY_WORKERS,
+                                                    thread_name_prefix="combat_summary")
+            # Copies, so later in-place cleanup of DM notes cannot race the worker
+            snapshot = [dict(m) for m in messages]
+            self._pending[round_num] = (message_ids, self._executor.submit(self.summarize, round_num, snapshot))
+            debug(f"COMPRESSION: Summarizing round {round_num} in the background", category="combat_events")
+
+    def summary(self, round_num: int) -> Optional[Dict[str, Any]]:
+        """Summary of a round, waiting for a background result if one is running"""
+        messages = self.round_messages(round_num)
+        pending = self._pending.pop(round_num, None)
+        if pending and pending[0] == tuple(id(m) for m in messages):
+            try:
+                return pending[1].result()
+            except Exception as e:
+                warning(f"COMPRESSION: Background summary of round {round_num} failed: {e}", category="combat_events")
+        return self.summarize(round_num, messages)
+
+    def close(self):
+        """Stop the worker threads; unfinished summaries are dropped"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
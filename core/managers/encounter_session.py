@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Encounter Session Cache
+
+Holds the files a combat reads every round: the party tracker, the encounter
+file and the player and NPC character files. Each file is parsed once and
+served from memory until it changes. NPC names are resolved to their
+character file once per encounter, so the fuzzy directory scan in
+load_npc_with_fuzzy_match runs at most once per NPC instead of every round.
+
+A cached file is re-read when:
+- it was written through utils.file_operations (the session listens for
+  writes and marks the file dirty), or
+- its mtime changed, which covers code that writes with plain open()
+
+Every call returns a fresh copy of the cached data, so a caller that changes
+it, as sync_active_encounter does, cannot corrupt the cache. Changes reach
+the session only by writing the file back through safe_write_json, which also
+invalidates the entry. Use the session as a context manager so it stops
+listening for writes however the combat ends.
+"""
+
+import copy
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.encoding_utils import safe_json_load
+from utils.file_operations import add_write_listener, remove_write_listener
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("encounter_session")
+
+PARTY_TRACKER_FILE = "party_tracker.json"
+
+class EncounterSession:
+    """Per-combat cache of encounter and combatant data"""
+
+    def __init__(self, encounter_id: str, path_manager,
+                 resolve_npc: Callable[[str, Any], Tuple[Optional[Dict[str, Any]], Optional[str]]]):
+        """
+        Args:
+            encounter_id: Active encounter id
+            path_manager: ModulePathManager used for character paths
+            resolve_npc: (name, path_manager) -> (npc data, file name), e.g.
+                load_npc_with_fuzzy_match
+        """
+        self.encounter_id = encounter_id
+        self.path_manager = path_manager
+        self.encounter_path = f"modules/encounters/encounter_{encounter_id}.json"
+        self._resolve_npc = resolve_npc
+        self._files = {}      # absolute path -> [mtime, data]
+        self._dirty = set()   # absolute paths written since they were cached
+        self._npc_files = {}  # NPC name -> character file name, or None if not found
+        self.reads = 0        # files actually parsed, for logging
+        add_write_listener(self._on_write)
+
+    def close(self):
+        """Stop listening for writes and drop the cache"""
+        remove_write_listener(self._on_write)
+        self._files.clear()
+        self._dirty.clear()
+        self._npc_files.clear()
+        debug(f"ENCOUNTER_SESSION: Closed session for {self.encounter_id} after {self.reads} file reads",
+              category="encounter_setup")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # File cache
+    # ------------------------------------------------------------------
+
+    def _on_write(self, path: str):
+        if path in self._files:
+            self._dirty.add(path)
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _remember(self, path: str, data: Any):
+        key = os.path.abspath(path)
+        self._dirty.discard(key)
+        self._files[key] = [self._mtime(key), data]
+
+    def read(self, path: str) -> Any:
+        """Copy of the parsed JSON of a file, from the cache unless it changed"""
+        key = os.path.abspath(path)
+        cached = self._files.get(key)
+        mtime = self._mtime(key)
+        if cached is not None and key not in self._dirty and mtime is not None and cached[0] == mtime:
+            return copy.deepcopy(cached[1])
+
+        self._dirty.discard(key)
+        data = safe_json_load(path)
+        self.reads += 1
+        if data is None:
+            self._files.pop(key, None)
+        else:
+            self._files[key] = [mtime, data]
+        return copy.deepcopy(data)
+
+    # ------------------------------------------------------------------
+    # Game data
+    # ------------------------------------------------------------------
+
+    def party_tracker(self) -> Optional[Dict[str, Any]]:
+        return self.read(PARTY_TRACKER_FILE)
+
+    def encounter(self) -> Optional[Dict[str, Any]]:
+        return self.read(self.encounter_path)
+
+    def player(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.read(self.path_manager.get_character_path(name))
+
+    def npc(self, name: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        NPC data by encounter name, resolved to a character file once
+
+        Returns:
+            (npc_data, matched_filename) or (None, None) if not found
+        """
+        if name not in self._npc_files:
+            data, filename = self._resolve_npc(name, self.path_manager)
+            self._npc_files[name] = filename if data else None
+            if data and filename:
+                self._remember(self.path_manager.get_character_path(filename), copy.deepcopy(data))
+            return (data, filename) if data else (None, None)
+
+        filename = self._npc_files[name]
+        if filename is None:
+            return None, None
+        data = self.read(self.path_manager.get_character_path(filename))
+        return (data, filename) if data else (None, None)
@@ -33,7 +33,14 @@ class DMResponseValidator:
             "createNewModule",
             "establishHub",
             "storageInteraction",
-            "exitGame"
+            "exitGame",
+            "levelUp",
+            "moveBackgroundNPC",
+            "saveGame",
+            "restoreGame",
+            "listSaves",
+            "deleteSave",
+            "warfareCombat"
         ]
         
         self.validation_log = []
@@ -204,7 +211,7 @@ class DMResponseValidator:
             if "newLocation" in params:
                 # Validate location ID format
                 loc_id = params["newLocation"]
-                if not re.match(r'^[A-Z]\d{2}$', str(loc_id)):
+                if not re.match(r'^[A-Z]+\d{2,3}$', str(loc_id)):
                     self.log_validation(f"Action {index} location format", False, f"Invalid: {loc_id}")
                     errors.append(f"Action {index}: Invalid location ID format '{loc_id}' (expected like 'A01')")
                 else:
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Validation Policy
+
+Decides whether a DM response needs the model validator or can be accepted
+on local checks alone. Most turns are narration plus updateTime or a
+character update, and the model validator costs a full-model call with the
+area, path and module context every time.
+
+A response is accepted locally when:
+- DMResponseValidator finds no structural, action or parameter errors
+- it contains none of the RISKY_ACTIONS and adds no party NPC
+- every character the narration names as speaking, acting or being
+  introduced is in the party or in the current location's npcs list
+- the narration mentions no NPC the location graph places at another
+  location, whatever it says they do ("Elen nods", "you see Elen")
+- any transitionLocation stays in the current area along a path the
+  location graph knows
+- it is the first attempt of the turn; once the model validator has
+  rejected a response, every retry goes back to it
+
+Everything else, including any response the local checks cannot parse, is
+sent to the model validator as before.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from core.validation.dm_response_validator import DMResponseValidator
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("validation_policy")
+
+# "Marta says", "Old Tobin nodded": a named character speaking or acting
+_NAME = r"[A-Z][\w'\u2019-]+(?:\s+[A-Z][\w'\u2019-]+){0,2}"
+_ACTING = re.compile(
+    rf"\b({_NAME})\s+(?:says|said|asks|asked|replies|replied|answers|answered|whispers|whispered|shouts|shouted|"
+    r"calls|called|mutters|muttered|growls|growled|explains|explained|nods|nodded|smiles|smiled|laughs|laughed|"
+    r"grins|grinned|greets|greeted|steps|stepped|approaches|approached|introduces|introduced|"
+    r"offers|offered|warns|warned|leans|leaned)\b")
+# "a woman named Marta", "introduces herself as Marta", "My name is Marta"
+_INTRODUCED = re.compile(
+    rf"\b(?:named|introduces\s+(?:himself|herself|themselves|themself)\s+as|"
+    rf"introduced\s+(?:himself|herself|themselves|themself)\s+as|name\s+is|I\s+am|I'm)\s+({_NAME})")
+# Capitalized words that are not names: sentence openers, pronouns, titles alone
+_NOT_NAMES = {
+    "a", "an", "the", "he", "she", "they", "it", "you", "we", "i", "his", "her", "their", "your", "my", "our",
+    "this", "that", "these", "those", "then", "suddenly", "finally", "meanwhile", "now", "someone", "everyone",
+    "one", "another", "each", "sir", "lady", "lord", "master", "mistress", "captain", "brother", "sister", "old",
+    "young", "dungeon", "narrator", "elder", "scout", "ranger", "guard", "sergeant", "knight", "commander",
+    "farmer", "baker", "merchant", "blacksmith", "apprentice", "innkeeper", "priest", "priestess", "father",
+    "mother", "hunter", "healer",
+}
+
+# Actions that always go to the model validator, with the reason logged
+RISKY_ACTIONS = {
+    "createNewModule": "module creation",
+    "createEncounter": "combat start",
+    "establishHub": "hub establishment",
+    "updatePartyTracker": "direct party tracker edit",
+    "warfareCombat": "warfare combat",
+    "restoreGame": "save restore",
+    "deleteSave": "save deletion",
+}
+
+def _name_words(name: str) -> List[str]:
+    """Words of a name or place, without possessives ("Harrow's Hollow" -> Harrow, Hollow)"""
+    return [re.sub(r"['\u2019]s$", "", word) for word in re.findall(r"[\w'\u2019-]+", name)]
+
+def _strip_code_fence(response: str) -> str:
+    match = re.match(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", response, re.DOTALL)
+    return match.group(1) if match else response
+
+class ValidationPolicy:
+    """Local pre-validation that lets low-risk DM responses skip the model validator"""
+
+    def __init__(self):
+        self.validator = DMResponseValidator()
+        self.skipped = 0
+        self.validated = 0
+
+    def review(self, response: str, party_tracker_data: Dict[str, Any], location_graph=None,
+               attempt: int = 0, location_data: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        Decide whether a DM response needs the model validator
+
+        Args:
+            response: Raw DM response
+            party_tracker_data: Current party tracker, for the party's location
+            location_graph: LocationGraph for transition checks; transitions go to the model without one
+            attempt: Retry number of this turn's response
+            location_data: Current location, for its npcs list; responses naming characters go to the model without one
+
+        Returns:
+            (needs_model_validation, reason)
+        """
+        needs_model, reason = self._decide(response, party_tracker_data, location_graph, attempt, location_data)
+        if needs_model:
+            self.validated += 1
+        else:
+            self.skipped += 1
+        debug(f"VALIDATION: {'Model validation' if needs_model else 'Local validation only'} - {reason} "
+              f"({self.skipped} skipped, {self.validated} sent to the model this session)", category="ai_validation")
+        return needs_model, reason
+
+    def _decide(self, response: str, party_tracker_data: Dict[str, Any], location_graph,
+                attempt: int, location_data: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        if not getattr(config, "SKIP_LOW_RISK_VALIDATION", True):
+            return True, "skipping disabled"
+        if attempt > 0:
+            return True, f"retry {attempt} of a rejected response"
+
+        try:
+            is_valid, errors, parsed = self.validator.validate_response(_strip_code_fence(response))
+        except (KeyError, TypeError, AttributeError) as e:
+            return True, f"local checks could not run: {e}"
+        if not is_valid:
+            return True, f"local checks failed: {'; '.join(errors[:3])}"
+
+        for action in parsed["actions"]:
+            action_type = action["action"]
+            parameters = action["parameters"]
+            if action_type in RISKY_ACTIONS:
+                return True, RISKY_ACTIONS[action_type]
+            if action_type == "updatePartyNPCs" and parameters.get("operation") != "remove":
+                return True, "party NPC added"
+            if action_type == "transitionLocation":
+                problem = self._transition_problem(parameters.get("newLocation"), party_tracker_data, location_graph)
+                if problem:
+                    return True, problem
+
+        stranger = self._unknown_character(parsed.get("narration"), party_tracker_data, location_data)
+        if stranger:
+            return True, f"narration names {stranger}, who is not at this location"
+        absent = self._absent_character(parsed.get("narration"), party_tracker_data, location_data, location_graph)
+        if absent:
+            return True, f"narration mentions {absent}, who is at another location"
+
+        actions = ", ".join(sorted({action["action"] for action in parsed["actions"]})) or "narration only"
+        return False, f"low risk ({actions})"
+
+    @staticmethod
+    def _present_words(party_tracker_data: Dict[str, Any], location_data: Optional[Dict[str, Any]]) -> set:
+        """Lower-case name words of the party and of the NPCs at the location"""
+        party = party_tracker_data or {}
+        present = [npc.get("name", "") for npc in (location_data or {}).get("npcs", []) if isinstance(npc, dict)]
+        present += [npc.get("name", "") for npc in party.get("partyNPCs", []) if isinstance(npc, dict)]
+        present += [name for name in party.get("partyMembers", []) if isinstance(name, str)]
+        return {word.lower() for name in present for word in _name_words(name)}
+
+    @classmethod
+    def _unknown_character(cls, narration: Any, party_tracker_data: Dict[str, Any],
+                           location_data: Optional[Dict[str, Any]]) -> Optional[str]:
+        """First character the narration names who is neither in the party nor at the location, or None"""
+        if not isinstance(narration, str):
+            return None
+        known_words = cls._present_words(party_tracker_data, location_data)
+
+        for match in list(_ACTING.finditer(narration)) + list(_INTRODUCED.finditer(narration)):
+            words = [word for word in match.group(1).split() if word.lower() not in _NOT_NAMES]
+            # "Kira" is "Scout Kira"; a name counts as known if any of its words is
+            if words and not any(word.lower() in known_words for word in words):
+                return " ".join(words)
+        return None
+
+    @classmethod
+    def _absent_character(cls, narration: Any, party_tracker_data: Dict[str, Any],
+                          location_data: Optional[Dict[str, Any]], location_graph) -> Optional[str]:
+        """First NPC of another location the narration mentions anywhere, or None"""
+        if not isinstance(narration, str) or location_graph is None:
+            return None
+        current_id = (party_tracker_data or {}).get("worldConditions", {}).get("currentLocationId")
+        if location_data is None and current_id in location_graph.nodes:
+            location_data = location_graph.nodes[current_id]["data"]
+        present_words = cls._present_words(party_tracker_data, location_data)
+        # Words of place names ("Harrow" in "Harrow's Hollow") do not identify anyone
+        place_words = {word.lower() for node in location_graph.nodes.values()
+                       for word in _name_words(node.get("location_name") or "")}
+        place_words |= {word.lower() for area in location_graph.area_data.values()
+                        for word in _name_words(area.get("areaName") or "")}
+
+        candidates = {}  # name word -> NPC at another location
+        for location_id, node in location_graph.nodes.items():
+            if location_id == current_id:
+                continue
+            for npc in node["data"].get("npcs", []):
+                name = npc.get("name") if isinstance(npc, dict) else npc
+                if not isinstance(name, str):
+                    continue
+                for word in _name_words(name):
+                    lowered = word.lower()
+                    if len(word) > 2 and word[0].isupper() and lowered not in _NOT_NAMES \
+                            and lowered not in present_words and lowered not in place_words:
+                        candidates.setdefault(word, name)
+        if not candidates:
+            return None
+
+        words = sorted(candidates, key=len, reverse=True)
+        match = re.search(r"(?<![\w'\u2019-])(" + "|".join(map(re.escape, words)) + r")(?![\w-])", narration)
+        return candidates[match.group(1)] if match else None
+
+    @staticmethod
+    def _transition_problem(destination: Any, party_tracker_data: Dict[str, Any], location_graph) -> Optional[str]:
+        """Why a transition needs the model validator, or None if it is a valid move within the area"""
+        if location_graph is None:
+            return "no location graph for the transition check"
+        origin = (party_tracker_data or {}).get("worldConditions", {}).get("currentLocationId")
+        if not origin or not destination:
+            return "transition without origin or destination"
+        cross_area = location_graph.is_cross_area_transition(origin, str(destination))
+        if cross_area is None:
+            return f"unknown transition {origin} -> {destination}"
+        if cross_area:
+            return f"cross-area travel {origin} -> {destination}"
+        success, _, message = location_graph.find_path(origin, str(destination))
+        if not success:
+            return f"no path {origin} -> {destination}: {message}"
+        return None
+
+# Global instance used by main.validate_ai_response
+validation_policy = ValidationPolicy()
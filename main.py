@@ -97,19 +97,17 @@ from updates.plot_update import update_plot
 from utils.player_stats import get_player_stat
 from updates.update_world_time import update_world_time
 from core.ai.conversation_utils import update_conversation_history, update_character_data
+from core.ai.conversation_index import conversation_index
 from updates.update_character_info import update_character_info
+from updates.character_update_queue import coalesce_update_actions
 from core.managers.level_up_manager import LevelUpSession # Add this line
 
 # Import new manager modules
 from core.managers import location_manager
 from utils.location_path_finder import LocationGraph
 from core.ai import action_handler
-from core.ai.cumulative_summary import (
-    generate_enhanced_adventure_summary,
-    update_journal_with_summary,
-    compress_conversation_history_on_transition,
-    check_and_compact_missing_summaries
-)
+from core.ai.cumulative_summary import check_and_compact_missing_summaries
+from core.ai.summary_engine import summary_engine
 from core.managers.status_manager import (
     status_manager, status_ready, status_processing_ai, status_validating,
     status_retrying, status_transitioning_location, status_generating_summary,
@@ -120,7 +118,11 @@ from core.managers.status_manager import (
 # Import atomic file operations
 from utils.file_operations import safe_write_json, safe_read_json
 from utils.module_path_manager import ModulePathManager
+from utils.version_store import version_store
 from core.managers.campaign_manager import CampaignManager
+from utils.usage_ledger import usage_ledger, track_openai_usage, BudgetExceededError
+from core.validation.validation_policy import validation_policy
+from core.ai.narration_stream import narration_stream
 
 # Import training data collection
 # from simple_training_collector import log_complete_interaction  # DISABLED
@@ -139,6 +141,9 @@ from config import (
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Record the token usage of every chat completion, whichever module makes it
+track_openai_usage()
+
 # Initialize location graph for path validation
 location_graph = LocationGraph()
 location_graph.load_module_data()
@@ -212,8 +217,7 @@ def check_and_inject_return_message(conversation_history, is_combat_active=False
         return conversation_history, False
     
     # Check if there are any user messages (game has been played before)
-    user_messages = [msg for msg in conversation_history if msg.get("role") == "user"]
-    if not user_messages:
+    if not conversation_index.update(conversation_history).has("user"):
         debug("STATE_CHANGE: No user messages found, skipping return message injection", category="session_management")
         return conversation_history, False
     
@@ -651,16 +655,7 @@ CRITICAL: If validation fails due to wrong NPC for location, provide specific co
         # print(f"DEBUG: Traceback: {traceback.format_exc()}")
         return f"MODULE VALIDATION DATA: Error loading module data - {str(e)}"
 
-def validate_ai_response(primary_response, user_input, validation_prompt_text, conversation_history, party_tracker_data):
-    print("DEBUG: NPC validation running...")
-    status_validating()
-    # Get the last two messages from the conversation history
-    last_two_messages = conversation_history[-2:]
-
-    # Ensure we have at least two messages
-    while len(last_two_messages) < 2:
-        last_two_messages.insert(0, {"role": "assistant", "content": "Previous context not available."})
-
+def validate_ai_response(primary_response, user_input, validation_prompt_text, conversation_history, party_tracker_data, attempt=0):
     # Get location data from party tracker
     current_location_id = party_tracker_data["worldConditions"]["currentLocationId"]
     current_area_id = party_tracker_data["worldConditions"]["currentAreaId"]
@@ -676,6 +671,21 @@ def validate_ai_response(primary_response, user_input, validation_prompt_text, c
     except (FileNotFoundError, json.JSONDecodeError):
         location_data = None
 
+    # Low-risk responses that pass the local checks skip the validation model
+    needs_model_validation, _ = validation_policy.review(primary_response, party_tracker_data, location_graph, attempt,
+                                                         location_data)
+    if not needs_model_validation:
+        return True
+
+    print("DEBUG: NPC validation running...")
+    status_validating()
+    # Get the last two messages from the conversation history
+    last_two_messages = conversation_history[-2:]
+
+    # Ensure we have at least two messages
+    while len(last_two_messages) < 2:
+        last_two_messages.insert(0, {"role": "assistant", "content": "Previous context not available."})
+
     # Create the location details message
     if location_data:
         location_details = f"Location Details: {location_data['description']} {location_data.get('dmInstructions', '')}"
@@ -744,11 +754,15 @@ def validate_ai_response(primary_response, user_input, validation_prompt_text, c
 
     max_validation_retries = 3
     for attempt in range(max_validation_retries):
-        validation_result = client.chat.completions.create(
-            model=DM_VALIDATION_MODEL, # Use imported model name
-            temperature=TEMPERATURE,
-            messages=validation_conversation
-        )
+        try:
+            validation_result = client.chat.completions.create(
+                model=DM_VALIDATION_MODEL, # Use imported model name
+                temperature=TEMPERATURE,
+                messages=validation_conversation
+            )
+        except BudgetExceededError as e:
+            warning(f"USAGE: Skipping response validation: {e}", category="ai_validation")
+            return True
 
         validation_response = validation_result.choices[0].message.content.strip()
 
@@ -848,22 +862,16 @@ def truncate_dm_notes(conversation_history):
 def check_and_process_location_transitions(conversation_history, party_tracker_data, path_manager):
     """
     Check if there are any unprocessed location transitions in the conversation history
-    and process them to create summaries and compress the history.
+    and schedule a background summary that compresses the location left behind.
     """
     # Find the most recent transition that hasn't been processed yet
-    last_transition_index = None
-    last_transition_content = None
-    
-    for i in range(len(conversation_history) - 1, -1, -1):
-        msg = conversation_history[i]
-        if msg.get("role") == "user" and "Location transition:" in msg.get("content", ""):
-            last_transition_index = i
-            last_transition_content = msg.get("content", "")
-            break
+    index = conversation_index.update(conversation_history)
+    last_transition_index = index.last("location_transition")
     
     if last_transition_index is None:
         # No transitions found
         return conversation_history
+    last_transition_content = conversation_history[last_transition_index].get("content", "")
     
     # Check if this transition has already been processed (has a summary right before it)
     if last_transition_index > 0:
@@ -873,16 +881,9 @@ def check_and_process_location_transitions(conversation_history, party_tracker_d
             return conversation_history
     
     # Check if there's already a summary after this transition
-    # If there are regular conversation messages after the transition, we should process it
-    has_conversation_after = False
-    for i in range(last_transition_index + 1, len(conversation_history)):
-        msg = conversation_history[i]
-        # Skip system messages and DM notes
-        if msg.get("role") == "assistant" or (msg.get("role") == "user" and "Dungeon Master Note:" not in msg.get("content", "")):
-            has_conversation_after = True
-            break
-    
-    if not has_conversation_after:
+    # If there are regular conversation messages (not system messages or DM notes)
+    # after the transition, we should process it
+    if index.first_after("conversation", last_transition_index) is None:
         # No conversation after the transition yet, wait for next round
         return conversation_history
     
@@ -915,51 +916,10 @@ def check_and_process_location_transitions(conversation_history, party_tracker_d
         error(f"FAILURE: Error parsing transition message", exception=e, category="location_transitions")
         return conversation_history
     
-    debug(f"STATE_CHANGE: Processing transition from {leaving_location_name}", category="location_transitions")
-    
-    try:
-        # Generate enhanced adventure summary
-        adventure_summary = generate_enhanced_adventure_summary(
-            conversation_history,
-            party_tracker_data,
-            leaving_location_name
-        )
-        
-        if adventure_summary:
-            # Update journal with the summary
-            update_journal_with_summary(
-                adventure_summary,
-                party_tracker_data,
-                leaving_location_name
-            )
-            
-            # Compress conversation history
-            compressed_history = compress_conversation_history_on_transition(
-                conversation_history,
-                leaving_location_name
-            )
-            
-            # Check if chunked compression is needed after creating the location summary
-            try:
-                from core.ai.chunked_compression_integration import check_and_perform_chunked_compression
-                if check_and_perform_chunked_compression():
-                    debug("SUCCESS: Chunked compression performed after location transition", category="conversation_management")
-                    # Reload the compressed history
-                    compressed_history = load_json_file(json_file) or compressed_history
-            except Exception as e:
-                error(f"FAILURE: Chunked compression check failed", exception=e, category="conversation_management")
-            
-            debug("SUCCESS: Location summary and compression completed", category="location_transitions")
-            return compressed_history
-        else:
-            debug("STATE_CHANGE: No adventure summary generated", category="location_transitions")
-            return conversation_history
-            
-    except Exception as e:
-        error(f"FAILURE: Failed to process location transition", exception=e, category="location_transitions")
-        import traceback
-        traceback.print_exc()
-        return conversation_history
+    # Summarize in the background; the summary is swapped in at a later turn boundary
+    if summary_engine.schedule_location(conversation_history, party_tracker_data, leaving_location_name):
+        debug(f"STATE_CHANGE: Scheduled summary of {leaving_location_name}", category="location_transitions")
+    return conversation_history
 
 def check_and_process_module_transitions(conversation_history, party_tracker_data):
     """
@@ -968,19 +928,13 @@ def check_and_process_module_transitions(conversation_history, party_tracker_dat
     Mirrors the logic of check_and_process_location_transitions().
     """
     # Find the most recent transition that hasn't been processed yet
-    last_transition_index = None
-    last_transition_content = None
-    
-    for i in range(len(conversation_history) - 1, -1, -1):
-        msg = conversation_history[i]
-        if msg.get("role") == "user" and "Module transition:" in msg.get("content", ""):
-            last_transition_index = i
-            last_transition_content = msg.get("content", "")
-            break
+    index = conversation_index.update(conversation_history)
+    last_transition_index = index.last("module_transition")
     
     if last_transition_index is None:
         # No module transitions found
         return conversation_history
+    last_transition_content = conversation_history[last_transition_index].get("content", "")
     
     # Check if this transition has already been processed (has a summary right before it)
     if last_transition_index > 0:
@@ -990,16 +944,9 @@ def check_and_process_module_transitions(conversation_history, party_tracker_dat
             return conversation_history
     
     # Check if there's already conversation after this transition
-    # If there are regular conversation messages after the transition, we should process it
-    has_conversation_after = False
-    for i in range(last_transition_index + 1, len(conversation_history)):
-        msg = conversation_history[i]
-        # Skip system messages and DM notes
-        if msg.get("role") == "assistant" or (msg.get("role") == "user" and "Dungeon Master Note:" not in msg.get("content", "")):
-            has_conversation_after = True
-            break
-    
-    if not has_conversation_after:
+    # If there are regular conversation messages (not system messages or DM notes)
+    # after the transition, we should process it
+    if index.first_after("conversation", last_transition_index) is None:
         # No conversation after the transition yet, wait for next round
         return conversation_history
     
@@ -1245,6 +1192,7 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
 
         if is_levelup_action:
             debug("STATE_CHANGE: levelUp action detected. Suppressing initial narration and starting session.", category="level_up")
+            narration_stream.discard()
             # Process ONLY the levelUp action from the list to start the session.
             # This assumes the first levelUp action is the one to process.
             for action in actions:
@@ -1305,7 +1253,8 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
             full_narration = generate_seamless_transition_narration(departure_narration, arrival_narration)
             
             # Step 5: Display the final, polished narration
-            print(colored("Dungeon Master:", "blue"), colored(full_narration, "blue"))
+            if not narration_stream.finalize(full_narration):
+                print(colored("Dungeon Master:", "blue"), colored(full_narration, "blue"))
             # <--- END OF MODIFIED SECTION --->
 
             # Step 6: Add the final combined narration to history as a single, clean message.
@@ -1324,7 +1273,8 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
         # If not a transition or levelup, proceed with normal processing
         narration = parsed_response.get("narration", "")
         sanitized_narration = sanitize_text(narration)
-        print(colored("Dungeon Master:", "blue"), colored(sanitized_narration, "blue"))
+        if not narration_stream.finalize(sanitized_narration):
+            print(colored("Dungeon Master:", "blue"), colored(sanitized_narration, "blue"))
 
         actions_processed = False
         
@@ -1337,6 +1287,8 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
         
         # Separate updateCharacterInfo actions from others for concurrent processing
         char_update_actions = [action for action in actions if action.get("action") == "updateCharacterInfo"]
+        # One update per character: several changes to the same sheet become one request and one write
+        char_update_actions = coalesce_update_actions(char_update_actions)
         other_actions = [action for action in actions if action.get("action") != "updateCharacterInfo"]
         
         debug(f"STATE_CHANGE: Separated into {len(char_update_actions)} character updates and {len(other_actions)} other actions", category="character_updates")
@@ -1464,7 +1416,8 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
         print(f"Error: Unable to parse AI response as JSON: {e}")
         print(f"Problematic response: {response}")
         sanitized_response = sanitize_text(response)
-        print(colored("Dungeon Master:", "blue"), colored(sanitized_response, "blue"))
+        if not narration_stream.finalize(sanitized_response):
+            print(colored("Dungeon Master:", "blue"), colored(sanitized_response, "blue"))
         # Even in error case, append to history
         assistant_message = {"role": "assistant", "content": response}
         conversation_history.append(assistant_message)
@@ -1475,15 +1428,24 @@ def process_ai_response(response, party_tracker_data, location_data, conversatio
 def save_conversation_history(history):
     try:
         safe_json_dump(history, json_file)
+        conversation_index.save(history)
     except Exception as e:
         error(f"FAILURE: Failed to save conversation history", exception=e, category="file_operations")
 
+def budget_exceeded_response(exc):
+    """A narration-only response telling the player a hard token budget was reached"""
+    warning(f"USAGE: Turn ended by token budget: {exc}", category="ai_processing")
+    narration = (f"[SYSTEM] The token budget for this session has been reached ({exc}). "
+                 "Raise TOKEN_BUDGETS in config.py or start a new session to continue.")
+    return json.dumps({"narration": narration, "actions": []})
+
 def get_ai_response(conversation_history, validation_retry_count=0):
     status_processing_ai()
     
     # Import action predictor and config
     from utils.action_predictor import predict_actions_required, extract_actual_actions, log_prediction_accuracy
     from config import ENABLE_INTELLIGENT_ROUTING, DM_MINI_MODEL, DM_FULL_MODEL, MAX_VALIDATION_RETRIES
+    import config
     
     # Get the last user message for action prediction
     user_input = ""
@@ -1522,12 +1484,40 @@ def get_ai_response(conversation_history, validation_retry_count=0):
             print(f"DEBUG: MODEL ROUTING - Intelligent routing disabled, using FULL MODEL")
     
     # Generate response with selected model
-    response = client.chat.completions.create(
-        model=selected_model,
-        temperature=TEMPERATURE,
-        messages=conversation_history
-    )
-    content = response.choices[0].message.content.strip()
+    if getattr(config, "ENABLE_STREAMING_NARRATION", True):
+        # Show the narration while the rest of the response is generated;
+        # actions are still applied only after validation
+        narration_stream.begin()
+        try:
+            stream = client.chat.completions.create(
+                model=selected_model,
+                temperature=TEMPERATURE,
+                messages=conversation_history,
+                stream=True
+            )
+            parts = []
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    narration_stream.feed(parts[-1])
+        except BudgetExceededError as e:
+            narration_stream.discard()
+            return budget_exceeded_response(e)
+        except Exception:
+            narration_stream.discard()
+            raise
+        narration_stream.end()
+        content = "".join(parts).strip()
+    else:
+        try:
+            response = client.chat.completions.create(
+                model=selected_model,
+                temperature=TEMPERATURE,
+                messages=conversation_history
+            )
+        except BudgetExceededError as e:
+            return budget_exceeded_response(e)
+        content = response.choices[0].message.content.strip()
     
     # Extract actual actions from the response for accuracy tracking (only on initial attempt)
     if validation_retry_count == 0:
@@ -1828,6 +1818,7 @@ def main_game_loop():
             # Generate AI response to the return message for startup narration
             debug("STATE_CHANGE: Generating startup narration after return message injection", category="startup")
             ai_response = get_ai_response(conversation_history)
+            narration_stream.keep()
             if ai_response:
                 conversation_history.append({"role": "assistant", "content": ai_response})
                 save_conversation_history(conversation_history)
@@ -1900,13 +1891,10 @@ def main_game_loop():
             save_conversation_history(conversation_history)
             needs_conversation_history_update = False
 
-        # Your essential cleanup script remains here, running every cycle.
-        # Loop until all unprocessed location transitions are handled
-        while True:
-            original_length = len(conversation_history)
-            conversation_history = check_and_process_location_transitions(conversation_history, party_tracker_data, path_manager)
-            if len(conversation_history) == original_length:
-                break  # No compression occurred, we're done
+        # Turn boundary: swap in summaries finished in the background, then
+        # schedule the location just left, if any
+        conversation_history = summary_engine.apply_ready(conversation_history)
+        conversation_history = check_and_process_location_transitions(conversation_history, party_tracker_data, path_manager)
         save_conversation_history(conversation_history)
         
         # DISABLED: Module summary insertion now handled by inject_campaign_summaries with separate system messages
@@ -1970,6 +1958,9 @@ def main_game_loop():
         else:
             # Reset counter on valid input
             empty_input_count = 0
+        # File versions and model calls made while handling this input are
+        # tagged with its turn
+        usage_ledger.begin_turn(version_store.start_turn())
         
         party_tracker_data = load_json_file("party_tracker.json") 
         
@@ -2345,7 +2336,7 @@ def main_game_loop():
         while retry_count < 5 and not valid_response_received:
             # Pass validation retry count for intelligent model escalation
             ai_response_content = get_ai_response(conversation_history, validation_retry_count=retry_count)
-            validation_result = validate_ai_response(ai_response_content, user_input_text, validation_prompt_text, conversation_history, party_tracker_data)
+            validation_result = validate_ai_response(ai_response_content, user_input_text, validation_prompt_text, conversation_history, party_tracker_data, attempt=retry_count)
             
             if validation_result is True:
                 valid_response_received = True
@@ -2432,11 +2423,13 @@ def main_game_loop():
             elif isinstance(validation_result, str):
                 # (The rest of your validation retry logic remains the same)
                 debug(f"VALIDATION: Validation failed. Reason: {validation_result}", category="ai_validation")
+                narration_stream.discard()
                 status_retrying(retry_count + 1, 5)
                 conversation_history.append({"role": "user", "content": f"Error Note: Your previous response failed validation. Reason: {validation_result}. Please adjust your response accordingly."})
                 retry_count += 1
             else: 
                 warning(f"VALIDATION: Unexpected validation result: {validation_result}. Assuming invalid and retrying.", category="ai_validation")
+                narration_stream.discard()
                 retry_count += 1
         
         if not valid_response_received:
@@ -29,6 +29,7 @@ from pathlib import Path
 from typing import Dict, List, Any, Tuple
 import jsonschema
 from collections import defaultdict
+from utils.schema_registry import schema_registry
 
 class ModuleDebugger:
     def __init__(self):
@@ -91,15 +92,12 @@ class ModuleDebugger:
         ]
         
         for schema_file in schema_files:
-            try:
-                with open(schema_file, 'r') as f:
-                    self.schemas[schema_file] = json.load(f)
-                    self.log_success(f"Loaded schema: {schema_file}")
-            except FileNotFoundError:
+            schema = schema_registry.get_schema(schema_file)
+            if schema is None:
                 self.log_warning(f"Schema not found: {schema_file}")
-            except json.JSONDecodeError as e:
-                self.log_error(f"Invalid JSON in {schema_file}: {e}")
-                return False
+                continue
+            self.schemas[schema_file] = schema
+            self.log_success(f"Loaded schema: {schema_file}")
                 
         return True
     
@@ -163,7 +161,7 @@ class ModuleDebugger:
                 
             if schema_name and schema_name in self.schemas:
                 try:
-                    jsonschema.validate(data, self.schemas[schema_name])
+                    schema_registry.validate(data, self.schemas[schema_name])
                     self.log_success(f"Valid schema: {filename} -> {schema_name}")
                 except jsonschema.ValidationError as e:
                     # Special handling for common enum errors
@@ -193,7 +191,7 @@ class ModuleDebugger:
         if "loca_schema.json" in self.schemas:
             try:
                 location_wrapper = {"locations": data.get("locations", [])}
-                jsonschema.validate(location_wrapper, self.schemas["loca_schema.json"])
+                schema_registry.validate(location_wrapper, self.schemas["loca_schema.json"])
                 self.log_success(f"Valid locations in: {filename}")
             except jsonschema.ValidationError as e:
                 self.log_error(f"Location validation failed for {filename}: {e.message}")
@@ -7,8 +7,10 @@
 """
 Character Backup Restoration Utility
 
-This utility can restore character files from their .bak backups
-when critical fields like currency are missing or corrupted.
+This utility can restore character files when critical fields like
+currency are missing or corrupted. It restores the newest intact version from
+the file's version history (utils.version_store), and falls back to the .bak
+copy left by safe_write_json for files without history.
 """
 
 import json
@@ -16,6 +18,7 @@ import os
 import shutil
 from typing import Dict, Any, Optional
 from utils.file_operations import safe_read_json, safe_write_json
+from utils.version_store import version_store
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -50,6 +53,31 @@ def check_character_integrity(character_data: Dict[str, Any]) -> tuple[bool, lis
     
     return len(issues) == 0, issues
 
+def restore_from_history(file_path: str) -> bool:
+    """
+    Restore the newest recorded version that passes the integrity check
+    
+    Args:
+        file_path: Path to character file
+        
+    Returns:
+        True if a version was restored
+    """
+    for entry in reversed(version_store.versions(file_path)):
+        data = version_store.load(file_path, version=entry["version"])
+        if not isinstance(data, dict):
+            continue
+        is_valid, issues = check_character_integrity(data)
+        if not is_valid:
+            debug(f"Version {entry['version']} has issues: {issues}")
+            continue
+        if data == safe_read_json(file_path):
+            # The current file is this version already; look further back
+            continue
+        info(f"Restoring version {entry['version']} ({entry['timestamp']}, {entry['reason']})")
+        return version_store.restore(file_path, version=entry["version"])
+    return False
+
 def restore_from_backup(file_path: str, force: bool = False) -> bool:
     """
     Restore character file from backup if integrity check fails
@@ -62,9 +90,10 @@ def restore_from_backup(file_path: str, force: bool = False) -> bool:
         True if restoration successful or not needed
     """
     backup_path = f"{file_path}.bak"
+    has_history = version_store.latest_version(file_path) > 0
     
     # Check if backup exists
-    if not os.path.exists(backup_path):
+    if not os.path.exists(backup_path) and not has_history:
         warning(f"No backup found at {backup_path}")
         return False
     
@@ -72,6 +101,10 @@ def restore_from_backup(file_path: str, force: bool = False) -> bool:
     current_data = safe_read_json(file_path)
     if current_data is None:
         error(f"Cannot read current file {file_path}")
+        if has_history and restore_from_history(file_path):
+            return True
+        if not os.path.exists(backup_path):
+            return False
         # Try to restore from backup
         info(f"Attempting to restore from backup...")
         try:
@@ -92,6 +125,13 @@ def restore_from_backup(file_path: str, force: bool = False) -> bool:
     if issues:
         warning(f"Character file has issues: {issues}")
     
+    if has_history:
+        if restore_from_history(file_path):
+            return True
+        warning("No intact version in history, trying .bak backup")
+    if not os.path.exists(backup_path):
+        return False
+    
     # Load and check backup
     backup_data = safe_read_json(backup_path)
     if backup_data is None:
@@ -177,6 +217,9 @@ if __name__ == "__main__":
         info(f"Checking character file: {file_path}")
         
         # Try to find backup
+        versions = version_store.versions(file_path)
+        if versions:
+            info(f"Found {len(versions)} recorded versions (newest v{versions[-1]['version']})")
         backup = find_latest_backup(file_path)
         if backup:
             info(f"Found backup: {backup}")
@@ -0,0 +1,26 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Shared pytest setup
+
+Tests run from the repository root like the game does. A checkout has no
+config.py until the player creates one from config_template.py, so the
+template stands in for it here.
+"""
+
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules["config"] = importlib.import_module("config_template")
@@ -0,0 +1,66 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""BM25 retrieval over chronicles and journal entries"""
+
+import json
+
+from core.ai.campaign_memory import CampaignMemory, format_passages
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def chronicle(summaries, name, sequence, summary, date):
+    write(summaries / f"{name}_summary_{sequence:03d}.json",
+          {"moduleName": name, "sequenceNumber": sequence, "summary": summary, "completionDate": date})
+
+def make_memory(tmp_path, journal_entries=()):
+    summaries = tmp_path / "summaries"
+    summaries.mkdir()
+    chronicle(summaries, "Keep", 1, "The party cleared the old keep. Elen the ranger joined them.", "2024-01-01")
+    chronicle(summaries, "Marsh", 2, "The heroes crossed the marsh and lost the map.", "2024-02-01")
+    journal = tmp_path / "journal.json"
+    write(journal, {"entries": [{"location": "Harbor", "date": "1st", "summary": summary}
+                                for summary in journal_entries]})
+    return CampaignMemory(str(summaries), str(journal), str(tmp_path / "index.json")).refresh()
+
+def test_latest_chronicle_opening_comes_first_even_without_matches(tmp_path):
+    memory = make_memory(tmp_path)
+    passages = memory.retrieve("nothing relevant here", token_budget=1000)
+    assert [p["text"] for p in passages] == ["The heroes crossed the marsh and lost the map."]
+
+def test_relevant_passages_are_returned_in_campaign_order(tmp_path):
+    memory = make_memory(tmp_path)
+    texts = [p["text"] for p in memory.retrieve("Elen ranger", token_budget=1000)]
+    assert texts == ["The party cleared the old keep. Elen the ranger joined them.",
+                     "The heroes crossed the marsh and lost the map."]
+
+def test_retrieval_stays_within_the_token_budget(tmp_path):
+    memory = make_memory(tmp_path, ["Elen haggled with the harbor master over the price of rope. " * 20,
+                                    "Elen slept at the harbor inn."])
+    # Room for the latest chronicle's opening and one short journal entry
+    budget = memory.passages(("chronicle",))[-1]["tokens"] + 12
+    passages = memory.retrieve("Elen harbor", token_budget=budget)
+    assert sum(p["tokens"] for p in passages) <= budget
+    # The long journal entry does not fit, so the short one is taken instead
+    assert "Elen slept at the harbor inn." in [p["text"] for p in passages]
+    assert not any("haggled" in p["text"] for p in passages)
+
+def test_top_k_limits_the_passage_count(tmp_path):
+    memory = make_memory(tmp_path, [f"Elen visited the harbor on day {day}." for day in range(6)])
+    assert len(memory.retrieve("Elen harbor", token_budget=10000, top_k=3)) == 3
+
+def test_passages_already_in_the_prompt_are_skipped(tmp_path):
+    memory = make_memory(tmp_path)
+    passages = memory.retrieve("keep marsh", exclude_text="The heroes crossed the marsh and lost the map.")
+    assert [p["text"] for p in passages] == ["The party cleared the old keep. Elen the ranger joined them."]
+
+def test_refresh_reuses_the_saved_index(tmp_path):
+    memory = make_memory(tmp_path, ["Elen slept at the harbor inn."])
+    reloaded = CampaignMemory(memory.summaries_dir, memory.journal_file, memory.index_path)
+    reloaded._chronicle_passages = None  # any re-read of a chronicle would fail
+    assert reloaded.refresh().passages() == memory.passages()
+    assert format_passages(reloaded.passages(("journal",))) == "--- Journal: Harbor (1st) ---\nElen slept at the harbor inn."
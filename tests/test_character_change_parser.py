@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Local parsing of simple character changes, and the cases it must leave to the model"""
+
+import pytest
+
+from updates.character_change_parser import parse_simple_changes
+
+def make_character(**overrides):
+    character = {
+        "name": "Elara",
+        "status": "alive",
+        "hitPoints": 20,
+        "maxHitPoints": 30,
+        "experience_points": 100,
+        "currency": {"gold": 50, "silver": 5, "copper": 0},
+        "ammunition": [{"name": "Arrows", "quantity": 20}],
+        "condition": "none",
+        "condition_affected": [],
+        "damageResistances": ["fire"],
+        "spellcasting": {"spellSlots": {"level1": {"current": 2, "max": 3}}},
+    }
+    character.update(overrides)
+    return character
+
+@pytest.mark.parametrize("changes, expected", [
+    ("Takes 5 damage", {"hitPoints": 15}),
+    ("Takes 5 points of damage from the falling rocks", {"hitPoints": 15}),
+    ("Heals 4 hit points", {"hitPoints": 24}),
+    ("Gains 50 XP for defeating the wolves", {"experience_points": 150}),
+    ("Spent 10 gold", {"currency": {"gold": 40, "silver": 5, "copper": 0}}),
+    ("Paid 3 gold to the innkeeper", {"currency": {"gold": 47, "silver": 5, "copper": 0}}),
+    ("Found 5 gold in the chest", {"currency": {"gold": 55, "silver": 5, "copper": 0}}),
+    ("Fired 3 arrows", {"ammunition": [{"name": "Arrows", "quantity": -3}]}),
+    ("Expends one 1st-level spell slot", {"spellcasting": {"spellSlots": {"level1": {"current": 1}}}}),
+    ("Is poisoned", {"condition": "poisoned", "condition_affected": ["poisoned"]}),
+    ("Is poisoned by the spider's bite", {"condition": "poisoned", "condition_affected": ["poisoned"]}),
+])
+def test_simple_changes_apply_locally(changes, expected):
+    assert parse_simple_changes(changes, make_character(), "Elara") == expected
+
+def test_subject_prefix_and_several_clauses():
+    updates = parse_simple_changes("Elara takes 3 damage and gains 20 experience points", make_character(), "Elara")
+    assert updates == {"hitPoints": 17, "experience_points": 120}
+
+@pytest.mark.parametrize("changes", [
+    # Trades: the item side is an equipment change
+    "Spent 10 gold for a healing potion",
+    "Spent 10 gold on a healing potion",
+    "Gains 5 gold from selling the dagger",
+    "Paid 20 gold in exchange for the Ring of Protection",
+    "Received 15 gold along with the map",
+    "Bought 10 arrows for 1 gold",
+    "Gave 5 gold to the smith as part of a trade",
+    # Typed damage depends on resistances, immunities and vulnerabilities
+    "Takes 10 fire damage",
+    "Takes 4 damage from the dragon's fiery breath",
+    # Context that carries a condition or effect of its own
+    "Takes 5 damage from a goblin's poisoned dagger",
+    "Takes 3 damage from the stunning blow",
+    "Loses 2 hit points to the curse",
+    "Takes 5 points of poison damage",
+    "Takes 5 guard damage",
+    # Judgement calls
+    "Takes 25 damage",
+    "Spent 100 gold",
+    "Is unconscious",
+    "Is no longer poisoned",
+])
+def test_changes_that_need_the_model(changes):
+    assert parse_simple_changes(changes, make_character(), "Elara") is None
+
+def test_input_is_not_modified():
+    character = make_character()
+    parse_simple_changes("Takes 5 damage and spent 10 gold", character, "Elara")
+    assert character == make_character()
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""One character update per character, with changes in the order they were made"""
+
+from updates.character_update_queue import CharacterUpdateQueue, coalesce_update_actions
+
+def update(name, changes):
+    return {"action": "updateCharacterInfo", "parameters": {"characterName": name, "changes": changes}}
+
+def test_actions_for_one_character_merge_in_order_at_the_first_position():
+    actions = [
+        update("Norn", "Lose 5 hit points"),
+        {"action": "updateTime", "parameters": {"timeEstimate": 10}},
+        update("Elen", "Gain 10 gold"),
+        update("norn", "Gain the poisoned condition"),
+        update("Norn", {"hitPoints": 3}),
+    ]
+    merged = coalesce_update_actions(actions)
+    assert merged == [
+        update("Norn", 'Lose 5 hit points\nGain the poisoned condition\n{"hitPoints": 3}'),
+        {"action": "updateTime", "parameters": {"timeEstimate": 10}},
+        update("Elen", "Gain 10 gold"),
+    ]
+    # The model's own action is not changed in place
+    assert actions[0] == update("Norn", "Lose 5 hit points")
+
+def test_unusable_actions_are_kept_for_the_action_handler():
+    actions = [update("Norn", ""), update(None, "Gain 10 gold"), update("Norn", "Lose 1 hit point")]
+    assert coalesce_update_actions(actions) == actions
+
+def test_queue_flushes_one_update_per_character_in_queue_order():
+    queue = CharacterUpdateQueue()
+    queue.add("Norn", "Remove the blessed condition")
+    queue.add("Elen", "Remove the hasted condition")
+    queue.add("norn", "Remove the poisoned condition")
+    assert len(queue) == 2
+
+    calls = []
+    results = queue.flush(lambda name, changes: calls.append((name, changes)) or name != "Elen")
+    assert calls == [("Norn", "Remove the blessed condition\nRemove the poisoned condition"),
+                     ("Elen", "Remove the hasted condition")]
+    assert results == {"Norn": True, "Elen": False}
+    assert len(queue) == 0
+
+def test_a_failing_update_does_not_stop_the_others():
+    queue = CharacterUpdateQueue()
+    queue.add("Norn", "Lose 1 hit point")
+    queue.add("Elen", "Lose 2 hit points")
+
+    def update_fn(name, changes):
+        if name == "Norn":
+            raise ValueError("model unavailable")
+        return True
+
+    assert queue.flush(update_fn) == {"Norn": False, "Elen": True}
@@ -0,0 +1,191 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Combat rounds resolved locally from the prerolled dice"""
+
+import random
+
+from core.generators.generate_prerolls import format_prerolls, roll_prerolls
+from core.managers.combat_round_engine import RoundDice, apply_round_changes, resolve_round
+
+GOBLIN = {
+    "armorClass": 15,
+    "abilities": {"strength": 8, "dexterity": 14, "constitution": 10,
+                  "intelligence": 10, "wisdom": 8, "charisma": 8},
+    "savingThrows": [],
+    "damageResistances": ["poison"],
+    "actions": [{"name": "Scimitar", "attackBonus": 4, "damageDice": "1d6", "damageBonus": 2,
+                 "damageType": "slashing"}]
+}
+NORN = {
+    "armorClass": 16,
+    "abilities": {"strength": 16, "dexterity": 12, "constitution": 14,
+                  "intelligence": 10, "wisdom": 10, "charisma": 10},
+    "savingThrows": ["Strength", "Constitution"],
+    "proficiencyBonus": 2
+}
+
+def encounter():
+    return {"creatures": [
+        {"name": "Norn", "type": "player", "currentHitPoints": 12, "maxHitPoints": 12, "status": "alive", "conditions": []},
+        {"name": "Goblin 1", "type": "enemy", "monsterType": "goblin", "currentHitPoints": 7, "maxHitPoints": 7, "status": "alive", "conditions": []},
+    ]}
+
+def prerolls(attacks=(14,), saves=None, generic=None):
+    return {
+        "round": 1,
+        "generic": generic or {"d6": [3, 5, 6, 1], "d8": [4]},
+        "creatures": {"Goblin 1": {"type": "enemy", "attacks": list(attacks), "attack_names": ["Scimitar"],
+                                   "saves": saves or {"STR": 10, "DEX": 9, "CON": 4, "INT": 2, "WIS": 7, "CHA": 5}}}
+    }
+
+def resolve(intents, dice=None, data=None):
+    return resolve_round(intents, data or encounter(), {"Norn": NORN, "Goblin 1": GOBLIN}, dice or RoundDice(prerolls()))
+
+def test_monster_attack_uses_the_preroll_and_damage_pool():
+    result = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn", "attack": "scimitar"}])
+    # 14 + 4 = 18 hits AC 16; 1d6 (3) + 2 slashing
+    assert result.outcomes == ["Goblin 1 attacks Norn with Scimitar: 14+4 = 18 vs AC 16, hit for 5 slashing damage "
+                               "(Norn HP 12 -> 7)"]
+    assert result.changes == {"Norn": {"currentHitPoints": 7}}
+
+def test_miss_changes_nothing():
+    result = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}], dice=RoundDice(prerolls((11,))))
+    assert result.outcomes[0].endswith("11+4 = 15 vs AC 16, miss")
+    assert result.changes == {}
+
+def test_critical_hit_doubles_the_dice():
+    result = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}], dice=RoundDice(prerolls((20,))))
+    # 2d6 (3 + 5) + 2
+    assert "critical hit for 10 slashing damage" in result.outcomes[0]
+
+def test_attacks_are_limited_to_the_prerolls_across_calls():
+    used = {}
+    first = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}], dice=RoundDice(prerolls(), used))
+    assert first.outcomes and used["attacks"] == {"Goblin 1": 1}
+    # Later in the same round the goblin has no attack left, and the damage pool moves on
+    second = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}], dice=RoundDice(prerolls(), used))
+    assert second.outcomes == []
+    assert second.unresolved == ["Goblin 1 has no attacks left this round"]
+    assert used["generic"] == {"d6": 1}
+
+def test_player_attack_uses_the_stated_rolls_and_kills_the_enemy():
+    result = resolve([{"type": "attack", "attacker": "Norn", "target": "Goblin 1", "attack": "longsword",
+                       "roll": 17, "damage": 9}])
+    assert result.outcomes == ["Norn attacks Goblin 1 with longsword: 17 vs AC 15, hit for 9 damage "
+                               "(Goblin 1 HP 7 -> 0, dead)"]
+    assert result.changes == {"Goblin 1": {"currentHitPoints": 0, "status": "dead"}}
+
+def test_player_attack_without_a_roll_is_left_for_the_player():
+    result = resolve([{"type": "attack", "attacker": "Norn", "target": "Goblin 1"}])
+    assert result.unresolved == ["Norn has not given an attack roll"]
+    assert result.changes == {}
+
+def test_dead_creatures_do_not_act():
+    data = encounter()
+    data["creatures"][1].update(currentHitPoints=0, status="dead")
+    result = resolve([{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}], data=data)
+    assert result.unresolved == ["Goblin 1 is dead"]
+
+def test_save_uses_preroll_bonus_half_damage_and_resistance():
+    intents = [{"type": "save", "source": "Norn", "targets": ["Goblin 1"], "ability": "dex", "dc": 10,
+                "damage": "2d6", "damage_type": "fire"},
+               {"type": "save", "source": "Norn", "targets": ["Goblin 1"], "ability": "CON", "dc": 10,
+                "damage": 6, "damage_type": "poison", "condition": "poisoned"}]
+    result = resolve(intents)
+    # DEX 9 + 2 = 11 saves: half of 2d6 (3 + 5) fire
+    assert result.outcomes[0] == "Goblin 1 DEX save 9+2 = 11 vs DC 10, success, 4 fire damage (Goblin 1 HP 7 -> 3)"
+    # CON 4 + 0 fails: 6 poison, halved by resistance, and poisoned
+    assert result.outcomes[1] == ("Goblin 1 CON save 4+0 = 4 vs DC 10, failure, 3 poison damage "
+                                  "(Goblin 1 HP 3 -> 0, dead), poisoned")
+
+def test_player_save_needs_the_stated_roll_and_drops_to_unconscious():
+    intent = {"type": "save", "source": "Goblin 1", "targets": ["Norn"], "ability": "CON", "dc": 15, "damage": 20}
+    assert resolve([intent]).unresolved == ["Norn has not given a CON saving throw"]
+    result = resolve([dict(intent, rolls={"Norn": 14})])
+    assert result.changes == {"Norn": {"currentHitPoints": 0, "status": "unconscious", "conditions": ["unconscious"]}}
+
+def test_healing_wakes_an_unconscious_character():
+    data = encounter()
+    data["creatures"][0].update(currentHitPoints=0, status="unconscious", conditions=["unconscious"])
+    result = resolve([{"type": "heal", "target": "Norn", "dice": "1d8"}], data=data)
+    assert result.outcomes == ["Norn regains 4 HP (Norn HP 0 -> 4)"]
+    apply_round_changes(data, result.changes)
+    assert data["creatures"][0] == {"name": "Norn", "type": "player", "currentHitPoints": 4, "maxHitPoints": 12,
+                                    "status": "alive", "conditions": []}
+
+def test_unknown_creatures_and_intents_are_reported():
+    result = resolve([{"type": "attack", "attacker": "Goblin 9", "target": "Norn"}, {"type": "dance"}])
+    assert result.unresolved == ["no creature named 'Goblin 9' (attacker)", "unknown intent type 'dance'"]
+
+def test_rolled_prerolls_match_their_text():
+    data = {"creatures": [{"name": "Hero", "type": "player"},
+                          {"name": "Wolf", "type": "enemy", "numAttacks": 2, "attacks": [{"name": "bite"}, {"name": "claw"}]}]}
+    dice = roll_prerolls(data, round_num=3, rng=random.Random(1))
+    wolf = dice["creatures"]["Wolf"]
+    assert wolf["attack_names"] == ["bite", "claw"] and len(wolf["attacks"]) == 2
+    assert f"Wolf: Attack[{wolf['attacks'][0]}], Attack[{wolf['attacks'][1]}] (2 attacks available: bite, claw)" \
+        in format_prerolls(dice)
+
+class _Reply:
+    def __init__(self, content):
+        self.choices = [type("Choice", (), {"message": type("Message", (), {"content": content})()})()]
+
+class _Session:
+    def __init__(self, tmp_path):
+        self.encounter_path = str(tmp_path / "encounter.json")
+        self.path_manager = type("Paths", (), {"get_character_path": lambda _, name: str(tmp_path / f"{name}.json")})()
+        self.characters = {"Norn": dict(NORN, name="Norn", hitPoints=12, status="alive")}
+
+    def player(self, name):
+        return self.characters.get(name)
+
+    def npc(self, name):
+        return None, None
+
+def test_local_round_asks_for_intents_then_narration(tmp_path, monkeypatch):
+    import json
+    from core.managers import combat_manager
+
+    replies = [
+        json.dumps({"combat_round": 1, "intents": [{"type": "attack", "attacker": "Goblin 1", "target": "Norn"}],
+                    "actions": [{"action": "updateEncounter", "parameters": {"changes": "Norn takes 5 damage"}}]}),
+        json.dumps({"narration": "The goblin's scimitar bites into Norn's shoulder."}),
+    ]
+    prompts = []
+
+    def create(model, temperature, messages):
+        prompts.append(messages[-1]["content"])
+        return _Reply(replies[len(prompts) - 1])
+
+    monkeypatch.setattr(combat_manager.client.chat.completions, "create", create)
+    session, data, cache = _Session(tmp_path), encounter(), {"dice": prerolls()}
+    data["preroll_cache"] = cache
+    dice = RoundDice(cache["dice"], cache.setdefault("used", {}))
+
+    response = json.loads(combat_manager.resolve_round_locally(
+        [{"role": "user", "content": "intent prompt"}], data, session, {"goblin": GOBLIN}, dice))
+
+    assert response["narration"] == "The goblin's scimitar bites into Norn's shoulder."
+    assert response["resolution"] == ["Goblin 1 attacks Norn with Scimitar: 14+4 = 18 vs AC 16, hit for 5 slashing "
+                                      "damage (Norn HP 12 -> 7)"]
+    # The model's own encounter update would apply the damage twice
+    assert response["actions"] == []
+    assert "hit for 5 slashing damage" in prompts[1]
+    with open(session.encounter_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["creatures"][0]["currentHitPoints"] == 7
+    assert saved["preroll_cache"]["used"]["attacks"] == {"Goblin 1": 1}
+    with open(tmp_path / "Norn.json", encoding="utf-8") as f:
+        assert json.load(f)["hitPoints"] == 7
+
+def test_unreadable_intents_fall_back_to_the_model(tmp_path, monkeypatch):
+    from core.managers import combat_manager
+
+    monkeypatch.setattr(combat_manager.client.chat.completions, "create",
+                        lambda model, temperature, messages: _Reply("The goblin attacks!"))
+    data = encounter()
+    assert combat_manager.resolve_round_locally([], data, _Session(tmp_path), {}, RoundDice(prerolls())) is None
+    assert data == encounter()
@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Positional tag index over the conversation history"""
+
+import json
+
+from core.ai.conversation_index import ConversationIndex, history_signature
+
+def history():
+    return [
+        {"role": "system", "content": "Current module: Keep of Doom"},
+        {"role": "user", "content": "Location transition: Gate to Courtyard"},
+        {"role": "assistant", "content": "You step into the courtyard."},
+        {"role": "user", "content": "Dungeon Master Note: the party rests"},
+    ]
+
+def test_signature_covers_content_not_just_length():
+    edited = history()
+    edited[2]["content"] = "You step into the cellar...."
+    assert len(edited[2]["content"]) == len(history()[2]["content"])
+    assert history_signature(edited) != history_signature(history())
+    assert history_signature(history()) == history_signature(history())
+
+def test_saved_index_is_reused_for_the_same_history(tmp_path):
+    path = str(tmp_path / "index.json")
+    ConversationIndex(path).save(history())
+
+    index = ConversationIndex(path)
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    # Tags are taken from the file rather than reclassified
+    saved["tags"][2] = "assistant,conversation,marked"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    index.update(history())
+    assert index.positions("marked") == [2]
+
+def test_same_length_edit_is_reclassified(tmp_path):
+    path = str(tmp_path / "index.json")
+    ConversationIndex(path).save(history())
+
+    edited = history()
+    # Same length as the note it replaces, but no longer a DM note
+    edited[3]["content"] = "Location transition: Hall to Tower!!"
+    index = ConversationIndex(path).update(edited)
+    assert index.positions("dm_note") == []
+    assert index.positions("location_transition") == [1, 3]
@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""chat_history.json appended to while the history grows, rewritten when it changes"""
+
+import json
+
+from utils.debug_exports import ChatHistoryExport
+
+def message(role, content):
+    return {"role": role, "content": content}
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_growing_history_is_appended_in_the_usual_format(tmp_path):
+    path = str(tmp_path / "chat_history.json")
+    export = ChatHistoryExport(path)
+    history = [message("user", "I open the door")]
+    assert export.write(history) == "rewritten"
+    assert export.write(history) == "unchanged"
+
+    history = history + [message("assistant", "The door creaks \"open\"."), message("user", "I step in")]
+    assert export.write(history) == "appended"
+    assert read(path) == json.dumps(history, indent=2)
+
+def test_messages_edited_in_place_are_rewritten(tmp_path):
+    path = str(tmp_path / "chat_history.json")
+    export = ChatHistoryExport(path)
+    history = [message("user", "I open the door"), message("assistant", "It opens.")]
+    export.write(history)
+
+    # Same list and dicts, new content, as when main.py trims DM notes
+    history[1]["content"] = "The door opens."
+    assert export.write(history) == "rewritten"
+    assert json.loads(read(path)) == history
+
+    history[0]["content"] = "I kick the door"
+    history.append(message("user", "I step in"))
+    assert export.write(history) == "rewritten"
+    assert json.loads(read(path)) == history
+
+def test_shorter_history_is_rewritten(tmp_path):
+    path = str(tmp_path / "chat_history.json")
+    export = ChatHistoryExport(path)
+    export.write([message("user", "one"), message("assistant", "two")])
+    assert export.write([message("user", "one")]) == "rewritten"
+    assert json.loads(read(path)) == [message("user", "one")]
+
+def test_unexpected_file_ending_falls_back_to_a_rewrite(tmp_path):
+    path = tmp_path / "chat_history.json"
+    export = ChatHistoryExport(str(path))
+    history = [message("user", "one")]
+    export.write(history)
+    path.write_text("[]  ", encoding="utf-8")
+    history = history + [message("assistant", "two")]
+    assert export.write(history) == "rewritten"
+    assert json.loads(read(path)) == history
@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Local effect classification, and the changes it must leave to the model"""
+
+import pytest
+
+from updates.effect_classifier import classify_effect
+
+NOT_TRACKED = {"should_track": False, "effect": {}}
+
+def test_explicit_duration_is_tracked():
+    result = classify_effect("Gains 3 vigour for 1 hour from the mead of the fair folk")
+    assert result["should_track"]
+    assert (result["effect"]["stat"], result["effect"]["value"]) == ("vigour", 3)
+
+def test_known_spell_on_the_character_is_tracked():
+    result = classify_effect("Is under the effect of Aid")
+    assert result["should_track"]
+    assert result["effect"]["stat"] == "hitPoints"
+
+@pytest.mark.parametrize("changes", [
+    "Takes 5 damage",
+    "Spent 10 gold",
+    "Expends one 1st-level spell slot",
+    # Endings and running effects are not new effects
+    "Shield of Faith ends",
+    "Aid spell expired",
+    "Bless wears off after the fight",
+    "Also, the Aid spell still holds",
+])
+def test_changes_that_are_not_effects(changes):
+    assert classify_effect(changes) == NOT_TRACKED
+
+@pytest.mark.parametrize("changes", [
+    # The caster is not the target
+    "Used a 2nd-level spell slot to cast Aid on Elara and Brom",
+    "Cast Shield of Faith on Elara",
+    "Thane casts Aid on Elara",
+    # Several effects in one change
+    "Gains 2 HP for 10 minutes and 3 vigour for 1 hour",
+    "Gains +2 AC and +1 vigour for 10 minutes",
+    "Gains +2 AC for 10 minutes; +1 to attack rolls for 1 hour",
+])
+def test_changes_that_need_the_model(changes):
+    assert classify_effect(changes) is None
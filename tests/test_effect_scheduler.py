@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Expiry scheduling, including trackers rewritten outside the scheduler"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import updates.update_character_effects as character_effects
+from updates.effect_scheduler import SCHEDULE_KEY, EffectScheduler
+
+START = datetime(2000, 1, 5, 12, 0, 0)
+
+def modifier(effect_id, expires_at, value=2):
+    expires = expires_at if isinstance(expires_at, str) else expires_at.isoformat()
+    return {"id": effect_id, "stat": "hitPoints", "value": value, "source": effect_id, "expires_at": expires}
+
+def tracker(*modifiers, character="elara"):
+    return {"characters": {character: {"modifiers": list(modifiers)}}}
+
+def test_pop_due_returns_expired_effects_in_order():
+    scheduler = EffectScheduler()
+    data = tracker(modifier("late", START + timedelta(hours=2)), modifier("early", START + timedelta(minutes=10)),
+                   modifier("rest", "long_rest"))
+    scheduler.load(data)
+    assert scheduler.next_expiry() == START + timedelta(minutes=10)
+    assert not scheduler.has_due(START)
+
+    due = scheduler.pop_due(data, START + timedelta(hours=3))
+    assert [m["id"] for _, m in due] == ["early", "late"]
+    assert [m["id"] for m in data["characters"]["elara"]["modifiers"]] == ["rest"]
+    assert data[SCHEDULE_KEY] == []
+
+def test_rest_effects_are_cleared_by_the_matching_rest():
+    scheduler = EffectScheduler()
+    data = tracker(modifier("short", "short_rest"), modifier("long", "long_rest"))
+    assert [m["id"] for m in scheduler.pop_rest_effects(data, "elara", "short_rest")] == ["short"]
+    assert [m["id"] for m in scheduler.pop_rest_effects(data, "elara", "long_rest")] == ["long"]
+
+def test_stale_persisted_schedule_is_rebuilt():
+    scheduler = EffectScheduler()
+    data = tracker(modifier("a", START + timedelta(minutes=5)))
+    data[SCHEDULE_KEY] = [[0, "elara", "gone"]]
+    scheduler.load(data)
+    assert data[SCHEDULE_KEY] == [[(START + timedelta(minutes=5) - datetime(2000, 1, 1)).total_seconds(), "elara", "a"]]
+
+@pytest.fixture
+def effects_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "effects_tracker.json")
+    clock = {"now": START}
+    monkeypatch.setattr(character_effects, "EFFECTS_TRACKER_FILE", path)
+    monkeypatch.setattr(character_effects, "effect_scheduler", EffectScheduler())
+    monkeypatch.setattr(character_effects, "get_current_game_time", lambda: clock["now"])
+    return path, clock
+
+def write_externally(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    # Make sure the stamp changes even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def test_expiry_follows_a_tracker_rewritten_elsewhere(effects_file):
+    path, clock = effects_file
+    write_externally(path, tracker(modifier("bless", START + timedelta(hours=1))))
+    assert character_effects.check_and_apply_expirations() == []
+
+    # A reset or migration replaces the tracker behind the scheduler's back
+    write_externally(path, tracker(modifier("aid", START + timedelta(minutes=30))))
+    clock["now"] = START + timedelta(minutes=45)
+    expired = character_effects.check_and_apply_expirations()
+    assert [r["modifier"]["id"] for r in expired] == ["aid"]
+
+    # The removed effect is never expired
+    clock["now"] = START + timedelta(hours=2)
+    assert character_effects.check_and_apply_expirations() == []
+
+def test_own_saves_do_not_force_a_reload(effects_file, monkeypatch):
+    path, clock = effects_file
+    write_externally(path, tracker(modifier("bless", START + timedelta(minutes=10))))
+    character_effects.check_and_apply_expirations()
+
+    loads = []
+    original = character_effects.load_effects_tracker
+    monkeypatch.setattr(character_effects, "load_effects_tracker", lambda: loads.append(1) or original())
+    assert character_effects.check_and_apply_expirations() == []
+    assert loads == []
@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Local encounter bookkeeping, and the changes it must leave to the model"""
+
+import pytest
+
+from updates.encounter_change_parser import resolve_encounter_changes
+
+def make_encounter():
+    return {
+        "encounterId": "T01-E1",
+        "creatures": [
+            {"name": "Elara", "type": "player", "currentHitPoints": 20, "maxHitPoints": 30, "status": "alive"},
+            {"name": "Goblin", "type": "enemy", "currentHitPoints": 7, "maxHitPoints": 7, "status": "alive"},
+            {"name": "Goblin Archer", "type": "enemy", "currentHitPoints": 5, "maxHitPoints": 9, "status": "alive"},
+            {"name": "Wolf 1", "type": "enemy", "currentHitPoints": 11, "maxHitPoints": 11, "status": "alive"},
+            {"name": "Wolf 2", "type": "enemy", "currentHitPoints": 11, "maxHitPoints": 11, "status": "alive"},
+        ],
+    }
+
+@pytest.mark.parametrize("changes, expected", [
+    ("Goblin takes 3 damage", [{"name": "Goblin", "currentHitPoints": 4}]),
+    # The quoted arithmetic is recomputed from the encounter file
+    ("Goblin takes 3 damage (HP 10 -> 7)", [{"name": "Goblin", "currentHitPoints": 4}]),
+    ("Goblin Archer takes 7 damage and is slain", [{"name": "Goblin Archer", "currentHitPoints": 0, "status": "dead"}]),
+    ("Wolf 2 flees", [{"name": "Wolf 2", "status": "defeated"}]),
+    ("Goblin Archer regains 2 HP", [{"name": "Goblin Archer", "currentHitPoints": 7}]),
+    ("Goblin takes 2 more damage", [{"name": "Goblin", "currentHitPoints": 5}]),
+    # Players are synced from their character files
+    ("Elara takes 4 damage", []),
+])
+def test_simple_changes_resolve_locally(changes, expected):
+    assert resolve_encounter_changes(changes, make_encounter()) == {"creatures": expected}
+
+@pytest.mark.parametrize("changes", [
+    # Resistances and immunities are not in the encounter file
+    "Goblin takes 7 fire damage",
+    "Wolf 1 is hit for 4 piercing damage",
+    "Goblin Archer suffers 3 points of radiant damage",
+    # Nonlethal damage knocks out rather than kills
+    "Goblin takes 7 nonlethal damage",
+    "Goblin takes 7 non-lethal damage",
+    # Unknown creatures and free text
+    "Hobgoblin takes 3 damage",
+    "Goblin is grappled by Elara",
+])
+def test_changes_that_need_the_model(changes):
+    assert resolve_encounter_changes(changes, make_encounter()) is None
+
+def test_input_is_not_modified():
+    encounter = make_encounter()
+    resolve_encounter_changes("Goblin takes 7 damage and Wolf 1 flees", encounter)
+    assert encounter == make_encounter()
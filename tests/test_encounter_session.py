@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Combatant files cached for the length of an encounter"""
+
+import json
+
+from core.managers.encounter_session import EncounterSession
+from utils.file_operations import atomic_writer, safe_write_json
+
+class _Paths:
+    def __init__(self, root):
+        self.root = root
+
+    def get_character_path(self, name):
+        return str(self.root / f"{name}.json")
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def make_session(tmp_path, resolved=None):
+    def resolve_npc(name, path_manager):
+        resolved.append(name)
+        with open(path_manager.get_character_path("elen"), encoding="utf-8") as f:
+            return json.load(f), "elen"
+    return EncounterSession("E1", _Paths(tmp_path), resolve_npc)
+
+def test_changing_returned_data_does_not_change_the_cache(tmp_path):
+    write(tmp_path / "norn.json", {"name": "Norn", "hitPoints": 12})
+    with make_session(tmp_path) as session:
+        player = session.player("norn")
+        player["hitPoints"] = 0
+        assert session.player("norn")["hitPoints"] == 12
+        assert session.reads == 1
+
+def test_writes_through_the_file_layer_are_read_back(tmp_path):
+    path = str(tmp_path / "norn.json")
+    write(path, {"name": "Norn", "hitPoints": 12})
+    with make_session(tmp_path) as session:
+        player = session.player("norn")
+        player["hitPoints"] = 5
+        assert safe_write_json(path, player, create_backup=False, acquire_lock=False)
+        assert session.player("norn")["hitPoints"] == 5
+        assert session.reads == 2
+
+def test_npc_name_is_resolved_once(tmp_path):
+    write(tmp_path / "elen.json", {"name": "Elen", "maxHitPoints": 9})
+    resolved = []
+    with make_session(tmp_path, resolved) as session:
+        first, filename = session.npc("Elen the Scout")
+        first["maxHitPoints"] = 1
+        second, _ = session.npc("Elen the Scout")
+    assert filename == "elen"
+    assert second["maxHitPoints"] == 9
+    assert resolved == ["Elen the Scout"]
+
+def test_leaving_the_session_stops_listening_for_writes(tmp_path):
+    session = make_session(tmp_path)
+    with session:
+        assert session._on_write in atomic_writer.write_listeners
+    assert session._on_write not in atomic_writer.write_listeners
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Seeded generation is reproducible through every generator that takes a context stream"""
+
+from core.generators.generate_prerolls import generate_prerolls
+from core.managers.combat_manager import build_preroll_cache
+from utils.generator_context import GeneratorContext
+from utils.mythic_generators import mythic_generators
+
+ENCOUNTER = {
+    "encounterId": "T01-E1",
+    "creatures": [
+        {"name": "Hero", "type": "player"},
+        {"name": "Wolf", "type": "enemy", "numAttacks": 1, "attacks": [{"name": "bite"}]},
+    ],
+}
+
+def test_named_streams_are_reproducible_and_independent():
+    first, second = GeneratorContext(42), GeneratorContext(42)
+    assert [first.stream("realm").random() for _ in range(5)] == [second.stream("realm").random() for _ in range(5)]
+    # Drawing from one stream does not shift another
+    third = GeneratorContext(42)
+    third.stream("realm").random()
+    assert third.stream("sites").random() == GeneratorContext(42).stream("sites").random()
+
+def test_mythic_generators_follow_the_rng():
+    def roll(seed):
+        rng = GeneratorContext(seed).stream("population")
+        return (
+            mythic_generators.get_random_knight(rng=rng)["name"],
+            mythic_generators.roll_random_myth_by_dice(rng=rng)["name"],
+            mythic_generators.get_random_location("dwelling", rng=rng),
+            mythic_generators.get_random_cast_member(rng=rng),
+            mythic_generators.generate_encounter_seed(rng=rng)["omen"],
+        )
+    assert roll(7) == roll(7)
+    assert roll(7) != roll(8)
+
+def test_prerolls_follow_the_rng():
+    def rolls(seed):
+        return generate_prerolls(ENCOUNTER, round_num=2, rng=GeneratorContext(seed).stream("prerolls"))
+    assert rolls(3) == rolls(3)
+    assert rolls(3) != rolls(4)
+
+def test_encounter_prerolls_are_reproducible_per_round():
+    encounter = dict(ENCOUNTER, seed=99)
+    round_one = build_preroll_cache(dict(encounter), 1)
+    assert build_preroll_cache(dict(encounter), 1) == round_one
+    assert build_preroll_cache(dict(encounter), 2)["rolls"] != round_one["rolls"]
+
+def test_unseeded_encounter_is_given_a_seed():
+    encounter = dict(ENCOUNTER)
+    cache = build_preroll_cache(encounter, 1)
+    assert "seed" in encounter
+    assert build_preroll_cache(dict(encounter), 1) == cache
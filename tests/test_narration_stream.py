@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Narration read from a DM response streamed in pieces of any size"""
+
+import json
+import random
+
+import pytest
+
+from core.ai.narration_stream import NarrationExtractor
+
+def fixed_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def random_chunks(text, seed):
+    rng, chunks, i = random.Random(seed), [], 0
+    while i < len(text):
+        size = rng.randint(1, 9)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+def splits(text):
+    for size in range(1, 13):
+        yield fixed_chunks(text, size)
+    for seed in range(20):
+        yield random_chunks(text, seed)
+
+def extract(chunks):
+    extractor = NarrationExtractor()
+    return "".join(extractor.feed(chunk) for chunk in chunks), extractor.done
+
+def fenced(data):
+    return "```json\n" + json.dumps(data, indent=2) + "\n```"
+
+# name -> (streamed response, narration)
+RESPONSES = {
+    "escapes": (json.dumps({"narration": 'She says "stay back"\nThe path\\gate is \t shut. Caf\u00e9 \u2014 closed.',
+                            "actions": []}),
+                'She says "stay back"\nThe path\\gate is \t shut. Caf\u00e9 \u2014 closed.'),
+    "surrogate pairs": (json.dumps({"narration": "A torch \U0001F525 flares; runes \U00010348 glow.", "actions": []}),
+                        "A torch \U0001F525 flares; runes \U00010348 glow."),
+    "nested narration keys": (json.dumps({
+        "actions": [{"action": "updatePlot", "parameters": {"narration": "not this", "plotPointId": "PP001"}}],
+        "notes": {"narration": "nor this"},
+        "plot": "narration",
+        "narration": "The bridge holds.",
+    }), "The bridge holds."),
+    "code fence": (fenced({"narration": "Rain falls on ```the``` docks.", "actions": []}),
+                   "Rain falls on ```the``` docks."),
+}
+
+@pytest.mark.parametrize("name", sorted(RESPONSES))
+def test_narration_is_the_same_whatever_the_chunk_sizes(name):
+    response, narration = RESPONSES[name]
+    for chunks in splits(response):
+        assert extract(chunks) == (narration, True), chunks
+
+def test_escape_sequences_are_not_split_between_deltas():
+    extractor = NarrationExtractor()
+    pieces = [extractor.feed(chunk) for chunk in fixed_chunks(RESPONSES["surrogate pairs"][0], 1)]
+    # Every delta decodes on its own: no half escapes or lone surrogates
+    for piece in pieces:
+        assert not any(0xD800 <= ord(ch) <= 0xDFFF for ch in piece)
+        assert "\\" not in piece
+
+def test_unfinished_narration_is_not_done():
+    text, done = extract(['{"narration": "The door', " creaks\\"])
+    assert (text, done) == ("The door creaks", False)
+
+def test_input_after_the_narration_is_ignored():
+    extractor = NarrationExtractor()
+    assert extractor.feed('{"narration": "Done.", "actions": [{"narration": "again"}]}') == "Done."
+    assert extractor.feed('"narration": "more"') == ""
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Compact prompt encoding keeps every value, every grid cell and every table column"""
+
+import json
+import os
+
+from utils.prompt_encoding import GRID_EMPTY, encode, prune
+
+MAP_FILE = os.path.join("modules", "Keep_of_Doom", "map_SK001_BU.json")
+
+INVENTORY = [
+    {"item_name": "Hempen Rope", "item_type": "miscellaneous", "description": "50 feet", "quantity": 1},
+    {"item_name": "Arrows", "item_type": "ammunition", "quantity": 20, "equipped": False},
+    {"item_name": "Potion of Healing", "item_type": "consumable", "item_subtype": "potion", "quantity": 2},
+    {"item_name": "Longbow", "item_type": "weapon", "quantity": 1, "equipped": True, "damage": "1d8 piercing"},
+]
+
+def decode_grid(lines):
+    """Grid rows from the encoded lines below a grid header"""
+    rows = []
+    for line in lines:
+        cells = line.strip().split(" | " if " | " in line else " ")
+        rows.append(["   " if cell == GRID_EMPTY else cell for cell in cells])
+    return rows
+
+def decode_table(text, key):
+    """Rows of an encoded table as dicts, "" for absent cells"""
+    lines = text.splitlines()
+    header = next(i for i, line in enumerate(lines) if line.startswith(f"{key}["))
+    columns = lines[header].split("{", 1)[1].split("}", 1)[0].split(",")
+    count = int(lines[header].split("[", 1)[1].split("]", 1)[0])
+    return [dict(zip(columns, line.strip().split("|"))) for line in lines[header + 1:header + 1 + count]]
+
+def test_map_layout_round_trips_with_empty_cells():
+    with open(MAP_FILE, encoding="utf-8") as f:
+        map_data = json.load(f)
+    layout = map_data["layout"]
+    assert any(cell == "   " for row in layout for cell in row)
+
+    lines = encode(map_data).splitlines()
+    header = lines.index(f"layout ({GRID_EMPTY} = empty cell):")
+    assert decode_grid(lines[header + 1:header + 1 + len(layout)]) == layout
+
+def test_blank_rows_and_cells_are_never_pruned():
+    grid = [["   ", "", None], ["A1", "   ", "B2"]]
+    assert prune({"layout": grid})["layout"] == grid
+    assert [line.strip() for line in encode({"layout": grid}).splitlines()[1:]] == [". . .", "A1 . B2"]
+
+def test_inventory_round_trips_with_quantities():
+    encoded = encode({"equipment": INVENTORY})
+    rows = decode_table(encoded, "equipment")
+    assert [row["quantity"] for row in rows] == ["1", "20", "2", "1"]
+    for row, item in zip(rows, INVENTORY):
+        for key, value in item.items():
+            expected = str(value).lower() if isinstance(value, bool) else str(value)
+            assert row[key] == expected
+
+def test_empty_values_are_dropped():
+    assert encode({"name": "Elara", "notes": "", "tags": [], "extra": {}, "spouse": None}) == "name: Elara"
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Location summaries cached by a hash of the segment they describe"""
+
+from types import SimpleNamespace
+
+import core.ai.cumulative_summary as cumulative_summary
+from core.ai.summary_cache import SummaryCache, segment_key
+
+SEGMENT = [
+    {"role": "user", "content": "Dungeon Master Note: ... Player: I search the mill."},
+    {"role": "assistant", "content": '{"narration": "You find a sack of grain."}'},
+]
+
+def test_key_covers_location_model_and_every_message():
+    key = segment_key("Old Mill", SEGMENT, "model-a")
+    assert segment_key("Old Mill", [dict(m) for m in SEGMENT], "model-a") == key
+    assert segment_key("Forest Road", SEGMENT, "model-a") != key
+    assert segment_key("Old Mill", SEGMENT, "model-b") != key
+    assert segment_key("Old Mill", SEGMENT[:1], "model-a") != key
+    edited = [SEGMENT[0], {"role": "assistant", "content": '{"narration": "You find nothing."}'}]
+    assert segment_key("Old Mill", edited, "model-a") != key
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SummaryCache(cache_path=None, max_entries=2)
+    cache.put("a", "summary a")
+    cache.put("b", "summary b")
+    assert cache.get("a") == "summary a"
+    cache.put("c", "summary c")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("summary a", "summary c")
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+    assert cache.report().startswith("3 hits, 1 misses (75% hit rate), 2/2 entries, 1 evictions")
+
+def test_cache_persists_across_sessions(tmp_path):
+    path = str(tmp_path / "location_summary_cache.json")
+    SummaryCache(cache_path=path).put("a", "summary a")
+    assert SummaryCache(cache_path=path).get("a") == "summary a"
+
+def test_unchanged_segment_is_not_summarized_again(monkeypatch):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Summary {len(calls)}"))])
+
+    monkeypatch.setattr(cumulative_summary, "summary_cache", SummaryCache(cache_path=None))
+    monkeypatch.setattr(cumulative_summary, "client",
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    assert cumulative_summary.generate_location_summary("Old Mill", SEGMENT, show_status=False) == "Summary 1"
+    assert cumulative_summary.generate_location_summary("Old Mill", SEGMENT, show_status=False) == "Summary 1"
+    assert len(calls) == 1
+    # A changed segment is summarized again
+    changed = SEGMENT + [{"role": "user", "content": "Dungeon Master Note: ... Player: I leave."}]
+    assert cumulative_summary.generate_location_summary("Old Mill", changed, show_status=False) == "Summary 2"
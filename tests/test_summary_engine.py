@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Background location summaries spliced in at turn boundaries"""
+
+import pytest
+
+import core.ai.cumulative_summary as cumulative_summary
+import core.ai.summary_engine as engine_module
+from core.ai.conversation_index import ConversationIndex
+from core.ai.summary_engine import SummaryEngine
+
+TRANSITION = {"role": "user", "content": "Location transition: Old Mill to Forest Road"}
+
+def context_messages(turn):
+    # Rebuilt every turn, so never the same objects or content twice
+    return [
+        {"role": "system", "content": "You are the Dungeon Master."},
+        {"role": "system", "content": f"Current location: Forest Road (turn {turn})"},
+    ]
+
+def first_location_history(turn=1):
+    return context_messages(turn) + [
+        {"role": "user", "content": "I search the mill."},
+        {"role": "assistant", "content": "You find a sack of grain."},
+        {"role": "user", "content": "Error Note: invalid action"},
+        TRANSITION,
+        {"role": "assistant", "content": "The road winds into the trees."},
+    ]
+
+@pytest.fixture
+def engine(monkeypatch):
+    journal = []
+    monkeypatch.setattr(cumulative_summary, "conversation_index", ConversationIndex(index_path=None))
+    monkeypatch.setattr(engine_module, "generate_location_summary", lambda name, messages, show_status=True:
+                        f"{len(messages)} messages at {name}")
+    monkeypatch.setattr(engine_module, "expand_summary_for_journal", lambda summary: f"Journal: {summary}")
+    monkeypatch.setattr(engine_module, "update_journal_with_summary",
+                        lambda entry, party, name, show_status=True: journal.append((entry, name)))
+    engine = SummaryEngine()
+    yield engine, journal
+    finish(engine)
+
+def finish(engine):
+    for job in engine._jobs:
+        job["future"].result()
+
+def test_first_location_summary_survives_rebuilt_context(engine):
+    engine, journal = engine
+    history = first_location_history()
+    assert engine.schedule_location(history, {}, "Old Mill")
+    finish(engine)
+
+    # The next turn rebuilds the system messages before the summary is applied
+    history = first_location_history(turn=2)
+    history = engine.apply_ready(history)
+    assert history == context_messages(2) + [
+        engine_module.location_summary_message("Old Mill", "2 messages at Old Mill"),
+        TRANSITION,
+        {"role": "assistant", "content": "The road winds into the trees."},
+    ]
+    assert journal == [("Journal: 2 messages at Old Mill", "Old Mill")]
+    assert engine.pending() == 0
+
+def test_stale_summary_is_dropped_without_a_journal_entry(engine):
+    engine, journal = engine
+    history = first_location_history()
+    assert engine.schedule_location(history, {}, "Old Mill")
+    finish(engine)
+
+    changed = [msg for msg in first_location_history() if msg.get("content") != "I search the mill."]
+    assert engine.apply_ready(changed) is changed
+    assert journal == []
+
+def test_pending_transition_is_not_scheduled_twice(engine):
+    engine, journal = engine
+    history = first_location_history()
+    assert engine.schedule_location(history, {}, "Old Mill")
+    assert not engine.schedule_location(history, {}, "Old Mill")
+    finish(engine)
+    engine.apply_ready(history)
+    assert len(journal) == 1
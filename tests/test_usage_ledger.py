@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Usage recording for streamed calls, and hard token budgets"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import utils.usage_ledger as ledger_module
+from utils.usage_ledger import BudgetExceededError, UsageLedger, _RecordingStream
+
+MESSAGES = [{"role": "user", "content": "I open the door."}]
+
+def chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = UsageLedger(db_path=str(tmp_path / "usage_ledger.db"))
+    monkeypatch.setattr(ledger_module, "usage_ledger", ledger)
+    return ledger
+
+def recording(chunks):
+    return _RecordingStream(iter(chunks), "gpt-4.1", "main:get_ai_response", 0.0, MESSAGES)
+
+def test_finished_stream_records_the_reported_usage(ledger):
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30, prompt_tokens_details=None)
+    list(recording([chunk("The door"), chunk(" opens."), chunk(usage=usage)]))
+    assert ledger.spent("dm") == 150
+
+def test_abandoned_stream_records_an_estimate(ledger):
+    stream = iter(recording([chunk("The door creaks open"), chunk(" slowly."), chunk(usage=None)]))
+    next(stream)
+    stream.close()
+    assert ledger.spent("dm") > 0
+
+def test_failed_stream_records_an_estimate(ledger):
+    def broken():
+        yield chunk("The door")
+        raise ConnectionError("stream dropped")
+
+    stream = _RecordingStream(broken(), "gpt-4.1", "main:get_ai_response", 0.0, MESSAGES)
+    with pytest.raises(ConnectionError):
+        list(stream)
+    assert ledger.spent("dm") > 0
+
+def test_hard_budget_stops_further_calls(ledger, monkeypatch):
+    monkeypatch.setattr(config, "TOKEN_BUDGETS", {"summaries": {"hard": 100}}, raising=False)
+    ledger.record("summaries", "core.ai.cumulative_summary:generate_location_summary", "gpt-4.1", 90, 20)
+    with pytest.raises(BudgetExceededError):
+        ledger.check_hard_limits("summaries")
+    ledger.check_hard_limits("dm")
+
+def test_call_sites_map_by_function_then_module():
+    assert ledger_module.subsystem_for("main:validate_ai_response") == "validation"
+    assert ledger_module.subsystem_for("main:generate_arrival_narration") == "transitions"
+    assert ledger_module.subsystem_for("main:get_ai_response") == "dm"
+    assert ledger_module.subsystem_for("core.ai.adv_summary:summarize") == "summaries"
+    assert ledger_module.subsystem_for("unknown.module:call") == "unknown.module"
+
+def test_calls_are_tagged_with_the_version_store_turn(ledger):
+    from utils.version_store import VersionStore
+
+    store = VersionStore()
+    turn = ledger.begin_turn(store.start_turn())
+    ledger.record("dm", "main:get_ai_response", "gpt-4.1", 100, 10)
+    assert ledger._db().execute("SELECT turn FROM calls").fetchall() == [(turn,)]
+    assert turn == f"{store.session_id}.1"
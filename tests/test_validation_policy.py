@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Which DM responses may skip the model validator"""
+
+import json
+
+import pytest
+
+from core.validation.validation_policy import ValidationPolicy
+
+PARTY = {
+    "partyMembers": ["Elara"],
+    "partyNPCs": [{"name": "Scout Kira"}],
+    "worldConditions": {"currentLocationId": "A01", "currentAreaId": "G001"},
+}
+LOCATION = {"locationId": "A01", "name": "The Rusty Anchor", "npcs": [{"name": "Marta Brindle"}, {"name": "Old Tobin"}]}
+
+def response(narration, actions=()):
+    return json.dumps({"narration": narration, "actions": list(actions)})
+
+class _Graph:
+    """The parts of LocationGraph the narration check reads"""
+    def __init__(self):
+        self.area_data = {"G001": {"areaName": "Harrow's Hollow"}}
+        self.nodes = {
+            "A01": {"location_name": "The Rusty Anchor", "data": LOCATION},
+            "A02": {"location_name": "Mill Road",
+                    "data": {"npcs": [{"name": "Elen Vance"}, {"name": "Elder Mirna Harrow"}, {"name": "Old Tobin"}]}},
+        }
+
+def review(text, location=LOCATION, attempt=0, graph=None):
+    needs_model, _ = ValidationPolicy().review(text, PARTY, graph, attempt=attempt, location_data=location)
+    return needs_model
+
+@pytest.mark.parametrize("narration", [
+    "The tavern is warm and loud. You find a seat by the fire.",
+    'Marta says, "Welcome back, travellers."',
+    "Tobin nodded slowly and went back to his pipe.",
+    'Kira whispers, "I do not trust him."',
+    "She smiles and hands Elara a mug of ale.",
+])
+def test_narration_with_known_characters_is_accepted_locally(narration):
+    assert not review(response(narration, [{"action": "updateTime", "parameters": {"timeEstimate": 10}}]))
+
+@pytest.mark.parametrize("narration", [
+    'A hooded stranger approaches. "Call me Vex," he says. Vex leans closer.',
+    'Grimbold says, "The mine has been closed for a week."',
+    "A woman named Seraphine waves from the bar.",
+    'The man introduces himself as Corwin Hale.',
+])
+def test_narration_naming_a_new_character_goes_to_the_model(narration):
+    assert review(response(narration))
+
+def test_named_character_without_location_data_goes_to_the_model():
+    assert review(response('Marta says, "Welcome back."'), location=None)
+    assert not review(response("The rain keeps falling."), location=None)
+
+def test_risky_actions_and_retries_go_to_the_model():
+    assert review(response("Combat begins!", [{"action": "createEncounter", "parameters": {}}]))
+    assert review(response("The tavern is quiet."), attempt=1)
+
+@pytest.mark.parametrize("narration", [
+    "Elen nods from across the room.",
+    "Through the window you see Elen hurrying past.",
+    "Vance's cart is parked outside.",
+    "Mirna sits by the fire.",
+])
+def test_npc_from_another_location_goes_to_the_model_whatever_the_verb(narration):
+    assert review(response(narration), graph=_Graph())
+
+@pytest.mark.parametrize("narration", [
+    # Tobin is also at the Rusty Anchor, and Harrow is part of a place name
+    "Tobin puffs on his pipe and talks about Harrow's Hollow.",
+    "An elder and a farmer argue over the price of grain.",
+])
+def test_present_npcs_and_place_names_are_accepted_locally(narration):
+    assert not review(response(narration), graph=_Graph())
+
+def test_npcs_elsewhere_are_checked_without_location_data():
+    assert review(response("You see Elen on the road."), location=None, graph=_Graph())
@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""Patch history kept in a fixed ring of slot files"""
+
+import json
+import os
+
+from utils.version_store import VersionStore, apply_patch, make_patch
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def record_versions(store, path, count, start=0):
+    document = {"hitPoints": start, "inventory": ["rope"]}
+    for n in range(start + 1, start + count + 1):
+        updated = dict(document, hitPoints=n)
+        write(path, updated)
+        store.record(path, document, updated)
+        document = updated
+    return document
+
+def test_patch_round_trip():
+    before = {"a": 1, "items": [1, 2, 3], "nested": {"x": "y"}}
+    after = {"a": 2, "items": [1, 3], "nested": {}, "new": [None]}
+    assert apply_patch(json.loads(json.dumps(before)), make_patch(before, after)) == after
+
+def test_history_rotates_through_a_fixed_ring(tmp_path):
+    path = str(tmp_path / "hero.json")
+    store = VersionStore(snapshot_interval=5, ring_size=3)
+    record_versions(store, path, 40)
+
+    slot_files = sorted(name for name in os.listdir(tmp_path) if ".history" in name)
+    assert slot_files == ["hero.json.history0.jsonl", "hero.json.history1.jsonl", "hero.json.history2.jsonl"]
+    versions = [entry["version"] for entry in store.versions(path)]
+    # The baseline plus 40 changes; the ring keeps the last three snapshots and their patches
+    assert versions == list(range(versions[0], 42))
+    assert len(versions) <= 15
+    assert store.load(path)["hitPoints"] == 40
+    assert store.load(path, version=versions[0])["hitPoints"] == versions[0] - 1
+
+def test_history_survives_a_new_process(tmp_path):
+    path = str(tmp_path / "hero.json")
+    document = record_versions(VersionStore(snapshot_interval=4, ring_size=2), path, 7)
+
+    store = VersionStore(snapshot_interval=4, ring_size=2)
+    assert store.latest_version(path) == 8
+    record_versions(store, path, 6, start=document["hitPoints"])
+    assert store.load(path)["hitPoints"] == 13
+    assert store.load(path, version=13)["hitPoints"] == 12
+
+def test_external_change_is_recorded(tmp_path):
+    path = str(tmp_path / "hero.json")
+    store = VersionStore()
+    document = record_versions(store, path, 2)
+    edited = dict(document, hitPoints=99)
+    final = dict(edited, hitPoints=100)
+    store.record(path, edited, final)
+    assert [entry["reason"] for entry in store.versions(path)][-2:] == ["external", "update"]
+    assert store.load(path, version=store.latest_version(path) - 1) == edited
+
+def test_restore_is_recorded_as_a_new_version(tmp_path):
+    path = str(tmp_path / "hero.json")
+    store = VersionStore()
+    record_versions(store, path, 3)
+    assert store.restore(path, version=2)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["hitPoints"] == 1
+    assert store.versions(path)[-1]["reason"] == "restore v2"
+
+def test_list_of_named_objects_is_diffed_by_name():
+    before = {"equipment": [{"item_name": "Rope", "quantity": 1},
+                            {"item_name": "Torch", "quantity": 3},
+                            {"item_name": "Rations", "quantity": 5}]}
+    after = {"equipment": [{"item_name": "Torch", "quantity": 2},
+                           {"item_name": "Rations", "quantity": 5},
+                           {"item_name": "Dagger", "quantity": 1}]}
+    patch = make_patch(before, after)
+    assert patch == [["remove", ["equipment", 0]],
+                     ["add", ["equipment", 2], {"item_name": "Dagger", "quantity": 1}],
+                     ["replace", ["equipment", 0, "quantity"], 2]]
+    assert apply_patch(json.loads(json.dumps(before)), patch) == after
+
+def test_reordered_named_objects_still_round_trip():
+    before = {"party": [{"name": "Elen"}, {"name": "Kira"}]}
+    after = {"party": [{"name": "Kira"}, {"name": "Elen", "hp": 3}]}
+    assert apply_patch(json.loads(json.dumps(before)), make_patch(before, after)) == after
+
+def test_turn_loads_the_newest_version_at_or_before_it(tmp_path):
+    path = str(tmp_path / "hero.json")
+    store = VersionStore()
+    document = {"hitPoints": 0}
+    for n, hit_points in ((2, 10), (9, 9), (11, 8)):
+        store.start_turn(f"{store.session_id}.{n}")
+        updated = dict(document, hitPoints=hit_points)
+        write(path, updated)
+        store.record(path, document, updated)
+        document = updated
+
+    # Turn 10 changed nothing; "10" must not sort before "9" or after "11"
+    assert store.load(path, turn=f"{store.session_id}.10")["hitPoints"] == 9
+    assert store.load(path, turn=f"{store.session_id}.11")["hitPoints"] == 8
+    assert store.load(path, turn=f"{store.session_id}.3")["hitPoints"] == 10
+    # The baseline was recorded in turn 2, so nothing is known before it
+    assert store.load(path, turn=f"{store.session_id}.1") is None
@@ -0,0 +1,376 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Local Character Change Parser
+
+Turns simple, unambiguous change descriptions into the same delta-only update
+dict the character update model returns. Examples: "Takes 5 damage",
+"Add 50 experience points", "Spent 10 gold", "Fired 3 arrows",
+"Expends one 1st-level spell slot" and "Is no longer poisoned".
+update_character_info then applies them through its normal merge,
+validation and save path without an LLM call.
+
+Every clause of a description has to match one of the patterns below, or
+parse_simple_changes() returns None and the caller falls back to the model.
+Anything that needs judgement is left to the model on purpose, for example
+dropping to 0 HP, typed damage (resistances, immunities and
+vulnerabilities apply), making change between coin types, unknown
+ammunition, unconsciousness, and coins or ammunition that change hands in
+a purchase, sale or exchange (the item side of the trade is an equipment
+change).
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("character_change_parser")
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
+}
+
+# Standard ammunition names used by the update prompt
+_AMMO_NAMES = {
+    "arrow": "Arrows",
+    "crossbow bolt": "Crossbow bolts",
+    "bolt": "Crossbow bolts",
+    "sling bullet": "Sling bullets",
+    "bullet": "Sling bullets",
+    "dart": "Darts",
+    "blowgun needle": "Blowgun needles",
+    "needle": "Blowgun needles"
+}
+
+_COIN_ABBREVIATIONS = {"gp": "gold", "sp": "silver", "cp": "copper"}
+
+# Conditions from char_schema with no extra bookkeeping. "unconscious" is tied
+# to status and hit points, and "exhaustion" has levels, so both go to the model.
+_SIMPLE_CONDITIONS = (
+    "blinded", "charmed", "deafened", "frightened", "grappled", "incapacitated",
+    "invisible", "paralyzed", "petrified", "poisoned", "prone", "restrained", "stunned"
+)
+
+_N = r"(?P<n>\d+|an?|one|two|three|four|five|six|seven|eight|nine|ten)"
+_HP = r"(?:hit\s+points?|hp)"
+_XP = r"(?:experience\s+points|experience|xp)"
+_COIN = r"(?:(?P<coin>gold|silver|copper)(?:\s+(?:pieces?|coins?))?|(?P<abbr>gp|sp|cp))"
+_AMMO = r"(?P<ammo>arrows?|crossbow\s+bolts?|bolts?|sling\s+bullets?|bullets?|darts?|blowgun\s+needles?|needles?)"
+_SLOT = r"(?:one|an?|1)\s+(?:(?P<level>\d)(?:st|nd|rd|th)?[-\s]level|level[-\s](?P<level2>\d))\s+spell\s+slot"
+_COND = r"(?P<cond>" + "|".join(_SIMPLE_CONDITIONS) + r")"
+
+# Trailing context such as "due to trap damage" or "to inventory". It must not
+# carry another number or a second change ("... and 3 poison damage"), and
+# _is_flavour() rejects context that describes a trade or a lingering effect.
+_TAIL = r"(?P<tail>\s+(?:due\s+to|from|by|after|as|for|during|because|while|when|in|on|to|into|with)\b(?:(?!\band\b)[^\d;])*)?"
+
+# Context that makes the clause one side of a trade: the other side changes
+# equipment, which only the model can apply
+_TRADE_CONTEXT = re.compile(
+    r"\b(?:buy|buys|buying|bought|purchas\w*|sell|sells|selling|sold|sale|exchang\w*|"
+    r"trade|trades|traded|trading|barter\w*|along\s+with|together\s+with|as\s+well\s+as|"
+    r"in\s+return|plus)\b"
+    r"|\bfor\s+(?!\w+ing\b)",  # "for a healing potion", but not "for defeating the wolves"
+    re.IGNORECASE)
+# Context that carries an effect of its own: "from a goblin's poisoned dagger"
+# is typed damage plus a possible condition, not plain damage
+_EFFECT_CONTEXT = re.compile(
+    r"\b(?:blind\w*|charm\w*|deafen\w*|frighten\w*|grappl\w*|incapacitat\w*|invisib\w*|paralyz\w*|"
+    r"paralys\w*|petrif\w*|poison\w*|prone|restrain\w*|stun\w*|venom\w*|toxi\w*|fear\w*|unconscious|exhaust\w*|sleep\w*|asleep|curse\w*|"
+    r"disease\w*|infect\w*|drain\w*|bleed\w*|burn\w*|fire|fier\w*|flames?|acid\w*|cold|frost\w*|icy|ice|"
+    r"lightning|thunder\w*|necrotic|radiant|psychic|force|magic\w*|spells?|ongoing|each\s+turn|"
+    r"per\s+round|every\s+round)\b",
+    re.IGNORECASE)
+# Spending coins or ammunition "on" or "with" something buys it
+_PURCHASE_CONTEXT = re.compile(r"^\s+(?:on|with)\b", re.IGNORECASE)
+
+_PATTERNS = [
+    ("hp_loss", rf"(?:loses|lost|lose|takes|took|take|suffers|suffered|suffer)\s+{_N}\s+(?:points?\s+of\s+)?(?:(?P<dtype>[a-z]+)\s+)?(?:damage|{_HP})"),
+    ("hp_loss", rf"(?:reduced?|reduces|decreased?|decreases|lowered?)\s+(?:current\s+)?{_HP}\s+by\s+{_N}"),
+    ("hp_gain", rf"(?:heals?|healed|regains?|regained|recovers?|recovered|restores?|restored|gains?|gained)\s+{_N}\s+{_HP}"),
+    ("hp_gain", rf"(?:increased?|increases|raised?)\s+(?:current\s+)?{_HP}\s+by\s+{_N}"),
+    ("hp_set", rf"(?:set\s+{_HP}\s+to|{_HP}\s+(?:set\s+to|(?:is|are)\s+now))\s+{_N}"),
+    ("hp_full", rf"(?:restored?|restores|regains?|regained|recovers?|recovered)\s+all\s+{_HP}(?:\s+to\s+maximum)?"),
+    ("xp_gain", rf"(?:adds?|added|gains?|gained|awards?|awarded|earns?|earned|receives?|received|grants?|granted)\s+{_N}\s+{_XP}"),
+    ("xp_set", rf"(?:set\s+{_XP}\s+to|{_XP}\s+set\s+to)\s+{_N}"),
+    ("coin_loss", rf"(?:spends?|spent|pays?|paid|loses?|lost|removes?|removed|gives?|gave|deducts?|deducted)\s+{_N}\s+{_COIN}"),
+    ("coin_gain", rf"(?:gains?|gained|finds?|found|receives?|received|earns?|earned|loots?|looted|adds?|added|collects?|collected)\s+{_N}\s+{_COIN}"),
+    ("ammo_loss", rf"(?:fires?|fired|shoots?|shot|uses?|used|expends?|expended|spends?|spent|loses?|lost|removes?|removed|sells?|sold|throws?|threw)\s+{_N}\s+{_AMMO}"),
+    ("ammo_gain", rf"(?:adds?|added|gains?|gained|finds?|found|recovers?|recovered|retrieves?|retrieved|collects?|collected|buys?|bought|purchases?|purchased|receives?|received|picks?\s+up|picked\s+up)\s+{_N}\s+{_AMMO}"),
+    ("slot_use", rf"(?:expends?|expended|uses?|used|spends?|spent|consumes?|consumed|reduced?|reduces|loses?|lost)\s+{_SLOT}"),
+    ("slot_use", rf"(?:casts?|cast)\s+[^,;\d]+?,?\s+(?:expending|using|consuming)\s+{_SLOT}"),
+    ("slot_restore", r"(?:restored?|restores|recovers?|recovered|regains?|regained)\s+all\s+spell\s+slots(?:\s+to\s+maximum)?"),
+    ("cond_add", rf"(?:is|was|becomes?|became)(?:\s+now)?\s+{_COND}"),
+    ("cond_add", r"(?:knocked|falls?|fell)\s+(?P<cond>prone)"),
+    ("cond_add", rf"(?:gains?|gained|suffers?|suffered|applies|applied|adds?|added)\s+(?:the\s+)?{_COND}\s+condition"),
+    ("cond_clear", rf"(?:is\s+)?no\s+longer\s+{_COND}"),
+    ("cond_clear", rf"(?:removes?|removed|clears?|cleared|ends?|ended|loses?|lost)\s+(?:the\s+)?{_COND}\s+condition"),
+    ("cond_clear", rf"(?:the\s+)?{_COND}\s+condition\s+(?:ends|ended|expires|expired|is\s+removed|was\s+removed)"),
+]
+_COMPILED = [(kind, re.compile(pattern + _TAIL, re.IGNORECASE)) for kind, pattern in _PATTERNS]
+
+# Clause boundaries: sentences, semicolons, line breaks and "and"/"then"
+_CLAUSE_SPLIT = re.compile(r"\s*[;\n]\s*|(?<=[.!])\s+|,?\s+(?:and|then)\s+", re.IGNORECASE)
+
+def _number(value: str) -> int:
+    value = value.lower()
+    return int(value) if value.isdigit() else _NUMBER_WORDS[value]
+
+def _ammo_name(raw: str) -> str:
+    key = " ".join(raw.lower().split())
+    return _AMMO_NAMES[key[:-1] if key.endswith("s") else key]
+
+def _is_flavour(kind: str, tail: Optional[str]) -> bool:
+    """Whether trailing context only describes the change, rather than trading for something or adding an effect"""
+    if not tail:
+        return True
+    if _TRADE_CONTEXT.search(tail):
+        return False
+    # A condition's own source ("is poisoned by the spider") is still just that condition
+    if not kind.startswith("cond_") and _EFFECT_CONTEXT.search(tail):
+        return False
+    return not (kind in ("coin_loss", "ammo_loss") and _PURCHASE_CONTEXT.match(tail))
+
+def _split_clauses(changes: str, character_name: Optional[str]) -> List[str]:
+    subjects = []
+    if character_name:
+        subjects.append(character_name)
+        first_name = character_name.split()[0]
+        if first_name != character_name:
+            subjects.append(first_name)
+    subject_prefix = re.compile(
+        r"^(?:" + "|".join(re.escape(s) for s in subjects) + r")\s+", re.IGNORECASE) if subjects else None
+
+    clauses = []
+    for clause in _CLAUSE_SPLIT.split(changes.strip()):
+        clause = clause.strip().rstrip(".!").strip()
+        if not clause:
+            continue
+        if subject_prefix:
+            clause = subject_prefix.sub("", clause, count=1)
+        clauses.append(clause)
+    return clauses
+
+class _ChangeState:
+    """Working copy of the fields a local change may touch"""
+
+    def __init__(self, character_data: Dict[str, Any]):
+        self.data = character_data
+        self.status = str(character_data.get("status", "alive")).lower()
+        self.hit_points = character_data.get("hitPoints")
+        self.max_hit_points = character_data.get("maxHitPoints")
+        self.experience = character_data.get("experience_points", 0)
+        self.currency = dict(character_data.get("currency") or {})
+        self.ammo = {}  # standard name -> [existing entry or None, quantity delta]
+        self.slots = {}  # "levelN" -> new current value
+        self.condition = str(character_data.get("condition", "none")).lower()
+        self.conditions = [str(c).lower() for c in character_data.get("condition_affected") or []]
+        self.touched = set()
+
+    def apply(self, kind: str, match: "re.Match") -> bool:
+        """Apply one parsed clause, returning False if it needs the model"""
+        groups = match.groupdict()
+        amount = _number(groups["n"]) if groups.get("n") else None
+        handler = getattr(self, "_" + kind)
+        return handler(amount, groups) is not False
+
+    # -- hit points ------------------------------------------------------
+
+    def _can_change_hp(self) -> bool:
+        return (self.status == "alive" and isinstance(self.hit_points, int)
+                and isinstance(self.max_hit_points, int))
+
+    def _set_hp(self, value: int) -> bool:
+        # Dropping to 0 means unconscious or dead, which is the model's call
+        if not self._can_change_hp() or value <= 0:
+            return False
+        self.hit_points = min(value, self.max_hit_points)
+        self.touched.add("hitPoints")
+        return True
+
+    def _hp_loss(self, amount, groups):
+        # Typed damage depends on resistances, immunities and vulnerabilities
+        if groups.get("dtype"):
+            return False
+        return self._can_change_hp() and self._set_hp(self.hit_points - amount)
+
+    def _hp_gain(self, amount, groups):
+        return self._can_change_hp() and self._set_hp(self.hit_points + amount)
+
+    def _hp_set(self, amount, groups):
+        return self._set_hp(amount)
+
+    def _hp_full(self, amount, groups):
+        return self._can_change_hp() and self._set_hp(self.max_hit_points)
+
+    # -- experience ------------------------------------------------------
+
+    def _xp_gain(self, amount, groups):
+        self.experience = (self.experience or 0) + amount
+        self.touched.add("experience_points")
+
+    def _xp_set(self, amount, groups):
+        self.experience = amount
+        self.touched.add("experience_points")
+
+    # -- currency --------------------------------------------------------
+
+    @staticmethod
+    def _coin(groups) -> str:
+        return (groups.get("coin") or _COIN_ABBREVIATIONS[groups["abbr"].lower()]).lower()
+
+    def _coin_loss(self, amount, groups):
+        coin = self._coin(groups)
+        current = self.currency.get(coin, 0)
+        if current < amount:
+            return False  # needs change made from another denomination
+        self.currency[coin] = current - amount
+        self.touched.add("currency")
+
+    def _coin_gain(self, amount, groups):
+        coin = self._coin(groups)
+        self.currency[coin] = self.currency.get(coin, 0) + amount
+        self.touched.add("currency")
+
+    # -- ammunition ------------------------------------------------------
+
+    def _ammo_entry(self, name: str) -> list:
+        entry = self.ammo.get(name)
+        if entry is None:
+            singular = name.lower()[:-1]
+            existing = next((a for a in self.data.get("ammunition") or []
+                             if str(a.get("name", "")).lower().strip() in (name.lower(), singular)), None)
+            entry = [existing, 0]
+            self.ammo[name] = entry
+        return entry
+
+    def _ammo_loss(self, amount, groups):
+        entry = self._ammo_entry(_ammo_name(groups["ammo"]))
+        existing, delta = entry
+        if existing is None or existing.get("quantity", 0) + delta < amount:
+            return False
+        entry[1] -= amount
+        self.touched.add("ammunition")
+
+    def _ammo_gain(self, amount, groups):
+        entry = self._ammo_entry(_ammo_name(groups["ammo"]))
+        entry[1] += amount
+        self.touched.add("ammunition")
+
+    # -- spell slots -----------------------------------------------------
+
+    def _spell_slots(self) -> Dict[str, Any]:
+        spellcasting = self.data.get("spellcasting")
+        return (spellcasting.get("spellSlots") or {}) if isinstance(spellcasting, dict) else {}
+
+    def _slot_use(self, amount, groups):
+        key = f"level{groups.get('level') or groups.get('level2')}"
+        slot = self._spell_slots().get(key)
+        if not isinstance(slot, dict):
+            return False
+        current = self.slots.get(key, slot.get("current", 0))
+        if current < 1:
+            return False
+        self.slots[key] = current - 1
+        self.touched.add("spellcasting")
+
+    def _slot_restore(self, amount, groups):
+        slots = self._spell_slots()
+        if not slots:
+            return False
+        for key, slot in slots.items():
+            if isinstance(slot, dict) and "max" in slot:
+                self.slots[key] = slot["max"]
+        self.touched.add("spellcasting")
+
+    # -- conditions ------------------------------------------------------
+
+    def _cond_add(self, amount, groups):
+        condition = groups["cond"].lower()
+        immunities = [str(c).lower() for c in self.data.get("conditionImmunities") or []]
+        if self.status != "alive" or condition in immunities:
+            return False
+        if condition not in self.conditions:
+            self.conditions.append(condition)
+        if self.condition == "none":
+            self.condition = condition
+        self.touched.add("condition")
+
+    def _cond_clear(self, amount, groups):
+        condition = groups["cond"].lower()
+        if self.status != "alive" or (condition not in self.conditions and self.condition != condition):
+            return False  # may refer to a temporary effect instead
+        self.conditions = [c for c in self.conditions if c != condition]
+        if self.condition == condition:
+            self.condition = self.conditions[0] if self.conditions else "none"
+        self.touched.add("condition")
+
+    # -- result ----------------------------------------------------------
+
+    def to_updates(self) -> Dict[str, Any]:
+        updates = {}
+        if "hitPoints" in self.touched:
+            updates["hitPoints"] = self.hit_points
+        if "experience_points" in self.touched:
+            updates["experience_points"] = self.experience
+        if "currency" in self.touched:
+            # Full currency object, as the update prompt requires
+            updates["currency"] = {coin: self.currency.get(coin, 0) for coin in ("gold", "silver", "copper")}
+        if "ammunition" in self.touched:
+            # Quantities are changes; merge_ammunition_arrays adds them
+            ammunition = [{"name": existing["name"] if existing else name, "quantity": delta}
+                          for name, (existing, delta) in self.ammo.items() if delta]
+            if ammunition:
+                updates["ammunition"] = ammunition
+        if "spellcasting" in self.touched:
+            updates["spellcasting"] = {"spellSlots": {key: {"current": value} for key, value in self.slots.items()}}
+        if "condition" in self.touched:
+            updates["condition"] = self.condition
+            updates["condition_affected"] = list(self.conditions)
+        return updates
+
+def parse_simple_changes(changes: str, character_data: Dict[str, Any],
+                         character_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Parse a change description into a delta-only character update
+
+    Args:
+        changes: Change description as passed to update_character_info
+        character_data: Current character data (not modified)
+        character_name: Optional name, stripped if a clause starts with it
+
+    Returns:
+        Update dict in the format returned by the update model, or None if
+        any part of the description needs the model
+    """
+    if not isinstance(changes, str) or not isinstance(character_data, dict):
+        return None
+
+    clauses = _split_clauses(changes, character_name)
+    if not clauses:
+        return None
+
+    state = _ChangeState(character_data)
+    for clause in clauses:
+        for kind, pattern in _COMPILED:
+            match = pattern.fullmatch(clause)
+            if match:
+                break
+        else:
+            debug(f"LOCAL_UPDATE: No local rule for '{clause}', using model", category="character_updates")
+            return None
+        if not _is_flavour(kind, match.group("tail")):
+            debug(f"LOCAL_UPDATE: '{clause}' has a trade or effect in its context, using model", category="character_updates")
+            return None
+        if not state.apply(kind, match):
+            debug(f"LOCAL_UPDATE: '{clause}' needs the model ({kind})", category="character_updates")
+            return None
+
+    updates = state.to_updates()
+    return updates or None
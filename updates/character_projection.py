@@ -0,0 +1,180 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Character Prompt Projection
+
+Chooses the character sheet sections an update prompt actually needs, using
+a keyword -> section routing table. Purchases get currency and equipment;
+damage gets hit points, status and conditions. The projection is rendered as
+compact JSON, so the model no longer receives the whole sheet with indent=2
+on every update.
+
+Items in named arrays (equipment, ammunition, features, ...) carry an
+"_index" field, so the model can refer to an existing item by index.
+resolve_indexed_references() maps those back to item names and strips the
+field before the update is merged.
+
+If no route matches, or the change is broad (level up), the full sheet is
+sent, still compact.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.token_estimator import TokenEstimator
+from utils.enhanced_logger import info, set_script_name
+
+# Set script name for logging
+set_script_name("character_projection")
+
+INDEX_FIELD = "_index"
+
+# Arrays merged by name in deep_merge_dict -> their identifying field
+NAMED_ARRAYS = {
+    'ammunition': 'name',
+    'attacksAndSpellcasting': 'name',
+    'classFeatures': 'name',
+    'equipment': 'item_name',
+    'equipment_effects': 'name',
+    'feats': 'name',
+    'racialTraits': 'name'
+}
+
+# Always sent so the model knows who it is updating
+CORE_FIELDS = ("name", "character_role", "type", "level", "class", "status", "condition")
+
+# Keyword stems -> top-level sections they need. Stems match at word starts.
+SECTION_ROUTES = (
+    (("damage", "hit point", "hp", "heal", "wound", "hurt", "injur", "dying", "dead", "death",
+      "die", "stabiliz", "reviv", "unconscious", "guard", "scar"),
+     ("hitPoints", "maxHitPoints", "status", "condition", "condition_affected", "injuries",
+      "damageResistances", "damageImmunities", "guard", "scars", "conditions")),
+    (("gold", "silver", "copper", "coin", "currency", "pay", "paid", "buy", "bought", "sell",
+      "sold", "purchas", "trade", "price", "cost", "loot", "reward"),
+     ("currency", "equipment", "ammunition")),
+    (("item", "inventory", "equip", "unequip", "weapon", "armor", "armour", "shield", "potion",
+      "scroll", "ring", "amulet", "cloak", "boots", "gloves", "helm", "wand", "staff", "rod",
+      "ration", "torch", "rope", "tool", "key", "drop", "pick", "add", "remov", "gave", "give",
+      "receiv", "found", "find", "lost", "destroy", "broke"),
+     ("equipment", "equipment_effects", "armorClass", "attacksAndSpellcasting", "ammunition",
+      "knight_property", "remedies")),
+    (("arrow", "bolt", "bullet", "dart", "needle", "ammunition", "ammo", "fire", "fired", "shot",
+      "shoot"),
+     ("ammunition", "equipment")),
+    (("experience", "xp"),
+     ("experience_points", "exp_required_for_next_level")),
+    (("spell", "slot", "cast", "cantrip", "concentrat"),
+     ("spellcasting", "attacksAndSpellcasting")),
+    (("blind", "charm", "deaf", "frighten", "grappl", "incapacitat", "invisib", "paralyz",
+      "petrif", "poison", "prone", "restrain", "stun", "exhaust", "condition"),
+     ("condition", "condition_affected", "conditionImmunities", "status", "conditions")),
+    (("effect", "bless", "buff", "expire", "temporar", "bonus", "resist", "immun", "advantage"),
+     ("temporaryEffects", "equipment_effects", "armorClass", "damageResistances",
+      "damageImmunities")),
+    (("feature", "abilit", "channel", "use", "usage", "feat", "trait", "recharge"),
+     ("classFeatures", "feats", "racialTraits")),
+    (("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma", "save",
+      "saving", "skill", "proficien"),
+     ("abilities", "savingThrows", "skills", "proficiencyBonus", "proficiencies")),
+    (("virtue", "vigour", "vigor", "clarity", "spirit", "glory", "rank", "knight", "squire",
+      "seer", "passion", "age"),
+     ("virtues", "glory", "rank", "knight_data", "knight_type", "squire", "age_category")),
+    (("rest",),
+     ("hitPoints", "maxHitPoints", "status", "condition", "condition_affected", "spellcasting",
+      "classFeatures", "temporaryEffects", "guard", "virtues")),
+    (("armor class",),
+     ("armorClass", "equipment", "equipment_effects", "temporaryEffects")),
+)
+
+# Changes broad enough that the whole sheet is relevant
+FULL_SHEET_TRIGGERS = re.compile(r"\blevel(?:s|ed|ing)?[\s-]*up\b|\bnew level\b|\brespec|\brebuild", re.IGNORECASE)
+
+_ROUTE_PATTERNS = [
+    (re.compile(r"\b(?:" + "|".join(re.escape(stem) for stem in stems) + r")", re.IGNORECASE), sections)
+    for stems, sections in SECTION_ROUTES
+]
+
+def select_sections(changes: str, character_data: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Pick the top-level sections a change description needs
+
+    Returns:
+        Section names present in the character data, or None for the full sheet
+    """
+    if not isinstance(changes, str) or FULL_SHEET_TRIGGERS.search(changes):
+        return None
+
+    wanted = []
+    for pattern, sections in _ROUTE_PATTERNS:
+        if pattern.search(changes):
+            wanted.extend(section for section in sections if section not in wanted)
+    if not wanted:
+        return None
+
+    fields = [field for field in CORE_FIELDS if field in character_data]
+    fields.extend(section for section in wanted if section in character_data and section not in fields)
+    return fields
+
+def _indexed(field: str, value: Any) -> Any:
+    if field in NAMED_ARRAYS and isinstance(value, list):
+        return [{INDEX_FIELD: i, **item} if isinstance(item, dict) else item for i, item in enumerate(value)]
+    return value
+
+def project_character(character_data: Dict[str, Any], changes: str) -> Tuple[Dict[str, Any], Optional[List[str]]]:
+    """
+    Build the prompt view of a character for one change description
+
+    Returns:
+        (projection, sections) where sections is None if the full sheet was used
+    """
+    sections = select_sections(changes, character_data)
+    fields = sections if sections is not None else list(character_data)
+    projection = {field: _indexed(field, character_data[field]) for field in fields}
+    return projection, sections
+
+def render_projection(projection: Dict[str, Any]) -> str:
+    """Compact JSON for the prompt"""
+    return json.dumps(projection, separators=(",", ":"), ensure_ascii=False)
+
+def report_savings(character_name: str, full_text: str, projected_text: str,
+                   sections: Optional[List[str]]) -> Dict[str, int]:
+    """Log and return estimated prompt tokens saved by the projection"""
+    full_tokens = TokenEstimator.estimate_tokens_from_text(full_text)
+    projected_tokens = TokenEstimator.estimate_tokens_from_text(projected_text)
+    saved = max(0, full_tokens - projected_tokens)
+    scope = ", ".join(sections) if sections is not None else "full sheet"
+    info(f"PROMPT_PROJECTION: {character_name} update sends {scope} "
+         f"(~{projected_tokens} tokens, ~{saved} saved)", category="character_updates")
+    return {"full_tokens": full_tokens, "projected_tokens": projected_tokens, "saved_tokens": saved}
+
+def resolve_indexed_references(updates: Dict[str, Any], character_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace "_index" references in a model update with the item's name
+
+    An entry like {"_index": 3, "quantity": 0} in "equipment" becomes
+    {"item_name": <name of item 3>, "quantity": 0}. Indexes that do not
+    exist are dropped, and the name wins if the model sent both.
+    """
+    if not isinstance(updates, dict):
+        return updates
+    for field, name_field in NAMED_ARRAYS.items():
+        entries = updates.get(field)
+        if not isinstance(entries, list):
+            continue
+        original = character_data.get(field) or []
+        resolved = []
+        for entry in entries:
+            if isinstance(entry, dict) and INDEX_FIELD in entry:
+                index = entry.pop(INDEX_FIELD)
+                if name_field not in entry:
+                    if not (isinstance(index, int) and 0 <= index < len(original)
+                            and isinstance(original[index], dict) and original[index].get(name_field)):
+                        continue
+                    entry[name_field] = original[index][name_field]
+            resolved.append(entry)
+        updates[field] = resolved
+    return updates
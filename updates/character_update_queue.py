@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Character Update Queue
+
+Groups pending change descriptions per character so that each character
+touched in a turn gets exactly one update_character_info call. That call is
+one local fast-path application or one model request, with one backup and one
+write. This replaces one serial call per change.
+
+Changes for a character are joined one per line, in the order they were
+queued. The local change parser treats each line as a clause, and the model
+sees them as a single list of changes to make.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from updates.update_character_info import update_character_info, normalize_character_name
+from utils.enhanced_logger import debug, info, error, set_script_name
+
+# Set script name for logging
+set_script_name("character_update_queue")
+
+ACTION_UPDATE_CHARACTER_INFO = "updateCharacterInfo"
+
+def combine_changes(changes: List[str]) -> str:
+    """Join several change descriptions into one update request"""
+    return "\n".join(change.strip() for change in changes if change and change.strip())
+
+class CharacterUpdateQueue:
+    """Pending change descriptions, grouped per character"""
+
+    def __init__(self):
+        self._pending = OrderedDict()  # normalized name -> (display name, [changes])
+
+    def add(self, character_name: str, changes: Any):
+        """Queue a change description (dicts are sent as JSON, like the action handler does)"""
+        if isinstance(changes, dict):
+            changes = json.dumps(changes)
+        if not character_name or not changes:
+            return
+        key = normalize_character_name(character_name)
+        if key not in self._pending:
+            self._pending[key] = (character_name, [])
+        self._pending[key][1].append(changes)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending(self) -> Dict[str, str]:
+        """Display name -> combined changes, without flushing"""
+        return {name: combine_changes(changes) for name, changes in self._pending.values()}
+
+    def flush(self, update_fn: Optional[Callable[[str, str], bool]] = None) -> Dict[str, bool]:
+        """
+        Apply every character's queued changes with one update each
+
+        Args:
+            update_fn: Update function (defaults to update_character_info)
+
+        Returns:
+            Dictionary of character name -> success
+        """
+        update_fn = update_fn or update_character_info
+        batches, self._pending = self._pending, OrderedDict()
+        results = {}
+        for character_name, changes in batches.values():
+            combined = combine_changes(changes)
+            if len(changes) > 1:
+                info(f"STATE_CHANGE: Batching {len(changes)} changes for {character_name} into one update", category="character_updates")
+            try:
+                results[character_name] = bool(update_fn(character_name, combined))
+            except Exception as e:
+                error(f"FAILURE: Batched update failed for {character_name}", exception=e, category="character_updates")
+                results[character_name] = False
+        return results
+
+def coalesce_update_actions(actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge updateCharacterInfo actions that target the same character
+
+    The first action for a character keeps its place and carries the
+    combined changes. Actions without a usable name or changes are kept
+    unchanged, so the action handler still reports them.
+    """
+    merged = []
+    by_character = {}  # normalized name -> (merged action, [changes])
+    for action in actions:
+        parameters = action.get("parameters", {}) if action.get("action") == ACTION_UPDATE_CHARACTER_INFO else {}
+        character_name = parameters.get("characterName") or parameters.get("npcName")
+        changes = parameters.get("changes")
+        if isinstance(changes, dict):
+            changes = json.dumps(changes)
+        if not character_name or not isinstance(character_name, str) or not changes or not isinstance(changes, str):
+            merged.append(action)
+            continue
+
+        key = normalize_character_name(character_name)
+        if key in by_character:
+            by_character[key][1].append(changes)
+            continue
+        combined_action = {**action, "parameters": {**parameters, "changes": changes}}
+        by_character[key] = (combined_action, [changes])
+        merged.append(combined_action)
+
+    for combined_action, changes in by_character.values():
+        if len(changes) > 1:
+            combined_action["parameters"]["changes"] = combine_changes(changes)
+            debug(f"STATE_CHANGE: Coalesced {len(changes)} updateCharacterInfo actions for "
+                  f"{combined_action['parameters'].get('characterName') or combined_action['parameters'].get('npcName')}",
+                  category="character_updates")
+    return merged
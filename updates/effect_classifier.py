@@ -0,0 +1,322 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Local Effect Classifier
+
+Decides without a model call whether a character change creates a timed
+effect for the effects tracker. It returns the same structure as
+analyze_effect_with_ai ({"should_track": ..., "effect": {...}}), or None when
+the change needs the model.
+
+Each clause of a change is classified by rules, in this order:
+- An effect that ends, expires or is still running is not a new effect.
+- A caster's bookkeeping is not an effect on the caster: spending a slot is
+  not an effect, and a slot spent on a named spell or a spell cast "on"
+  someone goes to the model, which knows who the target is.
+- An explicit duration ("for 10 minutes", "until a long rest") together with
+  a stat change it can read ("+2 AC", "gains 5 hit points") is an effect.
+- A known spell uses its duration from data/spell_repository.json. Spells
+  under one minute are never tracked. SPELL_MODIFIERS supplies the stat
+  change for common spells like Aid and Shield of Faith.
+- A known potion uses POTION_EFFECTS; healing potions are instant.
+- Finding, buying or equipping items is not a timed effect. Magic item
+  bonuses live in the item's effects array, as described in
+  magical_item_effects_documentation.md.
+- Damage, healing, coins, XP and other plain changes that have no effect
+  wording are not effects.
+
+Anything else is left to the model: unknown spells and potions, virtue
+damage, curses, poisons without a stated duration. The tracker records one
+effect per change, so a change with several effects, or one effect among
+several stated stat changes, also goes to the model.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.spell_index import spell_index
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("effect_classifier")
+
+MIN_TRACKED_HOURS = 1 / 60  # Effects under one minute are not tracked
+
+# Spell (folded display name) -> (stat, value or None to read it from the text, affects_max,
+# hours or None to use the spell's duration)
+SPELL_MODIFIERS = {
+    "aid": ("hitPoints", 5, True, None),
+    "false life": ("hitPoints", None, False, None),
+    "heroes' feast": ("hitPoints", None, True, 24),  # Cast instantly, benefits last 24 hours
+    "longstrider": ("other", 10, False, None),
+    "mage armor": ("other", 3, False, None),
+    "shield of faith": ("other", 2, False, None)
+}
+
+# Potion name (after "potion of") -> (stat, value, affects_max, hours); None for instant potions
+POTION_EFFECTS = {
+    "healing": None,
+    "greater healing": None,
+    "superior healing": None,
+    "supreme healing": None,
+    "heroism": ("hitPoints", 10, False, 1)
+}
+
+# Words that point to a lasting effect; clauses with none of them are plain changes
+EFFECT_WORDS = re.compile(
+    r"\b(?:temporar\w*|until|lasting|lasts?|expir\w*|duration|poison\w*|disease\w*|curse\w*|"
+    r"drain\w*|buff\w*|debuff\w*|bless\w*|enhanc\w*|concentrat\w*|spells?|cast\w*|potions?|"
+    r"elixirs?|oils?|magic\w*|enchant\w*|advantage|disadvantage|resist\w*|immun\w*|vigou?r|"
+    r"clarity|spirit|virtues?|exhaust\w*|fatigue\w*|charm\w*|frighten\w*|aura|effects?)\b",
+    re.IGNORECASE)
+
+# Acquiring or equipping gear: item bonuses are not timed effects
+ITEM_VERBS = re.compile(
+    r"\b(?:finds?|found|picks? up|picked up|receives?|received|buys?|bought|purchas\w*|acquires?|"
+    r"acquired|obtains?|obtained|loots?|looted|adds?|added|equips?|equipped|unequips?|unequipped|"
+    r"dons?|donned|wields?|attunes?|attuned|sells?|sold|drops?|dropped|gives?|gave)\b",
+    re.IGNORECASE)
+CONSUME_VERBS = re.compile(r"\b(?:drinks?|drank|quaffs?|consumes?|consumed|imbibes?|uses?|used|applies|applied)\b",
+                           re.IGNORECASE)
+
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "eight": 8, "ten": 10, "twelve": 12, "twenty-four": 24}
+_NUMBER = r"(\d+(?:\.\d+)?|an?|one|two|three|four|five|six|eight|ten|twelve|twenty-four)"
+
+DURATION_PATTERN = re.compile(rf"\bfor\s+(?:the\s+next\s+)?{_NUMBER}\s+(round|minute|hour|day)s?\b", re.IGNORECASE)
+REST_PATTERN = re.compile(r"\buntil\s+(?:the\s+|their\s+|his\s+|her\s+|a\s+|next\s+)*(long|short)\s+rest\b", re.IGNORECASE)
+SPELL_DURATION_PATTERN = re.compile(r"(\d+)\s+(round|minute|hour|day)s?", re.IGNORECASE)
+
+STAT_NAMES = (r"(?:temporary\s+)?(?:(max(?:imum)?)\s+)?"
+              r"(hit\s*points?|hp|ac|armou?r\s+class|vigou?r|vig|clarity|cla|spirit|spi|guard|gd|glory)")
+STAT_BEFORE = re.compile(rf"([+-]?\d+)\s+(?:bonus\s+to\s+)?{STAT_NAMES}\b", re.IGNORECASE)
+STAT_AFTER = re.compile(rf"\b{STAT_NAMES}\s+(?:is\s+|are\s+)?(reduced|drained|lowered|decreased|increased|raised|boosted)\s+by\s+(\d+)",
+                        re.IGNORECASE)
+# The effect is over or already running, so there is nothing new to track
+END_STATE_PATTERN = re.compile(
+    r"\b(?:ends?|ended|ending|expires?|expired|wears?\s+off|wore\s+off|fades?|faded|dispelled|"
+    r"still|holds?|held|remains?\s+(?:active|in\s+effect)|runs?\s+out|ran\s+out)\b",
+    re.IGNORECASE)
+CAST_ON_PATTERN = re.compile(r"\bcast(?:s|ing)?\b.+\b(?:on|upon|at|targeting)\s+\w", re.IGNORECASE)
+SPELL_SLOT_PATTERN = re.compile(r"\bspell\s+slots?\b|\b(?:1st|2nd|3rd|[4-9]th)[- ]level\s+slots?\b", re.IGNORECASE)
+NEGATIVE_WORDS = re.compile(r"\b(?:loses?|lost|reduc\w*|drain\w*|lower\w*|decreas\w*|minus|penalty|takes?)\b", re.IGNORECASE)
+
+STAT_MAP = {
+    "hit": "hitPoints", "hp": "hitPoints", "ac": "other", "armor": "other", "armour": "other",
+    "vigour": "vigour", "vigor": "vigour", "vig": "vigour", "clarity": "clarity", "cla": "clarity",
+    "spirit": "spirit", "spi": "spirit", "guard": "guard", "gd": "guard", "glory": "glory"
+}
+
+SOURCE_PATTERN = re.compile(r"\b(?:from|by|due to|via|thanks to)\s+(?:an?\s+|the\s+|their\s+|his\s+|her\s+)?"
+                            r"(?!\d)([^,.;]+?)(?=\s+(?:for|until|lasting|which|that)\b|[,.;]|$)", re.IGNORECASE)
+
+_spell_pattern = None
+_spell_pattern_size = 0
+
+def _to_number(text: str) -> float:
+    return WORD_NUMBERS.get(text.lower(), None) or float(text)
+
+def _hours(amount: float, unit: str) -> float:
+    unit = unit.lower()
+    return {"round": amount / 600, "minute": amount / 60, "hour": amount, "day": amount * 24}[unit]
+
+def _duration(hours: float) -> Tuple[str, Any]:
+    """Effects-tracker duration for a length in hours"""
+    if hours >= 24 and hours % 24 == 0:
+        return "days", int(hours // 24)
+    return "hours", round(hours, 4)
+
+def split_clauses(changes: str) -> List[str]:
+    return [clause.strip() for clause in re.split(r"[\n;]+|\.\s+|,?\s+and\s+", changes, flags=re.IGNORECASE)
+            if clause.strip()]
+
+def _stat_change_count(text: str) -> int:
+    """Number of stat changes stated anywhere in a text"""
+    return len(STAT_BEFORE.findall(text)) + len(STAT_AFTER.findall(text))
+
+def _spells_in(clause: str) -> List[str]:
+    """Known spell names mentioned in a clause"""
+    global _spell_pattern, _spell_pattern_size
+    names = spell_index.names()
+    if _spell_pattern is None or len(names) != _spell_pattern_size:
+        # SPELL_MODIFIERS also covers a few spells that are not in the SRD repository
+        known = {name.lower() for name in names}
+        extra = [name.title() for name in SPELL_MODIFIERS if name not in known]
+        ordered = sorted(names + extra, key=len, reverse=True)
+        _spell_pattern = re.compile(r"\b(" + "|".join(re.escape(name) for name in ordered) + r")\b", re.IGNORECASE)
+        _spell_pattern_size = len(names)
+    # Short spell names are common words ("Light", "Shield"); without spell wording
+    # only the capitalised form counts
+    spell_context = re.search(r"\b(?:spell|cast\w*|casting)\b", clause, re.IGNORECASE)
+    found = []
+    for match in _spell_pattern.finditer(clause):
+        spell = _spell(match.group(1))
+        if spell_context or match.group(1) == spell["name"]:
+            found.append(spell["name"])
+    return found
+
+def _spell(name: str) -> Dict[str, Any]:
+    """Repository record of a spell, or a stub for SPELL_MODIFIERS-only spells"""
+    return spell_index.get(name) or {"name": name.title(), "duration": ""}
+
+def _spell_hours(spell: Dict[str, Any]) -> Optional[float]:
+    """Longest duration of a spell in hours, 0 for instant spells, None if not time-based"""
+    duration = spell.get("duration", "")
+    match = SPELL_DURATION_PATTERN.search(duration)
+    if match:
+        return _hours(float(match.group(1)), match.group(2))
+    if re.search(r"instantaneous", duration, re.IGNORECASE):
+        return 0
+    return None  # Until dispelled, special
+
+def _stat_change(clause: str) -> Optional[Tuple[str, int, bool]]:
+    """(stat, value, affects_max) stated in a clause"""
+    match = STAT_BEFORE.search(clause)
+    if match:
+        raw, maximum, stat_name = match.group(1), match.group(2), match.group(3)
+        value = int(raw)
+        if not raw.startswith(("+", "-")) and NEGATIVE_WORDS.search(clause[:match.start()]):
+            value = -value
+    else:
+        match = STAT_AFTER.search(clause)
+        if not match:
+            return None
+        maximum, stat_name, verb = match.group(1), match.group(2), match.group(3)
+        value = int(match.group(4))
+        if verb.lower() in ("reduced", "drained", "lowered", "decreased"):
+            value = -value
+    stat = STAT_MAP.get(stat_name.lower().split()[0].rstrip("s"))
+    if stat is None:
+        return None
+    affects_max = bool(maximum) and stat == "hitPoints"
+    return stat, value, affects_max
+
+def _source(clause: str, fallback: Optional[str]) -> str:
+    if fallback:
+        return fallback
+    match = SOURCE_PATTERN.search(clause)
+    return match.group(1).strip() if match else "temporary effect"
+
+def _effect(clause: str, stat: str, value: int, affects_max: bool, duration_type: str,
+            duration_value: Any, source: Optional[str]) -> Dict[str, Any]:
+    return {
+        "stat": stat,
+        "value": value,
+        "source": _source(clause, source),
+        "duration_type": duration_type,
+        "duration_value": duration_value,
+        "description": clause,
+        "affects_max": affects_max
+    }
+
+# Result of classifying one clause
+NOT_AN_EFFECT = "not_an_effect"
+NEEDS_MODEL = "needs_model"
+
+def classify_clause(clause: str) -> Any:
+    """
+    Classify one clause of a change description
+
+    Returns:
+        An effect dict, NOT_AN_EFFECT or NEEDS_MODEL
+    """
+    # 0. Endings and the caster's own bookkeeping
+    if END_STATE_PATTERN.search(clause):
+        return NOT_AN_EFFECT
+    spells = _spells_in(clause)
+    if SPELL_SLOT_PATTERN.search(clause):
+        return NEEDS_MODEL if spells else NOT_AN_EFFECT
+    if CAST_ON_PATTERN.search(clause):
+        return NEEDS_MODEL
+
+    potion = re.search(r"\bpotion\s+of\s+([a-z' ]+?)(?=\s+(?:for|and|to|which|that|from)\b|[,.;]|$)", clause, re.IGNORECASE)
+    duration = DURATION_PATTERN.search(clause)
+    rest = REST_PATTERN.search(clause)
+
+    # 1. Explicit duration in the text
+    if duration or rest:
+        change = _stat_change(clause)
+        if rest:
+            duration_type, duration_value = "until_rest", f"{rest.group(1).lower()}_rest"
+        else:
+            hours = _hours(_to_number(duration.group(1)), duration.group(2))
+            if hours < MIN_TRACKED_HOURS:
+                return NOT_AN_EFFECT
+            duration_type, duration_value = _duration(hours)
+        if change is None:
+            return NEEDS_MODEL
+        return _effect(clause, *change, duration_type, duration_value, spells[0] if spells else None)
+
+    # 2. Known spells
+    if spells:
+        spell = _spell(spells[0])
+        modifier = SPELL_MODIFIERS.get(spell["name"].lower())
+        hours = modifier[3] if modifier and modifier[3] is not None else _spell_hours(spell)
+        if hours is not None and hours < MIN_TRACKED_HOURS:
+            return NOT_AN_EFFECT if len(spells) == 1 else NEEDS_MODEL
+        if hours is None or len(spells) > 1:
+            return NEEDS_MODEL
+        change = _stat_change(clause)
+        if modifier is None and change is None:
+            return NEEDS_MODEL
+        if modifier is not None:
+            stat, value, affects_max, _ = modifier
+            if value is None:
+                if change is None:
+                    return NEEDS_MODEL
+                value = change[1]
+        else:
+            stat, value, affects_max = change
+        return _effect(clause, stat, value, affects_max, *_duration(hours), spell["name"])
+
+    # 3. Known potions
+    if potion and CONSUME_VERBS.search(clause):
+        name = potion.group(1).strip().lower()
+        if name not in POTION_EFFECTS:
+            return NEEDS_MODEL
+        effect = POTION_EFFECTS[name]
+        if effect is None:
+            return NOT_AN_EFFECT
+        stat, value, affects_max, hours = effect
+        return _effect(clause, stat, value, affects_max, *_duration(hours), f"Potion of {name.title()}")
+
+    # 4. Gear changes: item bonuses belong to the item's effects array
+    if ITEM_VERBS.search(clause) and not CONSUME_VERBS.search(clause):
+        return NOT_AN_EFFECT
+
+    # 5. Plain changes (damage, healing, coins, XP, ...)
+    if not EFFECT_WORDS.search(clause):
+        return NOT_AN_EFFECT
+
+    return NEEDS_MODEL
+
+def classify_effect(change_description: str) -> Optional[Dict[str, Any]]:
+    """
+    Classify a change description locally
+
+    Returns:
+        Analysis in the analyze_effect_with_ai format, or None if the model is needed
+    """
+    if not isinstance(change_description, str) or not change_description.strip():
+        return {"should_track": False, "effect": {}}
+
+    effects = []
+    for clause in split_clauses(change_description):
+        result = classify_clause(clause)
+        if result == NEEDS_MODEL:
+            debug(f"EFFECTS: Clause needs model classification: {clause}", category="effects_tracking")
+            return None
+        if result != NOT_AN_EFFECT:
+            effects.append(result)
+
+    # The tracker records one effect per change; several at once go to the model,
+    # as does an effect whose duration may cover other stated changes
+    if len(effects) > 1 or (effects and _stat_change_count(change_description) > 1):
+        debug(f"EFFECTS: Several effects in one change, using model: {change_description}", category="effects_tracking")
+        return None
+    if not effects:
+        return {"should_track": False, "effect": {}}
+    return {"should_track": True, "effect": effects[0]}
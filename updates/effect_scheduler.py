@@ -0,0 +1,217 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Effect Expiration Scheduler
+
+Keeps timed effects from the effects tracker in a min-heap ordered by expiry
+time. Expiry times are parsed once, when an effect is scheduled. The heap is
+persisted in the tracker under "expirySchedule" as [seconds, character, id]
+entries, where seconds counts game time from GAME_EPOCH.
+
+The scheduler sleeps until the game clock moves. update_world_time (and other
+code that advances the clock) calls wake(); while asleep, the per-loop check
+does nothing. When awake, a check looks only at the top of the heap, so
+finding k expired effects costs O(k log n) instead of a scan of every
+modifier.
+
+Rest-based effects have no expiry time and are not in the heap.
+pop_rest_effects() clears all of a character's rest effects in one pass.
+
+The heap remembers the file stamp (mtime and size) of the tracker it was
+built from or last saved to. When the file on disk no longer matches, as
+after a calendar migration, a campaign reset or a module switch, sync()
+reloads the schedule from the new tracker, rebuilding it if its entries
+differ from the tracker's timed effects.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.file_operations import file_stamp
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("effect_scheduler")
+
+GAME_EPOCH = datetime(2000, 1, 1)  # Base date of get_current_game_time()
+SCHEDULE_KEY = "expirySchedule"
+UNTIMED_EXPIRIES = ("long_rest", "short_rest", "special")
+
+# Rest type -> expiry values cleared by it
+REST_CLEARS = {
+    "long_rest": ("long_rest", "short_rest"),
+    "short_rest": ("short_rest",)
+}
+
+def to_game_seconds(moment: datetime) -> float:
+    return (moment - GAME_EPOCH).total_seconds()
+
+def expiry_seconds(modifier: Dict[str, Any]) -> Optional[float]:
+    """Parsed expiry of a modifier in game seconds, or None if it is not time-based"""
+    expires_at = modifier.get("expires_at")
+    if not expires_at or expires_at in UNTIMED_EXPIRIES:
+        return None
+    try:
+        return to_game_seconds(datetime.fromisoformat(expires_at))
+    except (TypeError, ValueError):
+        warning(f"Invalid expiration time for effect {modifier.get('id')}", category="effects_tracking")
+        return None
+
+def _timed_effect_keys(tracker: Dict[str, Any]) -> set:
+    return {
+        (character_name, modifier.get("id"))
+        for character_name, char_data in tracker.get("characters", {}).items()
+        for modifier in char_data.get("modifiers", [])
+        if modifier.get("expires_at") and modifier["expires_at"] not in UNTIMED_EXPIRIES
+    }
+
+class EffectScheduler:
+    """Min-heap of timed effect expiries, persisted in the effects tracker"""
+
+    def __init__(self):
+        self._heap = None     # [seconds, character, effect id] entries
+        self._entries = set()  # (character, effect id) currently scheduled
+        self._stamp = None     # file stamp of the tracker the heap matches
+        self._awake = True     # check once after startup
+
+    # ------------------------------------------------------------------
+    # Clock
+    # ------------------------------------------------------------------
+
+    def wake(self):
+        """Called when game time advances"""
+        self._awake = True
+
+    def is_awake(self) -> bool:
+        return self._awake
+
+    def sleep(self):
+        self._awake = False
+
+    # ------------------------------------------------------------------
+    # Heap maintenance
+    # ------------------------------------------------------------------
+
+    def is_current(self, tracker_path: str) -> bool:
+        """Whether the heap matches the tracker file as it is on disk"""
+        stamp = file_stamp(tracker_path)
+        return self._heap is not None and stamp is not None and stamp == self._stamp
+
+    def sync(self, tracker: Dict[str, Any], tracker_path: str):
+        """Reload the schedule if the tracker was just read from a file the heap does not match"""
+        if not self.is_current(tracker_path):
+            if self._heap is not None:
+                debug("EFFECTS: Effects tracker changed on disk, reloading expiry schedule", category="effects_tracking")
+            self.load(tracker)
+            self._stamp = file_stamp(tracker_path)
+
+    def mark_saved(self, tracker_path: str):
+        """Record that the tracker file now holds the heap's schedule"""
+        self._stamp = file_stamp(tracker_path)
+
+    def load(self, tracker: Dict[str, Any]):
+        """Take the persisted schedule from the tracker, rebuilding it if it is missing or stale"""
+        heap = tracker.get(SCHEDULE_KEY)
+        if isinstance(heap, list) and all(isinstance(entry, list) and len(entry) == 3 for entry in heap):
+            entries = {(entry[1], entry[2]) for entry in heap}
+            if entries == _timed_effect_keys(tracker):
+                heapq.heapify(heap)
+                self._heap, self._entries = heap, entries
+                tracker[SCHEDULE_KEY] = heap
+                return
+        self.rebuild(tracker)
+
+    def rebuild(self, tracker: Dict[str, Any]):
+        """Parse every timed modifier in the tracker into a fresh heap"""
+        heap = []
+        for character_name, char_data in tracker.get("characters", {}).items():
+            for modifier in char_data.get("modifiers", []):
+                seconds = expiry_seconds(modifier)
+                if seconds is not None:
+                    heap.append([seconds, character_name, modifier.get("id")])
+        heapq.heapify(heap)
+        self._heap = heap
+        self._entries = {(entry[1], entry[2]) for entry in heap}
+        tracker[SCHEDULE_KEY] = heap
+        debug(f"EFFECTS: Rebuilt expiry schedule with {len(heap)} timed effects", category="effects_tracking")
+
+    def schedule(self, tracker: Dict[str, Any], character_name: str, modifier: Dict[str, Any]):
+        """Add a modifier that was just added to the tracker"""
+        if self._heap is None:
+            self.load(tracker)
+        key = (character_name, modifier.get("id"))
+        if key in self._entries:
+            return
+        seconds = expiry_seconds(modifier)
+        if seconds is None:
+            return
+        heapq.heappush(self._heap, [seconds, character_name, modifier.get("id")])
+        self._entries.add(key)
+        tracker[SCHEDULE_KEY] = self._heap
+
+    def next_expiry(self) -> Optional[datetime]:
+        """Game time of the earliest scheduled expiry"""
+        if not self._heap:
+            return None
+        return GAME_EPOCH + timedelta(seconds=self._heap[0][0])
+
+    def has_due(self, now: datetime) -> bool:
+        return bool(self._heap) and self._heap[0][0] <= to_game_seconds(now)
+
+    def pop_due(self, tracker: Dict[str, Any], now: datetime) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Remove effects that have expired by now from the schedule and the tracker
+
+        Returns:
+            (character name, modifier) pairs in expiry order
+        """
+        if self._heap is None:
+            self.load(tracker)
+        limit = to_game_seconds(now)
+        due = []
+        while self._heap and self._heap[0][0] <= limit:
+            _, character_name, effect_id = heapq.heappop(self._heap)
+            self._entries.discard((character_name, effect_id))
+            due.append((character_name, effect_id))
+        tracker[SCHEDULE_KEY] = self._heap
+        if not due:
+            return []
+
+        # One pass over each affected character's modifiers
+        due_by_character = {}
+        for character_name, effect_id in due:
+            due_by_character.setdefault(character_name, set()).add(effect_id)
+        removed = {}
+        for character_name, effect_ids in due_by_character.items():
+            char_data = tracker.get("characters", {}).get(character_name, {})
+            kept = []
+            for modifier in char_data.get("modifiers", []):
+                if modifier.get("id") in effect_ids:
+                    removed[(character_name, modifier.get("id"))] = modifier
+                else:
+                    kept.append(modifier)
+            if "modifiers" in char_data:
+                char_data["modifiers"] = kept
+
+        # Entries whose modifier is already gone are skipped
+        return [(character_name, removed[(character_name, effect_id)])
+                for character_name, effect_id in due if (character_name, effect_id) in removed]
+
+    def pop_rest_effects(self, tracker: Dict[str, Any], character_name: str, rest_type: str) -> List[Dict[str, Any]]:
+        """Remove and return every effect of a character that ends with this rest"""
+        cleared_expiries = REST_CLEARS.get(rest_type, ())
+        char_data = tracker.get("characters", {}).get(character_name)
+        if not char_data or "modifiers" not in char_data:
+            return []
+        cleared, kept = [], []
+        for modifier in char_data["modifiers"]:
+            (cleared if modifier.get("expires_at") in cleared_expiries else kept).append(modifier)
+        char_data["modifiers"] = kept
+        return cleared
+
+# Global instance
+effect_scheduler = EffectScheduler()
@@ -0,0 +1,209 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Local Encounter Change Resolver
+
+Applies the mechanical part of an updateEncounter action locally. The combat
+model still decides what happens and narrates it; this module only does the
+bookkeeping on the creatures array. Examples: "Goblin 1 takes 6 damage
+(HP 7 -> 1)", "The Bandit Captain loses 4 HP and is slain",
+"Wolf 2 flees" and "Orc heals 3 HP".
+
+Damage and healing are computed from the creature's current hit points in
+the encounter file, not from the numbers the model quotes, so a miscounted
+"HP 15 -> 5" cannot drift the encounter state. An enemy reduced to 0 is dead.
+Typed damage ("takes 7 fire damage") and nonlethal damage are left to the
+model: the encounter file does not carry the creature's resistances and
+immunities, and a creature knocked out by nonlethal damage is not dead.
+
+Only enemies are changed here. Clauses about players and NPCs are accepted
+but not applied, since update_encounter syncs them from their character files
+either way. If any clause names an unknown or ambiguous creature, or does not
+match a rule, resolve_encounter_changes() returns None and the caller falls
+back to the model.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("encounter_change_parser")
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
+}
+
+_N = r"(?P<n>\d+|an?|one|two|three|four|five|six|seven|eight|nine|ten)"
+_HP = r"(?:hit\s+points?|hp|guard|gd)"
+# Quoted bookkeeping such as "(HP 15 -> 5)" or "(now 5 HP)"; recomputed locally
+_NOTE = r"(?:\s*\([^()]*\))?"
+# Untyped damage only; "7 more damage" is still untyped
+_DAMAGE = rf"(?:points?\s+of\s+)?(?:(?:more|additional|extra)\s+)?(?:damage|{_HP})"
+
+_PATTERNS = [
+    ("damage", rf"(?:loses|lost|takes|took|suffers|suffered|receives|received)\s+{_N}\s+{_DAMAGE}"),
+    ("damage", rf"(?:is\s+|was\s+)?(?:hit|struck|damaged|wounded)\s+for\s+{_N}(?:\s+{_DAMAGE})?"),
+    ("heal", rf"(?:heals?|healed|regains?|regained|recovers?|recovered)\s+{_N}\s+{_HP}"),
+    ("set", rf"(?:(?:current\s+)?{_HP}\s+(?:is\s+)?(?:now|reduced\s+to|set\s+to|drops\s+to|dropped\s+to)|(?:is\s+|was\s+)?(?:reduced|down|dropped|drops)\s+to|(?:is\s+)?(?:now\s+)?at)\s+{_N}(?:\s+{_HP})?(?:\s+remaining)?"),
+    ("slain", r"(?:is\s+|was\s+)?(?:slain|killed|dead|destroyed|cut\s+down|struck\s+down)|dies|died|falls\s+dead|fell\s+dead"),
+    ("defeated", r"(?:is\s+|was\s+)?(?:defeated|routed)|flees|fled|surrenders|surrendered|yields|yielded|retreats|retreated"),
+    ("unconscious", r"(?:is\s+|was\s+)?(?:knocked\s+)?(?:unconscious|out\s+cold)|(?:is\s+|was\s+)?knocked\s+out"),
+]
+_COMPILED = [(kind, re.compile(pattern + _NOTE, re.IGNORECASE)) for kind, pattern in _PATTERNS]
+
+# Clause boundaries: sentences, semicolons, commas, line breaks and "and"/"then"
+_CLAUSE_SPLIT = re.compile(r"\s*[;\n]\s*|(?<=[.!])\s+|,?\s+(?:and|then)\s+|,\s+", re.IGNORECASE)
+
+# "Goblin's HP is now 3" -> "HP is now 3"
+_POSSESSIVE = re.compile(r"^'s?\s+", re.IGNORECASE)
+
+def _number(value: str) -> int:
+    value = value.lower()
+    return int(value) if value.isdigit() else _NUMBER_WORDS[value]
+
+class _EncounterState:
+    """Working copy of the creature fields a local change may touch"""
+
+    def __init__(self, encounter_data: Dict[str, Any]):
+        self.creatures = [c for c in encounter_data.get("creatures", []) if isinstance(c, dict) and c.get("name")]
+        # Longest names first so "Goblin Archer" wins over "Goblin"
+        self.names = sorted((c["name"] for c in self.creatures), key=len, reverse=True)
+        self.changes = {}  # name -> {"currentHitPoints": int, "status": str}
+
+    def find_subject(self, clause: str):
+        """Split a clause into (creature, rest); creature is None if it names no one"""
+        text = re.sub(r"^the\s+", "", clause, flags=re.IGNORECASE)
+        for name in self.names:
+            if text.lower().startswith(name.lower()):
+                rest = text[len(name):]
+                if rest and not (rest[0].isspace() or rest[0] == "'"):
+                    continue  # "Goblin" must not match "Goblins"
+                matches = [c for c in self.creatures if c["name"].lower() == name.lower()]
+                if len(matches) != 1:
+                    return None, None  # several creatures share the name
+                return matches[0], _POSSESSIVE.sub(" ", rest).strip()
+        return None, clause
+
+    def _current(self, creature: Dict[str, Any]) -> Dict[str, Any]:
+        state = self.changes.get(creature["name"])
+        if state is None:
+            state = {
+                "currentHitPoints": creature.get("currentHitPoints"),
+                "status": str(creature.get("status", "alive")).lower()
+            }
+            self.changes[creature["name"]] = state
+        return state
+
+    def apply(self, creature: Dict[str, Any], kind: str, match: "re.Match") -> bool:
+        """Apply one parsed clause to a creature, returning False if it needs the model"""
+        if creature.get("type") in ("player", "npc"):
+            return True  # update_encounter syncs these from their character files
+        if creature.get("type") != "enemy":
+            return False
+        state = self._current(creature)
+        hit_points = state["currentHitPoints"]
+        max_hit_points = creature.get("maxHitPoints")
+        groups = match.groupdict()
+        amount = _number(groups["n"]) if groups.get("n") else None
+
+        if kind in ("damage", "heal", "set"):
+            if state["status"] != "alive" or not isinstance(hit_points, int) or not isinstance(max_hit_points, int):
+                return False
+            if kind == "damage":
+                hit_points -= amount
+            elif kind == "heal":
+                hit_points += amount
+            else:
+                hit_points = amount
+            state["currentHitPoints"] = max(0, min(hit_points, max_hit_points))
+            if state["currentHitPoints"] == 0:
+                state["status"] = "dead"
+        elif kind == "slain":
+            state["currentHitPoints"] = 0
+            state["status"] = "dead"
+        elif kind == "defeated":
+            if state["status"] == "dead":
+                return False
+            state["status"] = "defeated"
+        elif kind == "unconscious":
+            if state["status"] == "dead":
+                return False
+            state["status"] = "unconscious"
+        return True
+
+    def to_updates(self) -> Dict[str, Any]:
+        creatures = []
+        for creature in self.creatures:
+            state = self.changes.get(creature["name"])
+            if state is None:
+                continue
+            entry = {"name": creature["name"]}
+            if state["currentHitPoints"] != creature.get("currentHitPoints"):
+                entry["currentHitPoints"] = state["currentHitPoints"]
+            if state["status"] != str(creature.get("status", "alive")).lower():
+                entry["status"] = state["status"]
+            if len(entry) > 1:
+                creatures.append(entry)
+        return {"creatures": creatures}
+
+def _split_clauses(changes: str) -> List[str]:
+    clauses = []
+    for clause in _CLAUSE_SPLIT.split(changes.strip()):
+        clause = clause.strip().rstrip(".!").strip()
+        if clause:
+            clauses.append(clause)
+    return clauses
+
+def resolve_encounter_changes(changes: str, encounter_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Resolve an updateEncounter change description into a creatures delta
+
+    Args:
+        changes: Change description from the combat model
+        encounter_data: Current encounter data (not modified)
+
+    Returns:
+        {"creatures": [...]} in the format returned by the encounter update
+        model (possibly empty), or None if any part of the description needs
+        the model
+    """
+    if not isinstance(changes, str) or not isinstance(encounter_data, dict):
+        return None
+
+    clauses = _split_clauses(changes)
+    if not clauses:
+        return None
+
+    state = _EncounterState(encounter_data)
+    subject = None
+    for clause in clauses:
+        creature, rest = state.find_subject(clause)
+        if creature is None:
+            if rest is None:
+                debug(f"LOCAL_UPDATE: Ambiguous creature in '{clause}', using model", category="encounter_updates")
+                return None
+            # "... and is slain" continues the previous creature
+            creature = subject
+        if creature is None:
+            debug(f"LOCAL_UPDATE: No creature named in '{clause}', using model", category="encounter_updates")
+            return None
+        subject = creature
+
+        for kind, pattern in _COMPILED:
+            match = pattern.fullmatch(rest)
+            if match:
+                break
+        else:
+            debug(f"LOCAL_UPDATE: No local rule for '{clause}', using model", category="encounter_updates")
+            return None
+        if not state.apply(creature, kind, match):
+            debug(f"LOCAL_UPDATE: '{clause}' needs the model ({kind})", category="encounter_updates")
+            return None
+
+    return state.to_updates()
@@ -4,7 +4,7 @@
 # This software is subject to the terms of the Fair Source License.
 
 import json
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from openai import OpenAI
 import time
 
@@ -12,6 +12,7 @@ import time
 from config import OPENAI_API_KEY, PLOT_UPDATE_MODEL
 from utils.module_path_manager import ModulePathManager
 from utils.file_operations import safe_write_json, safe_read_json
+from utils.schema_registry import schema_registry
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -26,8 +27,7 @@ TEMPERATURE = 0.7
 # All color codes have been removed to prevent Windows console encoding errors
 
 def load_schema():
-    with open("schemas/plot_schema.json", "r") as schema_file:
-        return json.load(schema_file)
+    return schema_registry.get_schema("plot_schema")
 
 def update_party_tracker(plot_point_id, new_status, plot_impact, plot_filename):
     # DEPRECATED: activeQuests tracking has been deprecated in favor of using module_plot.json as the single source of truth
@@ -114,6 +114,7 @@ def update_plot(plot_point_id_param, new_status_param, plot_impact_param, plot_f
 
 
     plot_schema_data = load_schema() # Renamed variable
+    changed_paths = set() # Plot points touched by any attempt, for delta validation
 
     for attempt in range(max_retries):
         prompt_messages = [ # Renamed variable
@@ -156,8 +157,9 @@ Examples:
             updated_sections = json.loads(ai_response_content)
 
             for current_plot_point_id, updates in updated_sections.items(): # Renamed plot_point_id loop var
-                for plot_point_obj in plot_info_data["plotPoints"]: # Renamed plot_point loop var
+                for index, plot_point_obj in enumerate(plot_info_data["plotPoints"]): # Renamed plot_point loop var
                     if plot_point_obj["id"] == current_plot_point_id:
+                        changed_paths.add(("plotPoints", index))
                         if "sideQuests" in updates:
                             for updated_quest_item in updates["sideQuests"]: # Renamed updated_quest loop var
                                 for quest_item in plot_point_obj.get("sideQuests", []): # Renamed quest loop var, added .get for safety
@@ -168,7 +170,7 @@ Examples:
                             plot_point_obj.update(updates)
                         break
 
-            validate(instance=plot_info_data, schema=plot_schema_data)
+            schema_registry.validate_delta(plot_info_data, plot_schema_data, changed_paths)
 
             info(f"SUCCESS: Updated and validated plot info on attempt {attempt + 1}", category="plot_updates")
 
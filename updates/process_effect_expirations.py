@@ -11,7 +11,8 @@ This should be called periodically (e.g., in the main game loop).
 import os
 from typing import List, Dict, Any
 from updates.update_character_effects import check_and_apply_expirations
-from updates.update_character_info import update_character_info
+from updates.character_update_queue import CharacterUpdateQueue
+from updates.effect_scheduler import effect_scheduler
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set up logging
@@ -21,7 +22,13 @@ def process_all_effect_expirations():
     """
     Check for expired effects and apply reversals for all characters.
     This is the main entry point for the game loop.
+    
+    Nothing is read unless game time has advanced since the last check.
     """
+    if not effect_scheduler.is_awake():
+        return
+    effect_scheduler.sleep()
+    
     debug("EFFECTS: Checking for expired effects...", category="effects_tracking")
     
     # Get all expired effects
@@ -33,20 +40,21 @@ def process_all_effect_expirations():
     
     info(f"EFFECTS: Processing {len(reversals)} expired effects", category="effects_tracking")
     
-    # Apply each reversal through the character update system
+    # Queue the reversals so each character gets one batched update
+    queue = CharacterUpdateQueue()
     for reversal in reversals:
         character_name = reversal['character']
         description = reversal['description']
         modifier = reversal['modifier']
         
-        info(f"EFFECTS: Reversing effect for {character_name}: {description}", category="effects_tracking")
-        
-        try:
-            # Call update_character_info to apply the reversal
-            update_character_info(character_name, description)
-            info(f"EFFECTS: Successfully reversed effect: {modifier['source']}", category="effects_tracking")
-        except Exception as e:
-            error(f"EFFECTS: Failed to reverse effect for {character_name}: {str(e)}", category="effects_tracking")
+        info(f"EFFECTS: Reversing effect for {character_name}: {description} ({modifier['source']})", category="effects_tracking")
+        queue.add(character_name, description)
+    
+    for character_name, success in queue.flush().items():
+        if success:
+            info(f"EFFECTS: Successfully reversed expired effects for {character_name}", category="effects_tracking")
+        else:
+            error(f"EFFECTS: Failed to reverse expired effects for {character_name}", category="effects_tracking")
 
 def process_rest_effects(character_name: str, rest_type: str):
     """
@@ -69,19 +77,16 @@ def process_rest_effects(character_name: str, rest_type: str):
     
     info(f"EFFECTS: Clearing {len(reversals)} effects due to {rest_type}", category="effects_tracking")
     
-    # Apply each reversal
+    # Apply all reversals in one update
+    queue = CharacterUpdateQueue()
     for reversal in reversals:
-        description = reversal['description']
-        modifier = reversal['modifier']
-        
-        info(f"EFFECTS: Clearing effect: {modifier['source']}", category="effects_tracking")
-        
-        try:
-            # Call update_character_info to apply the reversal
-            update_character_info(character_name, description)
-            info(f"EFFECTS: Successfully cleared rest effect: {modifier['source']}", category="effects_tracking")
-        except Exception as e:
-            error(f"EFFECTS: Failed to clear rest effect: {str(e)}", category="effects_tracking")
+        info(f"EFFECTS: Clearing effect: {reversal['modifier']['source']}", category="effects_tracking")
+        queue.add(character_name, reversal['description'])
+    
+    if all(queue.flush().values()):
+        info(f"EFFECTS: Successfully cleared {len(reversals)} rest effects", category="effects_tracking")
+    else:
+        error(f"EFFECTS: Failed to clear rest effects for {character_name}", category="effects_tracking")
 
 # Test function
 if __name__ == "__main__":
@@ -18,6 +18,8 @@ from utils.encoding_utils import safe_json_load, safe_json_dump
 from utils.file_operations import safe_read_json, safe_write_json
 from utils.module_path_manager import ModulePathManager
 from updates.update_character_info import normalize_character_name
+from updates.effect_scheduler import effect_scheduler
+from updates.effect_classifier import classify_effect
 from openai import OpenAI
 import config
 
@@ -91,6 +93,7 @@ def load_effects_tracker() -> Dict[str, Any]:
         }
         safe_write_json(file_path, initial_data)
         debug(f"EFFECTS: Created new effects tracker at {file_path}", category="effects_tracking")
+        effect_scheduler.sync(initial_data, file_path)
         return initial_data
     
     data = safe_read_json(file_path)
@@ -98,6 +101,8 @@ def load_effects_tracker() -> Dict[str, Any]:
         error(f"Failed to load effects tracker from {file_path}")
         return {"characters": {}}
     
+    # The file may have been rewritten elsewhere (reset, module switch, migration)
+    effect_scheduler.sync(data, file_path)
     return data
 
 def save_effects_tracker(data: Dict[str, Any]) -> bool:
@@ -107,6 +112,7 @@ def save_effects_tracker(data: Dict[str, Any]) -> bool:
     
     success = safe_write_json(file_path, data)
     if success:
+        effect_scheduler.mark_saved(file_path)
         debug(f"EFFECTS: Saved effects tracker to {file_path}", category="effects_tracking")
     else:
         error(f"EFFECTS: Failed to save effects tracker to {file_path}", category="effects_tracking")
@@ -283,71 +289,64 @@ def add_effect(character_name: str, effect_info: Dict[str, Any]) -> bool:
     if expiration:
         effect_entry["expires_at"] = expiration
     
-    # Add to character's modifiers
+    # Add to character's modifiers and the expiry schedule
     tracker["characters"][normalized_name]["modifiers"].append(effect_entry)
+    effect_scheduler.schedule(tracker, normalized_name, effect_entry)
+    # An effect may already be due (zero duration); check on the next loop
+    effect_scheduler.wake()
     
     info(f"EFFECTS: Added effect for {normalized_name}: {effect_info['source']} "
          f"({effect_info['stat']} {effect_info['value']:+d})", category="effects_tracking")
     
     return save_effects_tracker(tracker)
 
+def build_reversal_description(modifier: Dict[str, Any], rest_type: Optional[str] = None) -> str:
+    """Describe the character update that undoes an ending effect."""
+    # Generate proper description based on whether we're adding or removing
+    if modifier["value"] > 0:
+        # Positive effect expiring - character loses the bonus
+        action_word = "loses"
+    else:
+        # Negative effect expiring - character regains what was lost
+        action_word = "regains"
+    
+    if rest_type:
+        # Include the specific stat and value in the description
+        return f"{action_word} {abs(modifier['value'])} {modifier['stat']} as {modifier['source']} expires after {rest_type.replace('_', ' ')}"
+    
+    # Check if this effect affects both current and max values
+    if modifier.get("affects_max", False) and modifier["stat"] == "hitPoints":
+        return f"{action_word} {abs(modifier['value'])} maximum hit points and {abs(modifier['value'])} current hit points as {modifier['source']} expires. Remove '{modifier['source']}' from temporaryEffects."
+    return f"{action_word} {abs(modifier['value'])} {modifier['stat']} as {modifier['source']} expires. Remove effect from temporaryEffects."
+
 def check_and_apply_expirations() -> List[Dict[str, Any]]:
     """Check for expired effects and generate reversal actions."""
-    tracker = load_effects_tracker()
+    tracker = None
+    if not effect_scheduler.is_current(get_effects_file_path()):
+        # First check, or the tracker was rewritten outside this module
+        tracker = load_effects_tracker()
+    
     # Use game time instead of real time
     now = get_current_game_time()
+    
+    # Only the earliest scheduled expiry needs to be compared
+    if not effect_scheduler.has_due(now):
+        return []
+    
+    if tracker is None:
+        tracker = load_effects_tracker()
     reversals = []
     
-    for character_name, char_data in tracker["characters"].items():
-        if "modifiers" not in char_data:
-            continue
-        
-        active_modifiers = []
-        
-        for modifier in char_data["modifiers"]:
-            expired = False
-            
-            # Check time-based expiration
-            if "expires_at" in modifier and modifier["expires_at"] not in ["long_rest", "short_rest", "special"]:
-                try:
-                    expiration_time = datetime.fromisoformat(modifier["expires_at"])
-                    if now >= expiration_time:
-                        expired = True
-                        info(f"EFFECTS: Effect expired for {character_name}: {modifier['source']}", category="effects_tracking")
-                except:
-                    warning(f"Invalid expiration time for effect {modifier['id']}")
-            
-            if expired:
-                # Generate reversal
-                reversal_value = -modifier["value"]  # Reverse the effect
-                
-                # Generate proper description based on whether we're adding or removing
-                if modifier["value"] > 0:
-                    # Positive effect expiring - character loses the bonus
-                    action_word = "loses"
-                else:
-                    # Negative effect expiring - character regains what was lost
-                    action_word = "regains"
-                
-                # Check if this effect affects both current and max values
-                if modifier.get("affects_max", False) and modifier["stat"] == "hitPoints":
-                    reversal_desc = f"{action_word} {abs(modifier['value'])} maximum hit points and {abs(modifier['value'])} current hit points as {modifier['source']} expires. Remove '{modifier['source']}' from temporaryEffects."
-                else:
-                    reversal_desc = f"{action_word} {abs(modifier['value'])} {modifier['stat']} as {modifier['source']} expires. Remove effect from temporaryEffects."
-                
-                reversals.append({
-                    "character": character_name,
-                    "description": reversal_desc,
-                    "modifier": modifier
-                })
-            else:
-                active_modifiers.append(modifier)
-        
-        char_data["modifiers"] = active_modifiers
+    for character_name, modifier in effect_scheduler.pop_due(tracker, now):
+        info(f"EFFECTS: Effect expired for {character_name}: {modifier['source']}", category="effects_tracking")
+        reversals.append({
+            "character": character_name,
+            "description": build_reversal_description(modifier),
+            "modifier": modifier
+        })
     
-    # Save updated tracker
-    if reversals:
-        save_effects_tracker(tracker)
+    # Save updated tracker (modifiers and the remaining schedule)
+    save_effects_tracker(tracker)
     
     return reversals
 
@@ -359,52 +358,16 @@ def clear_rest_effects(character_name: str, rest_type: str) -> List[Dict[str, An
     # Normalize character name
     normalized_name = normalize_character_name(character_name)
     
-    if normalized_name not in tracker["characters"]:
-        return reversals
-    
-    char_data = tracker["characters"][normalized_name]
-    if "modifiers" not in char_data:
-        return reversals
+    for modifier in effect_scheduler.pop_rest_effects(tracker, normalized_name, rest_type):
+        reversals.append({
+            "character": character_name,
+            "description": build_reversal_description(modifier, rest_type),
+            "modifier": modifier
+        })
+        info(f"EFFECTS: Cleared rest effect for {character_name}: {modifier['source']}", category="effects_tracking")
     
-    active_modifiers = []
-    
-    for modifier in char_data["modifiers"]:
-        should_clear = False
-        
-        # Check if this effect expires on this type of rest
-        if "expires_at" in modifier:
-            if rest_type == "long_rest" and modifier["expires_at"] in ["long_rest", "short_rest"]:
-                should_clear = True
-            elif rest_type == "short_rest" and modifier["expires_at"] == "short_rest":
-                should_clear = True
-        
-        if should_clear:
-            # Generate reversal with specific value information
-            reversal_value = -modifier["value"]
-            
-            # Generate proper description based on whether we're adding or removing
-            if modifier["value"] > 0:
-                # Positive effect expiring - character loses the bonus
-                action_word = "loses"
-            else:
-                # Negative effect expiring - character regains what was lost
-                action_word = "regains"
-            
-            # Include the specific stat and value in the description
-            reversal_desc = f"{action_word} {abs(modifier['value'])} {modifier['stat']} as {modifier['source']} expires after {rest_type.replace('_', ' ')}"
-            
-            reversals.append({
-                "character": character_name,
-                "description": reversal_desc,
-                "modifier": modifier
-            })
-            
-            info(f"EFFECTS: Cleared rest effect for {character_name}: {modifier['source']}", category="effects_tracking")
-        else:
-            active_modifiers.append(modifier)
-    
-    char_data["modifiers"] = active_modifiers
-    save_effects_tracker(tracker)
+    if reversals:
+        save_effects_tracker(tracker)
     
     return reversals
 
@@ -434,15 +397,22 @@ def update_character_effects(character_name: str, change_description: str) -> bo
         
         # Apply reversals to character
         if rest_reversals:
-            from updates.update_character_info import update_character_info
+            from updates.character_update_queue import CharacterUpdateQueue
+            queue = CharacterUpdateQueue()
             for reversal in rest_reversals:
                 debug(f"EFFECTS: Applying rest reversal: {reversal['description']}")
-                update_character_info(reversal["character"], reversal["description"])
+                queue.add(reversal["character"], reversal["description"])
+            queue.flush()
         
         # Continue to check if there are also new effects to track
     
-    # Use AI to analyze if this is a trackable effect
-    analysis = analyze_effect_with_ai(character_name, change_description)
+    # Classify locally from the spell and item tables; only unknown
+    # spells, items and effects go to the AI
+    analysis = classify_effect(change_description)
+    if analysis is not None:
+        debug(f"EFFECTS: Classified locally: {analysis}", category="effects_tracking")
+    else:
+        analysis = analyze_effect_with_ai(character_name, change_description)
     
     if not analysis:
         warning("Failed to analyze effect")
@@ -102,7 +102,7 @@ import copy
 import shutil
 import os
 from datetime import datetime
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from openai import OpenAI
 import time
 import re
@@ -111,6 +111,11 @@ from config import OPENAI_API_KEY, PLAYER_INFO_UPDATE_MODEL, NPC_INFO_UPDATE_MOD
 from utils.module_path_manager import ModulePathManager
 from utils.file_operations import safe_write_json, safe_read_json
 from utils.encoding_utils import safe_json_load
+from utils.schema_registry import schema_registry, changed_keys
+from utils.version_store import version_store
+from updates.character_change_parser import parse_simple_changes
+from updates.character_projection import (project_character, render_projection, report_savings,
+                                          resolve_indexed_references)
 from core.validation.mythic_character_validator import MythicCharacterValidator as AICharacterValidator
 from core.validation.character_effects_validator import AICharacterEffectsValidator
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
@@ -128,9 +133,8 @@ VALIDATION_TEMPERATURE = 0.1  # Lower temperature for validation
 # All color codes have been removed to prevent Windows console encoding errors
 
 def load_schema():
-    """Load the unified character schema"""
-    with open("schemas/char_schema.json", "r") as schema_file:
-        return json.load(schema_file)
+    """Load the unified character schema (shared, cached copy - do not modify)"""
+    return schema_registry.get_schema("char_schema")
 
 def load_conversation_history():
     data = safe_read_json("modules/conversation_history/conversation_history.json")
@@ -374,14 +378,21 @@ def process_conversation_history(history, character_role):
     # NPC processing can be added here if needed
     return history
 
-def format_schema_for_prompt(schema, character_role):
-    """Format schema information for inclusion in the prompt"""
+def format_schema_for_prompt(schema, character_role, fields=None):
+    """
+    Format schema information for inclusion in the prompt
+
+    If fields is given, only those properties are described, and the item
+    guidance is included only when an item-bearing section is among them.
+    """
     if character_role == 'player':
         schema_info = "Character Schema - Valid fields and values:\n\n"
     else:
         schema_info = "NPC Schema - Valid fields and values:\n\n"
     
     properties = schema.get('properties', {})
+    if fields is not None:
+        properties = {field: properties[field] for field in fields if field in properties}
     
     # Group fields by type for better readability
     simple_fields = []
@@ -418,6 +429,9 @@ def format_schema_for_prompt(schema, character_role):
     if object_fields:
         schema_info += "Object Fields:\n" + "\n".join(object_fields) + "\n\n"
     
+    if fields is not None and not {'equipment', 'ammunition', 'currency', 'attacksAndSpellcasting'} & set(fields):
+        return schema_info
+    
     # Add role-specific examples
     # Add common item type guidance
     schema_info += """
@@ -501,8 +515,14 @@ def normalize_status_and_condition(data, character_role):
     return data
 
 def deep_merge_dict(base_dict, update_dict):
-    """Recursively merge update_dict into base_dict, preserving nested structures"""
-    result = copy.deepcopy(base_dict)
+    """
+    Recursively merge update_dict into base_dict, preserving nested structures
+
+    base_dict is never modified. Only the path to each updated value is
+    copied; untouched subtrees are shared with base_dict, so replace values
+    in the result rather than mutating them in place.
+    """
+    result = dict(base_dict)
     
     # Define arrays that need special merge handling (identified by name fields)
     named_arrays = {
@@ -546,7 +566,8 @@ def deep_merge_dict(base_dict, update_dict):
 
 def merge_equipment_arrays(base_equipment, update_equipment):
     """Merge equipment arrays by item name, preserving existing items and removing zero-quantity items"""
-    result = copy.deepcopy(base_equipment)
+    # Items are shared with the base; updated items are rebuilt by deep_merge_dict
+    result = list(base_equipment)
     
     # Create a mapping of item names to indices in the base equipment
     item_name_to_index = {}
@@ -586,7 +607,7 @@ def merge_ammunition_arrays(base_ammunition, update_ammunition):
         # Use lowercase name as key for case-insensitive matching
         key = ammo.get('name', '').lower().strip()
         if key:
-            ammo_lookup[key] = copy.deepcopy(ammo)
+            ammo_lookup[key] = ammo
     
     # Process updates
     for update_ammo in update_ammunition:
@@ -599,11 +620,14 @@ def merge_ammunition_arrays(base_ammunition, update_ammunition):
         
         # Check if this ammunition already exists (case-insensitive)
         if update_name_lower in ammo_lookup:
-            # Add to existing ammunition quantity (supports negative for removals)
-            ammo_lookup[update_name_lower]['quantity'] += update_quantity
+            # Add to existing ammunition quantity (supports negative for removals);
+            # copy on write, the base entry is shared with the original data
+            ammo = dict(ammo_lookup[update_name_lower])
+            ammo['quantity'] = ammo.get('quantity', 0) + update_quantity
             # If the update includes a description and the base doesn't have one, add it
-            if 'description' in update_ammo and 'description' not in ammo_lookup[update_name_lower]:
-                ammo_lookup[update_name_lower]['description'] = update_ammo['description']
+            if 'description' in update_ammo and 'description' not in ammo:
+                ammo['description'] = update_ammo['description']
+            ammo_lookup[update_name_lower] = ammo
         else:
             # New ammunition type - only add if positive quantity
             if update_quantity > 0:
@@ -621,7 +645,7 @@ def merge_ammunition_arrays(base_ammunition, update_ammunition):
         if ammo.get('quantity', 0) > 0:
             # Ensure description field exists for schema compliance
             if 'description' not in ammo:
-                ammo['description'] = f"Standard {ammo.get('name', 'ammunition').lower()}."
+                ammo = {**ammo, 'description': f"Standard {ammo.get('name', 'ammunition').lower()}."}
             result.append(ammo)
     
     # Sort by name for consistent ordering
@@ -636,7 +660,7 @@ def merge_named_arrays(base_array, update_array, name_field):
     for item in base_array:
         key = item.get(name_field, '').lower().strip()
         if key:
-            lookup[key] = copy.deepcopy(item)
+            lookup[key] = item
     
     # Process updates
     for update_item in update_array:
@@ -647,9 +671,8 @@ def merge_named_arrays(base_array, update_array, name_field):
             continue
         
         if update_name_lower in lookup:
-            # Update existing item - merge all fields
-            for field, value in update_item.items():
-                lookup[update_name_lower][field] = value
+            # Update existing item - merge all fields (copy on write)
+            lookup[update_name_lower] = {**lookup[update_name_lower], **update_item}
         else:
             # Add new item
             lookup[update_name_lower] = copy.deepcopy(update_item)
@@ -800,10 +823,18 @@ def validate_critical_fields_preserved(original_data, updated_data, character_na
     
     return warnings
 
-def validate_character_data(data, schema, character_name):
-    """Validate character data against schema"""
+def validate_character_data(data, schema, character_name, changed_keys=None):
+    """
+    Validate character data against schema
+
+    If changed_keys is given, only those top-level fields (and the required
+    fields) are checked; the rest of the data is assumed to be valid already.
+    """
     try:
-        validate(instance=data, schema=schema)
+        if changed_keys is None:
+            schema_registry.validate(data, schema)
+        else:
+            schema_registry.validate_delta(data, schema, changed_keys)
         return True, None
     except ValidationError as e:
         error_msg = f"Validation error for {character_name}: {e.message}"
@@ -811,7 +842,7 @@ def validate_character_data(data, schema, character_name):
             error_msg += f" at path: {'.'.join(map(str, e.path))}"
         return False, error_msg
 
-def purge_invalid_fields(data, schema, character_name=""):
+def purge_invalid_fields(data, schema, character_name="", fields=None):
     """
     Remove fields from character data that are not in the schema.
     This prevents validation failures from AI-added invalid fields.
@@ -820,6 +851,9 @@ def purge_invalid_fields(data, schema, character_name=""):
         data (dict): Character data to clean
         schema (dict): Schema to validate against
         character_name (str): Character name for logging
+        fields (iterable, optional): Top-level fields to clean recursively.
+            Unknown top-level fields are always removed; nested objects outside
+            this set are kept as they are (they were clean when last saved).
     
     Returns:
         tuple: (cleaned_data, removed_fields_list)
@@ -835,7 +869,7 @@ def purge_invalid_fields(data, schema, character_name=""):
         if field in schema_properties:
             # Field exists in schema - keep it (but recursively clean if it's an object)
             field_schema = schema_properties[field]
-            if isinstance(value, dict) and field_schema.get('type') == 'object':
+            if isinstance(value, dict) and field_schema.get('type') == 'object' and (fields is None or field in fields):
                 # Recursively clean nested objects
                 if 'properties' in field_schema:
                     cleaned_value, nested_removed = purge_invalid_fields(value, field_schema, f"{character_name}.{field}")
@@ -932,14 +966,17 @@ def cleanup_old_backups(character_path, max_backups=5):
     except Exception as e:
         warning(f"FILE_OP: Backup cleanup failed", category="file_operations")
 
-def restore_character_from_backup(character_name, backup_type="latest", character_role=None):
+def restore_character_from_backup(character_name, backup_type="latest", character_role=None, version=None, turn=None):
     """
-    Restore a character from a backup file
+    Restore a character from its version history or a backup file
     
     Args:
         character_name (str): Name of the character to restore
-        backup_type (str): Type of backup to restore ("latest", or specific timestamp)
+        backup_type (str): "latest" undoes the most recent recorded change; any other
+            value names a legacy backup file (e.g. "update_20240101_120000")
         character_role (str, optional): Character role, auto-detected if None
+        version (int, optional): Recorded version to restore (see list_character_versions)
+        turn (str, optional): Restore the character as it was at the end of this turn
     
     Returns:
         bool: True if successful, False otherwise
@@ -953,6 +990,14 @@ def restore_character_from_backup(character_name, backup_type="latest", characte
     
     character_path = get_character_path(character_name, character_role)
     
+    if version is None and turn is None and backup_type == "latest":
+        previous_version = version_store.latest_version(character_path) - 1
+        if previous_version >= 1:
+            version = previous_version
+    
+    if version is not None or turn is not None:
+        return version_store.restore(character_path, version=version, turn=turn)
+    
     if backup_type == "latest":
         backup_path = character_path + ".backup_latest"
     else:
@@ -967,15 +1012,17 @@ def restore_character_from_backup(character_name, backup_type="latest", characte
         return False
     
     try:
-        # Create a backup of current state before restoration
-        restoration_backup = create_character_backup(character_path, "pre_restoration")
+        current_data = safe_read_json(character_path) if os.path.exists(character_path) else None
         
         # Copy backup to main file
         shutil.copy2(backup_path, character_path)
         info(f"SUCCESS: Successfully restored {character_name} from backup", category="character_updates")
         
-        if restoration_backup:
-            info(f"FILE_OP: Previous state backed up as: {os.path.basename(restoration_backup)}", category="file_operations")
+        # Record the restoration so the previous state can be restored again
+        restored_data = safe_read_json(character_path)
+        if isinstance(restored_data, dict):
+            version_store.record(character_path, current_data, restored_data,
+                                 reason=f"restore {os.path.basename(backup_path)}")
         
         return True
         
@@ -983,61 +1030,79 @@ def restore_character_from_backup(character_name, backup_type="latest", characte
         error(f"FAILURE: Error restoring from backup", exception=e, category="character_updates")
         return False
 
-def repair_character_data(character_data):
+def repair_character_data(character_data, fields=None):
     """
     Repair common schema issues in character data before processing
     
+    Repaired items are replaced rather than edited in place, since merged
+    character data shares unchanged items with the data it was merged from.
+    
     Args:
         character_data (dict): Character data to repair
+        fields (iterable, optional): Only repair these top-level fields
     
     Returns:
         dict: Repaired character data
     """
+    def wanted(field):
+        return (fields is None or field in fields) and isinstance(character_data.get(field), list)
+    
     # Ensure ammunition has descriptions
-    if 'ammunition' in character_data and isinstance(character_data['ammunition'], list):
+    if wanted('ammunition'):
+        repaired = []
         for ammo in character_data['ammunition']:
-            if 'description' not in ammo or not ammo['description']:
+            if isinstance(ammo, dict) and not ammo.get('description'):
                 # Add a default description based on the ammunition name
                 ammo_name = ammo.get('name', 'ammunition').lower()
                 if 'arrow' in ammo_name:
-                    ammo['description'] = "Standard arrows for use with a longbow or shortbow"
+                    description = "Standard arrows for use with a longbow or shortbow"
                 elif 'bolt' in ammo_name:
-                    ammo['description'] = "Standard crossbow bolts for use with crossbows"
+                    description = "Standard crossbow bolts for use with crossbows"
                 elif 'bullet' in ammo_name:
-                    ammo['description'] = "Standard sling bullets for use with a sling"
+                    description = "Standard sling bullets for use with a sling"
                 else:
-                    ammo['description'] = f"Standard {ammo_name}"
-                debug(f"REPAIR: Added missing description to ammunition: {ammo['name']}", category="character_updates")
+                    description = f"Standard {ammo_name}"
+                ammo = {**ammo, 'description': description}
+                debug(f"REPAIR: Added missing description to ammunition: {ammo.get('name')}", category="character_updates")
+            repaired.append(ammo)
+        character_data['ammunition'] = repaired
     
     # Ensure equipment has required fields
-    if 'equipment' in character_data and isinstance(character_data['equipment'], list):
+    if wanted('equipment'):
+        repaired = []
         for item in character_data['equipment']:
-            # Ensure all equipment has a description
-            if 'description' not in item or not item['description']:
-                item['description'] = f"A {item.get('item_name', 'item')}"
-                debug(f"REPAIR: Added missing description to equipment: {item.get('item_name', 'unknown')}", category="character_updates")
-            
-            # Ensure quantity exists
-            if 'quantity' not in item:
-                item['quantity'] = 1
-                debug(f"REPAIR: Added missing quantity to equipment: {item.get('item_name', 'unknown')}", category="character_updates")
+            if isinstance(item, dict) and (not item.get('description') or 'quantity' not in item):
+                item = dict(item)
+                # Ensure all equipment has a description
+                if not item.get('description'):
+                    item['description'] = f"A {item.get('item_name', 'item')}"
+                    debug(f"REPAIR: Added missing description to equipment: {item.get('item_name', 'unknown')}", category="character_updates")
+                
+                # Ensure quantity exists
+                if 'quantity' not in item:
+                    item['quantity'] = 1
+                    debug(f"REPAIR: Added missing quantity to equipment: {item.get('item_name', 'unknown')}", category="character_updates")
+            repaired.append(item)
+        character_data['equipment'] = repaired
     
     # Ensure injuries have valid types
-    if 'injuries' in character_data and isinstance(character_data['injuries'], list):
+    if wanted('injuries'):
         valid_injury_types = ["wound", "poison", "disease", "curse", "other"]
+        # Map common invalid types
+        injury_type_map = {
+            "scar": "other",
+            "scars": "other",
+            "burn": "wound",
+            "burns": "wound"
+        }
+        repaired = []
         for injury in character_data['injuries']:
-            if isinstance(injury, dict) and 'type' in injury:
-                if injury['type'] not in valid_injury_types:
-                    old_type = injury['type']
-                    # Map common invalid types
-                    injury_type_map = {
-                        "scar": "other",
-                        "scars": "other",
-                        "burn": "wound",
-                        "burns": "wound"
-                    }
-                    injury['type'] = injury_type_map.get(old_type.lower(), "other")
-                    debug(f"REPAIR: Fixed invalid injury type '{old_type}' to '{injury['type']}'", category="character_updates")
+            if isinstance(injury, dict) and 'type' in injury and injury['type'] not in valid_injury_types:
+                old_type = injury['type']
+                injury = {**injury, 'type': injury_type_map.get(str(old_type).lower(), "other")}
+                debug(f"REPAIR: Fixed invalid injury type '{old_type}' to '{injury['type']}'", category="character_updates")
+            repaired.append(injury)
+        character_data['injuries'] = repaired
     
     return character_data
 
@@ -1103,24 +1168,31 @@ def update_character_info(character_name, changes, character_role=None):
         error(f"FAILURE: Error loading character data", exception=e, category="file_operations")
         return False
     
-    # Create file backup before any changes
-    backup_path = create_character_backup(character_path, "update")
-    if backup_path is None:
-        warning("FILE_OP: Could not create backup, but proceeding with update", category="file_operations")
-    else:
-        # Clean up old backups to prevent accumulation
-        cleanup_old_backups(character_path)
+    # character_data itself is the in-memory backup: merges below share its
+    # unchanged subtrees copy-on-write and never modify it. The saved result is
+    # recorded as a patch in the character's version history (no file copies).
     
-    # Create in-memory backup
-    original_data = copy.deepcopy(character_data)
+    # Simple changes (damage, XP, coins, ammunition, spell slots, conditions)
+    # are parsed locally; anything else goes to the model below
+    local_updates = parse_simple_changes(changes, character_data, character_name)
+    if local_updates is not None:
+        debug(f"LOCAL_UPDATE: Applying '{changes}' without model call: {local_updates}", category="character_updates")
     
     # Load and process conversation history
     history = load_conversation_history()
     if character_role == 'player':
         history = process_conversation_history(history, character_role)
     
+    # Only the sheet sections this change needs go into the prompt, compactly
+    projection, prompt_sections = project_character(character_data, changes)
+    projected_text = render_projection(projection)
+    
     # Format schema for prompt
-    schema_info = format_schema_for_prompt(schema, character_role)
+    schema_info = format_schema_for_prompt(schema, character_role, fields=prompt_sections)
+    if local_updates is None:
+        report_savings(character_name,
+                       json.dumps(character_data, indent=2) + format_schema_for_prompt(schema, character_role),
+                       projected_text + schema_info, prompt_sections)
     
     # Build the prompt
     system_message = f"""You are an assistant that updates character information in a Mythic Bastionland roleplaying game. Given the current character information and a description of changes, you must return only the updated sections as a JSON object. Do not include unchanged fields. Your response should be a valid JSON object representing only the modified parts of the character sheet.
@@ -1409,7 +1481,8 @@ Character Role: {character_role}
     
     messages = [
         {"role": "system", "content": system_message},
-        {"role": "user", "content": f"Current character data:\n{json.dumps(character_data, indent=2)}"},
+        {"role": "user", "content": "Current character data (sections relevant to this change; array items carry an "
+                                    f"\"_index\" you may use instead of their name):\n{projected_text}"},
         {"role": "user", "content": f"Changes to make: {changes}"}
     ]
     
@@ -1430,13 +1503,19 @@ Character Role: {character_role}
         try:
             debug(f"STATE_CHANGE: Attempt {attempt} of {max_attempts}", category="character_updates")
             
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=TEMPERATURE
-            )
-            
-            raw_response = response.choices[0].message.content.strip()
+            # The local result is only tried once; retries go to the model
+            applied_locally = local_updates is not None
+            if applied_locally:
+                raw_response = json.dumps(local_updates)
+                local_updates = None
+            else:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=TEMPERATURE
+                )
+                
+                raw_response = response.choices[0].message.content.strip()
             
             # Log the raw LLM response for debugging ammunition issues
             if "ammunition" in changes.lower() or "bolt" in changes.lower() or "arrow" in changes.lower():
@@ -1462,7 +1541,7 @@ Character Role: {character_role}
                 "attempt": attempt,
                 "changes_requested": changes,
                 "raw_ai_response": raw_response,
-                "model_used": model,
+                "model_used": "local" if applied_locally else model,
                 "parsed_updates": None,
                 "validation_results": {},
                 "final_outcome": "pending"
@@ -1497,6 +1576,7 @@ Character Role: {character_role}
             
             clean_response = json_match.group()
             updates = json.loads(clean_response)
+            updates = resolve_indexed_references(updates, character_data)
             
             # Update debug data with parsed updates
             debug_data["parsed_updates"] = updates
@@ -1643,16 +1723,21 @@ Please provide the CORRECT currency values:
             # Role-specific normalization
             updated_data = normalize_status_and_condition(updated_data, character_role)
             
+            # Untouched subtrees are shared with character_data and were clean when
+            # saved, so post-processing only walks the fields this update changed
+            touched_fields = changed_keys(character_data, updated_data)
+            
             # Purge invalid fields before validation
             # print(f"[DEBUG] About to purge invalid fields")
-            updated_data, removed_fields = purge_invalid_fields(updated_data, schema, character_name)
+            updated_data, removed_fields = purge_invalid_fields(updated_data, schema, character_name, fields=touched_fields)
             # print(f"[DEBUG] Field purging completed. Removed fields: {removed_fields}")
             if removed_fields:
                 warning(f"VALIDATION: Purged {len(removed_fields)} invalid fields: {', '.join(removed_fields)}", category="character_validation")
             
             # Validate updated data
             # print(f"[DEBUG] About to validate character data against schema")
-            is_valid, error_msg = validate_character_data(updated_data, schema, character_name)
+            is_valid, error_msg = validate_character_data(updated_data, schema, character_name,
+                                                          changed_keys=changed_keys(character_data, updated_data))
             # print(f"[DEBUG] Schema validation completed. Valid: {is_valid}, Error: {error_msg}")
             
             # Update debug data with validation results
@@ -1686,7 +1771,7 @@ Please provide the CORRECT currency values:
                 continue
             
             # Final repair pass before saving to ensure schema compliance
-            updated_data = repair_character_data(updated_data)
+            updated_data = repair_character_data(updated_data, fields=touched_fields)
             
             # Save updated character data
             # print(f"[DEBUG] Validation passed! About to save character data to: {character_path}")
@@ -1698,6 +1783,8 @@ Please provide the CORRECT currency values:
             if safe_write_json(character_path, updated_data):
                 # print(f"[DEBUG] Character data saved successfully!")
                 info(f"SUCCESS: Successfully updated {character_name} ({character_role})!", category="character_updates")
+                version_store.record(character_path, character_data, updated_data,
+                                     reason="local update" if applied_locally else "update")
                 
                 # Update debug data with success
                 debug_data["final_outcome"] = "success"
@@ -1733,6 +1820,11 @@ Please provide the CORRECT currency values:
                 else:
                     info(f"[Character Update] {character_name}'s {', '.join(changed_fields)} updated", category="character_updates")
                 
+                # Local changes never touch AC, equipment effects or virtues,
+                # so the model-based validators below have nothing to check
+                if applied_locally:
+                    return True
+                
                 # AI Character Validation after successful update
                 try:
                     print(f"DEBUG: [Character Validator] Starting validation for {character_name}...")
@@ -1914,6 +2006,22 @@ def list_character_backups(character_name, character_role=None):
     
     return backups
 
+def list_character_versions(character_name, character_role=None):
+    """
+    List the recorded versions of a character, oldest first
+    
+    Args:
+        character_name (str): Name of the character
+        character_role (str, optional): Character role, auto-detected if None
+    
+    Returns:
+        list: Version metadata (version, timestamp, turn, reason, kind)
+    """
+    if character_role is None:
+        character_role = detect_character_role(character_name)
+    
+    return version_store.versions(get_character_path(character_name, character_role))
+
 if __name__ == "__main__":
     # Test the unified system
     debug("INITIALIZATION: Testing unified character update system...", category="testing")
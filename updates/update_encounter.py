@@ -5,7 +5,7 @@
 
 import json
 import os
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from openai import OpenAI
 import time
 import re
@@ -13,6 +13,8 @@ import copy
 # Import model configuration from config.py
 from config import OPENAI_API_KEY, ENCOUNTER_UPDATE_MODEL
 from utils.module_path_manager import ModulePathManager
+from utils.schema_registry import schema_registry, changed_keys
+from updates.encounter_change_parser import resolve_encounter_changes
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -27,8 +29,7 @@ TEMPERATURE = 0.7
 client = OpenAI(api_key=OPENAI_API_KEY)
 
 def load_encounter_schema():
-    with open("schemas/encounter_schema.json", "r") as schema_file:
-        return json.load(schema_file)
+    return schema_registry.get_schema("encounter_schema")
 
 def update_encounter(encounter_id, changes, max_retries=3):
     # Load the current encounter info and schema
@@ -46,6 +47,12 @@ def update_encounter(encounter_id, changes, max_retries=3):
     original_info = copy.deepcopy(encounter_info)  # Keep a copy of the original info
     schema = load_encounter_schema()
 
+    # Damage, healing and defeat of enemies are resolved locally from the
+    # current hit points; anything else goes to the model below
+    local_updates = resolve_encounter_changes(changes, encounter_info)
+    if local_updates is not None:
+        debug(f"LOCAL_UPDATE: Applying '{changes}' without model call: {local_updates}", category="encounter_updates")
+
     for attempt in range(max_retries):
         # Prepare the prompt for the AI
         prompt = [
@@ -71,14 +78,19 @@ Remember to only update monster information and leave player and NPC data unchan
             {"role": "user", "content": f"Current encounter info: {json.dumps(encounter_info)}\n\nChanges to apply: {changes}\n\nRespond with ONLY the updated JSON object representing the changed sections of the encounter data, with no additional text or explanation."}
         ]
 
-        # Get AI's response
-        response = client.chat.completions.create(
-            model=ENCOUNTER_UPDATE_MODEL,
-            temperature=TEMPERATURE,
-            messages=prompt
-        )
+        # The local result is only tried once; retries go to the model
+        if local_updates is not None:
+            ai_response = json.dumps(local_updates)
+            local_updates = None
+        else:
+            # Get AI's response
+            response = client.chat.completions.create(
+                model=ENCOUNTER_UPDATE_MODEL,
+                temperature=TEMPERATURE,
+                messages=prompt
+            )
 
-        ai_response = response.choices[0].message.content.strip()
+            ai_response = response.choices[0].message.content.strip()
 
         # Write the raw AI response to a debug file
         os.makedirs("debug", exist_ok=True)
@@ -157,7 +169,7 @@ Remember to only update monster information and leave player and NPC data unchan
                     creature["status"] = status_mapping[current_status]
 
             # Validate the updated info against the schema
-            validate(instance=encounter_info, schema=schema)
+            schema_registry.validate_delta(encounter_info, schema, changed_keys(original_info, encounter_info))
 
             # If we reach here, validation was successful
 
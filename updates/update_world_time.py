@@ -6,6 +6,7 @@
 from datetime import datetime, timedelta
 import json
 from utils.encoding_utils import safe_json_load, safe_json_dump
+from updates.effect_scheduler import effect_scheduler
 
 def update_world_time(time_estimate_str):
     # Read the party tracker data from the JSON file with safe encoding
@@ -69,6 +70,7 @@ def update_world_time(time_estimate_str):
 
     # Save the updated party tracker data to the JSON file with safe encoding
     safe_json_dump(party_tracker_data, "party_tracker.json", indent=4)
+    effect_scheduler.wake()
 
     # Debug print line in orange color
     if current_month != new_month:
@@ -0,0 +1,152 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Debug Export Service
+
+Writes derived debugging artifacts (chat_history.json, combat chat logs) off
+the game loop. Callers submit a job under a key; a background thread runs it
+at most once every EXPORT_INTERVAL seconds per key, and a newer job for the
+same key replaces one that has not run yet, so a burst of context rebuilds
+costs one write. Pending jobs are flushed when the process exits, or on
+demand with flush().
+
+ChatHistoryExport keeps chat_history.json in its usual format (an indented
+JSON array) but appends new messages to the end of the file when the
+history only grew, and rewrites it only when earlier messages changed, for
+example after compression or an in-place edit. Messages are compared by
+their serialized content, since callers edit message dicts in place.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from utils.enhanced_logger import error, set_script_name
+
+# Set script name for logging
+set_script_name("debug_exports")
+
+EXPORT_INTERVAL = 5.0  # seconds between writes of the same artifact
+
+class DebugExporter:
+    """Throttled background runner for debug artifact writes"""
+
+    def __init__(self, interval: float = EXPORT_INTERVAL):
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._pending = OrderedDict()  # key -> job not yet run
+        self._last_run = {}            # key -> time.monotonic() of the last run
+        self._thread = None
+        atexit.register(self.flush)
+
+    def submit(self, key: str, job: Callable[[], Any]):
+        """Run job() in the background, replacing a job for the same key that has not run yet"""
+        with self._condition:
+            self._pending[key] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="debug_exports", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self):
+        """Run every pending job now, on the calling thread"""
+        with self._condition:
+            jobs = list(self._pending.items())
+            self._pending.clear()
+        for key, job in jobs:
+            self._run(key, job)
+
+    def _due(self, now: float) -> List[str]:
+        return [key for key in self._pending if now - self._last_run.get(key, float("-inf")) >= self.interval]
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due:
+                        break
+                    timeout = None
+                    if self._pending:
+                        timeout = min(self._last_run[key] + self.interval for key in self._pending) - now
+                    self._condition.wait(timeout)
+                jobs = [(key, self._pending.pop(key)) for key in due]
+            for key, job in jobs:
+                self._run(key, job)
+
+    def _run(self, key: str, job: Callable[[], Any]):
+        try:
+            job()
+        except Exception as e:
+            error(f"FAILURE: Debug export {key} failed", exception=e, category="file_operations")
+        finally:
+            with self._condition:
+                self._last_run[key] = time.monotonic()
+
+class ChatHistoryExport:
+    """An indented JSON array of messages, appended to in place while the history only grows"""
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self._exported = []  # serialized items in the file, in order
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _item(message: Dict[str, Any]) -> str:
+        # Same layout json.dump(messages, f, indent=2) gives each list item
+        return "\n".join("  " + line for line in json.dumps(message, indent=2).split("\n"))
+
+    def write(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Bring the file up to date with messages
+
+        Returns:
+            "unchanged", "appended" or "rewritten"
+        """
+        with self._lock:
+            items = [self._item(message) for message in messages]
+            common = min(len(items), len(self._exported))
+            prefix = 0
+            while prefix < common and items[prefix] == self._exported[prefix]:
+                prefix += 1
+
+            if prefix == len(self._exported) == len(items) and os.path.exists(self.output_file):
+                return "unchanged"
+            if prefix == len(self._exported) and prefix and self._append(items[prefix:]):
+                self._exported = items
+                return "appended"
+
+            os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
+            with open(self.output_file, "w", encoding="utf-8") as f:
+                json.dump(messages, f, indent=2)
+            self._exported = items
+            return "rewritten"
+
+    def _append(self, new_items: List[str]) -> bool:
+        """Insert items before the closing bracket; False if the file does not end as expected"""
+        try:
+            with open(self.output_file, "r+b") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < 2:
+                    return False
+                f.seek(-2, os.SEEK_END)
+                if f.read(2) != b"\n]":
+                    return False
+                f.seek(-2, os.SEEK_END)
+                body = ",\n".join(new_items)
+                f.write(f",\n{body}\n]".encode("utf-8"))
+                f.truncate()
+            return True
+        except OSError:
+            return False
+
+# Global instance shared by all debug exports
+debug_exporter = DebugExporter()
@@ -60,7 +60,7 @@ import os
 import shutil
 import time
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 from pathlib import Path
 
 # Set up logging
@@ -78,6 +78,24 @@ class AtomicFileWriter:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.lock_files = {}
+        self.write_listeners = []
+    
+    def add_write_listener(self, callback: Callable[[str], None]):
+        """Call callback(absolute path) after every successful write"""
+        if callback not in self.write_listeners:
+            self.write_listeners.append(callback)
+    
+    def remove_write_listener(self, callback: Callable[[str], None]):
+        if callback in self.write_listeners:
+            self.write_listeners.remove(callback)
+    
+    def _notify_write(self, filepath: str):
+        abs_path = os.path.abspath(filepath)
+        for callback in list(self.write_listeners):
+            try:
+                callback(abs_path)
+            except Exception as e:
+                logger.error(f"Write listener failed for {filepath}: {e}")
     
     def acquire_lock(self, filepath: str, timeout: float = 5.0) -> Optional[int]:
         """Acquire exclusive lock on file for writing using lock files"""
@@ -195,6 +213,7 @@ class AtomicFileWriter:
                 os.unlink(filepath)
             os.rename(temp_path, filepath)
             logger.info(f"Successfully wrote {filepath}")
+            self._notify_write(filepath)
             
             return True
             
@@ -280,6 +299,22 @@ def safe_read_json(filepath: str, acquire_lock: bool = False) -> Optional[Dict[s
     """Safely read JSON file"""
     return atomic_writer.read_json(filepath, acquire_lock)
 
+def add_write_listener(callback: Callable[[str], None]):
+    """Register a callback for successful writes (e.g. to invalidate a cache)"""
+    atomic_writer.add_write_listener(callback)
+
+def remove_write_listener(callback: Callable[[str], None]):
+    """Unregister a write callback"""
+    atomic_writer.remove_write_listener(callback)
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file or directory, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 def cleanup_locks():
     """Clean up any remaining lock files"""
     atomic_writer.cleanup_lock_files()
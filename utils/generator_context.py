@@ -0,0 +1,65 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Seeded Generator Context
+
+Threads an explicit random.Random through the procedural generators (realms,
+sites, knights/myths, warfare, combat prerolls) so that identical seeds produce
+identical output. Generators accept an optional ``rng`` argument; when it is
+omitted they fall back to the global ``random`` module, exactly as before.
+
+Each consumer draws from its own named stream (``context.stream("realm")``) so
+adding a new random call in one generator does not shift the output of another.
+"""
+
+import random
+from typing import Dict, Optional
+
+# Seeds are drawn from this range when none is supplied
+_SEED_BITS = 63
+
+class GeneratorContext:
+    """Seed holder that hands out deterministic per-consumer random streams"""
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(_SEED_BITS)
+        self.seed = int(seed)
+        self._streams = {}  # name -> random.Random
+
+    def stream(self, name: str) -> random.Random:
+        """
+        Get the random stream for a named consumer
+
+        Repeated calls with the same name return the same stream, so state
+        carries over between calls within one context.
+        """
+        rng = self._streams.get(name)
+        if rng is None:
+            # String seeds are hashed with SHA-512, so this is stable across
+            # processes regardless of PYTHONHASHSEED
+            rng = random.Random(f"{self.seed}:{name}")
+            self._streams[name] = rng
+        return rng
+
+    def to_metadata(self) -> Dict:
+        """Seed record for module/realm metadata"""
+        return {
+            "seed": self.seed,
+            "streams": sorted(self._streams)
+        }
+
+def make_rng(seed: Optional[int] = None, rng: Optional[random.Random] = None):
+    """
+    Resolve the random source for a generator call
+
+    An explicit rng wins, then a seed, otherwise the global random module.
+    """
+    if rng is not None:
+        return rng
+    if seed is not None:
+        return random.Random(seed)
+    return random
@@ -10,15 +10,17 @@ Mythic Bastionland Content Generators
 Utility functions to access the rich generator tables from Knights and Myths.
 Provides programmatic access to location tables, Knight generators, Seer information,
 and other random content from the converted mythic_knights.json and mythic_myths.json files.
+Every random method takes an optional ``rng`` (see utils/generator_context.py) so
+seeded generation is reproducible; without one the global random module is used.
 
 This module allows developers and AI systems to easily use the extensive random tables
 and generators that are part of each Knight archetype and Myth.
 """
 
 import json
-import random
-from typing import Dict, List, Any, Optional, Union
-from utils.encoding_utils import safe_json_load
+from typing import Dict, List, Any, Mapping, Optional, Union
+from utils.mythic_repository import MythicRepository, mythic_repository
+from utils.generator_context import make_rng
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 
 # Set script name for logging
@@ -27,25 +29,44 @@ set_script_name("mythic_generators")
 class MythicGenerators:
     """Access to all Mythic Bastionland random generators and tables"""
     
-    def __init__(self):
-        """Initialize by loading mythic data files"""
-        self.knights_data = safe_json_load('data/mythic_knights.json')
-        self.myths_data = safe_json_load('data/mythic_myths.json')
-        
-        if not self.knights_data or not self.myths_data:
+    def __init__(self, repository: MythicRepository = None):
+        """Attach to the shared mythic data repository (files load on first use)"""
+        self.repository = repository or mythic_repository
+    
+    def _require_data(self):
+        """Raise if the mythic data files could not be loaded"""
+        if not self.repository.knights_loaded() or not self.repository.myths_loaded():
             error("Failed to load mythic data files", category="generators")
             raise RuntimeError("Missing mythic data files required for generators")
-        
-        self.knights = self.knights_data.get('knights', {})
-        self.myths = self.myths_data.get('myths', {})
     
-    def get_random_knight(self) -> Dict[str, Any]:
+    @property
+    def knights(self) -> Mapping[str, Dict[str, Any]]:
+        """Read-only name -> Knight data mapping"""
+        self._require_data()
+        return self.repository.knights
+    
+    @property
+    def myths(self) -> Mapping[str, Dict[str, Any]]:
+        """Read-only name -> Myth data mapping"""
+        self._require_data()
+        return self.repository.myths
+    
+    @property
+    def knights_data(self) -> Dict[str, Any]:
+        return {'knights': self.knights}
+    
+    @property
+    def myths_data(self) -> Dict[str, Any]:
+        return {'myths': self.myths}
+    
+    def get_random_knight(self, rng=None) -> Dict[str, Any]:
         """Get a random Knight archetype with all their data"""
+        rng = make_rng(rng=rng)
         knight_names = list(self.knights.keys())
         if not knight_names:
             return {}
         
-        knight_name = random.choice(knight_names)
+        knight_name = rng.choice(knight_names)
         return {
             'name': knight_name,
             **self.knights[knight_name]
@@ -78,8 +99,9 @@ class MythicGenerators:
         
         return tables
     
-    def roll_on_knight_table(self, knight_name: str, table_name: str, dice: str = 'd6') -> Optional[Dict[str, Any]]:
+    def roll_on_knight_table(self, knight_name: str, table_name: str, dice: str = 'd6', rng=None) -> Optional[Dict[str, Any]]:
         """Roll on a specific Knight table"""
+        rng = make_rng(rng=rng)
         knight_data = self.knights.get(knight_name, {})
         table = knight_data.get(table_name, {})
         
@@ -88,21 +110,22 @@ class MythicGenerators:
         
         # Roll dice
         if dice == 'd6':
-            roll = random.randint(1, 6)
+            roll = rng.randint(1, 6)
         elif dice == 'd12':
-            roll = random.randint(1, 12)
+            roll = rng.randint(1, 12)
         else:
-            roll = random.randint(1, 6)  # Default to d6
+            roll = rng.randint(1, 6)  # Default to d6
         
         return table.get(str(roll))
     
-    def get_random_myth(self) -> Dict[str, Any]:
+    def get_random_myth(self, rng=None) -> Dict[str, Any]:
         """Get a random Myth with all their data"""
+        rng = make_rng(rng=rng)
         myth_names = list(self.myths.keys())
         if not myth_names:
             return {}
         
-        myth_name = random.choice(myth_names)
+        myth_name = rng.choice(myth_names)
         return {
             'name': myth_name,
             **self.myths[myth_name]
@@ -133,8 +156,9 @@ class MythicGenerators:
         
         return locations
     
-    def get_random_location(self, location_type: str = None) -> Dict[str, str]:
+    def get_random_location(self, location_type: str = None, rng=None) -> Dict[str, str]:
         """Get a random location from any Myth"""
+        rng = make_rng(rng=rng)
         all_locations = []
         
         for myth_name, myth_data in self.myths.items():
@@ -150,19 +174,20 @@ class MythicGenerators:
         if not all_locations:
             return {}
         
-        return random.choice(all_locations)
+        return rng.choice(all_locations)
     
     def get_myth_cast(self, myth_name: str) -> List[Dict[str, Any]]:
         """Get the cast of characters from a specific Myth"""
         myth_data = self.myths.get(myth_name, {})
         return myth_data.get('cast', [])
     
-    def get_random_cast_member(self, myth_name: str = None) -> Dict[str, Any]:
+    def get_random_cast_member(self, myth_name: str = None, rng=None) -> Dict[str, Any]:
         """Get a random cast member, optionally from a specific Myth"""
+        rng = make_rng(rng=rng)
         if myth_name:
             cast = self.get_myth_cast(myth_name)
             if cast:
-                return random.choice(cast)
+                return rng.choice(cast)
             return {}
         
         # Get from any myth
@@ -170,26 +195,28 @@ class MythicGenerators:
         for myth_name, myth_data in self.myths.items():
             cast = myth_data.get('cast', [])
             for member in cast:
-                member['source_myth'] = myth_name
-                all_cast.append(member)
+                all_cast.append({**member, 'source_myth': myth_name})
         
         if not all_cast:
             return {}
         
-        return random.choice(all_cast)
+        return rng.choice(all_cast)
     
     def get_myth_omens(self, myth_name: str) -> List[str]:
         """Get the omens from a specific Myth"""
         myth_data = self.myths.get(myth_name, {})
-        return myth_data.get('omens', [])
+        omens = myth_data.get('omens', [])
+        # A few myths number their omens like a table
+        return list(omens.values()) if isinstance(omens, dict) else omens
     
-    def get_random_omen(self, myth_name: str = None) -> Dict[str, str]:
+    def get_random_omen(self, myth_name: str = None, rng=None) -> Dict[str, str]:
         """Get a random omen, optionally from a specific Myth"""
+        rng = make_rng(rng=rng)
         if myth_name:
             omens = self.get_myth_omens(myth_name)
             if omens:
                 return {
-                    'omen': random.choice(omens),
+                    'omen': rng.choice(omens),
                     'source_myth': myth_name
                 }
             return {}
@@ -197,8 +224,7 @@ class MythicGenerators:
         # Get from any myth
         all_omens = []
         for myth_name, myth_data in self.myths.items():
-            omens = myth_data.get('omens', [])
-            for omen in omens:
+            for omen in self.get_myth_omens(myth_name):
                 all_omens.append({
                     'omen': omen,
                     'source_myth': myth_name
@@ -207,71 +233,68 @@ class MythicGenerators:
         if not all_omens:
             return {}
         
-        return random.choice(all_omens)
+        return rng.choice(all_omens)
     
-    def generate_location_set(self, count: int = 6) -> List[Dict[str, str]]:
+    def generate_location_set(self, count: int = 6, rng=None) -> List[Dict[str, str]]:
         """Generate a set of varied locations for a region"""
         location_types = ['dwelling', 'sanctum', 'monument', 'hazard', 'curse', 'ruin']
         locations = []
         
         for i in range(count):
             loc_type = location_types[i % len(location_types)]
-            location = self.get_random_location(loc_type)
+            location = self.get_random_location(loc_type, rng=rng)
             if location:
                 locations.append(location)
         
         return locations
     
-    def generate_encounter_seed(self) -> Dict[str, Any]:
+    def generate_encounter_seed(self, rng=None) -> Dict[str, Any]:
         """Generate a complete encounter seed with Knight, Myth, and location"""
-        knight = self.get_random_knight()
-        myth = self.get_random_myth()
-        location = self.get_random_location()
-        cast_member = self.get_random_cast_member()
+        knight = self.get_random_knight(rng=rng)
+        myth = self.get_random_myth(rng=rng)
+        location = self.get_random_location(rng=rng)
+        cast_member = self.get_random_cast_member(rng=rng)
         
         return {
             'knight': knight,
             'myth': myth,
             'location': location,
             'npc': cast_member,
-            'omen': self.get_random_omen(myth.get('name')),
+            'omen': self.get_random_omen(myth.get('name'), rng=rng),
             'seer': self.get_knight_seer(knight.get('name')) if knight else None
         }
     
     def get_knight_names_by_dice(self, d6_value: int) -> List[str]:
         """Get all Knight names for a specific d6 value (1-6)"""
-        knights = []
-        for name, data in self.knights.items():
-            if data.get('d6') == d6_value:
-                knights.append(name)
-        return knights
+        self._require_data()
+        return list(self.repository.knight_names(d6_value))
     
     def get_myth_names_by_dice(self, d6_value: int) -> List[str]:
         """Get all Myth names for a specific d6 value (1-6)"""
-        myths = []
-        for name, data in self.myths.items():
-            if data.get('d6') == d6_value:
-                myths.append(name)
-        return myths
+        self._require_data()
+        return list(self.repository.myth_names(d6_value))
     
-    def roll_random_knight_by_dice(self) -> Dict[str, Any]:
+    def roll_random_knight_by_dice(self, rng=None) -> Dict[str, Any]:
         """Roll random dice to select a Knight (as per Mythic Bastionland rules)"""
-        d6_roll = random.randint(1, 6)
-        d12_roll = random.randint(1, 12)
+        rng = make_rng(rng=rng)
+        d6_roll = rng.randint(1, 6)
+        d12_roll = rng.randint(1, 12)
         
         # Find knight matching both dice
-        for name, data in self.knights.items():
-            if data.get('d6') == d6_roll and data.get('d12') == d12_roll:
-                return {
-                    'name': name,
-                    'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
-                    **data
-                }
+        self._require_data()
+        found = self.repository.knight_by_dice(d6_roll, d12_roll)
+        if found:
+            name, data = found
+            return {
+                'name': name,
+                'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
+                **data
+            }
         
         # Fallback to any knight with matching d6
         knights = self.get_knight_names_by_dice(d6_roll)
         if knights:
-            knight_name = random.choice(knights)
+            knight_name = rng.choice(knights)
             return {
                 'name': knight_name,
                 'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
@@ -279,26 +302,29 @@ class MythicGenerators:
             }
         
         # Final fallback to completely random knight
-        return self.get_random_knight()
+        return self.get_random_knight(rng=rng)
     
-    def roll_random_myth_by_dice(self) -> Dict[str, Any]:
+    def roll_random_myth_by_dice(self, rng=None) -> Dict[str, Any]:
         """Roll random dice to select a Myth (as per Mythic Bastionland rules)"""
-        d6_roll = random.randint(1, 6)
-        d12_roll = random.randint(1, 12)
+        rng = make_rng(rng=rng)
+        d6_roll = rng.randint(1, 6)
+        d12_roll = rng.randint(1, 12)
         
         # Find myth matching both dice
-        for name, data in self.myths.items():
-            if data.get('d6') == d6_roll and data.get('d12') == d12_roll:
-                return {
-                    'name': name,
-                    'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
-                    **data
-                }
+        self._require_data()
+        found = self.repository.myth_by_dice(d6_roll, d12_roll)
+        if found:
+            name, data = found
+            return {
+                'name': name,
+                'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
+                **data
+            }
         
         # Fallback to any myth with matching d6
         myths = self.get_myth_names_by_dice(d6_roll)
         if myths:
-            myth_name = random.choice(myths)
+            myth_name = rng.choice(myths)
             return {
                 'name': myth_name,
                 'dice_rolled': {'d6': d6_roll, 'd12': d12_roll},
@@ -306,27 +332,27 @@ class MythicGenerators:
             }
         
         # Final fallback to completely random myth
-        return self.get_random_myth()
+        return self.get_random_myth(rng=rng)
 
-# Global instance for easy access
+# Global instance for easy access (data loads lazily on first use)
 mythic_generators = MythicGenerators()
 
 # Convenience functions for easy access
-def get_random_knight() -> Dict[str, Any]:
+def get_random_knight(rng=None) -> Dict[str, Any]:
     """Get a random Knight archetype"""
-    return mythic_generators.get_random_knight()
+    return mythic_generators.get_random_knight(rng=rng)
 
-def get_random_myth() -> Dict[str, Any]:
+def get_random_myth(rng=None) -> Dict[str, Any]:
     """Get a random Myth"""
-    return mythic_generators.get_random_myth()
+    return mythic_generators.get_random_myth(rng=rng)
 
-def get_random_location(location_type: str = None) -> Dict[str, str]:
+def get_random_location(location_type: str = None, rng=None) -> Dict[str, str]:
     """Get a random location"""
-    return mythic_generators.get_random_location(location_type)
+    return mythic_generators.get_random_location(location_type, rng=rng)
 
-def generate_encounter_seed() -> Dict[str, Any]:
+def generate_encounter_seed(rng=None) -> Dict[str, Any]:
     """Generate a complete encounter seed"""
-    return mythic_generators.generate_encounter_seed()
+    return mythic_generators.generate_encounter_seed(rng=rng)
 
 if __name__ == "__main__":
     # Test the generators
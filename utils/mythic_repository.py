@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Mythic Bastionland Data Repository
+
+Process-wide, lazily loaded cache of data/mythic_knights.json,
+data/mythic_myths.json and data/mythic_generators.json. Each file is parsed
+once on first use and indexed by (d6, d12), exact name and case-folded name,
+so rolling many Knights and Myths in a row (e.g. realm population) is a
+dictionary lookup rather than a JSON parse plus linear scan.
+
+Collections are handed out as read-only MappingProxyType views. Callers that
+need to modify an entry must copy it first; mythic_selectors does this for its
+public return values.
+"""
+
+import json
+import threading
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+from utils.enhanced_logger import debug, error, set_script_name
+
+# Set script name for logging
+set_script_name("mythic_repository")
+
+KNIGHTS_FILE = "data/mythic_knights.json"
+MYTHS_FILE = "data/mythic_myths.json"
+GENERATORS_FILE = "data/mythic_generators.json"
+
+def _load_json(path: str, label: str) -> Optional[Dict]:
+    """Load one of the mythic data files, logging (not raising) on failure"""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        error(f"{label} data file not found: {path}")
+        return None
+    except json.JSONDecodeError as e:
+        error(f"Invalid JSON in {label} data file: {e}")
+        return None
+
+class _EntryIndex:
+    """Indexes for one name -> entry collection (knights or myths)"""
+
+    def __init__(self, entries: Dict[str, Dict]):
+        self.entries = MappingProxyType(entries)
+        self.by_dice = {}      # (d6, d12) -> name
+        self.by_casefold = {}  # casefolded name -> name
+        by_d6 = {}             # d6 -> [(d12, name)]
+
+        for name, info in entries.items():
+            self.by_casefold[name.casefold()] = name
+            d6, d12 = info.get("d6"), info.get("d12")
+            if d6 is None or d12 is None:
+                continue
+            # Keep the first entry for a dice pair, matching the old linear scan
+            self.by_dice.setdefault((d6, d12), name)
+            by_d6.setdefault(d6, []).append((d12, name))
+
+        self.by_d6 = {d6: tuple(name for _, name in sorted(pairs)) for d6, pairs in by_d6.items()}
+        self.sorted_names = tuple(sorted(entries))
+
+    def find_name(self, name: str, ignore_case: bool = False) -> Optional[str]:
+        """Resolve a name to its canonical key"""
+        if name in self.entries:
+            return name
+        if ignore_case and isinstance(name, str):
+            return self.by_casefold.get(name.casefold())
+        return None
+
+class MythicRepository:
+    """Lazily loaded, indexed view over the Mythic Bastionland data files"""
+
+    def __init__(self, knights_file: str = KNIGHTS_FILE, myths_file: str = MYTHS_FILE,
+                 generators_file: str = GENERATORS_FILE):
+        self.knights_file = knights_file
+        self.myths_file = myths_file
+        self.generators_file = generators_file
+        self._lock = threading.Lock()
+        self._knights = None
+        self._myths = None
+        self._generators = None
+        self._generator_tables = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _ensure_knights(self) -> Optional[_EntryIndex]:
+        if self._knights is None:
+            with self._lock:
+                if self._knights is None:
+                    data = _load_json(self.knights_file, "Knights")
+                    if data is None:
+                        return None
+                    self._knights = _EntryIndex(data.get("knights", {}))
+                    debug(f"Indexed {len(self._knights.entries)} Knights", category="mythic_data")
+        return self._knights
+
+    def _ensure_myths(self) -> Optional[_EntryIndex]:
+        if self._myths is None:
+            with self._lock:
+                if self._myths is None:
+                    data = _load_json(self.myths_file, "Myths")
+                    if data is None:
+                        return None
+                    self._myths = _EntryIndex(data.get("myths", {}))
+                    debug(f"Indexed {len(self._myths.entries)} Myths", category="mythic_data")
+        return self._myths
+
+    def _ensure_generators(self) -> Optional[Dict]:
+        if self._generators is None:
+            with self._lock:
+                if self._generators is None:
+                    data = _load_json(self.generators_file, "Generator")
+                    if data is None:
+                        return None
+                    # Per-table arrays of non-empty entries, ready for rng.choice
+                    self._generator_tables = {
+                        (section, category): tuple(item for item in items if item)
+                        for section, tables in data.items() if isinstance(tables, dict)
+                        for category, items in tables.items() if isinstance(items, list)
+                    }
+                    self._generators = data
+        return self._generators
+
+    def invalidate(self, knights: bool = True, myths: bool = True, generators: bool = True):
+        """Drop cached data so the next access reloads it from disk"""
+        with self._lock:
+            if knights:
+                self._knights = None
+            if myths:
+                self._myths = None
+            if generators:
+                self._generators = None
+                self._generator_tables = None
+
+    # ------------------------------------------------------------------
+    # Knights and Myths
+    # ------------------------------------------------------------------
+
+    @property
+    def knights(self) -> MappingProxyType:
+        """Read-only name -> Knight data mapping (empty if the file failed to load)"""
+        index = self._ensure_knights()
+        return index.entries if index else MappingProxyType({})
+
+    @property
+    def myths(self) -> MappingProxyType:
+        """Read-only name -> Myth data mapping (empty if the file failed to load)"""
+        index = self._ensure_myths()
+        return index.entries if index else MappingProxyType({})
+
+    def knights_loaded(self) -> bool:
+        return self._ensure_knights() is not None
+
+    def myths_loaded(self) -> bool:
+        return self._ensure_myths() is not None
+
+    def knight_by_dice(self, d6: int, d12: int) -> Optional[Tuple[str, Dict]]:
+        return self._lookup_dice(self._ensure_knights(), d6, d12)
+
+    def myth_by_dice(self, d6: int, d12: int) -> Optional[Tuple[str, Dict]]:
+        return self._lookup_dice(self._ensure_myths(), d6, d12)
+
+    def knight_by_name(self, name: str, ignore_case: bool = False) -> Optional[Tuple[str, Dict]]:
+        return self._lookup_name(self._ensure_knights(), name, ignore_case)
+
+    def myth_by_name(self, name: str, ignore_case: bool = False) -> Optional[Tuple[str, Dict]]:
+        return self._lookup_name(self._ensure_myths(), name, ignore_case)
+
+    def knight_names(self, d6: Optional[int] = None) -> Tuple[str, ...]:
+        """Sorted Knight names, or names for one d6 value ordered by d12"""
+        return self._names(self._ensure_knights(), d6)
+
+    def myth_names(self, d6: Optional[int] = None) -> Tuple[str, ...]:
+        """Sorted Myth names, or names for one d6 value ordered by d12"""
+        return self._names(self._ensure_myths(), d6)
+
+    @staticmethod
+    def _lookup_dice(index: Optional[_EntryIndex], d6: int, d12: int) -> Optional[Tuple[str, Dict]]:
+        if index is None:
+            return None
+        name = index.by_dice.get((d6, d12))
+        return (name, index.entries[name]) if name else None
+
+    @staticmethod
+    def _lookup_name(index: Optional[_EntryIndex], name: str, ignore_case: bool) -> Optional[Tuple[str, Dict]]:
+        if index is None:
+            return None
+        key = index.find_name(name, ignore_case)
+        return (key, index.entries[key]) if key else None
+
+    @staticmethod
+    def _names(index: Optional[_EntryIndex], d6: Optional[int]) -> Tuple[str, ...]:
+        if index is None:
+            return ()
+        if d6 is None:
+            return index.sorted_names
+        return index.by_d6.get(d6, ())
+
+    # ------------------------------------------------------------------
+    # Generator tables
+    # ------------------------------------------------------------------
+
+    @property
+    def generators(self) -> Optional[Dict]:
+        """Raw generator tables (treat as read-only; None if the file failed to load)"""
+        return self._ensure_generators()
+
+    def generator_table(self, section: str, category: str) -> Tuple[str, ...]:
+        """Non-empty entries of one generator table, e.g. ("npc_generator", "name")"""
+        if self._ensure_generators() is None:
+            return ()
+        return self._generator_tables.get((section, category), ())
+
+# Process-wide instance shared by mythic_selectors and mythic_generators
+mythic_repository = MythicRepository()
@@ -8,8 +8,8 @@ Mythic Bastionland Knight and Myth Selectors
 Simple utilities to select Knights and Myths from the comprehensive data files
 """
 
+import copy
 import json
-import random
 import os
 import sys
 
@@ -17,6 +17,8 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.generator_context import make_rng
+from utils.mythic_repository import mythic_repository
 
 # Set script name for logging
 set_script_name("mythic_selectors")
@@ -62,141 +64,94 @@ def load_generators_data():
         error(f"Invalid JSON in generator data file: {e}")
         return None
 
-def roll_knight():
-    """Roll d6 and d12 to randomly select a Knight."""
-    d6_roll = random.randint(1, 6)
-    d12_roll = random.randint(1, 12)
+def roll_knight(rng=None):
+    """Roll d6 and d12 to randomly select a Knight (optionally from a seeded rng)."""
+    rng = make_rng(rng=rng)
+    d6_roll = rng.randint(1, 6)
+    d12_roll = rng.randint(1, 12)
     return get_knight_by_dice(d6_roll, d12_roll)
 
-def roll_myth():
-    """Roll d6 and d12 to randomly select a Myth."""
-    d6_roll = random.randint(1, 6)
-    d12_roll = random.randint(1, 12)
+def roll_myth(rng=None):
+    """Roll d6 and d12 to randomly select a Myth (optionally from a seeded rng)."""
+    rng = make_rng(rng=rng)
+    d6_roll = rng.randint(1, 6)
+    d12_roll = rng.randint(1, 12)
     return get_myth_by_dice(d6_roll, d12_roll)
 
+def _selector_result(name, entry):
+    """Build a selector result with a private copy of the cached entry."""
+    return {
+        "name": name,
+        "d6": entry.get("d6"),
+        "d12": entry.get("d12"),
+        "data": copy.deepcopy(entry)
+    }
+
 def get_knight_by_dice(d6, d12):
     """Get a specific Knight by d6 and d12 values."""
-    knights_data = load_knights_data()
-    if not knights_data:
+    if not mythic_repository.knights_loaded():
         return None
     
-    for knight_name, knight_info in knights_data["knights"].items():
-        if knight_info["d6"] == d6 and knight_info["d12"] == d12:
-            return {
-                "name": knight_name,
-                "d6": d6,
-                "d12": d12,
-                "data": knight_info
-            }
+    found = mythic_repository.knight_by_dice(d6, d12)
+    if found:
+        return _selector_result(*found)
     
     error(f"No Knight found for d6={d6}, d12={d12}")
     return None
 
 def get_myth_by_dice(d6, d12):
     """Get a specific Myth by d6 and d12 values."""
-    myths_data = load_myths_data()
-    if not myths_data:
+    if not mythic_repository.myths_loaded():
         return None
     
-    for myth_name, myth_info in myths_data["myths"].items():
-        if myth_info["d6"] == d6 and myth_info["d12"] == d12:
-            return {
-                "name": myth_name,
-                "d6": d6,
-                "d12": d12,
-                "data": myth_info
-            }
+    found = mythic_repository.myth_by_dice(d6, d12)
+    if found:
+        return _selector_result(*found)
     
     error(f"No Myth found for d6={d6}, d12={d12}")
     return None
 
-def get_knight_by_name(name):
-    """Get a Knight by exact name match."""
-    knights_data = load_knights_data()
-    if not knights_data:
+def get_knight_by_name(name, ignore_case=False):
+    """Get a Knight by exact name match (or case-insensitive match if requested)."""
+    if not mythic_repository.knights_loaded():
         return None
     
-    knight_info = knights_data["knights"].get(name)
-    if knight_info:
-        return {
-            "name": name,
-            "d6": knight_info["d6"],
-            "d12": knight_info["d12"],
-            "data": knight_info
-        }
+    found = mythic_repository.knight_by_name(name, ignore_case)
+    if found:
+        return _selector_result(*found)
     
     error(f"Knight '{name}' not found")
     return None
 
-def get_myth_by_name(name):
-    """Get a Myth by exact name match."""
-    myths_data = load_myths_data()
-    if not myths_data:
+def get_myth_by_name(name, ignore_case=False):
+    """Get a Myth by exact name match (or case-insensitive match if requested)."""
+    if not mythic_repository.myths_loaded():
         return None
     
-    myth_info = myths_data["myths"].get(name)
-    if myth_info:
-        return {
-            "name": name,
-            "d6": myth_info["d6"],
-            "d12": myth_info["d12"],
-            "data": myth_info
-        }
+    found = mythic_repository.myth_by_name(name, ignore_case)
+    if found:
+        return _selector_result(*found)
     
     error(f"Myth '{name}' not found")
     return None
 
 def list_all_knights():
     """Get a list of all Knight names."""
-    knights_data = load_knights_data()
-    if not knights_data:
-        return []
-    
-    return sorted(knights_data["knights"].keys())
+    return list(mythic_repository.knight_names())
 
 def list_all_myths():
     """Get a list of all Myth names."""
-    myths_data = load_myths_data()
-    if not myths_data:
-        return []
-    
-    return sorted(myths_data["myths"].keys())
+    return list(mythic_repository.myth_names())
 
 def get_knights_by_d6(d6):
     """Get all Knights for a specific d6 value."""
-    knights_data = load_knights_data()
-    if not knights_data:
-        return []
-    
-    result = []
-    for knight_name, knight_info in knights_data["knights"].items():
-        if knight_info["d6"] == d6:
-            result.append({
-                "name": knight_name,
-                "d6": d6,
-                "d12": knight_info["d12"],
-                "data": knight_info
-            })
-    
-    return sorted(result, key=lambda x: x["d12"])
+    knights = mythic_repository.knights
+    return [_selector_result(name, knights[name]) for name in mythic_repository.knight_names(d6)]
 
 def get_myths_by_d6(d6):
     """Get all Myths for a specific d6 value."""
-    myths_data = load_myths_data()
-    if not myths_data:
-        return []
-    
-    result = []
-    for myth_name, myth_info in myths_data["myths"].items():
-        if myth_info["d6"] == d6:
-            result.append({
-                "name": myth_name,
-                "d6": d6,
-                "d12": myth_info["d12"],
-                "data": myth_info
-            })
-    
-    return sorted(result, key=lambda x: x["d12"])
+    myths = mythic_repository.myths
+    return [_selector_result(name, myths[name]) for name in mythic_repository.myth_names(d6)]
 
 def print_knight_info(knight):
     """Pretty print Knight information."""
@@ -239,52 +194,42 @@ def print_myth_info(myth):
     if data.get('table'):
         print(f"Table: {data['table']}")
 
-def generate_random_npc():
+def generate_random_npc(rng=None):
     """Generate a random NPC using the generator tables."""
-    generators_data = load_generators_data()
-    if not generators_data:
+    rng = make_rng(rng=rng)
+    if mythic_repository.generators is None:
         return None
     
-    npc_gen = generators_data["npc_generator"]
+    def roll(category):
+        return rng.choice(mythic_repository.generator_table("npc_generator", category))
     
     # Roll d6 for each category
-    person = random.choice([item for item in npc_gen["person"] if item])
-    name = random.choice([item for item in npc_gen["name"] if item])
-    characteristic = random.choice([item for item in npc_gen["characteristic"] if item])
-    obj = random.choice([item for item in npc_gen["object"] if item])
-    beast = random.choice([item for item in npc_gen["beast"] if item])
-    state = random.choice([item for item in npc_gen["state"] if item])
-    theme = random.choice([item for item in npc_gen["theme"] if item])
-    
     return {
-        "person": person,
-        "name": name,
-        "characteristic": characteristic,
-        "object": obj,
-        "beast": beast,
-        "state": state,
-        "theme": theme
+        "person": roll("person"),
+        "name": roll("name"),
+        "characteristic": roll("characteristic"),
+        "object": roll("object"),
+        "beast": roll("beast"),
+        "state": roll("state"),
+        "theme": roll("theme")
     }
 
-def generate_random_location():
+def generate_random_location(rng=None):
     """Generate a random location using the generator tables."""
-    generators_data = load_generators_data()
-    if not generators_data:
+    rng = make_rng(rng=rng)
+    if mythic_repository.generators is None:
         return None
     
-    loc_gen = generators_data["location_generator"]
+    def roll(category):
+        table = mythic_repository.generator_table("location_generator", category)
+        return rng.choice(table) if table else ""
     
     # Roll d6 for each category (when location data is populated)
-    place = random.choice([item for item in loc_gen["place"] if item]) if any(loc_gen["place"]) else ""
-    feature = random.choice([item for item in loc_gen["feature"] if item]) if any(loc_gen["feature"]) else ""
-    mood = random.choice([item for item in loc_gen["mood"] if item]) if any(loc_gen["mood"]) else ""
-    detail = random.choice([item for item in loc_gen["detail"] if item]) if any(loc_gen["detail"]) else ""
-    
     return {
-        "place": place,
-        "feature": feature,
-        "mood": mood,
-        "detail": detail
+        "place": roll("place"),
+        "feature": roll("feature"),
+        "mood": roll("mood"),
+        "detail": roll("detail")
     }
 
 def add_npc_table_entry(category, entry):
@@ -302,6 +247,7 @@ def add_npc_table_entry(category, entry):
                 try:
                     with open("data/mythic_generators.json", 'w') as file:
                         json.dump(generators_data, file, indent=2)
+                    mythic_repository.invalidate(knights=False, myths=False)
                     return True
                 except Exception as e:
                     error(f"Failed to save generator data: {e}")
@@ -324,6 +270,7 @@ def add_location_table_entry(category, entry):
                 try:
                     with open("data/mythic_generators.json", 'w') as file:
                         json.dump(generators_data, file, indent=2)
+                    mythic_repository.invalidate(knights=False, myths=False)
                     return True
                 except Exception as e:
                     error(f"Failed to save generator data: {e}")
@@ -49,6 +49,10 @@ def get_player_stat(player_name, stat_name, time_estimate):
 
         safe_json_dump(data, 'party_tracker.json', indent=4)
 
+        # Let the effect expiration check run on the next game loop
+        from updates.effect_scheduler import effect_scheduler
+        effect_scheduler.wake()
+
         # Debug print line in orange color
         print(f"\033[38;5;208mCurrent Time: {current_time.strftime('%H:%M:%S')}, Time Advanced: {time_estimate_minutes} minutes, New Time: {new_time.strftime('%H:%M:%S')}\033[0m")
 
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Prompt Encoding Module
+Renders game state (locations, maps, party tracker, combat data) as compact
+text for AI consumption instead of raw JSON
+
+The encoding is an indented key: value outline:
+- empty values (None, "", [], {}) are dropped, except grid cells
+- a list of objects is written as a table, its keys once in the header
+  (features[3]{name,description}:) and one row per object, cells split by |
+- grids (lists of lists, e.g. map layouts) are written one row per line,
+  every cell in place; blank cells are written as "." and the header says so
+- short lists of plain values are written inline, comma separated
+- name/ID pairs such as currentArea and currentAreaId are folded into one
+  field, "Gloomwood (G001)", so entities are referenced by ID once
+
+Every scalar of the original data is still present in the output. Each call
+to encode_section() records the estimated tokens of the compact JSON it
+replaces and of the encoding, for report().
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from utils.token_estimator import TokenEstimator
+from utils.enhanced_logger import debug, set_script_name
+
+# Set script name for logging
+set_script_name("prompt_encoding")
+
+# Fields dropped when equal to the given value. Empty by default: a dropped
+# quantity of 1 leaves a bare table cell that reads as unknown, not as 1
+DEFAULT_FIELDS = {}
+GRID_EMPTY = "."  # blank grid cell, e.g. "   " in a map layout
+
+INLINE_LIST_CHARS = 100  # longest list of plain values written on one line
+MAX_TABLE_COLUMNS = 8
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+def _is_grid(value: Any) -> bool:
+    return (isinstance(value, list) and bool(value)
+            and all(isinstance(row, list) and all(_is_scalar(cell) for cell in row) for row in value))
+
+def prune(data: Any, defaults: Optional[Dict[str, Any]] = None) -> Any:
+    """Drop empty values and fields equal to their default, recursively; grids are kept whole"""
+    defaults = DEFAULT_FIELDS if defaults is None else defaults
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            value = prune(value, defaults)
+            if _is_empty(value) or (key in defaults and value == defaults[key]):
+                continue
+            result[key] = value
+        return _fold_ids(result)
+    if _is_grid(data):
+        # A blank cell or row still holds a position
+        return [list(row) for row in data]
+    if isinstance(data, list):
+        return [item for item in (prune(item, defaults) for item in data) if not _is_empty(item)]
+    return data
+
+def _fold_ids(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold fooId into foo as "name (ID)" where both are present"""
+    for id_key in [k for k in data if k.endswith("Id") and k[:-2] in data]:
+        name_key = id_key[:-2]
+        names, ids = data[name_key], data[id_key]
+        if _is_scalar(names) and _is_scalar(ids):
+            data[name_key] = f"{names} ({ids})"
+        elif (isinstance(names, list) and isinstance(ids, list) and len(names) == len(ids)
+              and all(_is_scalar(v) for v in names + ids)):
+            data[name_key] = [f"{name} ({id_})" for name, id_ in zip(names, ids)]
+        else:
+            continue
+        del data[id_key]
+    return data
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        # Keep every value on one line of the outline
+        return " ".join(value.split())
+    return str(value)
+
+def _inline(items: List[Any]) -> Optional[str]:
+    """Plain values joined on one line, or None if they would not read unambiguously"""
+    if not all(_is_scalar(item) for item in items):
+        return None
+    texts = [_scalar(item) for item in items]
+    if any("," in text for text in texts):
+        return None
+    line = ", ".join(texts)
+    return line if len(line) <= INLINE_LIST_CHARS else None
+
+def _cell(value: Any) -> Optional[str]:
+    if _is_scalar(value):
+        return _scalar(value).replace("|", "\\|")
+    if isinstance(value, list) and all(_is_scalar(v) and "," not in _scalar(v) for v in value):
+        return ",".join(_scalar(v).replace("|", "\\|") for v in value)
+    return None
+
+def _table(items: List[Any]) -> Optional[List[str]]:
+    """Header and rows for a list of flat objects, or None if it is not one"""
+    if len(items) < 2 or not all(isinstance(item, dict) for item in items):
+        return None
+    columns = []
+    for item in items:
+        columns.extend(key for key in item if key not in columns)
+    if len(columns) > MAX_TABLE_COLUMNS:
+        return None
+    rows = []
+    for item in items:
+        cells = [_cell(item.get(column, "")) for column in columns]
+        if None in cells:
+            return None
+        rows.append("|".join(cells))
+    return [f"[{len(items)}]{{{','.join(columns)}}}:"] + rows
+
+def _grid_cell(value: Any) -> str:
+    text = _scalar(value) if value is not None else ""
+    return text if text else GRID_EMPTY
+
+def _grid(items: List[Any]) -> Optional[List[str]]:
+    """One line per row for a list of lists of plain values"""
+    if not _is_grid(items):
+        return None
+    cells = [[_grid_cell(cell) for cell in row] for row in items]
+    separator = " | " if any(" " in cell for row in cells for cell in row) else " "
+    return [separator.join(row) for row in cells]
+
+def _value_lines(key: str, value: Any, pad: str) -> List[str]:
+    if _is_scalar(value):
+        return [f"{pad}{key}: {_scalar(value)}"]
+    if isinstance(value, dict):
+        return [f"{pad}{key}:"] + _dict_lines(value, pad + "  ")
+    inline = _inline(value)
+    if inline is not None:
+        return [f"{pad}{key}: {inline}"]
+    table = _table(value)
+    if table is not None:
+        return [f"{pad}{key}{table[0]}"] + [pad + "  " + row for row in table[1:]]
+    grid = _grid(value)
+    if grid is not None:
+        blank = any(_grid_cell(cell) == GRID_EMPTY for row in value for cell in row)
+        header = f"{pad}{key} ({GRID_EMPTY} = empty cell):" if blank else f"{pad}{key}:"
+        return [header] + [pad + "  " + row for row in grid]
+    return [f"{pad}{key}:"] + _list_lines(value, pad + "  ")
+
+def _dict_lines(data: Dict[str, Any], pad: str) -> List[str]:
+    lines = []
+    for key, value in data.items():
+        lines.extend(_value_lines(str(key), value, pad))
+    return lines
+
+def _list_lines(items: List[Any], pad: str) -> List[str]:
+    lines = []
+    for item in items:
+        if isinstance(item, dict):
+            item_lines = _dict_lines(item, pad + "  ")
+            lines.append(f"{pad}- {item_lines[0].lstrip()}")
+            lines.extend(item_lines[1:])
+        elif isinstance(item, list):
+            inline = _inline(item)
+            if inline is not None:
+                lines.append(f"{pad}- {inline}")
+            else:
+                lines.append(f"{pad}-")
+                lines.extend(_list_lines(item, pad + "  "))
+        else:
+            lines.append(f"{pad}- {_scalar(item)}")
+    return lines
+
+def encode(data: Any, defaults: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Compact prompt text for JSON-like game data
+
+    Args:
+        data: Parsed JSON data
+        defaults: Fields to drop when equal to the given value (DEFAULT_FIELDS if None)
+
+    Returns:
+        str: The encoded outline
+    """
+    data = prune(data, defaults)
+    if isinstance(data, dict):
+        lines = _dict_lines(data, "")
+    elif isinstance(data, list):
+        lines = _value_lines("items", data, "")
+    else:
+        return _scalar(data)
+    return "\n".join(lines)
+
+class PromptEncodingStats:
+    """Estimated tokens of each prompt section before and after encoding"""
+
+    def __init__(self):
+        self.sections = {}  # section -> {"encodings", "json_tokens", "encoded_tokens"} of the latest encoding
+
+    def record(self, section: str, json_tokens: int, encoded_tokens: int):
+        entry = self.sections.setdefault(section, {"encodings": 0})
+        entry["encodings"] += 1
+        entry["json_tokens"] = json_tokens
+        entry["encoded_tokens"] = encoded_tokens
+
+    def report(self) -> str:
+        """One line per section, plus the total, for the logs"""
+        lines = []
+        total_json = total_encoded = 0
+        for section, entry in self.sections.items():
+            total_json += entry["json_tokens"]
+            total_encoded += entry["encoded_tokens"]
+            lines.append(f"{section}: {_reduction(entry['json_tokens'], entry['encoded_tokens'])}")
+        lines.append(f"total: {_reduction(total_json, total_encoded)}")
+        return "\n".join(lines)
+
+def _reduction(json_tokens: int, encoded_tokens: int) -> str:
+    saved = 1 - encoded_tokens / json_tokens if json_tokens else 0.0
+    return f"{json_tokens} -> {encoded_tokens} tokens ({saved:.0%} smaller)"
+
+# Global statistics for every encoded prompt section
+encoding_stats = PromptEncodingStats()
+
+def encode_section(section: str, data: Any, defaults: Optional[Dict[str, Any]] = None) -> str:
+    """Encode data for a named prompt section and record its token reduction"""
+    text = encode(data, defaults)
+    json_tokens = TokenEstimator.estimate_tokens_from_chars(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+    encoded_tokens = TokenEstimator.estimate_tokens_from_chars(text)
+    encoding_stats.record(section, json_tokens, encoded_tokens)
+    debug(f"PROMPT_ENCODING: {section} {_reduction(json_tokens, encoded_tokens)}", category="conversation_management")
+    return text
@@ -20,11 +20,12 @@ A Realm represents the loose rule of a Seat of Power, containing:
 
 import random
 import json
-import math
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Set
 from enum import Enum
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
 from utils.mythic_generators import mythic_generators
+from utils.generator_context import GeneratorContext, make_rng
 
 # Set script name for logging
 set_script_name("realm_generator")
@@ -58,6 +59,63 @@ class HoldingType(Enum):
     TOWER = "tower"
     SEAT_OF_POWER = "seat_of_power"
 
+# Flat grid encodings. Every per-hex attribute lives in its own flat array at
+# index x * size + y, so a 100x100 realm is a handful of 10 KB bytearrays
+# instead of 10,000 objects, and exports keep the original (x, y) ordering.
+TERRAIN_CODES = tuple(TerrainType)
+HOLDING_CODES = (None,) + tuple(HoldingType)
+LANDMARK_CODES = (None,) + tuple(LandmarkType)
+_TERRAIN_INDEX = {terrain: code for code, terrain in enumerate(TERRAIN_CODES)}
+_HOLDING_INDEX = {holding: code for code, holding in enumerate(HOLDING_CODES)}
+_LANDMARK_INDEX = {landmark: code for code, landmark in enumerate(LANDMARK_CODES)}
+
+# Barrier directions, stored as a 6-bit mask per hex
+BARRIER_DIRECTIONS = ("north", "northeast", "southeast", "south", "southwest", "northwest")
+
+# Hex grid adjacency offsets (flat-top hexes), indexed by row parity
+_EVEN_ROW_OFFSETS = ((0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0))
+_ODD_ROW_OFFSETS = ((-1, -1), (0, -1), (1, 0), (0, 1), (-1, 1), (-1, 0))
+
+TERRAIN_DESCRIPTIONS = {
+    TerrainType.FOREST: "Dense woodland with ancient trees",
+    TerrainType.HILLS: "Rolling hills dotted with wildflowers",
+    TerrainType.MOUNTAINS: "Towering peaks shrouded in mist",
+    TerrainType.PLAINS: "Open grasslands stretching to the horizon",
+    TerrainType.SWAMP: "Murky wetlands thick with fog",
+    TerrainType.DESERT: "Endless sands beneath scorching sun",
+    TerrainType.COAST: "Rocky shores battered by waves",
+    TerrainType.RIVER: "A broad river flowing through the land",
+    TerrainType.LAKE: "A pristine lake reflecting the sky"
+}
+
+HOLDING_DESCRIPTIONS = {
+    HoldingType.CASTLE: "dominated by an imposing castle",
+    HoldingType.TOWN: "bustling with the activity of a market town",
+    HoldingType.FORTRESS: "fortified with strong defensive walls",
+    HoldingType.TOWER: "watched over by a tall stone tower",
+    HoldingType.SEAT_OF_POWER: "crowned by the magnificent Seat of Power"
+}
+
+LANDMARK_DESCRIPTIONS = {
+    LandmarkType.DWELLING: "where humble dwellings dot the landscape",
+    LandmarkType.SANCTUM: "blessed by the presence of a Seer's sanctum",
+    LandmarkType.MONUMENT: "marked by an ancient monument of inspiration",
+    LandmarkType.HAZARD: "dangerous with natural hazards",
+    LandmarkType.CURSE: "blighted by an ancient curse",
+    LandmarkType.RUIN: "haunted by mysterious ruins"
+}
+
+@lru_cache(maxsize=8)
+def _neighbour_table(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Precompute in-bounds neighbour indices for every hex of a size x size grid"""
+    table = []
+    for x in range(size):
+        for y in range(size):
+            offsets = _EVEN_ROW_OFFSETS if y % 2 == 0 else _ODD_ROW_OFFSETS
+            table.append(tuple((x + dx) * size + (y + dy) for dx, dy in offsets
+                               if 0 <= x + dx < size and 0 <= y + dy < size))
+    return tuple(table)
+
 class RealmHex:
     """Represents a single hex in the realm"""
     
@@ -88,18 +146,44 @@ class RealmHex:
 class RealmGenerator:
     """Generates complete Mythic Bastionland Realms using the official system"""
     
-    def __init__(self, size: int = 12):
-        self.size = size  # 12x12 is typical
-        self.hexes = {}  # Dict of (x,y) -> RealmHex
+    def __init__(self, size: int = 12, rng: Optional[random.Random] = None, seed: Optional[int] = None):
+        self.size = size  # 12x12 is typical, sandbox realms go to 100x100 and beyond
+        self.seed = seed  # Recorded in metadata when known
+        self.rng = make_rng(seed, rng)
+        cells = size * size
+        
+        # Array-backed hex grid (see TERRAIN_CODES / HOLDING_CODES / LANDMARK_CODES)
+        self.terrain = bytearray([_TERRAIN_INDEX[TerrainType.PLAINS]]) * cells
+        self.holding_grid = bytearray(cells)
+        self.landmark_grid = bytearray(cells)
+        self.barrier_mask = bytearray(cells)
+        self.myth_names = {}  # Sparse index -> myth name
+        self.descriptions = [""] * cells
+        self.neighbours = _neighbour_table(size)
+        
         self.holdings = []  # List of holding positions
         self.seat_of_power = None  # Coordinates of the seat of power
         self.myths = []  # List of myth positions and names
         self.landmarks = []  # List of landmark positions
-        
-        # Initialize the hex grid
-        for x in range(size):
-            for y in range(size):
-                self.hexes[(x, y)] = RealmHex(x, y)
+    
+    @property
+    def hexes(self) -> Dict[Tuple[int, int], RealmHex]:
+        """Materialise the grid as (x, y) -> RealmHex objects (compatibility view)"""
+        return {(index // self.size, index % self.size): self.hex_at(index // self.size, index % self.size)
+                for index in range(self.size * self.size)}
+    
+    def hex_at(self, x: int, y: int) -> RealmHex:
+        """Build a RealmHex snapshot of a single hex"""
+        index = x * self.size + y
+        hex_obj = RealmHex(x, y)
+        hex_obj.terrain = TERRAIN_CODES[self.terrain[index]]
+        hex_obj.holding = HOLDING_CODES[self.holding_grid[index]]
+        hex_obj.landmark = LANDMARK_CODES[self.landmark_grid[index]]
+        hex_obj.myth = self.myth_names.get(index)
+        hex_obj.barriers = self._barrier_list(index)
+        hex_obj.description = self.descriptions[index]
+        hex_obj.is_wilderness = self.holding_grid[index] == 0
+        return hex_obj
     
     def generate_realm(self, realm_name: str, coastal: bool = None) -> Dict:
         """
@@ -116,7 +200,7 @@ class RealmGenerator:
         
         # Determine realm type
         if coastal is None:
-            coastal = random.choice([True, False, "island"])
+            coastal = self.rng.choice([True, False, "island"])
         
         # Step 1: Create terrain base
         self._generate_terrain(coastal)
@@ -140,28 +224,55 @@ class RealmGenerator:
         self._generate_descriptions()
         
         # Create final realm data
+        size = self.size
         realm_data = {
             "name": realm_name,
-            "size": self.size,
+            "size": size,
             "coastal": coastal,
             "seat_of_power": {"x": self.seat_of_power[0], "y": self.seat_of_power[1]} if self.seat_of_power else None,
-            "hexes": {f"{x},{y}": hex_obj.to_dict() for (x, y), hex_obj in self.hexes.items()},
-            "holdings": [{"x": x, "y": y, "type": self.hexes[(x, y)].holding.value} for x, y in self.holdings],
+            "hexes": {f"{index // size},{index % size}": self._hex_to_dict(index) for index in range(size * size)},
+            "holdings": [{"x": x, "y": y, "type": HOLDING_CODES[self.holding_grid[x * size + y]].value}
+                         for x, y in self.holdings],
             "myths": [{"x": x, "y": y, "name": myth_name} for (x, y), myth_name in self.myths],
-            "landmarks": [{"x": x, "y": y, "type": self.hexes[(x, y)].landmark.value} for x, y in self.landmarks],
+            "landmarks": [{"x": x, "y": y, "type": LANDMARK_CODES[self.landmark_grid[x * size + y]].value}
+                          for x, y in self.landmarks],
             "metadata": {
-                "total_hexes": self.size * self.size,
-                "wilderness_hexes": len([h for h in self.hexes.values() if h.is_wilderness]),
+                "total_hexes": size * size,
+                "wilderness_hexes": self.holding_grid.count(0),
                 "holdings_count": len(self.holdings),
                 "myths_count": len(self.myths),
                 "landmarks_count": len(self.landmarks)
             }
         }
+        if self.seed is not None:
+            realm_data["metadata"]["seed"] = self.seed
         
         info(f"Generated realm '{realm_name}' with {len(self.holdings)} holdings and {len(self.myths)} myths", 
              category="realm_generation")
         return realm_data
     
+    def _hex_to_dict(self, index: int) -> Dict:
+        """Export a single hex in the RealmHex.to_dict format"""
+        holding = HOLDING_CODES[self.holding_grid[index]]
+        landmark = LANDMARK_CODES[self.landmark_grid[index]]
+        return {
+            "coordinates": {"x": index // self.size, "y": index % self.size},
+            "terrain": TERRAIN_CODES[self.terrain[index]].value,
+            "holding": holding.value if holding else None,
+            "landmark": landmark.value if landmark else None,
+            "myth": self.myth_names.get(index),
+            "barriers": self._barrier_list(index),
+            "description": self.descriptions[index],
+            "is_wilderness": holding is None
+        }
+    
+    def _barrier_list(self, index: int) -> List[str]:
+        """Decode the barrier bitmask of a hex into direction names"""
+        mask = self.barrier_mask[index]
+        if not mask:
+            return []
+        return [direction for bit, direction in enumerate(BARRIER_DIRECTIONS) if mask & (1 << bit)]
+    
     def _generate_terrain(self, coastal):
         """Generate base terrain using clusters"""
         # Create terrain clusters (groups of d12 hexes of same type)
@@ -176,37 +287,34 @@ class RealmGenerator:
             terrain_types.append(TerrainType.COAST)
         
         # Generate 5-8 terrain clusters
-        num_clusters = random.randint(5, 8)
-        cluster_size = random.randint(6, 12)  # d12 hexes per cluster
+        num_clusters = self.rng.randint(5, 8)
+        cluster_size = self.rng.randint(6, 12)  # d12 hexes per cluster
         
         for _ in range(num_clusters):
-            terrain = random.choice(terrain_types)
+            terrain_code = _TERRAIN_INDEX[self.rng.choice(terrain_types)]
             
             # Pick a random starting point
-            start_x = random.randint(0, self.size - 1)
-            start_y = random.randint(0, self.size - 1)
+            start = self.rng.randint(0, self.size - 1) * self.size + self.rng.randint(0, self.size - 1)
             
-            # Grow cluster from starting point
-            cluster_hexes = {(start_x, start_y)}
-            self.hexes[(start_x, start_y)].terrain = terrain
+            # Grow cluster from starting point. The list gives O(1) random picks,
+            # the set gives O(1) membership tests.
+            cluster_list = [start]
+            cluster_set = {start}
+            self.terrain[start] = terrain_code
             
             # Add adjacent hexes to cluster
             for _ in range(cluster_size - 1):
-                if not cluster_hexes:
-                    break
-                
                 # Pick a random hex from the cluster to expand from
-                expand_from = random.choice(list(cluster_hexes))
-                adjacent = self._get_adjacent_hexes(expand_from[0], expand_from[1])
+                expand_from = self.rng.choice(cluster_list)
                 
                 # Find valid adjacent hexes not already in cluster
-                valid_adjacent = [(x, y) for x, y in adjacent 
-                                if (x, y) in self.hexes and (x, y) not in cluster_hexes]
+                valid_adjacent = [n for n in self.neighbours[expand_from] if n not in cluster_set]
                 
                 if valid_adjacent:
-                    new_hex = random.choice(valid_adjacent)
-                    cluster_hexes.add(new_hex)
-                    self.hexes[new_hex].terrain = terrain
+                    new_hex = self.rng.choice(valid_adjacent)
+                    cluster_list.append(new_hex)
+                    cluster_set.add(new_hex)
+                    self.terrain[new_hex] = terrain_code
         
         # Coastal realms get coast hexes along edges
         if coastal == True or coastal == "island":
@@ -214,30 +322,26 @@ class RealmGenerator:
     
     def _add_coastal_hexes(self, is_island: bool):
         """Add coastal hexes along the edges"""
+        size = self.size
+        coast = _TERRAIN_INDEX[TerrainType.COAST]
+        edge_indices = {
+            "north": range(0, size * size, size),             # y == 0
+            "south": range(size - 1, size * size, size),      # y == size - 1
+            "east": range((size - 1) * size, size * size),    # x == size - 1
+            "west": range(0, size)                            # x == 0
+        }
+        
         if is_island:
             # Islands have coast all around the edges
-            for x in range(self.size):
-                for y in range(self.size):
-                    if x == 0 or x == self.size - 1 or y == 0 or y == self.size - 1:
-                        self.hexes[(x, y)].terrain = TerrainType.COAST
+            coastal_edges = list(edge_indices)
         else:
             # Coastal realms have coast along one or two edges
             edges = ["north", "south", "east", "west"]
-            coastal_edges = random.sample(edges, random.randint(1, 2))
-            
-            for edge in coastal_edges:
-                if edge == "north":
-                    for x in range(self.size):
-                        self.hexes[(x, 0)].terrain = TerrainType.COAST
-                elif edge == "south":
-                    for x in range(self.size):
-                        self.hexes[(x, self.size - 1)].terrain = TerrainType.COAST
-                elif edge == "east":
-                    for y in range(self.size):
-                        self.hexes[(self.size - 1, y)].terrain = TerrainType.COAST
-                elif edge == "west":
-                    for y in range(self.size):
-                        self.hexes[(0, y)].terrain = TerrainType.COAST
+            coastal_edges = self.rng.sample(edges, self.rng.randint(1, 2))
+        
+        for edge in coastal_edges:
+            for index in edge_indices[edge]:
+                self.terrain[index] = coast
     
     def _place_holdings(self):
         """Place 4 Holdings with good distance apart, one as Seat of Power"""
@@ -245,26 +349,21 @@ class RealmGenerator:
         
         # Place holdings with minimum distance between them
         min_distance = max(3, self.size // 4)
+        min_distance_sq = min_distance * min_distance
         attempts = 0
         max_attempts = 100
         
         while len(self.holdings) < 4 and attempts < max_attempts:
-            x = random.randint(1, self.size - 2)  # Avoid edges
-            y = random.randint(1, self.size - 2)
+            x = self.rng.randint(1, self.size - 2)  # Avoid edges
+            y = self.rng.randint(1, self.size - 2)
             
             # Check distance from existing holdings
-            too_close = False
-            for hx, hy in self.holdings:
-                distance = math.sqrt((x - hx)**2 + (y - hy)**2)
-                if distance < min_distance:
-                    too_close = True
-                    break
+            too_close = any((x - hx) ** 2 + (y - hy) ** 2 < min_distance_sq for hx, hy in self.holdings)
             
             if not too_close:
                 holding_type = holding_types[len(self.holdings)]
                 self.holdings.append((x, y))
-                self.hexes[(x, y)].holding = holding_type
-                self.hexes[(x, y)].is_wilderness = False
+                self.holding_grid[x * self.size + y] = _HOLDING_INDEX[holding_type]
                 debug(f"Placed {holding_type.value} at ({x}, {y})", category="realm_generation")
             
             attempts += 1
@@ -272,7 +371,7 @@ class RealmGenerator:
         # Designate first holding as Seat of Power
         if self.holdings:
             seat_x, seat_y = self.holdings[0]
-            self.hexes[(seat_x, seat_y)].holding = HoldingType.SEAT_OF_POWER
+            self.holding_grid[seat_x * self.size + seat_y] = _HOLDING_INDEX[HoldingType.SEAT_OF_POWER]
             self.seat_of_power = (seat_x, seat_y)
             debug(f"Designated Seat of Power at ({seat_x}, {seat_y})", category="realm_generation")
     
@@ -288,34 +387,28 @@ class RealmGenerator:
             # Fallback if mythic_generators not available
             available_myths = [f"Myth_{i}" for i in range(1, 7)]
         
-        # Find remote locations (far from holdings)
-        remote_candidates = []
-        for x in range(self.size):
-            for y in range(self.size):
-                if self.hexes[(x, y)].is_wilderness:
-                    # Check distance from all holdings
-                    min_distance_to_holding = float('inf')
-                    for hx, hy in self.holdings:
-                        distance = math.sqrt((x - hx)**2 + (y - hy)**2)
-                        min_distance_to_holding = min(min_distance_to_holding, distance)
-                    
-                    # Remote places are at least 4 hexes from holdings
-                    if min_distance_to_holding >= 4:
-                        remote_candidates.append((x, y))
+        size = self.size
+        wilderness = [index for index in range(size * size) if self.holding_grid[index] == 0]
+        
+        # Find remote locations (at least 4 hexes from every holding)
+        remote_candidates = [
+            index for index in wilderness
+            if all((index // size - hx) ** 2 + (index % size - hy) ** 2 >= 16 for hx, hy in self.holdings)
+        ]
         
         # If we don't have enough remote places, relax the criteria
         if len(remote_candidates) < 6:
-            remote_candidates = [(x, y) for x in range(self.size) for y in range(self.size) 
-                               if self.hexes[(x, y)].is_wilderness]
+            remote_candidates = wilderness
         
         # Place 6 myths
-        selected_locations = random.sample(remote_candidates, min(6, len(remote_candidates)))
-        selected_myths = random.sample(available_myths, min(6, len(available_myths)))
+        selected_locations = self.rng.sample(remote_candidates, min(6, len(remote_candidates)))
+        selected_myths = self.rng.sample(available_myths, min(6, len(available_myths)))
         
-        for i, (x, y) in enumerate(selected_locations):
+        for i, index in enumerate(selected_locations):
+            x, y = divmod(index, size)
             myth_name = selected_myths[i] if i < len(selected_myths) else f"Unknown_Myth_{i}"
             self.myths.append(((x, y), myth_name))
-            self.hexes[(x, y)].myth = myth_name
+            self.myth_names[index] = myth_name
             debug(f"Placed {myth_name} at ({x}, {y})", category="realm_generation")
     
     def _place_landmarks(self):
@@ -323,20 +416,20 @@ class RealmGenerator:
         landmark_types = list(LandmarkType)
         
         for landmark_type in landmark_types:
-            count = random.randint(3, 4)
+            count = self.rng.randint(3, 4)
             placed = 0
             attempts = 0
             max_attempts = 50
             
             while placed < count and attempts < max_attempts:
-                x = random.randint(0, self.size - 1)
-                y = random.randint(0, self.size - 1)
-                
-                hex_obj = self.hexes[(x, y)]
+                x = self.rng.randint(0, self.size - 1)
+                y = self.rng.randint(0, self.size - 1)
+                index = x * self.size + y
                 
                 # Only place in wilderness hexes without other features
-                if hex_obj.is_wilderness and hex_obj.landmark is None and hex_obj.myth is None:
-                    hex_obj.landmark = landmark_type
+                if (self.holding_grid[index] == 0 and self.landmark_grid[index] == 0
+                        and index not in self.myth_names):
+                    self.landmark_grid[index] = _LANDMARK_INDEX[landmark_type]
                     self.landmarks.append((x, y))
                     placed += 1
                     debug(f"Placed {landmark_type.value} at ({x}, {y})", category="realm_generation")
@@ -348,169 +441,147 @@ class RealmGenerator:
         total_hexes = self.size * self.size
         num_barriers = total_hexes // 6
         
-        directions = ["north", "northeast", "southeast", "south", "southwest", "northwest"]
-        
         for _ in range(num_barriers):
-            x = random.randint(0, self.size - 1)
-            y = random.randint(0, self.size - 1)
-            direction = random.choice(directions)
-            
-            self.hexes[(x, y)].barriers.append(direction)
+            index = self.rng.randrange(total_hexes)
+            self.barrier_mask[index] |= 1 << self.rng.randrange(len(BARRIER_DIRECTIONS))
     
     def _add_water_features(self):
         """Add navigable rivers and large lakes"""
         # Add 1-2 rivers
-        num_rivers = random.randint(1, 2)
+        num_rivers = self.rng.randint(1, 2)
         for _ in range(num_rivers):
             self._create_river()
         
         # Add 1-3 lakes spanning whole hexes
-        num_lakes = random.randint(1, 3)
+        num_lakes = self.rng.randint(1, 3)
         for _ in range(num_lakes):
             self._create_lake()
     
     def _create_river(self):
         """Create a navigable river passing through the realm"""
         # Rivers typically run from one edge to another
-        start_edge = random.choice(["north", "south", "east", "west"])
+        start_edge = self.rng.choice(["north", "south", "east", "west"])
         
         if start_edge == "north":
-            start = (random.randint(0, self.size - 1), 0)
-            end = (random.randint(0, self.size - 1), self.size - 1)
+            start = (self.rng.randint(0, self.size - 1), 0)
+            end = (self.rng.randint(0, self.size - 1), self.size - 1)
         elif start_edge == "south":
-            start = (random.randint(0, self.size - 1), self.size - 1)
-            end = (random.randint(0, self.size - 1), 0)
+            start = (self.rng.randint(0, self.size - 1), self.size - 1)
+            end = (self.rng.randint(0, self.size - 1), 0)
         elif start_edge == "east":
-            start = (self.size - 1, random.randint(0, self.size - 1))
-            end = (0, random.randint(0, self.size - 1))
+            start = (self.size - 1, self.rng.randint(0, self.size - 1))
+            end = (0, self.rng.randint(0, self.size - 1))
         else:  # west
-            start = (0, random.randint(0, self.size - 1))
-            end = (self.size - 1, random.randint(0, self.size - 1))
+            start = (0, self.rng.randint(0, self.size - 1))
+            end = (self.size - 1, self.rng.randint(0, self.size - 1))
         
         # Create a meandering path from start to end
         current = start
         river_hexes = []
         
         while current != end and len(river_hexes) < self.size * 2:
-            river_hexes.append(current)
+            river_hexes.append(current[0] * self.size + current[1])
             
             # Move towards the end with some randomness
             dx = 1 if end[0] > current[0] else (-1 if end[0] < current[0] else 0)
             dy = 1 if end[1] > current[1] else (-1 if end[1] < current[1] else 0)
             
             # Add some meandering
-            if random.random() < 0.3:
-                dx += random.choice([-1, 0, 1])
-                dy += random.choice([-1, 0, 1])
+            if self.rng.random() < 0.3:
+                dx += self.rng.choice([-1, 0, 1])
+                dy += self.rng.choice([-1, 0, 1])
             
             next_x = max(0, min(self.size - 1, current[0] + dx))
             next_y = max(0, min(self.size - 1, current[1] + dy))
             current = (next_x, next_y)
         
         # Mark river hexes
-        for x, y in river_hexes:
-            if self.hexes[(x, y)].terrain not in [TerrainType.LAKE, TerrainType.COAST]:
-                self.hexes[(x, y)].terrain = TerrainType.RIVER
+        river = _TERRAIN_INDEX[TerrainType.RIVER]
+        blocked = (_TERRAIN_INDEX[TerrainType.LAKE], _TERRAIN_INDEX[TerrainType.COAST])
+        for index in river_hexes:
+            if self.terrain[index] not in blocked:
+                self.terrain[index] = river
     
     def _create_lake(self):
         """Create a large lake spanning one or more hexes"""
-        center_x = random.randint(1, self.size - 2)
-        center_y = random.randint(1, self.size - 2)
+        center_x = self.rng.randint(1, self.size - 2)
+        center_y = self.rng.randint(1, self.size - 2)
         
         # Lake size: 1-4 hexes
-        lake_size = random.randint(1, 4)
-        lake_hexes = [(center_x, center_y)]
+        lake_size = self.rng.randint(1, 4)
+        lake_hexes = [center_x * self.size + center_y]
         
         # Expand lake to adjacent hexes
         for _ in range(lake_size - 1):
-            if lake_hexes:
-                expand_from = random.choice(lake_hexes)
-                adjacent = self._get_adjacent_hexes(expand_from[0], expand_from[1])
-                valid_adjacent = [(x, y) for x, y in adjacent 
-                                if (x, y) in self.hexes and (x, y) not in lake_hexes 
-                                and self.hexes[(x, y)].holding is None]
-                
-                if valid_adjacent:
-                    new_hex = random.choice(valid_adjacent)
-                    lake_hexes.append(new_hex)
+            expand_from = self.rng.choice(lake_hexes)
+            valid_adjacent = [n for n in self.neighbours[expand_from]
+                              if n not in lake_hexes and self.holding_grid[n] == 0]
+            
+            if valid_adjacent:
+                lake_hexes.append(self.rng.choice(valid_adjacent))
         
         # Mark lake hexes
-        for x, y in lake_hexes:
-            self.hexes[(x, y)].terrain = TerrainType.LAKE
+        lake = _TERRAIN_INDEX[TerrainType.LAKE]
+        for index in lake_hexes:
+            self.terrain[index] = lake
     
     def _get_adjacent_hexes(self, x: int, y: int) -> List[Tuple[int, int]]:
         """Get adjacent hex coordinates"""
-        # Hex grid adjacency (flat-top hexes)
-        if y % 2 == 0:  # Even rows
-            adjacent = [
-                (x, y - 1), (x + 1, y - 1),  # North, northeast
-                (x + 1, y), (x, y + 1),      # East, south
-                (x - 1, y + 1), (x - 1, y)  # Southwest, west
-            ]
-        else:  # Odd rows
-            adjacent = [
-                (x - 1, y - 1), (x, y - 1),  # Northwest, north
-                (x + 1, y), (x, y + 1),      # East, south
-                (x - 1, y + 1), (x - 1, y)  # Southwest, west
-            ]
-        
-        return [(ax, ay) for ax, ay in adjacent if 0 <= ax < self.size and 0 <= ay < self.size]
+        return [divmod(index, self.size) for index in self.neighbours[x * self.size + y]]
     
     def _generate_descriptions(self):
         """Generate descriptions for hexes based on their features"""
-        for hex_obj in self.hexes.values():
-            description_parts = []
-            
-            # Base terrain description
-            terrain_descriptions = {
-                TerrainType.FOREST: "Dense woodland with ancient trees",
-                TerrainType.HILLS: "Rolling hills dotted with wildflowers",
-                TerrainType.MOUNTAINS: "Towering peaks shrouded in mist",
-                TerrainType.PLAINS: "Open grasslands stretching to the horizon",
-                TerrainType.SWAMP: "Murky wetlands thick with fog",
-                TerrainType.DESERT: "Endless sands beneath scorching sun",
-                TerrainType.COAST: "Rocky shores battered by waves",
-                TerrainType.RIVER: "A broad river flowing through the land",
-                TerrainType.LAKE: "A pristine lake reflecting the sky"
-            }
-            
-            description_parts.append(terrain_descriptions.get(hex_obj.terrain, "Wilderness"))
-            
-            # Add holding description
-            if hex_obj.holding:
-                holding_descriptions = {
-                    HoldingType.CASTLE: "dominated by an imposing castle",
-                    HoldingType.TOWN: "bustling with the activity of a market town",
-                    HoldingType.FORTRESS: "fortified with strong defensive walls",
-                    HoldingType.TOWER: "watched over by a tall stone tower",
-                    HoldingType.SEAT_OF_POWER: "crowned by the magnificent Seat of Power"
-                }
-                description_parts.append(holding_descriptions.get(hex_obj.holding, "with a settlement"))
-            
-            # Add landmark description
-            if hex_obj.landmark:
-                landmark_descriptions = {
-                    LandmarkType.DWELLING: "where humble dwellings dot the landscape",
-                    LandmarkType.SANCTUM: "blessed by the presence of a Seer's sanctum",
-                    LandmarkType.MONUMENT: "marked by an ancient monument of inspiration",
-                    LandmarkType.HAZARD: "dangerous with natural hazards",
-                    LandmarkType.CURSE: "blighted by an ancient curse",
-                    LandmarkType.RUIN: "haunted by mysterious ruins"
-                }
-                description_parts.append(landmark_descriptions.get(hex_obj.landmark, "of interest"))
-            
-            # Add myth description
-            if hex_obj.myth:
-                description_parts.append(f"touched by the Myth of {hex_obj.myth}")
-            
-            hex_obj.description = ", ".join(description_parts) + "."
+        # Most hexes share a handful of feature combinations, so build each
+        # distinct description once
+        cache = {}
+        for index in range(self.size * self.size):
+            myth = self.myth_names.get(index)
+            key = (self.terrain[index], self.holding_grid[index], self.landmark_grid[index], myth)
+            description = cache.get(key)
+            if description is None:
+                description = self._describe(*key)
+                cache[key] = description
+            self.descriptions[index] = description
+    
+    @staticmethod
+    def _describe(terrain_code: int, holding_code: int, landmark_code: int, myth: Optional[str]) -> str:
+        """Compose a hex description from its encoded features"""
+        # Base terrain description
+        description_parts = [TERRAIN_DESCRIPTIONS.get(TERRAIN_CODES[terrain_code], "Wilderness")]
+        
+        # Add holding description
+        if holding_code:
+            description_parts.append(HOLDING_DESCRIPTIONS.get(HOLDING_CODES[holding_code], "with a settlement"))
+        
+        # Add landmark description
+        if landmark_code:
+            description_parts.append(LANDMARK_DESCRIPTIONS.get(LANDMARK_CODES[landmark_code], "of interest"))
+        
+        # Add myth description
+        if myth:
+            description_parts.append(f"touched by the Myth of {myth}")
+        
+        return ", ".join(description_parts) + "."
 
 # Convenience functions for external use
-def generate_realm(name: str, coastal: bool = None) -> Dict:
+def generate_realm(name: str, coastal: bool = None, size: int = 12, seed: Optional[int] = None) -> Dict:
     """Generate a realm using the official Mythic Bastionland system"""
-    generator = RealmGenerator()
+    generator = RealmGenerator(size, seed=seed)
     return generator.generate_realm(name, coastal)
 
+def generate_realms(names: List[str], coastal: bool = None, size: int = 12,
+                    seed: Optional[int] = None) -> List[Dict]:
+    """
+    Batch-generate realms (e.g. for seeding sandbox campaigns)
+    
+    With a seed, every realm gets its own derived seed (recorded in its
+    metadata), so any single realm can be regenerated on its own.
+    """
+    if seed is None:
+        return [generate_realm(name, coastal, size) for name in names]
+    seeds = GeneratorContext(seed).stream("realms")
+    return [generate_realm(name, coastal, size, seed=seeds.getrandbits(63)) for name in names]
+
 def generate_island_realm(name: str) -> Dict:
     """Generate an island realm"""
     return generate_realm(name, "island")
@@ -526,4 +597,4 @@ def generate_landlocked_realm(name: str) -> Dict:
 if __name__ == "__main__":
     # Test the generator
     realm = generate_realm("Test Realm")
-    print(json.dumps(realm, indent=2))
\ No newline at end of file
+    print(json.dumps(realm, indent=2))
@@ -0,0 +1,335 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+JSON Schema Registry
+
+Loads the files in schemas/ once and keeps one compiled validator per schema,
+so hot paths (character, plot and encounter updates, journal and location
+writes, the module debugger) no longer re-read the schema from disk and
+rebuild a validator on every call.
+
+Schemas can be referenced by name ("char_schema", "char_schema.json" or
+"schemas/char_schema.json") or passed as the dict returned by get_schema().
+Schema dicts are shared; treat them as read-only.
+
+validate_delta() checks only the subtrees an update touched (plus the
+required/type/additionalProperties constraints of their parents), which is
+what the update paths need when the rest of the document was valid already.
+Anything the walk cannot handle safely falls back to full validation.
+
+Format checking ("date", "email", ...) is off by default, matching
+jsonschema.validate(); pass check_formats=True to SchemaRegistry to enable it.
+
+Run this module directly for a per-update validation micro-benchmark.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+from jsonschema import Draft7Validator, FormatChecker, ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from utils.enhanced_logger import debug, error, set_script_name
+
+# Set script name for logging
+set_script_name("schema_registry")
+
+SCHEMA_DIR = "schemas"
+
+# Keywords validate_delta understands on the ancestors of a changed subtree.
+# A parent using anything else (allOf, dependencies, minItems, ...) could be
+# affected by the change, so those documents are validated in full.
+_DELTA_SAFE_KEYWORDS = frozenset({
+    "$schema", "$id", "$comment", "title", "description", "default", "examples",
+    "definitions", "type", "properties", "required", "additionalProperties", "items",
+})
+
+SchemaRef = Union[str, Dict[str, Any]]
+DeltaPath = Union[str, Sequence[Union[str, int]]]
+
+def _schema_name(name: str) -> str:
+    """Normalise "schemas/char_schema.json" / "char_schema.json" to "char_schema" """
+    name = os.path.basename(name.replace("\\", "/"))
+    return name[:-5] if name.endswith(".json") else name
+
+def _uses_ref(schema: Any) -> bool:
+    if isinstance(schema, dict):
+        return "$ref" in schema or any(_uses_ref(value) for value in schema.values())
+    if isinstance(schema, list):
+        return any(_uses_ref(value) for value in schema)
+    return False
+
+def changed_keys(before: Dict[str, Any], after: Dict[str, Any]) -> set:
+    """Top-level keys whose values differ between two versions of a document"""
+    # Identity first: structurally shared subtrees are unchanged without a deep compare
+    keys = {key for key, value in after.items()
+            if key not in before or (before[key] is not value and before[key] != value)}
+    keys.update(key for key in before if key not in after)
+    return keys
+
+class _CompiledSchema:
+    """A schema, its compiled validator and lazily built subschema validators"""
+
+    def __init__(self, schema: Dict[str, Any], format_checker: Optional[FormatChecker]):
+        cls = validator_for(schema, default=Draft7Validator)
+        cls.check_schema(schema)
+        self.schema = schema
+        self.cls = cls
+        self.format_checker = format_checker
+        self.validator = cls(schema, format_checker=format_checker)
+        # $ref resolution needs the root document, so subtree validation is off
+        self.delta_capable = not _uses_ref(schema)
+        self._sub_validators = {}  # schema step tuple -> validator
+
+    def sub_validator(self, steps: Tuple, subschema: Dict[str, Any]):
+        validator = self._sub_validators.get(steps)
+        if validator is None:
+            validator = self.cls(subschema, format_checker=self.format_checker)
+            self._sub_validators[steps] = validator
+        return validator
+
+class SchemaRegistry:
+    """Process-wide cache of loaded schemas and compiled validators"""
+
+    def __init__(self, schema_dir: str = SCHEMA_DIR, check_formats: bool = False):
+        self.schema_dir = schema_dir
+        self.format_checker = FormatChecker() if check_formats else None
+        self._lock = threading.Lock()
+        self._schemas = None  # name -> schema dict
+        self._compiled = {}   # name -> _CompiledSchema
+        self._by_id = {}      # id(schema dict) -> _CompiledSchema, for dicts passed in directly
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> Dict[str, Dict[str, Any]]:
+        if self._schemas is None:
+            with self._lock:
+                if self._schemas is None:
+                    self._schemas = self._load_all()
+        return self._schemas
+
+    def _load_all(self) -> Dict[str, Dict[str, Any]]:
+        schemas = {}
+        try:
+            filenames = sorted(os.listdir(self.schema_dir))
+        except OSError as e:
+            error(f"Could not list schema directory {self.schema_dir}: {e}")
+            return schemas
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.schema_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    schemas[_schema_name(filename)] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                error(f"Could not load schema {path}: {e}")
+        debug(f"Loaded {len(schemas)} schemas from {self.schema_dir}", category="schema_validation")
+        return schemas
+
+    def invalidate(self):
+        """Drop every cached schema and validator so the next use reloads from disk"""
+        with self._lock:
+            self._schemas = None
+            self._compiled = {}
+            self._by_id = {}
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._ensure_loaded())
+
+    def get_schema(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get a loaded schema by name (None if it does not exist or failed to load)"""
+        return self._ensure_loaded().get(_schema_name(name))
+
+    def _compiled_for(self, schema: SchemaRef) -> _CompiledSchema:
+        if isinstance(schema, str):
+            key = _schema_name(schema)
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                loaded = self.get_schema(key)
+                if loaded is None:
+                    raise KeyError(f"Unknown schema: {schema}")
+                compiled = _CompiledSchema(loaded, self.format_checker)
+                self._compiled[key] = compiled
+                self._by_id[id(compiled.schema)] = compiled
+            return compiled
+
+        # A dict: usually one handed out by get_schema(), otherwise compile it
+        # once and keep it alive so its id() cannot be reused
+        compiled = self._by_id.get(id(schema))
+        if compiled is None or compiled.schema is not schema:
+            compiled = _CompiledSchema(schema, self.format_checker)
+            self._by_id[id(schema)] = compiled
+        return compiled
+
+    # ------------------------------------------------------------------
+    # Full validation
+    # ------------------------------------------------------------------
+
+    def validator(self, schema: SchemaRef):
+        """The compiled validator for a schema name or dict"""
+        return self._compiled_for(schema).validator
+
+    def iter_errors(self, instance: Any, schema: SchemaRef) -> Iterator[ValidationError]:
+        return self._compiled_for(schema).validator.iter_errors(instance)
+
+    def is_valid(self, instance: Any, schema: SchemaRef) -> bool:
+        return self._compiled_for(schema).validator.is_valid(instance)
+
+    def validate(self, instance: Any, schema: SchemaRef):
+        """
+        Validate a document, raising the most relevant error like jsonschema.validate()
+
+        Raises:
+            ValidationError: If the instance does not match the schema
+        """
+        err = best_match(self._compiled_for(schema).validator.iter_errors(instance))
+        if err is not None:
+            raise err
+
+    # ------------------------------------------------------------------
+    # Delta validation
+    # ------------------------------------------------------------------
+
+    def validate_delta(self, instance: Any, schema: SchemaRef, changed_paths: Iterable[DeltaPath]):
+        """
+        Validate only the parts of a document touched by an update
+
+        Assumes the rest of the document was valid before the update. Each
+        changed path is a top-level key ("hitPoints") or a key/index sequence
+        (("plotPoints", 2)); paths that no longer exist in the instance mean
+        the value was removed.
+
+        Raises:
+            ValidationError: If a changed subtree (or a parent constraint it
+                affects) does not match the schema
+        """
+        compiled = self._compiled_for(schema)
+        paths = [(path,) if isinstance(path, (str, int)) else tuple(path) for path in changed_paths]
+        if not paths:
+            return
+        if not compiled.delta_capable:
+            self.validate(instance, schema)
+            return
+
+        for path in paths:
+            errors = self._delta_errors(compiled, instance, path)
+            if errors is None:
+                # Path leaves what validate_delta can reason about
+                self.validate(instance, schema)
+                return
+            err = best_match(errors)
+            if err is not None:
+                raise err
+
+    def _delta_errors(self, compiled: _CompiledSchema, instance: Any,
+                      path: Tuple) -> Optional[list]:
+        """Errors for one changed path, or None if full validation is needed"""
+        errors = []
+        subschema = compiled.schema
+        value = instance
+        steps = ()
+        prefix = []
+
+        for key in path:
+            if not isinstance(subschema, dict) or not _DELTA_SAFE_KEYWORDS.issuperset(subschema):
+                return None
+
+            # The parent's own constraints (type, required, closed properties)
+            errors.extend(self._with_prefix(
+                compiled.sub_validator(steps + ("<shallow>",), self._shallow(subschema)).iter_errors(value),
+                prefix))
+
+            if isinstance(value, dict) and isinstance(key, str):
+                properties = subschema.get("properties", {})
+                if key in properties:
+                    subschema, steps = properties[key], steps + ("properties", key)
+                elif isinstance(subschema.get("additionalProperties"), dict):
+                    subschema, steps = subschema["additionalProperties"], steps + ("additionalProperties",)
+                else:
+                    # Unknown or closed key: the shallow check already covered it
+                    return errors
+                if key not in value:
+                    return errors  # removed; "required" was checked above
+                value = value[key]
+            elif isinstance(value, list) and isinstance(key, int):
+                if not isinstance(subschema.get("items"), dict):
+                    return None
+                if not -len(value) <= key < len(value):
+                    return errors
+                subschema, steps = subschema["items"], steps + ("items",)
+                value = value[key]
+            else:
+                # Type mismatch along the path (or a bad path): let the full
+                # validator report it properly
+                return None
+            prefix.append(key)
+
+        errors.extend(self._with_prefix(compiled.sub_validator(steps, subschema).iter_errors(value), prefix))
+        return errors
+
+    @staticmethod
+    def _shallow(subschema: Dict[str, Any]) -> Dict[str, Any]:
+        """The parts of an object/array schema that do not look inside children"""
+        shallow = {key: subschema[key] for key in ("type", "required") if key in subschema}
+        if subschema.get("additionalProperties") is False:
+            shallow["properties"] = {key: {} for key in subschema.get("properties", {})}
+            shallow["additionalProperties"] = False
+        return shallow
+
+    @staticmethod
+    def _with_prefix(errors: Iterable[ValidationError], prefix: list) -> list:
+        """Re-root subtree errors so their paths are relative to the whole document"""
+        errors = list(errors)
+        if prefix:
+            for err in errors:
+                err.path.extendleft(reversed(prefix))
+        return errors
+
+# Process-wide instance
+schema_registry = SchemaRegistry()
+
+if __name__ == "__main__":
+    # Micro-benchmark: cost of validating one update the old way (read the
+    # schema file + jsonschema.validate) against the cached full and delta paths.
+    # Usage: python -m utils.schema_registry [schema_name instance.json changed_key]
+    import sys
+    import timeit
+    import jsonschema
+
+    if len(sys.argv) == 4:
+        bench_schema, bench_file, bench_key = sys.argv[1:]
+    else:
+        bench_schema, bench_file, bench_key = "plot_schema", "modules/Keep_of_Doom/module_plot_BU.json", "plotPoints"
+
+    with open(bench_file, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    schema_path = os.path.join(SCHEMA_DIR, _schema_name(bench_schema) + ".json")
+
+    def old_style():
+        with open(schema_path, "r") as schema_file:
+            jsonschema.validate(instance=document, schema=json.load(schema_file))
+
+    schema_registry.validate(document, bench_schema)  # warm the cache
+    runs = 200
+    timings = {
+        "load + jsonschema.validate": timeit.timeit(old_style, number=runs),
+        "cached full validation": timeit.timeit(lambda: schema_registry.validate(document, bench_schema), number=runs),
+        f"delta validation ({bench_key})": timeit.timeit(
+            lambda: schema_registry.validate_delta(document, bench_schema, [bench_key]), number=runs),
+    }
+    if isinstance(document.get(bench_key), list) and document[bench_key]:
+        timings[f"delta validation ({bench_key}[0])"] = timeit.timeit(
+            lambda: schema_registry.validate_delta(document, bench_schema, [(bench_key, 0)]), number=runs)
+
+    print(f"{bench_schema} against {bench_file}, {runs} runs")
+    for label, seconds in timings.items():
+        print(f"  {label:<36} {seconds / runs * 1000:8.3f} ms/update")
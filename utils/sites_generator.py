@@ -19,6 +19,7 @@ import json
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.generator_context import make_rng
 
 # Set script name for logging
 set_script_name("sites_generator")
@@ -60,7 +61,8 @@ class SitePoint:
 class SiteGenerator:
     """Generates detailed sites using the Mythic Bastionland 7-point hex method"""
     
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None, seed: Optional[int] = None):
+        self.rng = make_rng(seed, rng)
         self.points = {}  # Dict of point_id -> SitePoint
         self.entrances = []  # List of point IDs that are entrances
         
@@ -120,7 +122,7 @@ class SiteGenerator:
             self.points[i] = SitePoint(i, PointType.FEATURE)  # Temporary type
         
         # Always erase exactly one point to leave 6 (official rule)
-        erased_point = random.randint(1, 7)
+        erased_point = self.rng.randint(1, 7)
         del self.points[erased_point]
         
         # Renumber remaining points 1-6
@@ -145,7 +147,7 @@ class SiteGenerator:
         assert len(point_ids) == 6, f"Expected 6 points, got {len(point_ids)}"
         
         # Randomly assign types
-        random.shuffle(point_ids)
+        self.rng.shuffle(point_ids)
         
         # Assign exactly 1 treasure (diamond)
         self.points[point_ids[0]].type = PointType.TREASURE
@@ -166,7 +168,7 @@ class SiteGenerator:
         routes_to_create = ([RouteType.OPEN] * 3 + 
                            [RouteType.CLOSED] * 2 + 
                            [RouteType.HIDDEN] * 1)
-        random.shuffle(routes_to_create)
+        self.rng.shuffle(routes_to_create)
         
         # Generate all possible point pairs
         possible_pairs = []
@@ -175,7 +177,7 @@ class SiteGenerator:
                 possible_pairs.append((point_a, point_b))
         
         # We need exactly 6 routes, so select 6 pairs
-        selected_pairs = random.sample(possible_pairs, 6)
+        selected_pairs = self.rng.sample(possible_pairs, 6)
         
         # Create the routes
         routes_created = []
@@ -210,9 +212,9 @@ class SiteGenerator:
         # Main entrance - usually a feature point
         feature_points = [pid for pid, point in self.points.items() if point.type == PointType.FEATURE]
         if feature_points:
-            main_entrance = random.choice(feature_points)
+            main_entrance = self.rng.choice(feature_points)
         else:
-            main_entrance = random.choice(point_ids)
+            main_entrance = self.rng.choice(point_ids)
         
         self.entrances.append(main_entrance)
         
@@ -220,7 +222,7 @@ class SiteGenerator:
         if len(point_ids) > 1:
             hidden_entrance_candidates = [pid for pid in point_ids if pid != main_entrance]
             if hidden_entrance_candidates:
-                hidden_entrance = random.choice(hidden_entrance_candidates)
+                hidden_entrance = self.rng.choice(hidden_entrance_candidates)
                 self.entrances.append(hidden_entrance)
                 debug(f"Added hidden entrance at point {hidden_entrance}", category="site_generation")
     
@@ -232,7 +234,7 @@ class SiteGenerator:
             template_key = f"{point.type.value}s"
             if template_key in theme_templates:
                 templates = theme_templates[template_key]
-                point.description = random.choice(templates)
+                point.description = self.rng.choice(templates)
                 
                 # Add entrance descriptions
                 if point_id in self.entrances:
@@ -329,22 +331,23 @@ class SiteGenerator:
         return templates.get(theme, templates["generic"])
 
 # Convenience functions for external use
-def generate_site(name: str, theme: str = "generic") -> Dict:
+def generate_site(name: str, theme: str = "generic", rng: Optional[random.Random] = None) -> Dict:
     """Generate a site using the 7-point hex method"""
-    generator = SiteGenerator()
+    generator = SiteGenerator(rng)
     return generator.generate_site(name, theme)
 
-def generate_themed_site(name: str, myth_name: str = None) -> Dict:
+def generate_themed_site(name: str, myth_name: str = None, rng: Optional[random.Random] = None) -> Dict:
     """Generate a site themed around a specific myth"""
+    rng = make_rng(rng=rng)
     # Could integrate with mythic_generators.py to get location themes from myths
     themes = ["tomb", "fortress", "cavern", "generic"]
-    theme = random.choice(themes)
+    theme = rng.choice(themes)
     
     if myth_name:
         # Could use myth data to influence theme selection
         debug(f"Generating site themed around myth: {myth_name}", category="site_generation")
     
-    return generate_site(name, theme)
+    return generate_site(name, theme, rng)
 
 if __name__ == "__main__":
     # Test the generator
@@ -0,0 +1,211 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Spell Index Service
+
+Indexed, lazily built view over data/spell_repository.json. The file is parsed
+once on first use (and again only if its mtime changes), then indexed by spell
+id, case-folded name, class, level and school so the web UI and validators can
+query individual spells without loading the whole 290 KB repository.
+
+The full payload is also kept pre-serialised (gzipped on first demand) with an
+ETag, so the /spell-data endpoint can answer repeat requests with 304 Not
+Modified and never re-encodes the file.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.enhanced_logger import debug, error, set_script_name
+
+# Set script name for logging
+set_script_name("spell_index")
+
+SPELL_REPOSITORY_FILE = "data/spell_repository.json"
+
+# Upper bound for a single page of query results
+MAX_PAGE_SIZE = 100
+
+def _fold(value: Any) -> str:
+    """Normalise a lookup key (case and surrounding whitespace)"""
+    return str(value).strip().casefold()
+
+class SpellIndex:
+    """Lazily built, in-memory indexes over the spell repository"""
+
+    def __init__(self, path: str = SPELL_REPOSITORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.metadata = {}
+        self.spells = {}      # spell id -> spell data
+        self._ordered_ids = []  # spell ids sorted by display name
+        self._by_name = {}    # folded id and display name -> spell id
+        self._by_class = {}   # folded class -> [spell ids]
+        self._by_level = {}   # level -> [spell ids]
+        self._by_school = {}  # folded school -> [spell ids]
+        self._payload = b"{}"
+        self._payload_gzip = None
+        self._etag = ""
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self):
+        """Build the indexes on first use, or rebuild if the file changed"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime and self._mtime is not None:
+            return
+
+        with self._lock:
+            if mtime == self._mtime and self._mtime is not None:
+                return
+            self._build(mtime)
+
+    def _build(self, mtime: Optional[float]):
+        raw = {}
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                error(f"Could not load spell repository {self.path}: {e}")
+                raw = {}
+
+        metadata = raw.get("_metadata", {}) if isinstance(raw, dict) else {}
+        spells = {spell_id: data for spell_id, data in raw.items()
+                  if not spell_id.startswith("_") and isinstance(data, dict)}
+
+        ordered_ids = sorted(spells, key=lambda sid: _fold(spells[sid].get("name", sid)))
+        by_name, by_class, by_level, by_school = {}, {}, {}, {}
+        for spell_id in ordered_ids:
+            spell = spells[spell_id]
+            by_name[_fold(spell_id)] = spell_id
+            by_name.setdefault(_fold(spell.get("name", spell_id)), spell_id)
+            for class_name in spell.get("classes", []):
+                by_class.setdefault(_fold(class_name), []).append(spell_id)
+            by_level.setdefault(spell.get("level"), []).append(spell_id)
+            if spell.get("school"):
+                by_school.setdefault(_fold(spell["school"]), []).append(spell_id)
+
+        payload = json.dumps(raw, separators=(",", ":")).encode("utf-8")
+
+        self.metadata = metadata
+        self.spells = spells
+        self._ordered_ids = ordered_ids
+        self._by_name = by_name
+        self._by_class = by_class
+        self._by_level = by_level
+        self._by_school = by_school
+        self._payload = payload
+        self._payload_gzip = None  # compressed on first request that accepts gzip
+        self._etag = hashlib.sha1(payload).hexdigest()
+        self._mtime = mtime
+        debug(f"Indexed {len(spells)} spells from {self.path}", category="spell_index")
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a spell by id ("magic_missile") or display name ("Magic Missile")"""
+        self._ensure_loaded()
+        key = _fold(name)
+        spell_id = self._by_name.get(key) or self._by_name.get(key.replace(" ", "_"))
+        return self.spells.get(spell_id) if spell_id else None
+
+    def exists(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def names(self) -> List[str]:
+        """Display names of all spells, sorted"""
+        self._ensure_loaded()
+        return [self.spells[sid].get("name", sid) for sid in self._ordered_ids]
+
+    def by_class(self, class_name: str) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [self.spells[sid] for sid in self._by_class.get(_fold(class_name), [])]
+
+    def by_level(self, level: int) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [self.spells[sid] for sid in self._by_level.get(level, [])]
+
+    def by_school(self, school: str) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return [self.spells[sid] for sid in self._by_school.get(_fold(school), [])]
+
+    def query(self, name: Optional[str] = None, class_name: Optional[str] = None,
+              level: Optional[int] = None, school: Optional[str] = None,
+              page: int = 1, per_page: int = 25) -> Dict[str, Any]:
+        """
+        Filter spells and return one page of results
+
+        Args:
+            name: Case-insensitive substring of the spell name
+            class_name: Class that can cast the spell (e.g. "Wizard")
+            level: Spell level (0 for cantrips)
+            school: School of magic (e.g. "Evocation")
+            page: 1-based page number
+            per_page: Results per page (capped at MAX_PAGE_SIZE)
+
+        Returns:
+            Dictionary with total, page, per_page and the spells on this page
+        """
+        self._ensure_loaded()
+
+        # Intersect the requested indexes, keeping name order
+        candidates = None
+        for ids in (self._by_class.get(_fold(class_name), []) if class_name else None,
+                    self._by_level.get(level, []) if level is not None else None,
+                    self._by_school.get(_fold(school), []) if school else None):
+            if ids is None:
+                continue
+            if candidates is None:
+                candidates = list(ids)
+            else:
+                allowed = set(ids)
+                candidates = [sid for sid in candidates if sid in allowed]
+        if candidates is None:
+            candidates = list(self._ordered_ids)
+
+        if name:
+            needle = _fold(name)
+            candidates = [sid for sid in candidates
+                          if needle in _fold(self.spells[sid].get("name", sid))]
+
+        per_page = max(1, min(int(per_page), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+        start = (page - 1) * per_page
+        return {
+            "total": len(candidates),
+            "page": page,
+            "per_page": per_page,
+            "spells": {sid: self.spells[sid] for sid in candidates[start:start + per_page]}
+        }
+
+    # ------------------------------------------------------------------
+    # Full payload
+    # ------------------------------------------------------------------
+
+    def payload(self, compressed: bool = False) -> Tuple[bytes, str]:
+        """Return the full repository as compact JSON (optionally gzipped) and its ETag"""
+        self._ensure_loaded()
+        if not compressed:
+            return self._payload, self._etag
+        if self._payload_gzip is None:
+            self._payload_gzip = gzip.compress(self._payload)
+        return self._payload_gzip, self._etag
+
+# Process-wide instance
+spell_index = SpellIndex()
@@ -21,6 +21,7 @@ class TokenEstimator:
     
     # Token estimation constants based on empirical testing
     WORDS_PER_TOKEN = 0.75  # Average words per token
+    CHARS_PER_TOKEN = 4  # Average characters per token, also for punctuation-heavy text
     JSON_OVERHEAD_RATIO = 1.1  # JSON formatting adds ~10% overhead
     
     def __init__(self):
@@ -53,6 +54,24 @@ class TokenEstimator:
         
         return max(1, estimated_tokens)  # Ensure minimum of 1 token
     
+    @staticmethod
+    def estimate_tokens_from_chars(text: str) -> int:
+        """
+        Estimate tokens from character count
+        
+        Word counts undercount compact JSON and other text with few spaces,
+        so use this to compare different encodings of the same data.
+        
+        Args:
+            text: Input text string
+            
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+        return max(1, round(len(text) / TokenEstimator.CHARS_PER_TOKEN))
+    
     @staticmethod
     def estimate_tokens_from_json(json_data: Union[Dict, List, str]) -> int:
         """
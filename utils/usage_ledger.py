@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Usage Ledger
+
+Records the token usage the API reports for every chat completion, tagged
+with the subsystem and call site that made it, the model, the game session
+and the turn, in a local SQLite file (modules/logs/usage_ledger.db). The
+turn is the label version_store.start_turn() gives the turn, so a call can
+be matched with the file versions written in the same turn.
+
+track_openai_usage() wraps Completions.create once, so every client the
+game creates is covered without touching the call sites. The subsystem is
+looked up from the calling module:function in SUBSYSTEMS, then from the
+calling module.
+
+Budgets are read from config.TOKEN_BUDGETS, keyed by "session" or a
+subsystem name, and count tokens spent in the current session:
+
+    TOKEN_BUDGETS = {
+        "session": {"soft": 2_000_000},
+        "summaries": {"soft": 200_000, "hard": 400_000},
+    }
+
+Crossing a soft limit logs a warning once. Once a hard limit is reached,
+further calls of that subsystem (or any call, for "session") raise
+BudgetExceededError before reaching the API.
+
+Reports: usage_ledger.report() for the web UI, and
+    python -m utils.usage_ledger [--session ID | --all]
+for the command line.
+"""
+
+import argparse
+import functools
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import config
+from utils.token_estimator import TokenEstimator
+from utils.enhanced_logger import debug, warning, set_script_name
+
+# Set script name for logging
+set_script_name("usage_ledger")
+
+LEDGER_FILE = "modules/logs/usage_ledger.db"
+
+# Calling module:function, or calling module (longest prefix wins) -> subsystem
+SUBSYSTEMS = {
+    "main": "dm",
+    "main:validate_ai_response": "validation",
+    "main:generate_module_summary": "summaries",
+    "main:generate_arrival_narration": "transitions",
+    "main:generate_seamless_transition_narration": "transitions",
+    "web.web_interface": "dm",
+    "core.ai.action_handler": "actions",
+    "utils.action_predictor": "predictor",
+    "core.validation": "validation",
+    "updates.update_character_info": "character_updates",
+    "updates.update_character_effects": "character_updates",
+    "updates.plot_update": "plot_updates",
+    "updates.update_encounter": "combat",
+    "core.managers.combat_manager": "combat",
+    "core.managers.initiative_tracker_ai": "combat",
+    "core.ai.cumulative_summary": "summaries",
+    "core.ai.adv_summary": "summaries",
+    "core.ai.chunked_compression": "summaries",
+    "core.managers.campaign_manager": "summaries",
+    "core.generators": "module_generation",
+    "core.managers.level_up_manager": "level_up",
+    "utils.level_up": "level_up",
+    "core.managers.storage_processor": "storage",
+    "utils.startup_wizard": "startup",
+    "utils.mythic_startup_wizard": "startup",
+}
+
+# USD per million tokens: input, cached input, output (longest model prefix wins)
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+class BudgetExceededError(RuntimeError):
+    """Raised instead of making a call once a hard token budget is reached"""
+
+def _longest_prefix(table: Dict[str, Any], name: str) -> Optional[str]:
+    matches = [key for key in table if name == key or name.startswith(key + ".") or name.startswith(key + "-")]
+    return max(matches, key=len) if matches else None
+
+def subsystem_for(call_site: str) -> str:
+    """Subsystem a module:function call site (or a module) belongs to, or the module name itself"""
+    if call_site in SUBSYSTEMS:
+        return SUBSYSTEMS[call_site]
+    module_name = call_site.split(":")[0]
+    key = _longest_prefix(SUBSYSTEMS, module_name)
+    return SUBSYSTEMS[key] if key else module_name
+
+def call_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """Estimated cost in USD, 0.0 for models without a known price"""
+    prices = {**MODEL_PRICES, **getattr(config, "MODEL_PRICES", {})}
+    key = _longest_prefix(prices, model or "")
+    if key is None:
+        return 0.0
+    input_price, cached_price, output_price = prices[key]
+    return ((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+            + completion_tokens * output_price) / 1_000_000
+
+class UsageLedger:
+    """SQLite ledger of chat completion usage with per-session budgets"""
+
+    def __init__(self, db_path: str = LEDGER_FILE):
+        self.db_path = db_path
+        self.session_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.turn = None  # version_store turn label
+        self._connection = None
+        self._lock = threading.Lock()  # calls are also made from background workers
+        self._session_tokens = {}  # subsystem -> tokens spent this session
+        self._warned = set()
+
+    def begin_turn(self, turn: str) -> str:
+        """Tag later calls with a turn label from version_store.start_turn()"""
+        self.turn = turn
+        return turn
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS calls (
+                    id INTEGER PRIMARY KEY,
+                    timestamp REAL NOT NULL,
+                    session TEXT NOT NULL,
+                    turn TEXT,
+                    subsystem TEXT NOT NULL,
+                    call_site TEXT NOT NULL,
+                    model TEXT,
+                    prompt_tokens INTEGER NOT NULL,
+                    cached_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    total_tokens INTEGER NOT NULL,
+                    cost REAL NOT NULL,
+                    duration REAL NOT NULL
+                )""")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS calls_session ON calls (session, subsystem)")
+            self._connection.commit()
+        return self._connection
+
+    def record(self, subsystem: str, call_site: str, model: str, prompt_tokens: int,
+               completion_tokens: int, cached_tokens: int = 0, duration: float = 0.0):
+        """Add one call to the ledger and check the session budgets"""
+        total_tokens = prompt_tokens + completion_tokens
+        cost = call_cost(model, prompt_tokens, cached_tokens, completion_tokens)
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT INTO calls (timestamp, session, turn, subsystem, call_site, model, prompt_tokens, "
+                    "cached_tokens, completion_tokens, total_tokens, cost, duration) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (time.time(), self.session_id, self.turn, subsystem, call_site, model, prompt_tokens,
+                     cached_tokens, completion_tokens, total_tokens, cost, duration)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                warning(f"FILE_OP: Could not record usage for {call_site}: {e}", category="file_operations")
+            self._session_tokens[subsystem] = self._session_tokens.get(subsystem, 0) + total_tokens
+        debug(f"USAGE: {subsystem} {call_site} {model}: {prompt_tokens} prompt + {completion_tokens} completion "
+              f"tokens (${cost:.4f})", category="ai_processing")
+        self._check_soft_limits(subsystem)
+
+    # ------------------------------------------------------------------
+    # Budgets
+    # ------------------------------------------------------------------
+
+    def spent(self, scope: str = "session") -> int:
+        """Tokens spent this session, in total or by one subsystem"""
+        if scope == "session":
+            return sum(self._session_tokens.values())
+        return self._session_tokens.get(scope, 0)
+
+    def _check_soft_limits(self, subsystem: str):
+        budgets = getattr(config, "TOKEN_BUDGETS", {})
+        for scope in ("session", subsystem):
+            soft = budgets.get(scope, {}).get("soft")
+            if soft and scope not in self._warned and self.spent(scope) >= soft:
+                self._warned.add(scope)
+                warning(f"USAGE: {scope} has used {self.spent(scope)} tokens this session, "
+                        f"over its soft budget of {soft}", category="ai_processing")
+
+    def check_hard_limits(self, subsystem: str):
+        """Raise BudgetExceededError if the session or subsystem hard budget is used up"""
+        budgets = getattr(config, "TOKEN_BUDGETS", {})
+        for scope in ("session", subsystem):
+            hard = budgets.get(scope, {}).get("hard")
+            if hard and self.spent(scope) >= hard:
+                raise BudgetExceededError(f"{scope} has used {self.spent(scope)} tokens this session, "
+                                          f"its hard budget is {hard}")
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def report(self, session: Optional[str] = None, all_sessions: bool = False) -> Dict[str, Any]:
+        """
+        Usage by subsystem, most expensive first
+
+        Args:
+            session: Session to report, the current one if None
+            all_sessions: Report every session in the ledger instead
+
+        Returns:
+            dict: {"session", "subsystems": [rows], "total": row, "budgets"}
+        """
+        session = None if all_sessions else (session or self.session_id)
+        where, params = ("", ()) if session is None else ("WHERE session = ?", (session,))
+        columns = ("calls", "prompt_tokens", "cached_tokens", "completion_tokens", "total_tokens", "cost")
+        query = (f"SELECT subsystem, COUNT(*), SUM(prompt_tokens), SUM(cached_tokens), SUM(completion_tokens), "
+                 f"SUM(total_tokens), SUM(cost) FROM calls {where} GROUP BY subsystem ORDER BY SUM(cost) DESC, "
+                 f"SUM(total_tokens) DESC")
+        with self._lock:
+            rows = self._db().execute(query, params).fetchall()
+        subsystems = [dict(zip(("subsystem",) + columns, row)) for row in rows]
+        total = {column: sum(row[column] for row in subsystems) for column in columns}
+        return {
+            "session": session or "all",
+            "subsystems": subsystems,
+            "total": total,
+            "budgets": getattr(config, "TOKEN_BUDGETS", {}) if session == self.session_id else {}
+        }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain text table of a report()"""
+    lines = [f"Token usage - session {report['session']}",
+             f"{'subsystem':<20} {'calls':>6} {'prompt':>10} {'cached':>9} {'completion':>11} {'cost $':>9}"]
+    for row in report["subsystems"] + [dict(report["total"], subsystem="TOTAL")]:
+        lines.append(f"{row['subsystem']:<20} {row['calls']:>6} {row['prompt_tokens']:>10} {row['cached_tokens']:>9} "
+                     f"{row['completion_tokens']:>11} {row['cost']:>9.4f}")
+    for scope, limits in report["budgets"].items():
+        lines.append(f"budget {scope}: " + ", ".join(f"{kind} {limit}" for kind, limit in limits.items()))
+    return "\n".join(lines)
+
+# Global ledger for this game session
+usage_ledger = UsageLedger()
+
+# ----------------------------------------------------------------------
+# OpenAI hook
+# ----------------------------------------------------------------------
+
+def _caller() -> str:
+    """module:function of the first frame outside the OpenAI client and this module"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if not (module_name.startswith("openai") or module_name == __name__):
+            if module_name == "__main__":
+                module_name = os.path.splitext(os.path.basename(frame.f_globals.get("__file__", "main")))[0]
+            return f"{module_name}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown:unknown"
+
+def _record_usage(usage: Any, model: str, call_site: str, started: float):
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    usage_ledger.record(
+        subsystem_for(call_site),
+        call_site,
+        model,
+        usage.prompt_tokens or 0,
+        usage.completion_tokens or 0,
+        (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0,
+        time.monotonic() - started
+    )
+
+def _estimated_usage(messages: Any, completion: str) -> Any:
+    """Usage estimated from the text, for a stream that ended before its usage chunk"""
+    return SimpleNamespace(
+        prompt_tokens=TokenEstimator.estimate_tokens_from_json(messages or []),
+        completion_tokens=TokenEstimator.estimate_tokens_from_chars(completion),
+        prompt_tokens_details=None
+    )
+
+class _RecordingStream:
+    """Passes a streamed response through, recording the usage chunk at the end"""
+
+    def __init__(self, stream, model: str, call_site: str, started: float, messages: Any = None):
+        self._stream = stream
+        self._model = model
+        self._call_site = call_site
+        self._started = started
+        self._messages = messages
+
+    def __iter__(self):
+        usage = None
+        parts = []
+        try:
+            for chunk in self._stream:
+                usage = getattr(chunk, "usage", None) or usage
+                for choice in getattr(chunk, "choices", None) or []:
+                    content = getattr(getattr(choice, "delta", None), "content", None)
+                    if content:
+                        parts.append(content)
+                yield chunk
+        finally:
+            # A stream that failed or was abandoned still cost tokens
+            if usage is None:
+                debug(f"USAGE: {self._call_site} stream ended without usage, recording an estimate",
+                      category="ai_processing")
+                usage = _estimated_usage(self._messages, "".join(parts))
+            _record_usage(usage, self._model, self._call_site, self._started)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def track_openai_usage():
+    """Record every chat completion in usage_ledger; safe to call more than once"""
+    from openai.resources.chat.completions import Completions
+
+    if getattr(Completions.create, "_usage_ledger", False):
+        return
+    create = Completions.create
+
+    @functools.wraps(create)
+    def create_with_usage(self, *args, **kwargs):
+        call_site = _caller()
+        usage_ledger.check_hard_limits(subsystem_for(call_site))
+        started = time.monotonic()
+        if kwargs.get("stream"):
+            # Usage is only sent at the end of a stream when asked for
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        response = create(self, *args, **kwargs)
+        model = kwargs.get("model", "")
+        if kwargs.get("stream"):
+            return _RecordingStream(response, model, call_site, started, kwargs.get("messages"))
+        _record_usage(getattr(response, "usage", None), getattr(response, "model", None) or model,
+                      call_site, started)
+        return response
+
+    create_with_usage._usage_ledger = True
+    Completions.create = create_with_usage
+
+def main():
+    parser = argparse.ArgumentParser(description="Token usage by subsystem from the usage ledger")
+    parser.add_argument("--session", help="Session ID to report (default: the most recent session)")
+    parser.add_argument("--all", action="store_true", help="Report every session in the ledger")
+    args = parser.parse_args()
+
+    if not os.path.exists(usage_ledger.db_path):
+        print(f"No usage ledger at {usage_ledger.db_path}")
+        return
+    session = args.session
+    if not session and not args.all:
+        row = usage_ledger._db().execute("SELECT session FROM calls ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            print("The usage ledger is empty")
+            return
+        session = row[0]
+    print(format_report(usage_ledger.report(session, all_sessions=args.all)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+# SPDX-FileCopyrightText: 2024 MoonlightByte
+# SPDX-License-Identifier: Fair-Source-1.0
+# License: See LICENSE file in the repository root
+# This software is subject to the terms of the Fair Source License.
+
+"""
+Versioned Document Store
+
+Keeps the history of a JSON game file (character sheet, area file) as
+append-only logs next to it. Each mutation is one line holding a patch from
+the previous version, tagged with a timestamp, the game turn and a reason. A
+full snapshot is written every SNAPSHOT_INTERVAL versions so restores never
+replay a long chain.
+
+The logs rotate through a fixed ring of RING_SIZE slot files,
+"<file>.history0.jsonl" to "<file>.history4.jsonl". Each slot starts with a
+snapshot followed by the patches after it. A new snapshot overwrites the
+oldest slot, so old history is dropped without listing, sorting or
+rewriting any file.
+
+Appending a version costs one diff and one line write instead of copying the
+whole file, and any recorded version can be restored, by number, by turn or
+by time. Turn labels are "<session>.<n>"; each entry also stores the turn as
+a sortable [session, n] sequence, so "the end of turn T" is the newest entry
+at or before T, even if the file did not change during T.
+
+Patches are lists of [op, path, value] entries, where op is "add", "replace"
+or "remove" and path is a list of keys and list indexes, as in JSON Patch.
+Lists of objects that carry an identity (id, name or item_name) are diffed
+by that identity, so removing the first inventory item is one "remove"
+rather than a rewrite of every later item.
+
+If the file was changed by code that does not record history, the next
+record() first logs the difference as an "external" version, so the chain
+always matches what was on disk.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.enhanced_logger import debug, info, warning, error, set_script_name
+
+# Set script name for logging
+set_script_name("version_store")
+
+SNAPSHOT_INTERVAL = 20  # Versions between full snapshots
+RING_SIZE = 5           # History slot files per document, each a snapshot and the patches after it
+
+_MISSING = object()
+IDENTITY_KEYS = ("id", "name", "item_name")  # Keys that identify an object within a list
+
+def turn_sequence(turn: Any) -> Optional[List[Any]]:
+    """Sortable [session, n] of a "<session>.<n>" turn label, or None for other labels"""
+    if not isinstance(turn, str):
+        return None
+    session, _, number = turn.rpartition(".")
+    if not session or not number.isdigit():
+        return None
+    return [session, int(number)]
+
+def _identity(item: Any) -> Any:
+    if isinstance(item, dict):
+        for key in IDENTITY_KEYS:
+            value = item.get(key)
+            if isinstance(value, (str, int)) and not isinstance(value, bool):
+                return (key, value)
+    return None
+
+def _identities(items: List[Any]) -> Optional[List[Any]]:
+    """Identity of every element, or None if any is missing or repeated"""
+    keys = [_identity(item) for item in items]
+    if None in keys or len(set(keys)) != len(keys):
+        return None
+    return keys
+
+def _list_patch_by_identity(before: List[Any], after: List[Any], path: List[Any]) -> Optional[List[list]]:
+    """Patch for two lists of identified objects, or None if they cannot be matched by identity"""
+    before_keys, after_keys = _identities(before), _identities(after)
+    if not before_keys or not after_keys:
+        return None
+    after_set, before_set = set(after_keys), set(before_keys)
+    kept = [key for key in before_keys if key in after_set]
+    if kept != [key for key in after_keys if key in before_set]:
+        return None  # reordered; position by position is as good as anything
+    # Removals from the end, then insertions in order, leave the kept objects at their new indexes
+    ops = [["remove", path + [index]] for index in range(len(before) - 1, -1, -1)
+           if before_keys[index] not in after_set]
+    ops.extend(["add", path + [index], after[index]] for index, key in enumerate(after_keys)
+               if key not in before_set)
+    by_key = dict(zip(before_keys, before))
+    for index, key in enumerate(after_keys):
+        if key in before_set:
+            ops.extend(make_patch(by_key[key], after[index], path + [index]))
+    return ops
+
+def canonical_json(document: Any) -> str:
+    """Stable JSON text of a document, used to compare versions"""
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+def make_patch(before: Any, after: Any, path: Optional[List[Any]] = None) -> List[list]:
+    """
+    Diff two JSON documents into a list of patch operations
+
+    Objects are diffed key by key. Lists of identified objects are diffed by
+    identity, other lists position by position. Anything else that differs
+    is replaced.
+    """
+    path = path or []
+    if before is after:
+        return []
+    if isinstance(before, dict) and isinstance(after, dict):
+        ops = []
+        for key, value in after.items():
+            old = before.get(key, _MISSING)
+            if old is _MISSING:
+                ops.append(["add", path + [key], value])
+            else:
+                ops.extend(make_patch(old, value, path + [key]))
+        ops.extend(["remove", path + [key]] for key in before if key not in after)
+        return ops
+    if isinstance(before, list) and isinstance(after, list):
+        ops = _list_patch_by_identity(before, after, path)
+        if ops is not None:
+            return ops
+        ops = []
+        common = min(len(before), len(after))
+        for index in range(common):
+            ops.extend(make_patch(before[index], after[index], path + [index]))
+        ops.extend(["add", path + [index], after[index]] for index in range(common, len(after)))
+        # Remove from the end so earlier indexes stay valid
+        ops.extend(["remove", path + [index]] for index in range(len(before) - 1, common - 1, -1))
+        return ops
+    if type(before) is not type(after) or before != after:
+        return [["replace", path, after]]
+    return []
+
+def apply_patch(document: Any, patch: List[list]) -> Any:
+    """Apply patch operations to a document in place and return it"""
+    for op in patch:
+        action, path = op[0], op[1]
+        if not path:
+            if action == "remove":
+                document = None
+            else:
+                document = op[2]
+            continue
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        if action == "remove":
+            del parent[key]
+        elif action == "add" and isinstance(parent, list):
+            parent.insert(key, op[2])
+        else:
+            parent[key] = op[2]
+    return document
+
+class _History:
+    """In-memory head of one document's history"""
+
+    def __init__(self):
+        self.version = 0
+        self.since_snapshot = 0
+        self.slot = None       # ring slot holding the latest version
+        self.head_json = None  # canonical JSON of the latest version
+
+class VersionStore:
+    """Append-only patch history for JSON game files"""
+
+    def __init__(self, snapshot_interval: int = SNAPSHOT_INTERVAL, ring_size: int = RING_SIZE):
+        self.snapshot_interval = snapshot_interval
+        self.ring_size = ring_size
+        self.session_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.turn_count = 0
+        self.current_turn = None
+        self._histories = {}
+
+    # ------------------------------------------------------------------
+    # Turns
+    # ------------------------------------------------------------------
+
+    def start_turn(self, label: Optional[str] = None) -> str:
+        """Start a new game turn; versions recorded from now on are tagged with it"""
+        self.turn_count += 1
+        self.current_turn = label or f"{self.session_id}.{self.turn_count}"
+        return self.current_turn
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def history_path(self, document_path: str, slot: int) -> str:
+        """Path of one ring slot of a document's history"""
+        return f"{document_path}.history{slot}.jsonl"
+
+    def record(self, document_path: str, before: Optional[Dict[str, Any]], after: Dict[str, Any],
+               reason: str = "update", turn: Optional[str] = None) -> Optional[int]:
+        """
+        Record that a document changed from before to after
+
+        Call this after the new version has been written. before may be None
+        if the previous content is unknown; a snapshot is recorded then.
+
+        Returns:
+            The new version number, or None if the history could not be written
+        """
+        try:
+            history = self._load_history(document_path)
+            turn = turn if turn is not None else self.current_turn
+            after_json = canonical_json(after)
+
+            if before is not None:
+                before_json = canonical_json(before)
+                if history.head_json is None:
+                    self._append(document_path, history, before, before_json, "baseline", turn, snapshot=True)
+                elif before_json != history.head_json:
+                    # Changed on disk without going through the store
+                    self._append(document_path, history, before, before_json, "external", turn,
+                                 patch=make_patch(json.loads(history.head_json), before))
+            if after_json == history.head_json:
+                return history.version
+
+            if history.head_json is None or history.since_snapshot + 1 >= self.snapshot_interval:
+                self._append(document_path, history, after, after_json, reason, turn, snapshot=True)
+            else:
+                head = json.loads(history.head_json) if before is None else before
+                self._append(document_path, history, after, after_json, reason, turn,
+                             patch=make_patch(head, after))
+            return history.version
+        except Exception as e:
+            warning(f"FILE_OP: Could not record history for {os.path.basename(str(document_path))}: {e}",
+                    category="file_operations")
+            return None
+
+    def _append(self, document_path: str, history: _History, document: Dict[str, Any], document_json: str,
+                reason: str, turn: Optional[str], snapshot: bool = False, patch: Optional[List[list]] = None):
+        entry = {
+            "v": history.version + 1,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "turn": turn,
+            "seq": turn_sequence(turn),
+            "reason": reason
+        }
+        if snapshot:
+            entry["snapshot"] = document
+            # Slots are written in turn, so the next one holds the oldest history
+            slot = 0 if history.slot is None else (history.slot + 1) % self.ring_size
+            mode = "w"
+        else:
+            entry["patch"] = patch
+            slot = history.slot
+            mode = "a"
+        with open(self.history_path(document_path, slot), mode, encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+        history.version += 1
+        history.head_json = document_json
+        history.slot = slot
+        history.since_snapshot = 0 if snapshot else history.since_snapshot + 1
+        debug(f"FILE_OP: Recorded {os.path.basename(str(document_path))} v{history.version} "
+              f"({'snapshot' if snapshot else f'{len(patch)} ops'}, {reason})", category="file_operations")
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read_slot(self, history_path: str) -> List[Dict[str, Any]]:
+        entries = []
+        with open(history_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted write; earlier versions are intact
+                    warning(f"FILE_OP: Skipping unreadable history line in {history_path}", category="file_operations")
+        return entries
+
+    def _read_slots(self, document_path: str) -> List[tuple]:
+        """(slot, entries) of each usable ring slot, oldest history first"""
+        slots = []
+        for slot in range(self.ring_size):
+            history_path = self.history_path(document_path, slot)
+            if not os.path.exists(history_path):
+                continue
+            entries = self._read_slot(history_path)
+            # A slot whose snapshot was torn cannot be replayed
+            if entries and "snapshot" in entries[0]:
+                slots.append((slot, entries))
+        slots.sort(key=lambda item: item[1][0]["v"])
+        return slots
+
+    def _read_entries(self, document_path: str) -> List[Dict[str, Any]]:
+        return [entry for _, entries in self._read_slots(document_path) for entry in entries]
+
+    def _load_history(self, document_path: str) -> _History:
+        key = os.path.abspath(str(document_path))
+        history = self._histories.get(key)
+        if history is None:
+            history = _History()
+            slots = self._read_slots(document_path)
+            if slots:
+                history.slot, entries = slots[-1]
+                history.version = entries[-1]["v"]
+                history.since_snapshot = len(entries) - 1
+                history.head_json = canonical_json(self._replay(entries, 0, len(entries) - 1))
+            self._histories[key] = history
+        return history
+
+    def _replay(self, entries: List[Dict[str, Any]], start: int, end: int) -> Any:
+        document = entries[start]["snapshot"]
+        for entry in entries[start + 1:end + 1]:
+            document = entry["snapshot"] if "snapshot" in entry else apply_patch(document, entry["patch"])
+        return document
+
+    def versions(self, document_path: str) -> List[Dict[str, Any]]:
+        """Recorded versions of a document, oldest first (metadata only)"""
+        return [{
+            "version": entry["v"],
+            "timestamp": entry.get("ts"),
+            "turn": entry.get("turn"),
+            "reason": entry.get("reason"),
+            "kind": "snapshot" if "snapshot" in entry else "patch"
+        } for entry in self._read_entries(document_path)]
+
+    def latest_version(self, document_path: str) -> int:
+        """Number of the newest recorded version (0 if there is no history)"""
+        return self._load_history(document_path).version
+
+    def load(self, document_path: str, version: Optional[int] = None, turn: Optional[str] = None,
+             timestamp: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild a recorded version of a document
+
+        Args:
+            version: Version number (defaults to the newest)
+            turn: Turn label; the document as it was at the end of that turn, which is
+                the newest version recorded in or before it
+            timestamp: ISO timestamp; the newest version recorded at or before it
+
+        Returns:
+            The document, or None if no matching version is recorded
+        """
+        entries = self._read_entries(document_path)
+        if version is not None:
+            matches = [i for i, entry in enumerate(entries) if entry["v"] == version]
+        elif turn is not None:
+            sequence = turn_sequence(turn)
+            if sequence is None:
+                # A custom label has no order; only versions recorded in it match
+                matches = [i for i, entry in enumerate(entries) if entry.get("turn") == turn]
+            else:
+                # Entries are in recording order, so stop at the first one from a later turn
+                matches = []
+                for i, entry in enumerate(entries):
+                    entry_sequence = entry.get("seq") or turn_sequence(entry.get("turn"))
+                    if entry_sequence is not None and entry_sequence > sequence:
+                        break
+                    matches.append(i)
+        elif timestamp is not None:
+            matches = [i for i, entry in enumerate(entries) if (entry.get("ts") or "") <= timestamp]
+        else:
+            matches = list(range(len(entries)))
+        if not matches:
+            return None
+        target = matches[-1]
+        start = max((i for i in range(target + 1) if "snapshot" in entries[i]), default=None)
+        if start is None:
+            return None
+        return self._replay(entries, start, target)
+
+    def restore(self, document_path: str, version: Optional[int] = None, turn: Optional[str] = None,
+                timestamp: Optional[str] = None) -> bool:
+        """
+        Write a recorded version back to the document
+
+        The restore is recorded as a new version, so it can be undone too.
+        """
+        from utils.file_operations import safe_read_json, safe_write_json
+
+        target = self.load(document_path, version=version, turn=turn, timestamp=timestamp)
+        if target is None:
+            error(f"FAILURE: No recorded version of {document_path} matches "
+                  f"version={version}, turn={turn}, timestamp={timestamp}", category="file_operations")
+            return False
+        current = safe_read_json(document_path) if os.path.exists(document_path) else None
+        if not safe_write_json(document_path, target):
+            error(f"FAILURE: Could not write restored version of {document_path}", category="file_operations")
+            return False
+        label = f"v{version}" if version is not None else f"turn {turn}" if turn is not None else timestamp or "latest"
+        self.record(document_path, current, target, reason=f"restore {label}")
+        info(f"SUCCESS: Restored {os.path.basename(str(document_path))} to {label}", category="file_operations")
+        return True
+
+# Global instance
+version_store = VersionStore()
@@ -23,6 +23,7 @@ import json
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.generator_context import make_rng
 
 # Set script name for logging
 set_script_name("warfare_system")
@@ -377,7 +378,8 @@ class Artillery:
 class WarfareManager:
     """Manages large-scale warfare scenarios"""
     
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = make_rng(rng=rng)
         self.warbands = []
         self.structures = []
         self.artillery = []
@@ -452,15 +454,15 @@ class WarfareManager:
         """Roll damage from damage string (e.g., 'd8', '2d6')"""
         # Simplified damage rolling - in practice would parse dice notation
         if "d12" in damage_string:
-            return random.randint(1, 12)
+            return self.rng.randint(1, 12)
         elif "d8" in damage_string:
-            return random.randint(1, 8)
+            return self.rng.randint(1, 8)
         elif "d6" in damage_string:
-            return random.randint(1, 6)
+            return self.rng.randint(1, 6)
         elif "d4" in damage_string:
-            return random.randint(1, 4)
+            return self.rng.randint(1, 4)
         else:
-            return random.randint(1, 6)  # Default
+            return self.rng.randint(1, 6)  # Default
     
     def check_battle_end(self) -> Tuple[bool, str]:
         """Check if the battle has ended"""
@@ -493,9 +495,9 @@ def create_warband(warband_type: str, name: str = "") -> Warband:
     warband_type_enum = WarbandType(warband_type.lower())
     return Warband(warband_type_enum, name)
 
-def create_siege_scenario(defender_type: str = "castle") -> WarfareManager:
+def create_siege_scenario(defender_type: str = "castle", rng: Optional[random.Random] = None) -> WarfareManager:
     """Create a typical siege scenario"""
-    warfare = WarfareManager()
+    warfare = WarfareManager(rng)
     
     if defender_type == "castle":
         # Add defensive structures
@@ -64,7 +64,9 @@ install_debug_interceptor()
 import main as dm_main
 import utils.reset_campaign as reset_campaign
 from core.managers.status_manager import set_status_callback
+from core.ai.narration_stream import set_narration_callback
 from utils.enhanced_logger import debug, info, warning, error, set_script_name
+from utils.spell_index import spell_index
 
 # Set script name for logging
 set_script_name("web_interface")
@@ -93,6 +95,17 @@ def emit_status_update(status_message, is_processing):
 # Set the status callback
 set_status_callback(emit_status_update)
 
+# Narration stream callback function
+def emit_narration_stream(event, text):
+    """Emit the streamed DM narration draft; the settled narration goes out as normal game output"""
+    if event == 'final':
+        game_output_queue.put({'type': 'narration', 'content': text})
+    else:
+        socketio.emit('narration_stream', {'event': event, 'content': text})
+
+# Set the narration stream callback
+set_narration_callback(emit_narration_stream)
+
 class WebOutputCapture:
     """Captures output and routes it to appropriate queues"""
     def __init__(self, queue, original_stream, is_error=False):
@@ -381,13 +394,43 @@ def serve_icon(filename):
 
 @app.route('/spell-data')
 def get_spell_data():
-    """Serve spell repository data for tooltips"""
+    """Serve spell repository data for tooltips (ETag + gzip, indexed once)"""
+    compressed = 'gzip' in request.headers.get('Accept-Encoding', '')
+    body, etag = spell_index.payload(compressed=compressed)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if compressed:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/spell-data/search')
+def search_spell_data():
+    """Paginated, filtered spell lookup (?name=&class=&level=&school=&page=&per_page=)"""
     try:
-        with open('data/spell_repository.json', 'r') as f:
-            spell_data = json.load(f)
-        return jsonify(spell_data)
-    except FileNotFoundError:
-        return jsonify({})
+        level = request.args.get('level', type=int)
+        result = spell_index.query(
+            name=request.args.get('name'),
+            class_name=request.args.get('class'),
+            level=level,
+            school=request.args.get('school'),
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 25, type=int)
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/spell-data/<spell_name>')
+def get_single_spell(spell_name):
+    """Look up one spell by id or display name"""
+    spell = spell_index.get(spell_name)
+    if spell is None:
+        return jsonify({'error': f"Spell '{spell_name}' not found"}), 404
+    return jsonify(spell)
 
 @socketio.on('connect')
 def handle_connect():
@@ -857,6 +900,18 @@ def handle_request_storage_data():
         print(f"ERROR handling storage request: {e}")
         emit('error', {'message': 'An internal error occurred while fetching storage data.'})
 
+@socketio.on('request_usage_data')
+def handle_request_usage_data(data=None):
+    """Token usage and cost by subsystem, for this session or ({'all': true}) every session"""
+    debug("WEB_REQUEST: Received request for usage data from client", category="web_interface")
+    try:
+        from utils.usage_ledger import usage_ledger
+        all_sessions = bool(data and data.get('all'))
+        emit('usage_data_response', {'data': usage_ledger.report(all_sessions=all_sessions)})
+    except Exception as e:
+        print(f"ERROR handling usage request: {e}")
+        emit('usage_data_response', {'data': None, 'error': str(e)})
+
 @socketio.on('user_exit')
 def handle_user_exit():
     """Handle intentional user exit - log and clean up"""